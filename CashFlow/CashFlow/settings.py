@@ -123,6 +123,17 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Статические файлы с хешем содержимого в имени (после collectstatic)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'dds_app_api.staticfiles.CashFlowStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -152,7 +163,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    
+    'dds_app_api.profiling.ProfilerMiddleware',
+    'dds_app_api.slowlog.SlowQueryMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -176,4 +188,155 @@ REDOC_SETTINGS = {
 }
 
 CSRF_COOKIE_HTTPONLY = False
-CSRF_COOKIE_SECURE = False
\ No newline at end of file
+CSRF_COOKIE_SECURE = False
+
+# Каталог для сжатых NDJSON-сегментов архива транзакций
+CASHFLOW_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Кэш отчетов и справочников. При запуске нескольких процессов
+# следует указать общий бэкенд (Redis, Memcached), чтобы версии данных
+# и закэшированные отчеты были согласованы между процессами.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cashflow',
+    }
+}
+
+# Время жизни закэшированных отчетов (секунды)
+CASHFLOW_REPORT_CACHE_TIMEOUT = 600
+
+# Месяц начала финансового года (1 - январь)
+CASHFLOW_FISCAL_YEAR_START_MONTH = 1
+
+# Режим админки транзакций для больших таблиц: оценка количества строк,
+# фильтры с автодополнением и кэшированный список месяцев
+CASHFLOW_SCALABLE_ADMIN = True
+
+# Предел точного подсчета строк для отфильтрованных списков
+CASHFLOW_COUNT_LIMIT = 10000
+
+# Время жизни кэша списка месяцев в админке (секунды)
+CASHFLOW_ADMIN_DATE_CACHE_TIMEOUT = 3600
+
+# Количество объектов каждой модели в ответе API синхронизации
+CASHFLOW_SYNC_PAGE_SIZE = 500
+CASHFLOW_SYNC_MAX_PAGE_SIZE = 5000
+# Запас времени на фиксацию транзакций БД (секунды): курсор синхронизации
+# не продвигается по изменениям новее этого запаса, они передаются повторно
+CASHFLOW_SYNC_SAFETY_WINDOW = 5
+
+# Максимальное количество подзапросов в /api/batch/
+CASHFLOW_BATCH_MAX_REQUESTS = 20
+
+# Статические файлы, для которых collectstatic создает минифицированную
+# хешированную копию (при установленном rjsmin) и сжатые варианты .gz/.br
+# (.br - при установленном brotli)
+CASHFLOW_STATIC_OPTIMIZE = [
+    'js/app.js',
+    'js/transactions.js',
+    'js/forms.js',
+    'js/references.js',
+]
+CASHFLOW_STATIC_MINIFY = True
+CASHFLOW_STATIC_COMPRESS = True
+
+# Раздача статических файлов приложением (с заголовками immutable для
+# хешированных имен). Отключите, если статику отдает веб-сервер.
+CASHFLOW_SERVE_STATIC = True
+
+# Каталог входных файлов и результатов фоновых задач
+CASHFLOW_JOB_DIR = BASE_DIR / 'jobs'
+# Интервал опроса очереди задач обработчиками run_jobs (секунды)
+CASHFLOW_JOB_POLL_INTERVAL = 2
+# Аренда выполняемой задачи (секунды): обработчик продлевает ее, пока задача
+# выполняется; задача с истекшей арендой (обработчик завершился аварийно)
+# возвращается в очередь, а после CASHFLOW_JOB_MAX_ATTEMPTS захватов - завершается ошибкой
+CASHFLOW_JOB_LEASE_TIMEOUT = 300
+CASHFLOW_JOB_MAX_ATTEMPTS = 3
+# Имя хоста для запросов к API, выполняемых задачами отчетов
+CASHFLOW_JOB_HOST = 'localhost'
+
+# Параллельное построение сводных отчетов: количество процессов
+# (None - по числу ядер) и минимальное количество периодов в диапазоне,
+# начиная с которого отчет делится на шарды
+CASHFLOW_REPORT_WORKERS = None
+CASHFLOW_REPORT_SHARD_MIN_PERIODS = 24
+
+# Количество наборов массивов аналитики (по фильтрам), хранимых в памяти процесса
+CASHFLOW_ANALYTICS_CACHE_SIZE = 8
+
+# Колоночный снимок транзакций для аналитики (команда snapshot_transactions):
+# каталог файлов, чтение аналитики из снимка и допустимая доля устаревших
+# строк до перестроения
+CASHFLOW_SNAPSHOT_DIR = BASE_DIR / 'snapshot'
+CASHFLOW_ANALYTICS_SNAPSHOT = True
+CASHFLOW_SNAPSHOT_MAX_DEAD_RATIO = 0.25
+
+# Максимальный горизонт прогноза денежного потока (периодов)
+CASHFLOW_FORECAST_MAX_HORIZON = 24
+
+# Поиск аномальных сумм: порог модифицированной z-оценки, минимальное
+# количество транзакций подкатегории и время жизни статистик в кэше (секунды)
+CASHFLOW_ANOMALY_THRESHOLD = 3.5
+CASHFLOW_ANOMALY_MIN_SAMPLES = 5
+CASHFLOW_ANOMALY_STATS_TIMEOUT = 7 * 24 * 60 * 60
+
+# Измерения, в разрезе которых дополнительно ведутся остатки на конец месяца
+# (status, category); после изменения выполните rebuild_balance_checkpoints
+CASHFLOW_BALANCE_DIMENSIONS = []
+
+# Максимальное количество строк в запросе transactions/upsert/
+# (большие файлы загружаются задачей upsert)
+CASHFLOW_UPSERT_MAX_ROWS = 5000
+
+# Отклонять создание и импорт транзакций, совпадающих с существующими
+# по дате, сумме, подкатегории и комментарию
+CASHFLOW_REJECT_DUPLICATES = False
+
+# Допуски сверки выписки по умолчанию: расхождение дат (дни) и сумм
+CASHFLOW_RECONCILE_DATE_TOLERANCE = 3
+CASHFLOW_RECONCILE_AMOUNT_TOLERANCE = '0.00'
+
+# Журнал медленных SQL-запросов: порог времени выполнения (мс, None -
+# журнал отключен), файл журнала, его максимальный размер (байты)
+# и количество ротированных файлов. Сводка - команда slow_queries.
+CASHFLOW_SLOW_QUERY_THRESHOLD_MS = 200
+CASHFLOW_SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+CASHFLOW_SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+CASHFLOW_SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {
+            'format': '%(message)s',
+        },
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': CASHFLOW_SLOW_QUERY_LOG,
+            'maxBytes': CASHFLOW_SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': CASHFLOW_SLOW_QUERY_LOG_BACKUP_COUNT,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        'dds_app_api.slowlog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Профилирование запросов сотрудников по заголовку X-Profile или параметру
+# profile: каталог файлов профилей, количество хранимых профилей (None -
+# без ограничения) и количество функций в текстовой сводке
+CASHFLOW_PROFILE_DIR = BASE_DIR / 'profiles'
+CASHFLOW_PROFILE_KEEP = 200
+CASHFLOW_PROFILE_SUMMARY_SIZE = 40
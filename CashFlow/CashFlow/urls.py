@@ -14,12 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from dds_app_api import views_frontend
+from dds_app_api import staticfiles, views_frontend
 
 
 # Схема OpenAPI для Swagger-документации
@@ -52,3 +53,8 @@ urlpatterns = [
     path('transaction/', views_frontend.TransactionFormView.as_view(), name='transaction-form-new'),
     path('references/', views_frontend.ReferencesView.as_view(), name='references'),
 ]
+
+if getattr(settings, 'CASHFLOW_SERVE_STATIC', False):
+    urlpatterns.append(
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), staticfiles.serve)
+    )
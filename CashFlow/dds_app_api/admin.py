@@ -1,11 +1,32 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
-from .models import Status, TransactionType, Category, Subcategory, Transaction
+from django.contrib.admin.widgets import AutocompleteSelect
+
+from . import categorize, recurring
+from .admin_filters import AutocompleteFilter, CachedMonthFilter
+from .pagination import TransactionCountPaginator
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    ArchiveSegment,
+    Job,
+    Anomaly,
+    Budget,
+    RecurringTransaction,
+    CategorizationRule,
+    RequestProfile
+)
 
 
 class StatusAdmin(admin.ModelAdmin):
     """Админка для модели Status"""
     list_display = ('name', 'description')
     search_fields = ('name', 'description')
+    ordering = ('name',)
     list_per_page = 20
 
 
@@ -13,6 +34,7 @@ class TransactionTypeAdmin(admin.ModelAdmin):
     """Админка для модели TransactionType"""
     list_display = ('name', 'description')
     search_fields = ('name', 'description')
+    ordering = ('name',)
     list_per_page = 20
 
 
@@ -21,6 +43,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'transaction_type', 'description')
     list_filter = ('transaction_type',)
     search_fields = ('name', 'description', 'transaction_type__name')
+    ordering = ('name',)
     list_per_page = 20
     
     def get_queryset(self, request):
@@ -32,6 +55,7 @@ class SubcategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'transaction_type', 'description')
     list_filter = ('category__transaction_type', 'category')
     search_fields = ('name', 'description', 'category__name')
+    ordering = ('name',)
     list_per_page = 20
     
     def transaction_type(self, obj):
@@ -64,7 +88,8 @@ class TransactionAdmin(admin.ModelAdmin):
         'comment',
         'category__name',
         'subcategory__name',
-        'status__name'
+        'status__name',
+        '=external_id'
     )
     readonly_fields = ('created_date',)
     date_hierarchy = 'transaction_date'
@@ -84,6 +109,7 @@ class TransactionAdmin(admin.ModelAdmin):
         ('Дополнительная информация', {
             'fields': (
                 'comment',
+                'external_id',
                 'created_date'
             )
         }),
@@ -91,13 +117,230 @@ class TransactionAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
-            'status', 'transaction_type', 'category', 'subcategory'
+            'status',
+            'transaction_type',
+            'category__transaction_type',
+            'subcategory__category__transaction_type'
         )
 
 
+class ScalableTransactionAdmin(TransactionAdmin):
+    """
+    Админка для модели Transaction, рассчитанная на большие таблицы.
+
+    Не выполняет точный COUNT(*) по всей таблице, фильтрует категории и
+    подкатегории через автодополнение вместо полного списка значений и
+    заменяет date_hierarchy фильтром по месяцам из кэша.
+    """
+    paginator = TransactionCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    date_hierarchy = None
+    list_filter = (
+        'status',
+        'transaction_type',
+        ('category', AutocompleteFilter),
+        ('subcategory', AutocompleteFilter),
+        CachedMonthFilter,
+        'transaction_date'
+    )
+    autocomplete_fields = (
+        'status',
+        'transaction_type',
+        'category',
+        'subcategory'
+    )
+
+    @property
+    def media(self):
+        field = self.model._meta.get_field('category')
+        return super().media + AutocompleteSelect(field, self.admin_site).media
+
+
+class ArchiveSegmentAdmin(admin.ModelAdmin):
+    """Админка для модели ArchiveSegment (только просмотр)"""
+    list_display = (
+        'created_date',
+        'storage',
+        'cutoff',
+        'date_from',
+        'date_to',
+        'row_count',
+        'total_amount'
+    )
+    list_filter = ('storage',)
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class JobAdmin(admin.ModelAdmin):
+    """Админка для модели Job (только просмотр)"""
+    list_display = (
+        'id',
+        'kind',
+        'status',
+        'progress',
+        'message',
+        'worker',
+        'created_date',
+        'finished_at'
+    )
+    list_filter = ('kind', 'status')
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class AnomalyAdmin(admin.ModelAdmin):
+    """Админка для модели Anomaly (только просмотр)"""
+    list_display = ('transaction', 'score', 'expected', 'detected_at')
+    list_select_related = ('transaction__subcategory',)
+    raw_id_fields = ('transaction',)
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class BudgetAdmin(admin.ModelAdmin):
+    """Админка для модели Budget"""
+    list_display = ('month', 'category', 'subcategory', 'amount')
+    list_filter = ('month', 'category')
+    search_fields = ('category__name', 'subcategory__name')
+    ordering = ('-month',)
+    list_per_page = 20
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'category__transaction_type', 'subcategory__category__transaction_type'
+        )
+
+
+class RecurringTransactionForm(forms.ModelForm):
+    """Форма шаблона регулярной операции с проверкой расписания"""
+
+    class Meta:
+        model = RecurringTransaction
+        fields = '__all__'
+
+    def clean_schedule(self):
+        value = self.cleaned_data['schedule']
+        try:
+            recurring.Schedule(value)
+        except ValueError as error:
+            raise forms.ValidationError(str(error))
+        return ' '.join(value.split())
+
+
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    """Админка для модели RecurringTransaction"""
+    form = RecurringTransactionForm
+    list_display = (
+        'name',
+        'schedule',
+        'amount',
+        'category',
+        'subcategory',
+        'start_date',
+        'end_date',
+        'materialized_until',
+        'is_active'
+    )
+    list_filter = ('is_active', 'transaction_type', 'category')
+    search_fields = ('name', 'comment')
+    readonly_fields = ('materialized_until',)
+    ordering = ('name',)
+    list_per_page = 20
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'category__transaction_type', 'subcategory__category__transaction_type'
+        )
+
+
+class CategorizationRuleForm(forms.ModelForm):
+    """Форма правила категоризации с проверкой шаблона"""
+
+    class Meta:
+        model = CategorizationRule
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if 'pattern' in cleaned_data:
+            try:
+                categorize.validate_pattern(
+                    cleaned_data.get('kind'), cleaned_data['pattern']
+                )
+            except ValueError as error:
+                self.add_error('pattern', str(error))
+        return cleaned_data
+
+
+class CategorizationRuleAdmin(admin.ModelAdmin):
+    """Админка для модели CategorizationRule"""
+    form = CategorizationRuleForm
+    list_display = ('name', 'kind', 'pattern', 'subcategory', 'priority', 'is_active')
+    list_filter = ('is_active', 'kind')
+    search_fields = ('name', 'pattern')
+    ordering = ('priority', 'id')
+    list_per_page = 20
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('subcategory')
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Админка для модели RequestProfile (только просмотр)"""
+    list_display = (
+        'created_date',
+        'method',
+        'path',
+        'view',
+        'action',
+        'status_code',
+        'duration_ms',
+        'query_count',
+        'user'
+    )
+    list_filter = ('method', 'view')
+    search_fields = ('path',)
+    list_select_related = ('user',)
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Регистрация моделей в админке
 admin.site.register(Status, StatusAdmin)
 admin.site.register(TransactionType, TransactionTypeAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Subcategory, SubcategoryAdmin)
-admin.site.register(Transaction, TransactionAdmin)
\ No newline at end of file
+admin.site.register(
+    Transaction,
+    ScalableTransactionAdmin
+    if getattr(settings, 'CASHFLOW_SCALABLE_ADMIN', False)
+    else TransactionAdmin
+)
+admin.site.register(ArchiveSegment, ArchiveSegmentAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(Anomaly, AnomalyAdmin)
+admin.site.register(Budget, BudgetAdmin)
+admin.site.register(RecurringTransaction, RecurringTransactionAdmin)
+admin.site.register(CategorizationRule, CategorizationRuleAdmin)
+admin.site.register(RequestProfile, RequestProfileAdmin)
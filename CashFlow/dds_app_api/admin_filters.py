@@ -0,0 +1,156 @@
+"""
+Фильтры списка в админке, не загружающие полные справочники и даты.
+"""
+from datetime import date
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+
+from . import caching
+
+
+MONTHS_CACHE_KEY = 'dds:admin:months:{model}:{field}:{version}'
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Фильтр по внешнему ключу с полем автодополнения вместо списка значений.
+
+    Вместо вывода всех объектов связанной модели отображает виджет select2,
+    который подгружает варианты через autocomplete-представление админки.
+    Связанная модель должна быть зарегистрирована с search_fields.
+
+    Attributes:
+        template (str): Шаблон фильтра.
+        lookup_kwarg (str): Имя GET-параметра фильтра.
+        lookup_val (str | None): Выбранное значение.
+        widget_html (str): HTML виджета автодополнения.
+    """
+
+    template = 'admin/dds_app_api/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+        form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site)
+        )
+        self.widget_html = form_field.widget.render(
+            self.lookup_kwarg,
+            self.lookup_val,
+            attrs={'id': f'autocomplete-filter-{field_path}'}
+        )
+
+    def expected_parameters(self):
+        """
+        Возвращает список GET-параметров фильтра.
+
+        Returns:
+            list: Имена параметров.
+        """
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        """
+        Возвращает только вариант сброса фильтра.
+
+        Args:
+            changelist (ChangeList): Текущий список изменений.
+
+        Yields:
+            dict: Вариант "Все" со ссылкой без параметра фильтра.
+        """
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.lookup_kwarg, 'p']
+            ),
+            'display': 'Все',
+        }
+
+
+class CachedMonthFilter(admin.SimpleListFilter):
+    """
+    Фильтр по месяцу операции со списком месяцев из кэша.
+
+    Заменяет date_hierarchy, которая на каждое открытие списка выполняет
+    запросы DISTINCT по датам. Список месяцев кэшируется на время из
+    настройки CASHFLOW_ADMIN_DATE_CACHE_TIMEOUT; ключ кэша содержит версию
+    данных, поэтому список обновляется после записи транзакций.
+
+    Attributes:
+        title (str): Заголовок фильтра.
+        parameter_name (str): Имя GET-параметра (значение вида YYYY-MM).
+        date_field (str): Поле даты модели.
+        data_scope (str): Область данных, версия которой входит в ключ кэша.
+    """
+
+    title = 'месяцу операции'
+    parameter_name = 'month'
+    date_field = 'transaction_date'
+    data_scope = caching.TRANSACTIONS
+
+    def lookups(self, request, model_admin):
+        """
+        Возвращает месяцы, в которых есть операции.
+
+        Args:
+            request (HttpRequest): Объект HTTP-запроса.
+            model_admin (ModelAdmin): Админка модели.
+
+        Returns:
+            list: Пары (значение, подпись) от новых месяцев к старым.
+        """
+        model = model_admin.model
+        key = MONTHS_CACHE_KEY.format(
+            model=model._meta.label_lower,
+            field=self.date_field,
+            version=caching.get_data_version(self.data_scope)
+        )
+        months = cache.get(key)
+        if months is None:
+            months = [
+                month.strftime('%Y-%m')
+                for month in model._default_manager.dates(
+                    self.date_field, 'month', order='DESC'
+                )
+            ]
+            cache.set(
+                key,
+                months,
+                getattr(settings, 'CASHFLOW_ADMIN_DATE_CACHE_TIMEOUT', 3600)
+            )
+        return [(month, month) for month in months]
+
+    def queryset(self, request, queryset):
+        """
+        Ограничивает выборку выбранным месяцем.
+
+        Args:
+            request (HttpRequest): Объект HTTP-запроса.
+            queryset (QuerySet): Исходная выборка.
+
+        Returns:
+            QuerySet: Выборка операций за месяц или исходная выборка.
+        """
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            year, month = (int(part) for part in value.split('-'))
+            start = date(year, month, 1)
+        except ValueError:
+            return queryset
+        end = date(year + month // 12, month % 12 + 1, 1)
+        return queryset.filter(**{
+            f'{self.date_field}__gte': start,
+            f'{self.date_field}__lt': end,
+        })
@@ -0,0 +1,384 @@
+"""
+Колоночная аналитика транзакций на NumPy.
+
+Отфильтрованные транзакции загружаются в непрерывные массивы (дата, сумма
+в копейках, ID типа, статуса, категории и подкатегории), над которыми
+группировки, процентили и скользящие средние считаются векторными
+операциями. Если создан колоночный снимок (snapshot.py), массивы берутся
+из отображенных в память файлов снимка без загрузки из БД. Иначе загруженные
+массивы хранятся в памяти процесса с версией данных транзакций в ключе,
+поэтому повторные запросы за тот же период с другой группировкой или окном
+не обращаются к БД.
+
+Суммы хранятся целыми копейками (int64), поэтому итоги по группам точные.
+"""
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+
+from . import archive, caching, snapshot, transfer
+from .filters import TransactionFilter
+from .models import Status, TransactionType, Category, Subcategory, Transaction
+
+
+# Измерения группировки по ID: поле массива -> модель справочника
+GROUP_FIELDS = {
+    'transaction_type': TransactionType,
+    'status': Status,
+    'category': Category,
+    'subcategory': Subcategory,
+}
+
+# Группировки по календарным периодам: измерение -> единица datetime64
+GROUP_PERIODS = {
+    'month': 'M',
+    'year': 'Y',
+}
+
+# Параметры, определяющие набор загружаемых транзакций
+FILTER_PARAMS = tuple(TransactionFilter.base_filters)
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def get_frame_cache_size():
+    """
+    Возвращает количество наборов массивов, хранимых в памяти процесса.
+
+    Returns:
+        int: Значение настройки CASHFLOW_ANALYTICS_CACHE_SIZE.
+    """
+    return getattr(settings, 'CASHFLOW_ANALYTICS_CACHE_SIZE', 8)
+
+
+def use_snapshot():
+    """
+    Проверяет, включено ли чтение аналитики из колоночного снимка.
+
+    Returns:
+        bool: Значение настройки CASHFLOW_ANALYTICS_SNAPSHOT.
+    """
+    return getattr(settings, 'CASHFLOW_ANALYTICS_SNAPSHOT', True)
+
+
+class TransactionFrame:
+    """
+    Транзакции в колоночном представлении.
+
+    Attributes:
+        ids (ndarray): ID транзакций (int64).
+        days (ndarray): Даты транзакций (datetime64[D]).
+        amounts (ndarray): Суммы в копейках (int64).
+        transaction_type (ndarray): ID типов операций (int64).
+        status (ndarray): ID статусов (int64).
+        category (ndarray): ID категорий (int64).
+        subcategory (ndarray): ID подкатегорий (int64).
+    """
+
+    COLUMNS = ('transaction_type', 'status', 'category', 'subcategory')
+
+    def __init__(self, ids, days, amounts, **columns):
+        self.ids = ids
+        self.days = days
+        self.amounts = amounts
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @classmethod
+    def from_querysets(cls, querysets):
+        """
+        Загружает транзакции из выборок в массивы.
+
+        Args:
+            querysets (list): Выборки Transaction или ArchivedTransaction.
+
+        Returns:
+            TransactionFrame: Загруженные массивы.
+        """
+        fields = ('id', 'transaction_date', 'amount') + tuple(
+            f'{name}_id' for name in cls.COLUMNS
+        )
+        rows = [
+            row
+            for queryset in querysets
+            for row in queryset.order_by().values_list(*fields).iterator(chunk_size=5000)
+        ]
+        count = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(fields)
+
+        ids = np.fromiter(columns[0], dtype=np.int64, count=count)
+        days = np.array(columns[1], dtype='datetime64[D]')
+        amounts = np.fromiter(
+            (int(amount.scaleb(2)) for amount in columns[2]),
+            dtype=np.int64, count=count
+        )
+        references = {
+            name: np.fromiter(values, dtype=np.int64, count=count)
+            for name, values in zip(cls.COLUMNS, columns[3:])
+        }
+        return cls(ids, days, amounts, **references)
+
+    def group_keys(self, by):
+        """
+        Возвращает ключи группировки для каждой транзакции.
+
+        Args:
+            by (str): Измерение (ключ GROUP_FIELDS или GROUP_PERIODS).
+
+        Returns:
+            ndarray: Ключи группировки.
+        """
+        if by in GROUP_PERIODS:
+            return self.days.astype(f'datetime64[{GROUP_PERIODS[by]}]')
+        return getattr(self, by)
+
+
+def frame_from_snapshot(current, filters):
+    """
+    Отбирает транзакции из снимка векторными условиями TransactionFilter.
+
+    Без фильтров и мертвых строк массивы снимка используются без копирования.
+
+    Args:
+        current (Snapshot): Снимок, отображенный в память.
+        filters (dict): Параметры TransactionFilter (кроме search).
+
+    Returns:
+        TransactionFrame: Массивы отфильтрованных транзакций.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    filterset = TransactionFilter(filters, queryset=Transaction.objects.none())
+    if not filterset.is_valid():
+        raise ValueError(dict(filterset.errors))
+    data = filterset.form.cleaned_data
+    columns = current.columns
+
+    conditions = []
+    if current.live_count != current.count:
+        conditions.append(current.live == 1)
+    if data.get('date_from'):
+        conditions.append(columns['days'] >= np.datetime64(data['date_from'], 'D'))
+    if data.get('date_to'):
+        conditions.append(columns['days'] <= np.datetime64(data['date_to'], 'D'))
+    for name in TransactionFrame.COLUMNS:
+        if data.get(name) is not None:
+            conditions.append(columns[name] == int(data[name]))
+    if data.get('amount_min') is not None:
+        conditions.append(columns['amounts'] >= float(data['amount_min'].scaleb(2)))
+    if data.get('amount_max') is not None:
+        conditions.append(columns['amounts'] <= float(data['amount_max'].scaleb(2)))
+
+    names = ('days', 'amounts') + TransactionFrame.COLUMNS
+    if not conditions:
+        return TransactionFrame(
+            columns['id'], **{name: columns[name] for name in names}
+        )
+    mask = np.logical_and.reduce(conditions)
+    return TransactionFrame(
+        columns['id'][mask], **{name: columns[name][mask] for name in names}
+    )
+
+
+def load_frame(params):
+    """
+    Возвращает массивы транзакций для параметров фильтра.
+
+    Если снимок создан, а фильтры не требуют поиска по тексту и архива,
+    массивы берутся из снимка; иначе транзакции загружаются из БД.
+
+    Args:
+        params (QueryDict | dict): Параметры запроса; учитываются только
+            параметры TransactionFilter.
+
+    Returns:
+        TransactionFrame: Массивы отфильтрованных транзакций (из основной
+        и архивной таблиц; NDJSON-сегменты архива не загружаются).
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    filters = {name: params.get(name) for name in FILTER_PARAMS if params.get(name)}
+    if use_snapshot() and 'search' not in filters and not archive.reaches_archive(filters):
+        current = snapshot.get_snapshot()
+        if current is not None:
+            return frame_from_snapshot(current, filters)
+
+    key = caching.make_cache_key('analytics-frame', filters, scopes=(caching.TRANSACTIONS,))
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is not None:
+            _frames.move_to_end(key)
+            return frame
+
+    frame = TransactionFrame.from_querysets(transfer.filter_transactions(filters))
+    with _frames_lock:
+        _frames[key] = frame
+        while len(_frames) > get_frame_cache_size():
+            _frames.popitem(last=False)
+    return frame
+
+
+def to_money(minor_units):
+    """
+    Переводит сумму в копейках в Decimal с двумя знаками.
+
+    Args:
+        minor_units (int): Сумма в копейках.
+
+    Returns:
+        Decimal: Сумма в рублях.
+    """
+    return Decimal(int(minor_units)).scaleb(-2)
+
+
+def group_stats(frame, by, percentiles=(50, 90)):
+    """
+    Считает количество, сумму, среднее и процентили сумм по группам.
+
+    Args:
+        frame (TransactionFrame): Массивы транзакций.
+        by (str): Измерение группировки.
+        percentiles (tuple): Процентили сумм (от 0 до 100).
+
+    Returns:
+        list: Группы в порядке ключей с полями key, count, total, average
+        и percentiles.
+    """
+    if not len(frame):
+        return []
+
+    keys = frame.group_keys(by)
+    # Сортировка по ключу и сумме: группы - непрерывные отрезки,
+    # внутри которых суммы упорядочены для процентилей
+    order = np.lexsort((frame.amounts, keys))
+    sorted_keys = keys[order]
+    sorted_amounts = frame.amounts[order]
+    unique_keys, starts, counts = np.unique(
+        sorted_keys, return_index=True, return_counts=True
+    )
+    totals = np.add.reduceat(sorted_amounts, starts)
+
+    groups = []
+    for key, start, count, total in zip(unique_keys, starts, counts, totals):
+        values = sorted_amounts[start:start + count]
+        points = np.percentile(values, percentiles) if percentiles else []
+        groups.append({
+            'key': key,
+            'count': int(count),
+            'total': to_money(total),
+            'average': round(float(total) / count / 100, 2),
+            'percentiles': {
+                f'{q:g}': round(float(point) / 100, 2)
+                for q, point in zip(percentiles, points)
+            },
+        })
+    return groups
+
+
+def daily_series(frame):
+    """
+    Строит ряд дневных сумм без пропусков дат.
+
+    Args:
+        frame (TransactionFrame): Массивы транзакций.
+
+    Returns:
+        tuple: Первая дата ряда (datetime64[D] или None) и массив сумм в копейках.
+    """
+    if not len(frame):
+        return None, np.zeros(0, dtype=np.int64)
+    start = frame.days.min()
+    offsets = (frame.days - start).astype(np.int64)
+    series = np.zeros(int(offsets.max()) + 1, dtype=np.int64)
+    np.add.at(series, offsets, frame.amounts)
+    return start, series
+
+
+def moving_average(series, window):
+    """
+    Считает скользящее среднее ряда через накопленные суммы.
+
+    Args:
+        series (ndarray): Ряд значений.
+        window (int): Ширина окна.
+
+    Returns:
+        ndarray: Средние для окон, заканчивающихся на каждом элементе начиная
+        с window-1 (длина len(series) - window + 1).
+    """
+    if window < 1 or len(series) < window:
+        return np.zeros(0)
+    cumulative = np.concatenate(([0], np.cumsum(series, dtype=np.int64)))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def _group_names(by, keys):
+    """
+    Возвращает названия групп.
+
+    Args:
+        by (str): Измерение группировки.
+        keys (list): Ключи групп.
+
+    Returns:
+        dict: Ключ группы -> название.
+    """
+    if by in GROUP_PERIODS:
+        return {key: str(key) for key in keys}
+    model = GROUP_FIELDS[by]
+    return dict(
+        model.objects.filter(id__in=[int(key) for key in keys]).values_list('id', 'name')
+    )
+
+
+def build_analytics(params, by='category', percentiles=(50, 90), window=7):
+    """
+    Строит аналитический отчет по отфильтрованным транзакциям.
+
+    Args:
+        params (QueryDict | dict): Параметры TransactionFilter.
+        by (str): Измерение группировки.
+        percentiles (tuple): Процентили сумм.
+        window (int): Окно скользящего среднего дневных сумм (дни).
+
+    Returns:
+        dict: Итоги, группы и ряд дневных сумм со скользящим средним.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    frame = load_frame(params)
+    groups = group_stats(frame, by, percentiles)
+    names = _group_names(by, [group['key'] for group in groups])
+    for group in groups:
+        key = group.pop('key')
+        group['id'] = str(key) if by in GROUP_PERIODS else int(key)
+        group['name'] = names.get(int(key) if by in GROUP_FIELDS else key)
+
+    start, series = daily_series(frame)
+    averages = moving_average(series, window)
+    padding = [None] * (len(series) - len(averages))
+    return {
+        'group_by': by,
+        'count': len(frame),
+        'total': to_money(frame.amounts.sum()),
+        'groups': [
+            {'id': group.pop('id'), 'name': group.pop('name'), **group}
+            for group in groups
+        ],
+        'series': {
+            'start': str(start) if start is not None else None,
+            'window': window,
+            'totals': [to_money(value) for value in series],
+            'moving_average': padding + [round(value / 100, 2) for value in averages.tolist()],
+        },
+    }
@@ -0,0 +1,249 @@
+"""
+Поиск аномальных сумм транзакций по подкатегориям.
+
+Для каждой подкатегории вычисляются устойчивые статистики логарифма суммы:
+медиана и медианное абсолютное отклонение (MAD). Сумма считается аномальной,
+если ее модифицированная z-оценка 0.6745 * (log x - медиана) / MAD по модулю
+больше порога. Логарифмическая шкала делает оценку одинаковой для лишнего
+нуля в малой и в большой сумме.
+
+Полная проверка строит статистики всех подкатегорий одним векторным проходом
+по массивам аналитики (сортировка по подкатегории и значению) и сохраняет
+их в кэш по ключу на подкатегорию. Новые транзакции проверяются по
+закэшированной статистике своей подкатегории без обращения к БД; запись
+в БД выполняется только для найденной аномалии.
+"""
+import math
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+from . import analytics
+from .models import Anomaly
+
+
+STATS_CACHE_KEY = 'dds:anomaly:stats:{subcategory}'
+
+# Коэффициент модифицированной z-оценки (Iglewicz, Hoaglin)
+Z_FACTOR = 0.6745
+
+
+def get_threshold():
+    """
+    Возвращает порог модифицированной z-оценки.
+
+    Returns:
+        float: Значение настройки CASHFLOW_ANOMALY_THRESHOLD.
+    """
+    return getattr(settings, 'CASHFLOW_ANOMALY_THRESHOLD', 3.5)
+
+
+def get_min_samples():
+    """
+    Возвращает минимальное количество транзакций подкатегории для проверки.
+
+    Returns:
+        int: Значение настройки CASHFLOW_ANOMALY_MIN_SAMPLES.
+    """
+    return getattr(settings, 'CASHFLOW_ANOMALY_MIN_SAMPLES', 5)
+
+
+def get_stats_timeout():
+    """
+    Возвращает время жизни закэшированных статистик.
+
+    Returns:
+        int | None: Значение настройки CASHFLOW_ANOMALY_STATS_TIMEOUT (секунды).
+    """
+    return getattr(settings, 'CASHFLOW_ANOMALY_STATS_TIMEOUT', 7 * 24 * 60 * 60)
+
+
+def _group_medians(groups, values):
+    """
+    Векторно вычисляет медианы значений по группам.
+
+    Args:
+        groups (ndarray): Ключи групп.
+        values (ndarray): Значения.
+
+    Returns:
+        tuple: Ключи групп, количества и медианы.
+    """
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    keys, starts, counts = np.unique(
+        sorted_groups, return_index=True, return_counts=True
+    )
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    return keys, counts, (lower + upper) / 2
+
+
+def _stats_arrays(frame):
+    """
+    Вычисляет статистики подкатегорий и их позиции для каждой транзакции.
+
+    Args:
+        frame (TransactionFrame): Массивы транзакций (непустые).
+
+    Returns:
+        tuple: Логарифмы сумм, ID подкатегорий, количества, медианы, MAD
+        и индекс подкатегории каждой транзакции в этих массивах.
+    """
+    values = np.log(np.maximum(frame.amounts, 1))
+    keys, counts, medians = _group_medians(frame.subcategory, values)
+    # Ключи групп отсортированы, поэтому позиция транзакции - searchsorted
+    positions = np.searchsorted(keys, frame.subcategory)
+    _, _, mads = _group_medians(frame.subcategory, np.abs(values - medians[positions]))
+    return values, keys, counts, medians, mads, positions
+
+
+def score_values(values, stats):
+    """
+    Вычисляет модифицированные z-оценки логарифмов сумм.
+
+    Args:
+        values (ndarray | float): Логарифмы сумм в копейках.
+        stats (tuple): Медиана, MAD и количество транзакций подкатегории.
+
+    Returns:
+        ndarray | float | None: Оценки или None, если статистика непригодна
+        (мало транзакций или нулевой разброс).
+    """
+    median, mad, count = stats
+    if count < get_min_samples() or mad <= 0:
+        return None
+    return Z_FACTOR * (values - median) / mad
+
+
+def expected_amount(median):
+    """
+    Возвращает типичную сумму подкатегории.
+
+    Args:
+        median (float): Медиана логарифма суммы в копейках.
+
+    Returns:
+        Decimal: Сумма, соответствующая медиане.
+    """
+    return Decimal(round(math.exp(median))).scaleb(-2)
+
+
+def store_stats(stats):
+    """
+    Сохраняет статистики подкатегорий в кэш.
+
+    Args:
+        stats (dict): ID подкатегории -> статистика.
+    """
+    cache.set_many(
+        {STATS_CACHE_KEY.format(subcategory=key): value for key, value in stats.items()},
+        get_stats_timeout()
+    )
+
+
+def scan():
+    """
+    Проверяет все транзакции основной таблицы и сохраняет найденные аномалии.
+
+    Статистики подкатегорий пересчитываются и сохраняются в кэш для проверки
+    новых транзакций, прежние записи об аномалиях заменяются.
+
+    Returns:
+        dict: Количество проверенных транзакций, подкатегорий и аномалий.
+    """
+    frame = analytics.load_frame({})
+    if not len(frame):
+        Anomaly.objects.all().delete()
+        return {'checked': 0, 'subcategories': 0, 'anomalies': 0}
+
+    values, keys, counts, medians, mads, positions = _stats_arrays(frame)
+    store_stats({
+        int(key): (float(median), float(mad), int(count))
+        for key, median, mad, count in zip(keys, medians, mads, counts)
+    })
+
+    # Оценки всех транзакций одним векторным выражением; подкатегории
+    # с малым количеством транзакций или нулевым разбросом не проверяются
+    usable = (counts >= get_min_samples()) & (mads > 0)
+    row_mads = np.where(usable, mads, 1)[positions]
+    scores = Z_FACTOR * (values - medians[positions]) / row_mads
+    flagged = np.flatnonzero(usable[positions] & (np.abs(scores) > get_threshold()))
+
+    expected = [expected_amount(median) for median in medians.tolist()]
+    anomalies = [
+        Anomaly(
+            transaction_id=transaction_id,
+            score=round(score, 2),
+            expected=expected[position]
+        )
+        for transaction_id, score, position in zip(
+            frame.ids[flagged].tolist(),
+            scores[flagged].tolist(),
+            positions[flagged].tolist()
+        )
+    ]
+
+    with db_transaction.atomic():
+        Anomaly.objects.all().delete()
+        Anomaly.objects.bulk_create(anomalies, batch_size=1000)
+
+    return {
+        'checked': len(frame),
+        'subcategories': len(keys),
+        'anomalies': len(anomalies),
+    }
+
+
+def check(transaction, stats=None):
+    """
+    Проверяет сумму транзакции по закэшированной статистике подкатегории.
+
+    Args:
+        transaction (Transaction): Сохраненная транзакция.
+        stats (tuple, optional): Статистика подкатегории (по умолчанию из кэша).
+
+    Returns:
+        tuple | None: Оценка и типичная сумма, если транзакция аномальна.
+    """
+    if stats is None:
+        stats = cache.get(STATS_CACHE_KEY.format(subcategory=transaction.subcategory_id))
+        if stats is None:
+            return None
+    value = math.log(max(int(transaction.amount.scaleb(2)), 1))
+    score = score_values(value, stats)
+    if score is None or abs(score) <= get_threshold():
+        return None
+    return round(score, 2), expected_amount(stats[0])
+
+
+def check_many(transactions):
+    """
+    Проверяет новые транзакции и сохраняет найденные аномалии.
+
+    Args:
+        transactions (list): Сохраненные транзакции.
+
+    Returns:
+        int: Количество найденных аномалий.
+    """
+    keys = {
+        STATS_CACHE_KEY.format(subcategory=item.subcategory_id): item.subcategory_id
+        for item in transactions
+    }
+    cached = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    anomalies = []
+    for item in transactions:
+        stats = cached.get(item.subcategory_id)
+        result = check(item, stats) if stats is not None else None
+        if result is not None:
+            anomalies.append(
+                Anomaly(transaction_id=item.pk, score=result[0], expected=result[1])
+            )
+    Anomaly.objects.bulk_create(anomalies)
+    return len(anomalies)
@@ -12,4 +12,13 @@ class DdsAppApiConfig(AppConfig):
     
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dds_app_api'
-    verbose_name = 'DDS API'
\ No newline at end of file
+    verbose_name = 'DDS API'
+
+    def ready(self):
+        """Подключает обработчики сигналов приложения и журнал медленных запросов."""
+        from django.db.backends.signals import connection_created
+
+        from . import signals, slowlog  # noqa: F401
+
+        if slowlog.get_threshold() is not None:
+            connection_created.connect(slowlog.install, dispatch_uid='dds_app_api.slowlog')
\ No newline at end of file
@@ -0,0 +1,523 @@
+"""
+Архивация холодной истории транзакций.
+
+Модуль переносит старые транзакции из основной таблицы в архивную таблицу
+или в сжатые NDJSON-сегменты, ведет помесячные итоги по архиву и позволяет
+прозрачно подключать архивные данные к чтению через API, когда фильтры
+по дате выходят за границу архивации.
+
+Строки NDJSON-сегментов из базы не читаются: список транзакций их
+не содержит, а сводки учитывают их через помесячные итоги ArchiveRollup,
+которые точны только для фильтров, совместимых с итогами (см. rollups_exact).
+"""
+import gzip
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction as db_transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import caching, counters, sync
+from .models import (
+    Transaction,
+    ArchivedTransaction,
+    ArchiveSegment,
+    ArchiveRollup
+)
+
+
+ARCHIVE_HORIZON_CACHE_KEY = 'dds:archive:horizon'
+ARCHIVE_HORIZON_CACHE_TIMEOUT = 300
+
+RELATED_FIELDS = ('status', 'transaction_type', 'category', 'subcategory')
+
+# Поля, которые копируются из основной таблицы в архив (кроме archived_at)
+ARCHIVE_FIELDS = [
+    field.attname for field in ArchivedTransaction._meta.concrete_fields
+    if field.name != 'archived_at'
+]
+
+# Фильтры, которые не могут быть применены к помесячным итогам архива
+NON_ROLLUP_FILTERS = ('search', 'amount_min', 'amount_max')
+
+_archiving = ContextVar('dds_archiving', default=False)
+
+
+@contextmanager
+def archiving():
+    """
+    Отмечает перенос транзакций в архив внутри блока.
+
+    Перенос в архив не является удалением: обработчики удаления транзакций
+    проверяют is_archiving() и не меняют остатки, исполнение бюджетов
+    и счетчики строк (счетчики уменьшаются один раз на порцию), а записи
+    Tombstone для клиентов синхронизации не создаются.
+    """
+    token = _archiving.set(True)
+    try:
+        with sync.suppress_tombstones():
+            yield
+    finally:
+        _archiving.reset(token)
+
+
+def is_archiving():
+    """
+    Проверяет, выполняется ли перенос транзакций в архив.
+
+    Returns:
+        bool: True внутри блока archiving.
+    """
+    return _archiving.get()
+
+
+def get_archive_dir():
+    """
+    Возвращает каталог для хранения NDJSON-сегментов архива.
+
+    Returns:
+        Path: Путь из настройки CASHFLOW_ARCHIVE_DIR.
+    """
+    return Path(getattr(
+        settings, 'CASHFLOW_ARCHIVE_DIR', settings.BASE_DIR / 'archive'
+    ))
+
+
+def get_archive_horizon():
+    """
+    Возвращает границу архивации - дату, до которой история вынесена в архив.
+
+    Значение кэшируется, так как проверяется при каждом чтении транзакций.
+
+    Returns:
+        date | None: Максимальная граница среди сегментов архива или None,
+        если архивация не выполнялась.
+    """
+    horizon = cache.get(ARCHIVE_HORIZON_CACHE_KEY)
+    if horizon is None:
+        cutoff = ArchiveSegment.objects.aggregate(cutoff=Max('cutoff'))['cutoff']
+        horizon = cutoff.isoformat() if cutoff else ''
+        cache.set(
+            ARCHIVE_HORIZON_CACHE_KEY, horizon, ARCHIVE_HORIZON_CACHE_TIMEOUT
+        )
+    return parse_date(horizon) if horizon else None
+
+
+def reaches_archive(params):
+    """
+    Проверяет, выходят ли фильтры по дате за границу архивации.
+
+    Архив подключается только если date_from или date_to раньше границы;
+    запросы без фильтров по дате читают только основную таблицу.
+
+    Args:
+        params (QueryDict): Параметры запроса.
+
+    Returns:
+        bool: True, если в выборку нужно включить архивные данные.
+    """
+    horizon = get_archive_horizon()
+    if horizon is None:
+        return False
+
+    for name in ('date_from', 'date_to'):
+        value = parse_date_param(params.get(name))
+        if value is not None and value < horizon:
+            return True
+    return False
+
+
+def parse_date_param(value):
+    """
+    Безопасно разбирает дату из параметра запроса.
+
+    Args:
+        value (str | None): Значение параметра.
+
+    Returns:
+        date | None: Дата или None, если значение пустое или некорректное.
+    """
+    if not value:
+        return None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+class ArchiveChain:
+    """
+    Объединение основной и архивной выборок транзакций для пагинации.
+
+    Реализует интерфейс, необходимый Django Paginator (count и срезы).
+    Страница строится слиянием первых N записей каждой выборки, поэтому
+    стоимость запроса ограничена смещением страницы, а не размером архива.
+    Строки, вынесенные в NDJSON-сегменты, в объединение не входят.
+
+    Attributes:
+        hot (QuerySet): Отфильтрованная выборка из основной таблицы.
+        archived (QuerySet): Отфильтрованная выборка из архивной таблицы.
+        ordering (list): Поля сортировки объединенной выборки.
+    """
+
+    ordered = True
+
+    def __init__(self, hot, archived):
+        self.ordering = list(
+            hot.query.order_by or hot.model._meta.ordering
+        )
+        self.hot = hot
+        self.archived = archived.order_by(*self.ordering)
+
+    def count(self, limit=None):
+        """
+        Возвращает общее количество записей в обеих выборках.
+
+        Args:
+            limit (int | None): Предел подсчета: каждая выборка считается
+                по подзапросу с LIMIT, результат не превышает limit.
+
+        Returns:
+            int: Количество транзакций.
+        """
+        if limit is None:
+            return self.hot.count() + self.archived.count()
+        hot = self.hot[:limit].count()
+        if hot >= limit:
+            return limit
+        return hot + self.archived[:limit - hot].count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+
+        start = key.start or 0
+        stop = key.stop
+        rows = list(self.hot[:stop]) + [
+            archived.as_transaction() for archived in self.archived[:stop]
+        ]
+
+        # Устойчивая сортировка от младшего поля к старшему
+        for field in reversed(self.ordering):
+            name = field.lstrip('-')
+            rows.sort(
+                key=lambda row: getattr(row, name),
+                reverse=field.startswith('-')
+            )
+        return rows[start:stop]
+
+
+def _rollups_in_range(params):
+    """
+    Отбирает помесячные итоги NDJSON-сегментов по фильтрам дат.
+
+    Args:
+        params (QueryDict): Параметры запроса.
+
+    Returns:
+        QuerySet: Итоги ArchiveRollup за месяцы, пересекающиеся с периодом.
+    """
+    rollups = ArchiveRollup.objects.filter(storage=ArchiveSegment.STORAGE_NDJSON)
+    date_from = parse_date_param(params.get('date_from'))
+    date_to = parse_date_param(params.get('date_to'))
+    if date_from is not None:
+        rollups = rollups.filter(month__gte=date_from.replace(day=1))
+    if date_to is not None:
+        rollups = rollups.filter(month__lte=date_to)
+    return rollups
+
+
+def filter_rollups(params):
+    """
+    Отбирает помесячные итоги NDJSON-сегментов архива по параметрам запроса.
+
+    Итоги учитывают фильтры по статусу, типу, категории и подкатегории;
+    фильтры по дате применяются с точностью до месяца. Если в запросе есть
+    поиск или фильтры по сумме, данные из файлов не учитываются, так как
+    их нельзя применить к итогам. Точность результата проверяет rollups_exact.
+
+    Args:
+        params (QueryDict): Параметры запроса.
+
+    Returns:
+        QuerySet: Отфильтрованные итоги ArchiveRollup.
+    """
+    rollups = _rollups_in_range(params)
+    if any(params.get(name) for name in NON_ROLLUP_FILTERS):
+        return rollups.none()
+
+    for name in RELATED_FIELDS:
+        value = params.get(name)
+        if value:
+            try:
+                rollups = rollups.filter(**{f'{name}_id': int(value)})
+            except (TypeError, ValueError):
+                return rollups.none()
+
+    return rollups
+
+
+def rollups_exact(params):
+    """
+    Проверяет, точно ли итоги filter_rollups соответствуют фильтрам запроса.
+
+    Итоги неточны, если в периоде есть данные NDJSON-сегментов и запрос
+    содержит поиск или фильтр по сумме (строки файлов не учитываются)
+    либо граница периода приходится на середину месяца с данными файлов
+    (учитывается весь месяц).
+
+    Args:
+        params (QueryDict): Параметры запроса.
+
+    Returns:
+        bool: True, если сводка по архиву точна.
+    """
+    rollups = _rollups_in_range(params)
+    if any(params.get(name) for name in NON_ROLLUP_FILTERS):
+        return not rollups.exists()
+
+    months = set()
+    date_from = parse_date_param(params.get('date_from'))
+    date_to = parse_date_param(params.get('date_to'))
+    if date_from is not None and date_from.day != 1:
+        months.add(date_from.replace(day=1))
+    if date_to is not None and (date_to + timedelta(days=1)).day != 1:
+        months.add(date_to.replace(day=1))
+    return not (months and rollups.filter(month__in=months).exists())
+
+
+def _apply_rollups(rows, storage, sign=1):
+    """
+    Добавляет (или вычитает) строки транзакций в помесячные итоги архива.
+
+    Args:
+        rows (list): Словари с полями транзакций.
+        storage (str): Тип хранилища итогов.
+        sign (int): 1 для добавления, -1 для вычитания.
+    """
+    buckets = defaultdict(lambda: [0, Decimal('0')])
+    for row in rows:
+        key = (
+            row['transaction_date'].replace(day=1),
+            row['status_id'],
+            row['transaction_type_id'],
+            row['category_id'],
+            row['subcategory_id'],
+        )
+        buckets[key][0] += 1
+        buckets[key][1] += row['amount']
+
+    for key, (count, total) in buckets.items():
+        month, status_id, type_id, category_id, subcategory_id = key
+        rollup, _ = ArchiveRollup.objects.get_or_create(
+            storage=storage,
+            month=month,
+            status_id=status_id,
+            transaction_type_id=type_id,
+            category_id=category_id,
+            subcategory_id=subcategory_id,
+        )
+        ArchiveRollup.objects.filter(pk=rollup.pk).update(
+            count=F('count') + sign * count,
+            total=F('total') + sign * total
+        )
+
+    if sign < 0:
+        ArchiveRollup.objects.filter(storage=storage, count__lte=0).delete()
+
+
+def _iter_batches(queryset, batch_size):
+    """
+    Итерирует выборку порциями по возрастанию ID.
+
+    Args:
+        queryset (QuerySet): Исходная выборка.
+        batch_size (int): Размер порции.
+
+    Yields:
+        list: Список словарей с полями ARCHIVE_FIELDS.
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]['id']
+
+
+def _extend_segment(segment, storage, cutoff, rows, path=''):
+    """
+    Создает сегмент архива или добавляет к нему перенесенную порцию.
+
+    Вызывается в той же транзакции БД, что и перенос порции, поэтому
+    граница архивации начинает действовать вместе с удалением строк из
+    основной таблицы, в том числе если команда прервется на середине.
+
+    Args:
+        segment (ArchiveSegment | None): Сегмент текущего запуска или None
+            для первой порции.
+        storage (str): Тип хранилища.
+        cutoff (date): Граница архивации.
+        rows (list): Перенесенные строки (словари с полями транзакций).
+        path (str): Путь к файлу сегмента.
+
+    Returns:
+        ArchiveSegment: Созданный или обновленный сегмент.
+    """
+    dates = [row['transaction_date'] for row in rows]
+    total = sum((row['amount'] for row in rows), Decimal('0'))
+    if segment is None:
+        segment = ArchiveSegment.objects.create(
+            storage=storage,
+            cutoff=cutoff,
+            date_from=min(dates),
+            date_to=max(dates),
+            row_count=len(rows),
+            total_amount=total,
+            path=path
+        )
+    else:
+        segment.date_from = min(segment.date_from, *dates)
+        segment.date_to = max(segment.date_to, *dates)
+        segment.row_count += len(rows)
+        segment.total_amount += total
+        segment.save(update_fields=['date_from', 'date_to', 'row_count', 'total_amount'])
+
+    cache.delete(ARCHIVE_HORIZON_CACHE_KEY)
+    # Повторный сброс после фиксации: читатель мог закэшировать старую
+    # границу между удалением ключа и фиксацией транзакции
+    db_transaction.on_commit(lambda: cache.delete(ARCHIVE_HORIZON_CACHE_KEY))
+    caching.bump_data_version(caching.TRANSACTIONS)
+    return segment
+
+
+def _remove_transactions(rows):
+    """
+    Удаляет перенесенные в архив строки из основной таблицы.
+
+    Вызывается внутри блока archiving: обработчики post_delete не меняют
+    счетчики, остатки и исполнение бюджетов и не создают записи об удалениях
+    для синхронизации, поэтому счетчики строк уменьшаются один раз на порцию.
+    Отметки аномалий удаляются каскадно.
+
+    Args:
+        rows (list): Перенесенные строки (словари с полями транзакций).
+    """
+    Transaction.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    counters.apply_rows(rows, -1)
+
+
+def archive_to_table(cutoff, batch_size=1000):
+    """
+    Переносит транзакции до указанной даты в архивную таблицу.
+
+    Каждая порция переносится в отдельной транзакции БД: строки копируются
+    в ArchivedTransaction, учитываются в итогах и сегменте архива
+    и удаляются из основной таблицы.
+
+    Args:
+        cutoff (date): Граница архивации (переносятся операции раньше этой даты).
+        batch_size (int): Размер порции.
+
+    Returns:
+        ArchiveSegment | None: Сегмент архива или None, если переносить нечего.
+    """
+    source = Transaction.objects.filter(transaction_date__lt=cutoff)
+    segment = None
+    with archiving():
+        for batch in _iter_batches(source, batch_size):
+            with db_transaction.atomic():
+                ArchivedTransaction.objects.bulk_create(
+                    [ArchivedTransaction(**row) for row in batch],
+                    batch_size=batch_size
+                )
+                _apply_rollups(batch, ArchiveSegment.STORAGE_TABLE)
+                _remove_transactions(batch)
+                segment = _extend_segment(
+                    segment, ArchiveSegment.STORAGE_TABLE, cutoff, batch
+                )
+    return segment
+
+
+def archive_to_ndjson(cutoff, batch_size=1000):
+    """
+    Выносит транзакции до указанной даты в сжатый NDJSON-сегмент.
+
+    В файл попадают строки как из основной, так и из архивной таблицы
+    (уплотнение архива). Строки удаляются из базы только после того, как
+    файл полностью записан; итоги по ним сохраняются в ArchiveRollup.
+
+    Args:
+        cutoff (date): Граница архивации (переносятся операции раньше этой даты).
+        batch_size (int): Размер порции.
+
+    Returns:
+        ArchiveSegment | None: Сегмент архива или None, если переносить нечего.
+    """
+    sources = (
+        (Transaction.objects.filter(transaction_date__lt=cutoff), None),
+        (
+            ArchivedTransaction.objects.filter(transaction_date__lt=cutoff),
+            ArchiveSegment.STORAGE_TABLE
+        ),
+    )
+    if not any(queryset.exists() for queryset, _ in sources):
+        return None
+
+    archive_dir = get_archive_dir()
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / (
+        f"transactions-{cutoff:%Y%m%d}-{timezone.now():%Y%m%d%H%M%S}.ndjson.gz"
+    )
+
+    written_ids = []
+    with gzip.open(path, 'wt', encoding='utf-8') as segment_file:
+        for queryset, _ in sources:
+            ids = []
+            for batch in _iter_batches(queryset, batch_size):
+                for row in batch:
+                    segment_file.write(
+                        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+                    )
+                    segment_file.write('\n')
+                ids.extend(row['id'] for row in batch)
+            written_ids.append(ids)
+
+    segment = None
+    with archiving():
+        for (queryset, rollup_storage), ids in zip(sources, written_ids):
+            for start in range(0, len(ids), batch_size):
+                chunk = queryset.filter(id__in=ids[start:start + batch_size])
+                with db_transaction.atomic():
+                    rows = list(chunk.values(*ARCHIVE_FIELDS))
+                    if not rows:
+                        continue
+                    _apply_rollups(rows, ArchiveSegment.STORAGE_NDJSON)
+                    if rollup_storage is None:
+                        _remove_transactions(rows)
+                    else:
+                        _apply_rollups(rows, rollup_storage, sign=-1)
+                        chunk.delete()
+                    segment = _extend_segment(
+                        segment, ArchiveSegment.STORAGE_NDJSON, cutoff, rows,
+                        path=str(path)
+                    )
+    return segment
@@ -0,0 +1,318 @@
+"""
+Остатки на конец месяца и остаток на произвольную дату.
+
+Остаток - сумма пополнений за вычетом списаний. Отметки BalanceCheckpoint
+хранят остаток на конец каждого месяца с операциями для всех транзакций
+и, если настроено (CASHFLOW_BALANCE_DIMENSIONS), в разрезе статуса или
+категории. При записи транзакции изменение прибавляется к отметке ее месяца
+и ко всем последующим (одним UPDATE на отрезок месяцев), поэтому операции
+задним числом корректно переносятся вперед.
+
+Остаток на дату - ближайшая отметка до месяца даты плюс сумма операций
+от начала месяца до даты; на последний день месяца - сама отметка.
+
+Отметки учитывают основную и архивную таблицы и итоги NDJSON-сегментов
+архива; перенос в архив остатки не меняет. После изменения настройки
+измерений или названий типов операций отметки нужно пересчитать командой
+rebuild_balance_checkpoints.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from . import archive, caching
+from .forecast import INCOME_TYPE, EXPENSE_TYPE
+from .models import (
+    TransactionType,
+    Transaction,
+    ArchivedTransaction,
+    ArchiveSegment,
+    ArchiveRollup,
+    BalanceCheckpoint
+)
+
+
+ALL = 'all'
+
+# Измерения отметок: параметр запроса -> поле модели
+DIMENSIONS = {
+    'status': 'status_id',
+    'category': 'category_id',
+}
+
+
+def get_dimensions():
+    """
+    Возвращает измерения, в разрезе которых ведутся отметки остатков.
+
+    Returns:
+        tuple: Ключи DIMENSIONS из настройки CASHFLOW_BALANCE_DIMENSIONS.
+    """
+    return tuple(
+        name for name in getattr(settings, 'CASHFLOW_BALANCE_DIMENSIONS', ())
+        if name in DIMENSIONS
+    )
+
+
+def get_type_signs():
+    """
+    Возвращает знак суммы для каждого типа операции.
+
+    Returns:
+        dict: ID типа -> 1 для пополнений, -1 для списаний (прочие типы
+        на остаток не влияют).
+    """
+    cache_key = caching.make_cache_key('balance-signs', {}, scopes=(caching.REFERENCES,))
+    signs = cache.get(cache_key)
+    if signs is None:
+        names = {INCOME_TYPE: 1, EXPENSE_TYPE: -1}
+        signs = {
+            type_id: names[name]
+            for type_id, name in TransactionType.objects.filter(
+                name__in=names
+            ).values_list('id', 'name')
+        }
+        cache.set(cache_key, signs, caching.get_report_cache_timeout())
+    return signs
+
+
+def signed_amount(signs, amount_field='amount'):
+    """
+    Возвращает выражение суммы со знаком типа операции.
+
+    Args:
+        signs (dict): Знаки типов из get_type_signs.
+        amount_field (str): Поле суммы.
+
+    Returns:
+        Case: Сумма для пополнений, минус сумма для списаний, иначе 0.
+    """
+    return Case(
+        When(
+            transaction_type_id__in=[key for key, sign in signs.items() if sign > 0],
+            then=F(amount_field)
+        ),
+        When(
+            transaction_type_id__in=[key for key, sign in signs.items() if sign < 0],
+            then=-F(amount_field)
+        ),
+        default=Value(0),
+        output_field=DecimalField(max_digits=18, decimal_places=2)
+    )
+
+
+def checkpoint_keys(values):
+    """
+    Возвращает ключи отметок, в которые входит транзакция.
+
+    Args:
+        values (dict): Значения полей транзакции.
+
+    Returns:
+        list: Пары (измерение, ключ).
+    """
+    return [(ALL, '')] + [
+        (name, str(values[DIMENSIONS[name]])) for name in get_dimensions()
+    ]
+
+
+def apply_rows(rows, sign):
+    """
+    Переносит изменение остатков от записанных транзакций на отметки.
+
+    Args:
+        rows (Iterable): Словари или объекты Transaction.
+        sign (int): 1 для добавленных транзакций, -1 для удаленных.
+    """
+    signs = get_type_signs()
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for row in rows:
+        if not isinstance(row, dict):
+            row = {
+                field: getattr(row, field)
+                for field in ('transaction_date', 'transaction_type_id', 'amount')
+                + tuple(DIMENSIONS.values())
+            }
+        value = sign * signs.get(row['transaction_type_id'], 0) * Decimal(row['amount'])
+        if not value:
+            continue
+        month = row['transaction_date']
+        if isinstance(month, str):
+            month = parse_date(month)
+        month = month.replace(day=1)
+        for key in checkpoint_keys(row):
+            deltas[key][month] += value
+
+    with db_transaction.atomic():
+        for (dimension, key), changes in sorted(deltas.items()):
+            _shift(dimension, key, changes)
+
+
+def _shift(dimension, key, changes):
+    """
+    Прибавляет изменения месяцев к отметкам этих и последующих месяцев.
+
+    Отсутствующие отметки месяцев с изменениями создаются с остатком
+    предыдущей отметки. Отметки между соседними изменившимися месяцами
+    сдвигаются одним UPDATE на накопленную сумму изменений.
+
+    Args:
+        dimension (str): Измерение.
+        key (str): Значение измерения.
+        changes (dict): Первый день месяца -> изменение остатка.
+    """
+    checkpoints = BalanceCheckpoint.objects.filter(dimension=dimension, key=key)
+    months = sorted(changes)
+    existing = dict(
+        checkpoints.filter(month__lte=months[-1]).values_list('month', 'balance')
+    )
+    known = sorted(existing)
+    missing = []
+    for month in months:
+        if month in existing:
+            continue
+        index = bisect_left(known, month)
+        missing.append(BalanceCheckpoint(
+            dimension=dimension,
+            key=key,
+            month=month,
+            balance=existing[known[index - 1]] if index else 0
+        ))
+    if missing:
+        try:
+            with db_transaction.atomic():
+                BalanceCheckpoint.objects.bulk_create(missing)
+        except IntegrityError:
+            # Отметку того же месяца создала параллельная запись
+            return _shift(dimension, key, changes)
+
+    running = Decimal(0)
+    for index, month in enumerate(months):
+        running += changes[month]
+        segment = checkpoints.filter(month__gte=month)
+        if index + 1 < len(months):
+            segment = segment.filter(month__lt=months[index + 1])
+        segment.update(balance=F('balance') + running)
+
+
+def rebuild():
+    """
+    Пересчитывает все отметки остатков по основной и архивной таблицам
+    и итогам NDJSON-сегментов архива.
+
+    Returns:
+        int: Количество отметок.
+    """
+    signs = get_type_signs()
+    fields = ('transaction_type_id',) + tuple(
+        DIMENSIONS[name] for name in get_dimensions()
+    )
+    sources = (
+        Transaction.objects.annotate(month=TruncMonth('transaction_date'))
+        .values('month', *fields).annotate(total=Sum('amount')),
+        ArchivedTransaction.objects.annotate(month=TruncMonth('transaction_date'))
+        .values('month', *fields).annotate(total=Sum('amount')),
+        ArchiveRollup.objects.filter(storage=ArchiveSegment.STORAGE_NDJSON)
+        .values('month', *fields).annotate(total=Sum('total')),
+    )
+
+    nets = defaultdict(lambda: defaultdict(Decimal))
+    for source in sources:
+        for row in source.order_by():
+            value = signs.get(row['transaction_type_id'], 0) * row['total']
+            if not value:
+                continue
+            for key in checkpoint_keys(row):
+                nets[key][row['month']] += value
+
+    checkpoints = []
+    for (dimension, key), months in nets.items():
+        balance = Decimal(0)
+        for month in sorted(months):
+            balance += months[month]
+            checkpoints.append(BalanceCheckpoint(
+                dimension=dimension, key=key, month=month, balance=balance
+            ))
+
+    with db_transaction.atomic():
+        BalanceCheckpoint.objects.all().delete()
+        BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+    return len(checkpoints)
+
+
+def _is_last_day(day):
+    """
+    Проверяет, является ли дата последним днем месяца.
+
+    Args:
+        day (date): Дата.
+
+    Returns:
+        bool: True для последнего дня месяца.
+    """
+    return (day + timedelta(days=1)).month != day.month
+
+
+def balance_at(day, dimension=ALL, key=''):
+    """
+    Возвращает остаток на конец указанной даты.
+
+    Args:
+        day (date): Дата.
+        dimension (str): Измерение (ALL или ключ из get_dimensions).
+        key (str): Значение измерения (ID).
+
+    Returns:
+        dict: Дата, остаток, месяц использованной отметки и признак
+        точности (False, если часть операций месяца вынесена в NDJSON-файлы
+        и доступна только помесячными итогами).
+
+    Raises:
+        ValueError: Если отметки для измерения не ведутся.
+    """
+    if dimension != ALL and dimension not in get_dimensions():
+        raise ValueError(dimension)
+
+    month = day.replace(day=1)
+    checkpoints = BalanceCheckpoint.objects.filter(dimension=dimension, key=key)
+    month_end = _is_last_day(day)
+    checkpoint = checkpoints.filter(
+        **{'month__lte' if month_end else 'month__lt': month}
+    ).order_by('-month').values('month', 'balance').first()
+
+    balance = checkpoint['balance'] if checkpoint else Decimal(0)
+    exact = True
+    if not month_end:
+        filters = {'transaction_date__gte': month, 'transaction_date__lte': day}
+        if dimension != ALL:
+            filters[DIMENSIONS[dimension]] = int(key)
+        sources = [Transaction.objects]
+        horizon = archive.get_archive_horizon()
+        if horizon is not None and month < horizon:
+            sources.append(ArchivedTransaction.objects)
+            exact = not ArchiveSegment.objects.filter(
+                storage=ArchiveSegment.STORAGE_NDJSON,
+                date_from__lte=day,
+                date_to__gte=month
+            ).exists()
+        signs = get_type_signs()
+        for source in sources:
+            delta = source.filter(**filters).aggregate(
+                delta=Sum(signed_amount(signs))
+            )['delta']
+            balance += delta or 0
+
+    return {
+        'date': day,
+        'balance': Decimal(balance).quantize(Decimal('0.01')),
+        'checkpoint': checkpoint['month'].strftime('%Y-%m') if checkpoint else None,
+        'exact': exact,
+    }
@@ -0,0 +1,243 @@
+"""
+Выполнение пакета GET-запросов к API в рамках одного HTTP-запроса.
+
+Подзапросы выполняются последовательно в том же потоке, поэтому используют
+общее соединение с БД и кэш. Путь подзапроса может ссылаться на результат
+предыдущего подзапроса через подстановку вида {id.поле}, что позволяет
+загрузить зависимые данные (транзакция -> категории ее типа) за один
+запрос клиента.
+"""
+import json
+import re
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+
+
+PLACEHOLDER_RE = re.compile(r'\{(\w+)((?:\.\w+)*)\}')
+
+# Статус подзапроса, зависимость которого завершилась ошибкой
+FAILED_DEPENDENCY = 424
+
+
+class BatchError(ValueError):
+    """
+    Ошибка в описании пакета запросов.
+    """
+
+
+def get_max_requests():
+    """
+    Возвращает максимальное количество подзапросов в пакете.
+
+    Returns:
+        int: Значение настройки CASHFLOW_BATCH_MAX_REQUESTS.
+    """
+    return getattr(settings, 'CASHFLOW_BATCH_MAX_REQUESTS', 20)
+
+
+def get_api_prefix():
+    """
+    Возвращает префикс путей API.
+
+    Returns:
+        str: Префикс, например /api/.
+    """
+    return reverse('batch')[:-len('batch/')]
+
+
+def parse_items(items):
+    """
+    Проверяет и нормализует описание подзапросов.
+
+    Элемент пакета - строка пути или объект {"id": ..., "path": ...}.
+    Если id не указан, используется порядковый номер подзапроса.
+
+    Args:
+        items (list): Элементы пакета из тела запроса.
+
+    Returns:
+        list: Пары (id, путь).
+
+    Raises:
+        BatchError: Если пакет пуст, слишком велик или содержит некорректные элементы.
+    """
+    if not isinstance(items, list) or not items:
+        raise BatchError("Ожидается непустой список подзапросов")
+    if len(items) > get_max_requests():
+        raise BatchError(f"Не более {get_max_requests()} подзапросов в пакете")
+
+    parsed = []
+    seen = set()
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f"Подзапрос {index}: ожидается строка или объект с полем path")
+        item_id = str(item.get('id', index))
+        if item_id in seen:
+            raise BatchError(f"Подзапрос {index}: повторяющийся id {item_id}")
+        seen.add(item_id)
+        parsed.append((item_id, item['path']))
+    return parsed
+
+
+def resolve_placeholders(path, results):
+    """
+    Подставляет в путь значения из результатов предыдущих подзапросов.
+
+    Args:
+        path (str): Путь с подстановками вида {id.поле.поле}.
+        results (dict): Результаты выполненных подзапросов по id.
+
+    Returns:
+        str: Путь с подставленными значениями.
+
+    Raises:
+        LookupError: Если подзапрос не выполнен, завершился ошибкой
+            или не содержит нужного поля.
+    """
+    def substitute(match):
+        item_id, fields = match.group(1), match.group(2)
+        result = results.get(item_id)
+        if result is None or result['status'] >= 400:
+            raise LookupError(f"Подзапрос {item_id} не выполнен")
+        value = result['body']
+        for field in filter(None, fields.split('.')):
+            try:
+                value = value[int(field) if isinstance(value, list) else field]
+            except (KeyError, IndexError, TypeError, ValueError):
+                raise LookupError(f"Поле {item_id}{fields} не найдено")
+        return quote(str(value), safe='')
+
+    return PLACEHOLDER_RE.sub(substitute, path)
+
+
+def _build_request(original, path, query):
+    """
+    Создает HttpRequest подзапроса на основе исходного запроса.
+
+    Подзапрос наследует заголовки, cookies, пользователя и сессию, поэтому
+    проверки доступа представлений выполняются так же, как для прямого вызова.
+
+    Args:
+        original (HttpRequest): Исходный запрос.
+        path (str): Путь подзапроса.
+        query (str): Строка параметров подзапроса.
+
+    Returns:
+        HttpRequest: Запрос GET для вызова представления.
+    """
+    sub_request = HttpRequest()
+    sub_request.method = 'GET'
+    sub_request.path = sub_request.path_info = path
+    sub_request.META = {
+        key: value for key, value in original.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'wsgi.input')
+    }
+    sub_request.META.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+    })
+    sub_request.GET = QueryDict(query)
+    sub_request.COOKIES = original.COOKIES
+    sub_request.user = getattr(original, 'user', AnonymousUser())
+    if hasattr(original, 'session'):
+        sub_request.session = original.session
+    return sub_request
+
+
+def _response_body(response):
+    """
+    Извлекает тело ответа подзапроса.
+
+    Args:
+        response (HttpResponse): Ответ представления.
+
+    Returns:
+        object: Данные ответа DRF, разобранный JSON или текст.
+    """
+    if hasattr(response, 'data'):
+        return response.data
+    if hasattr(response, 'render'):
+        response.render()
+    content = response.content.decode(response.charset or 'utf-8')
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content
+
+
+def execute(request, items, batch_view):
+    """
+    Выполняет пакет GET-подзапросов.
+
+    Args:
+        request (Request): Исходный запрос пакета.
+        items (list): Пары (id, путь) из parse_items.
+        batch_view (type): Класс представления пакета (вложенные пакеты запрещены).
+
+    Returns:
+        list: Результаты подзапросов с полями id, path, status и body.
+    """
+    results = {}
+    responses = []
+    for item_id, path in items:
+        try:
+            path = resolve_placeholders(path, results)
+        except LookupError as error:
+            result = {'status': FAILED_DEPENDENCY, 'body': {'detail': str(error)}}
+        else:
+            result = dispatch(request._request, path, batch_view)
+
+        result = {'id': item_id, 'path': path, **result}
+        results[item_id] = result
+        responses.append(result)
+    return responses
+
+
+def dispatch(request, path, batch_view=None):
+    """
+    Выполняет один GET-запрос к API внутри текущего запроса.
+
+    Используется для подзапросов пакета и для встраивания данных API
+    в страницы фронтенда.
+
+    Args:
+        request (HttpRequest): Исходный запрос.
+        path (str): Путь подзапроса (с параметрами); относительный путь
+            считается от префикса API, абсолютный должен с него начинаться.
+        batch_view (type | None): Класс представления пакета, вызов которого запрещен.
+
+    Returns:
+        dict: Статус и тело ответа.
+    """
+    api_prefix = get_api_prefix()
+    parts = urlsplit(path)
+    target = parts.path
+    if not target.startswith('/'):
+        target = api_prefix + target
+    if not target.startswith(api_prefix):
+        return {'status': 400, 'body': {'detail': "Разрешены только пути API"}}
+
+    try:
+        match = resolve(target)
+    except Resolver404:
+        return {'status': 404, 'body': {'detail': "Не найдено."}}
+    if batch_view is not None and getattr(match.func, 'view_class', None) is batch_view:
+        return {'status': 400, 'body': {'detail': "Вложенные пакеты не поддерживаются"}}
+
+    sub_request = _build_request(request, target, parts.query)
+    sub_request.resolver_match = match
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Http404:
+        return {'status': 404, 'body': {'detail': "Не найдено."}}
+    if response.streaming:
+        # Потоковые ответы (скачивание файлов) не помещаются в JSON пакета
+        response.close()
+        return {'status': 400, 'body': {'detail': "Потоковые ответы не поддерживаются в пакете"}}
+    return {'status': response.status_code, 'body': _response_body(response)}
@@ -0,0 +1,271 @@
+"""
+Исполнение месячных бюджетов по категориям и подкатегориям.
+
+Фактические суммы и плановые значения месяца загружаются одним
+сгруппированным запросом по подкатегориям, к которому присоединены
+транзакции месяца и бюджеты подкатегорий и их категорий. Результат
+кэшируется на месяц и при записи транзакций не сбрасывается, а обновляется
+на величину изменения, поэтому отчет для панели предупреждений не обращается
+к БД при каждом запросе. Изменение бюджетов и справочников меняет ключ кэша.
+
+Обновление выполняется чтением и записью значения кэша; изменение,
+потерянное при одновременной записи из нескольких процессов, исправляется
+пересчетом по истечении времени жизни значения.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import FilteredRelation, Max, Q, Sum
+from django.utils import timezone
+
+from . import archive, caching, counters
+from .models import ArchivedTransaction, Subcategory
+
+
+CENT = Decimal('0.01')
+
+
+def parse_month(value):
+    """
+    Разбирает месяц из параметра запроса.
+
+    Args:
+        value (str | None): Месяц вида YYYY-MM (по умолчанию текущий).
+
+    Returns:
+        date: Первый день месяца.
+
+    Raises:
+        ValueError: Если значение некорректно.
+    """
+    if not value:
+        return timezone.localdate().replace(day=1)
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
+
+
+def next_month(month):
+    """
+    Возвращает первый день следующего месяца.
+
+    Args:
+        month (date): Первый день месяца.
+
+    Returns:
+        date: Первый день следующего месяца.
+    """
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def get_cache_key(month):
+    """
+    Возвращает ключ кэша исполнения бюджетов за месяц.
+
+    Версия данных транзакций в ключ не входит: при записи транзакций
+    значение обновляется функцией apply_rows.
+
+    Args:
+        month (str): Месяц вида YYYY-MM.
+
+    Returns:
+        str: Ключ кэша.
+    """
+    return caching.make_cache_key(
+        'budget-variance',
+        {'month': month},
+        scopes=(caching.REFERENCES, caching.BUDGETS)
+    )
+
+
+def load_month(month):
+    """
+    Загружает плановые и фактические суммы за месяц по подкатегориям.
+
+    Основной запрос группирует подкатегории с присоединенными транзакциями
+    месяца, бюджетом подкатегории и бюджетом ее категории. Если месяц
+    вынесен в архив, фактические суммы дополняются архивной таблицей
+    и итогами NDJSON-сегментов.
+
+    Args:
+        month (date): Первый день месяца.
+
+    Returns:
+        dict: Категории (название, тип операции, бюджет) и подкатегории
+        (название, категория, бюджет, фактическая сумма) по ID.
+    """
+    end = next_month(month)
+    rows = Subcategory.objects.annotate(
+        month_transactions=FilteredRelation(
+            'transaction',
+            condition=Q(
+                transaction__transaction_date__gte=month,
+                transaction__transaction_date__lt=end
+            )
+        ),
+        month_budget=FilteredRelation(
+            'budgets', condition=Q(budgets__month=month)
+        ),
+        category_budget=FilteredRelation(
+            'category__budgets', condition=Q(category__budgets__month=month)
+        ),
+    ).values(
+        'id', 'name', 'category_id', 'category__name',
+        'category__transaction_type__name'
+    ).annotate(
+        actual=Sum('month_transactions__amount'),
+        planned=Max('month_budget__amount'),
+        category_planned=Max('category_budget__amount'),
+    ).order_by()
+
+    categories = {}
+    subcategories = {}
+    for row in rows:
+        categories[row['category_id']] = {
+            'name': row['category__name'],
+            'transaction_type': row['category__transaction_type__name'],
+            'planned': row['category_planned'],
+        }
+        subcategories[row['id']] = {
+            'name': row['name'],
+            'category': row['category_id'],
+            'planned': row['planned'],
+            'actual': row['actual'] or Decimal(0),
+        }
+
+    horizon = archive.get_archive_horizon()
+    if horizon is not None and month < horizon:
+        sources = (
+            ArchivedTransaction.objects.filter(
+                transaction_date__gte=month, transaction_date__lt=end
+            ).values('subcategory_id').annotate(total=Sum('amount')),
+            archive.filter_rollups({
+                'date_from': month.isoformat(), 'date_to': month.isoformat()
+            }).values('subcategory_id').annotate(total=Sum('total')),
+        )
+        for source in sources:
+            for row in source.order_by():
+                if row['subcategory_id'] in subcategories:
+                    subcategories[row['subcategory_id']]['actual'] += row['total']
+
+    return {'categories': categories, 'subcategories': subcategories}
+
+
+def apply_rows(rows, sign):
+    """
+    Обновляет закэшированные фактические суммы по записанным транзакциям.
+
+    Месяцы, отсутствующие в кэше, не загружаются. Если транзакция относится
+    к подкатегории, которой нет в закэшированном значении, оно удаляется.
+
+    Args:
+        rows (Iterable): Словари или объекты Transaction (transaction_date,
+            subcategory_id, amount).
+        sign (int): 1 для добавленных транзакций, -1 для удаленных.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for row in rows:
+        if not isinstance(row, dict):
+            row = {
+                'transaction_date': row.transaction_date,
+                'subcategory_id': row.subcategory_id,
+                'amount': row.amount,
+            }
+        month = counters.month_key(row['transaction_date'])
+        deltas[month][row['subcategory_id']] += sign * Decimal(row['amount'])
+
+    for month, changes in deltas.items():
+        key = get_cache_key(month)
+        data = cache.get(key)
+        if data is None:
+            continue
+        if not changes.keys() <= data['subcategories'].keys():
+            cache.delete(key)
+            continue
+        for subcategory_id, delta in changes.items():
+            data['subcategories'][subcategory_id]['actual'] += delta
+        cache.set(key, data, caching.get_report_cache_timeout())
+
+
+def _variance(planned, actual):
+    """
+    Вычисляет отклонение фактической суммы от плановой.
+
+    Args:
+        planned (Decimal | None): Плановая сумма.
+        actual (Decimal): Фактическая сумма.
+
+    Returns:
+        dict: Плановая и фактическая суммы, остаток, процент исполнения
+        и признак превышения (None для остатка и процента без бюджета).
+    """
+    actual = actual.quantize(CENT)
+    if planned is None:
+        return {
+            'planned': None, 'actual': actual, 'remaining': None,
+            'percent': None, 'exceeded': False,
+        }
+    planned = planned.quantize(CENT)
+    return {
+        'planned': planned,
+        'actual': actual,
+        'remaining': planned - actual,
+        'percent': round(float(actual / planned * 100), 1) if planned else None,
+        'exceeded': actual > planned,
+    }
+
+
+def build_variance(month):
+    """
+    Строит отчет об исполнении бюджетов за месяц.
+
+    Бюджет категории - ее собственный бюджет, а если он не задан, сумма
+    бюджетов ее подкатегорий.
+
+    Args:
+        month (date): Первый день месяца.
+
+    Returns:
+        dict: Месяц и категории с подкатегориями: плановая и фактическая
+        суммы, остаток, процент исполнения и признак превышения.
+    """
+    key = get_cache_key(counters.month_key(month))
+    data = cache.get(key)
+    if data is None:
+        data = load_month(month)
+        cache.set(key, data, caching.get_report_cache_timeout())
+
+    children = defaultdict(list)
+    for subcategory_id, item in data['subcategories'].items():
+        children[item['category']].append((subcategory_id, item))
+
+    categories = []
+    for category_id, category in sorted(
+        data['categories'].items(), key=lambda pair: pair[1]['name']
+    ):
+        items = sorted(children[category_id], key=lambda pair: pair[1]['name'])
+        planned = category['planned']
+        if planned is None and any(item['planned'] is not None for _, item in items):
+            planned = sum(item['planned'] or 0 for _, item in items)
+        categories.append({
+            'id': category_id,
+            'name': category['name'],
+            'transaction_type': category['transaction_type'],
+            **_variance(planned, sum((item['actual'] for _, item in items), Decimal(0))),
+            'subcategories': [
+                {
+                    'id': subcategory_id,
+                    'name': item['name'],
+                    **_variance(item['planned'], item['actual']),
+                }
+                for subcategory_id, item in items
+            ],
+        })
+
+    return {
+        'month': counters.month_key(month),
+        'categories': categories,
+    }
@@ -0,0 +1,90 @@
+"""
+Версионирование данных для кэширования отчетов и справочников.
+
+Каждая область данных (транзакции, справочники, бюджеты, правила
+категоризации) имеет счетчик версии в кэше.
+Счетчик увеличивается сигналами при любой записи, поэтому ключи кэша,
+содержащие версию, автоматически устаревают без явной очистки.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+TRANSACTIONS = 'transactions'
+REFERENCES = 'references'
+BUDGETS = 'budgets'
+RULES = 'rules'
+
+VERSION_CACHE_KEY = 'dds:version:{scope}'
+
+
+def get_data_version(scope):
+    """
+    Возвращает текущую версию области данных.
+
+    Если версия отсутствует в кэше (первый запуск или вытеснение), она
+    инициализируется текущим временем, чтобы не повторять старые значения.
+
+    Args:
+        scope (str): Область данных (TRANSACTIONS, REFERENCES, BUDGETS или RULES).
+
+    Returns:
+        int: Версия данных.
+    """
+    key = VERSION_CACHE_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_data_version(*scopes):
+    """
+    Увеличивает версию указанных областей данных.
+
+    Args:
+        *scopes (str): Области данных, которые были изменены.
+    """
+    for scope in scopes:
+        key = VERSION_CACHE_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            get_data_version(scope)
+
+
+def make_cache_key(prefix, params, scopes=(TRANSACTIONS, REFERENCES)):
+    """
+    Строит ключ кэша для результата, зависящего от параметров и данных.
+
+    Args:
+        prefix (str): Префикс ключа (имя отчета).
+        params (dict | QueryDict): Параметры запроса.
+        scopes (tuple): Области данных, от которых зависит результат.
+
+    Returns:
+        str: Ключ кэша.
+    """
+    if hasattr(params, 'lists'):
+        params = {name: sorted(values) for name, values in params.lists()}
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    versions = '.'.join(str(get_data_version(scope)) for scope in scopes)
+    return f'dds:{prefix}:{versions}:{digest}'
+
+
+def get_report_cache_timeout():
+    """
+    Возвращает время жизни закэшированных отчетов.
+
+    Returns:
+        int: Время жизни в секундах из настройки CASHFLOW_REPORT_CACHE_TIMEOUT.
+    """
+    return getattr(settings, 'CASHFLOW_REPORT_CACHE_TIMEOUT', 600)
@@ -0,0 +1,235 @@
+"""
+Автоматическая категоризация транзакций по комментарию.
+
+Активные правила CategorizationRule компилируются в один набор правил
+(Matcher). Ключевые слова и фразы попадают в индекс по первому слову:
+комментарий разбивается на слова одним проходом, и для каждого слова
+проверяются только фразы, начинающиеся с него, поэтому время классификации
+не зависит от количества ключевых слов. Регулярные выражения объединяются
+в одно выражение - альтернативу именованных групп в порядке приоритета.
+Поиск ведется без учета регистра; если совпадают несколько правил,
+выбирается правило с наименьшим приоритетом (при равенстве - созданное
+раньше).
+
+Скомпилированный набор хранится в памяти процесса вместе с версиями
+правил и справочников и пересобирается только после их изменения.
+Результаты для повторяющихся комментариев (типично для банковских выписок)
+запоминаются.
+"""
+import re
+import threading
+
+from . import caching
+from .models import CategorizationRule
+
+
+GROUP_PREFIX = 'r'
+
+# Количество запоминаемых результатов для повторяющихся комментариев
+MEMO_SIZE = 100000
+
+WORD = re.compile(r'\w+')
+
+# Ссылки на группы ломают нумерацию групп в общем выражении
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def split_words(text):
+    """
+    Разбивает текст на слова в нижнем регистре.
+
+    Args:
+        text (str): Текст.
+
+    Returns:
+        list: Слова без знаков препинания.
+    """
+    return WORD.findall(text.lower())
+
+
+def validate_pattern(kind, pattern):
+    """
+    Проверяет шаблон правила.
+
+    Args:
+        kind (str): Вид шаблона.
+        pattern (str): Ключевое слово или регулярное выражение.
+
+    Raises:
+        ValueError: Если шаблон пуст или не может быть включен в набор
+            правил.
+    """
+    if not pattern or not pattern.strip():
+        raise ValueError("Шаблон не может быть пустым")
+    if kind != CategorizationRule.REGEX:
+        if not split_words(pattern):
+            raise ValueError("Ключевое слово должно содержать буквы или цифры")
+        return
+    if BACKREFERENCE.search(pattern):
+        raise ValueError("Ссылки на группы в шаблоне не поддерживаются")
+    try:
+        compiled = re.compile(f'(?:{pattern})', re.IGNORECASE)
+    except re.error as error:
+        raise ValueError(f"Некорректное регулярное выражение: {error}")
+    if compiled.groupindex:
+        raise ValueError("Именованные группы в шаблоне не поддерживаются")
+    if compiled.match(''):
+        raise ValueError("Шаблон не должен совпадать с пустой строкой")
+
+
+class Matcher:
+    """
+    Скомпилированный набор правил категоризации.
+
+    Attributes:
+        version (tuple): Версии правил и справочников при компиляции.
+        keywords (dict): Первое слово фразы -> список (остальные слова,
+            цель правила) в порядке приоритета.
+        expression (Pattern | None): Общее выражение регулярных правил
+            (None, если их нет).
+        targets (dict): Имя группы -> цель регулярного правила.
+
+    Цель правила - кортеж (приоритет, ID подкатегории, ID категории,
+    ID типа операции).
+    """
+
+    def __init__(self, version, rules):
+        """
+        Компилирует правила.
+
+        Args:
+            version (tuple): Версии правил и справочников.
+            rules (Iterable): Активные правила в порядке приоритета.
+        """
+        self.version = version
+        self.keywords = {}
+        self.targets = {}
+        self._memo = {}
+        parts = []
+        for rank, rule in enumerate(rules):
+            try:
+                validate_pattern(rule.kind, rule.pattern)
+            except ValueError:
+                # Правило, сохраненное в обход проверки, не должно
+                # ломать остальные правила
+                continue
+            target = (
+                rank,
+                rule.subcategory_id,
+                rule.subcategory.category_id,
+                rule.subcategory.category.transaction_type_id,
+            )
+            if rule.kind == CategorizationRule.REGEX:
+                name = f'{GROUP_PREFIX}{rank}'
+                parts.append(f'(?P<{name}>{rule.pattern})')
+                self.targets[name] = target
+            else:
+                first, *rest = split_words(rule.pattern)
+                self.keywords.setdefault(first, []).append((tuple(rest), target))
+        # Опережающая проверка не поглощает текст, поэтому совпадение
+        # с высоким приоритетом не теряется за более ранним совпадением
+        # другого правила
+        self.expression = (
+            re.compile(f"(?=(?:{'|'.join(parts)}))", re.IGNORECASE) if parts else None
+        )
+
+    def _match_keywords(self, comment):
+        """
+        Находит ключевую фразу с наименьшим приоритетом.
+
+        Args:
+            comment (str): Комментарий транзакции.
+
+        Returns:
+            tuple | None: Цель правила или None.
+        """
+        best = None
+        words = split_words(comment)
+        for position, word in enumerate(words):
+            candidates = self.keywords.get(word)
+            if candidates is None:
+                continue
+            for rest, target in candidates:
+                if best is not None and target[0] >= best[0]:
+                    break
+                end = position + 1 + len(rest)
+                if tuple(words[position + 1:end]) == rest:
+                    best = target
+                    break
+        return best
+
+    def _match_expression(self, comment, best):
+        """
+        Находит регулярное правило с приоритетом выше найденного.
+
+        Args:
+            comment (str): Комментарий транзакции.
+            best (tuple | None): Лучшая найденная цель.
+
+        Returns:
+            tuple | None: Лучшая цель с учетом регулярных правил.
+        """
+        if self.expression is None:
+            return best
+        for match in self.expression.finditer(comment):
+            target = self.targets[match.lastgroup]
+            if best is None or target[0] < best[0]:
+                best = target
+        return best
+
+    def classify(self, comment):
+        """
+        Определяет подкатегорию по комментарию.
+
+        Результаты запоминаются для повторяющихся комментариев (не более
+        MEMO_SIZE значений на набор правил).
+
+        Args:
+            comment (str): Комментарий транзакции.
+
+        Returns:
+            tuple | None: ID подкатегории, категории и типа операции или None,
+            если ни одно правило не совпало.
+        """
+        if not comment or not (self.keywords or self.targets):
+            return None
+        try:
+            return self._memo[comment]
+        except KeyError:
+            pass
+
+        best = self._match_expression(comment, self._match_keywords(comment))
+        result = best[1:] if best is not None else None
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[comment] = result
+        return result
+
+
+def get_matcher():
+    """
+    Возвращает скомпилированный набор правил, пересобирая его при изменении
+    правил или справочников.
+
+    Returns:
+        Matcher: Набор правил.
+    """
+    global _matcher
+    version = (
+        caching.get_data_version(caching.RULES),
+        caching.get_data_version(caching.REFERENCES),
+    )
+    matcher = _matcher
+    if matcher is not None and matcher.version == version:
+        return matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher.version != version:
+            rules = CategorizationRule.objects.filter(is_active=True).select_related(
+                'subcategory__category'
+            ).order_by('priority', 'id')
+            _matcher = Matcher(version, rules)
+        return _matcher
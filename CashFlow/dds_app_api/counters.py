@@ -0,0 +1,219 @@
+"""
+Поддерживаемые счетчики строк транзакций.
+
+Счетчики хранят количество транзакций в основной таблице в разрезе статуса,
+типа, категории, подкатегории и месяца. Они обновляются сигналами при каждой
+записи и позволяют отдавать точное количество для пагинации без COUNT(*).
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from .models import Transaction, TransactionCounter
+
+
+ALL = 'all'
+MONTH = 'month'
+
+# Измерения счетчиков: параметр фильтра -> поле модели
+DIMENSIONS = {
+    'status': 'status_id',
+    'transaction_type': 'transaction_type_id',
+    'category': 'category_id',
+    'subcategory': 'subcategory_id',
+}
+
+# Значения, которые нужно прочитать из БД для вычисления ключей счетчиков
+KEY_FIELDS = tuple(DIMENSIONS.values()) + ('transaction_date',)
+
+# Параметры запроса, не влияющие на количество строк
+NEUTRAL_PARAMS = ('page', 'page_size', 'ordering', 'format')
+
+
+def month_key(value):
+    """
+    Возвращает ключ месячного счетчика для даты.
+
+    Args:
+        value (date | str): Дата операции.
+
+    Returns:
+        str: Ключ вида YYYY-MM.
+    """
+    if isinstance(value, str):
+        value = parse_date(value)
+    return f'{value:%Y-%m}'
+
+
+def counter_keys(values):
+    """
+    Возвращает ключи счетчиков, в которые входит транзакция.
+
+    Args:
+        values (dict | Transaction): Значения полей KEY_FIELDS.
+
+    Returns:
+        set: Пары (измерение, ключ).
+    """
+    if not isinstance(values, dict):
+        values = {field: getattr(values, field) for field in KEY_FIELDS}
+
+    keys = {(ALL, ''), (MONTH, month_key(values['transaction_date']))}
+    for dimension, field in DIMENSIONS.items():
+        keys.add((dimension, str(values[field])))
+    return keys
+
+
+def apply(keys, delta):
+    """
+    Изменяет значения счетчиков на delta.
+
+    Args:
+        keys (Iterable): Пары (измерение, ключ).
+        delta (int): Изменение количества.
+    """
+    with db_transaction.atomic():
+        for dimension, key in keys:
+            counters = TransactionCounter.objects.filter(
+                dimension=dimension, key=key
+            )
+            if counters.update(count=F('count') + delta):
+                continue
+            try:
+                with db_transaction.atomic():
+                    TransactionCounter.objects.create(
+                        dimension=dimension, key=key, count=delta
+                    )
+            except IntegrityError:
+                counters.update(count=F('count') + delta)
+
+
+def apply_rows(rows, delta):
+    """
+    Изменяет счетчики для набора транзакций, записанных в обход сигналов.
+
+    Args:
+        rows (Iterable): Словари или объекты Transaction.
+        delta (int): 1 для добавленных строк, -1 для удаленных.
+    """
+    totals = {}
+    for row in rows:
+        for key in counter_keys(row):
+            totals[key] = totals.get(key, 0) + delta
+
+    with db_transaction.atomic():
+        for key, value in totals.items():
+            apply([key], value)
+
+
+def rebuild():
+    """
+    Пересчитывает все счетчики по основной таблице транзакций.
+    """
+    counters = [
+        TransactionCounter(
+            dimension=ALL, key='', count=Transaction.objects.count()
+        )
+    ]
+    for dimension, field in DIMENSIONS.items():
+        counters.extend(
+            TransactionCounter(
+                dimension=dimension, key=str(row[field]), count=row['count']
+            )
+            for row in Transaction.objects.order_by()
+            .values(field).annotate(count=Count('id'))
+        )
+    counters.extend(
+        TransactionCounter(
+            dimension=MONTH, key=month_key(row['month']), count=row['count']
+        )
+        for row in Transaction.objects.order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('month').annotate(count=Count('id'))
+    )
+
+    with db_transaction.atomic():
+        TransactionCounter.objects.all().delete()
+        TransactionCounter.objects.bulk_create(counters)
+
+
+def get_total():
+    """
+    Возвращает общее количество транзакций в основной таблице.
+
+    Returns:
+        int: Значение счетчика ALL.
+    """
+    counter = TransactionCounter.objects.filter(dimension=ALL, key='').first()
+    return counter.count if counter else 0
+
+
+def count_for_params(params):
+    """
+    Возвращает точное количество транзакций по счетчикам, если фильтр покрыт.
+
+    Покрываются запросы без фильтров, с одним фильтром по статусу, типу,
+    категории или подкатегории, а также с фильтром только по датам,
+    границы которого совпадают с границами месяцев.
+
+    Args:
+        params (QueryDict): Параметры запроса.
+
+    Returns:
+        int | None: Количество транзакций или None, если фильтр не покрыт.
+    """
+    used = {
+        name: value for name, value in params.items()
+        if value and name not in NEUTRAL_PARAMS
+    }
+
+    if not used:
+        return get_total()
+
+    if len(used) == 1:
+        name, value = next(iter(used.items()))
+        if name in DIMENSIONS:
+            try:
+                key = str(int(value))
+            except ValueError:
+                return None
+            counter = TransactionCounter.objects.filter(
+                dimension=name, key=key
+            ).first()
+            return counter.count if counter else 0
+
+    if set(used) <= {'date_from', 'date_to'}:
+        return _count_months(used.get('date_from'), used.get('date_to'))
+
+    return None
+
+
+def _count_months(date_from, date_to):
+    """
+    Суммирует месячные счетчики для диапазона, выровненного по месяцам.
+
+    Args:
+        date_from (str | None): Начало диапазона.
+        date_to (str | None): Конец диапазона.
+
+    Returns:
+        int | None: Количество транзакций или None, если диапазон не выровнен.
+    """
+    counters = TransactionCounter.objects.filter(dimension=MONTH)
+    try:
+        if date_from:
+            start = parse_date(date_from)
+            if start is None or start.day != 1:
+                return None
+            counters = counters.filter(key__gte=month_key(start))
+        if date_to:
+            end = parse_date(date_to)
+            if end is None or end.month == date.fromordinal(end.toordinal() + 1).month:
+                return None
+            counters = counters.filter(key__lte=month_key(end))
+    except ValueError:
+        return None
+    return counters.aggregate(total=Sum('count'))['total'] or 0
@@ -1,6 +1,6 @@
 import django_filters
 from django.db.models import Q
-from .models import Transaction, Status, TransactionType, Category, Subcategory
+from .models import Transaction, Status, TransactionType, Category, Subcategory, Budget
 from django_filters import DateFilter, NumberFilter, CharFilter
 
 
@@ -113,4 +113,24 @@ class SubcategoryFilter(django_filters.FilterSet):
     class Meta:
         """Метаданные для SubcategoryFilter."""
         model = Subcategory
-        fields = ['name', 'category', 'transaction_type']
\ No newline at end of file
+        fields = ['name', 'category', 'transaction_type']
+
+
+class BudgetFilter(django_filters.FilterSet):
+    """Фильтр для модели Budget, позволяющий фильтровать по месяцу, категории и подкатегории.
+
+    Атрибуты:
+        month (DateFilter): Фильтрация бюджетов по месяцу (первый день месяца).
+        category (NumberFilter): Фильтрация бюджетов по ID категории.
+        subcategory (NumberFilter): Фильтрация бюджетов по ID подкатегории.
+    """
+
+    month = DateFilter(field_name='month')
+    category = NumberFilter(field_name='category__id')
+    subcategory = NumberFilter(field_name='subcategory__id')
+
+
+    class Meta:
+        """Метаданные для BudgetFilter."""
+        model = Budget
+        fields = ['month', 'category', 'subcategory']
@@ -0,0 +1,131 @@
+"""
+Отпечатки транзакций для поиска повторно загруженных операций.
+
+Отпечаток - SHA-1 от нормализованных даты, суммы (два знака), подкатегории
+и комментария (без учета регистра и лишних пробелов). Он хранится
+в индексированном столбце Transaction.fingerprint и заполняется при
+сохранении через ORM (сигнал pre_save) и при массовой записи, поэтому
+поиск дубликатов - группировка по индексу, а проверка импортируемой строки -
+поиск ее отпечатка в индексе вместо соединения таблицы с собой.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+
+from .models import Transaction
+
+
+# Количество отпечатков в одном запросе проверки
+PROBE_CHUNK = 1000
+
+
+def reject_duplicates():
+    """
+    Проверяет, отклоняются ли транзакции, совпадающие с существующими.
+
+    Returns:
+        bool: Значение настройки CASHFLOW_REJECT_DUPLICATES.
+    """
+    return getattr(settings, 'CASHFLOW_REJECT_DUPLICATES', False)
+
+
+def normalize_comment(comment):
+    """
+    Приводит комментарий к виду для сравнения.
+
+    Args:
+        comment (str | None): Комментарий.
+
+    Returns:
+        str: Комментарий в нижнем регистре с одиночными пробелами.
+    """
+    return ' '.join((comment or '').casefold().split())
+
+
+def compute(values):
+    """
+    Вычисляет отпечаток транзакции.
+
+    Args:
+        values (dict | Transaction): Дата операции, сумма, ID подкатегории
+            и комментарий.
+
+    Returns:
+        str: Шестнадцатеричный SHA-1.
+    """
+    if not isinstance(values, dict):
+        values = {
+            'transaction_date': values.transaction_date,
+            'amount': values.amount,
+            'subcategory_id': values.subcategory_id,
+            'comment': values.comment,
+        }
+    transaction_date = values['transaction_date']
+    if isinstance(transaction_date, str):
+        transaction_date = parse_date(transaction_date)
+    key = '|'.join((
+        transaction_date.isoformat(),
+        str(Decimal(values['amount']).quantize(Decimal('0.01'))),
+        str(values['subcategory_id']),
+        normalize_comment(values['comment']),
+    ))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def assign(transactions):
+    """
+    Заполняет отпечатки транзакций перед массовой записью.
+
+    Args:
+        transactions (Iterable): Объекты Transaction.
+    """
+    for item in transactions:
+        item.fingerprint = compute(item)
+
+
+def find_existing(fingerprints, max_id=None):
+    """
+    Ищет сохраненные транзакции с указанными отпечатками.
+
+    Args:
+        fingerprints (Iterable): Отпечатки.
+        max_id (int, optional): Учитывать только транзакции с ID не больше
+            указанного (например, существовавшие до начала импорта).
+
+    Returns:
+        dict: Отпечаток -> ID одной из транзакций с этим отпечатком.
+    """
+    fingerprints = list(set(fingerprints))
+    queryset = Transaction.objects.order_by()
+    if max_id is not None:
+        queryset = queryset.filter(id__lte=max_id)
+    found = {}
+    for start in range(0, len(fingerprints), PROBE_CHUNK):
+        found.update(
+            queryset.filter(
+                fingerprint__in=fingerprints[start:start + PROBE_CHUNK]
+            ).values_list('fingerprint', 'id')
+        )
+    return found
+
+
+def duplicate_groups(queryset, limit=100):
+    """
+    Находит группы транзакций с одинаковыми отпечатками.
+
+    Args:
+        queryset (QuerySet): Отфильтрованные транзакции.
+        limit (int): Максимальное количество групп.
+
+    Returns:
+        list: Группы (отпечаток, количество) по убыванию количества.
+    """
+    return list(
+        queryset.exclude(fingerprint='').order_by().values('fingerprint')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by('-count', 'fingerprint')[:limit]
+    )
@@ -0,0 +1,338 @@
+"""
+Прогноз денежного потока по категориям.
+
+История отфильтрованных транзакций сворачивается в матрицу "категория ×
+период", к которой векторно (для всех категорий сразу) применяется
+классическая аддитивная декомпозиция: тренд - скользящее среднее за сезон,
+сезонная составляющая - средние отклонения от тренда по позициям сезона,
+разброс - стандартное отклонение остатков. Прогноз на следующие периоды
+равен последнему уровню тренда плюс сезонная составляющая, доверительный
+интервал расширяется с горизонтом.
+
+Подобранные модели кэшируются по фильтрам и периоду с версией данных
+транзакций в ключе, поэтому повторные запросы (другой горизонт или уровень
+доверия) не пересчитывают модель, а новые транзакции ее сбрасывают.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import analytics, caching
+from .models import Category
+
+
+# Периоды прогноза: период -> длина сезона в периодах
+SEASONS = {
+    'month': 12,
+    'week': 52,
+}
+
+# Уровни доверия (%) -> квантиль нормального распределения
+Z_SCORES = {
+    80: 1.2816,
+    90: 1.6449,
+    95: 1.96,
+}
+
+# Названия типов операций, образующих приток и отток денежных средств
+INCOME_TYPE = 'Пополнение'
+EXPENSE_TYPE = 'Списание'
+
+# Окно скользящего среднего, если истории меньше двух сезонов
+SHORT_WINDOW = 3
+
+
+def get_max_horizon():
+    """
+    Возвращает максимальный горизонт прогноза.
+
+    Returns:
+        int: Значение настройки CASHFLOW_FORECAST_MAX_HORIZON (периодов).
+    """
+    return getattr(settings, 'CASHFLOW_FORECAST_MAX_HORIZON', 24)
+
+
+def period_index(days, period):
+    """
+    Возвращает порядковые номера периодов для дат.
+
+    Args:
+        days (ndarray | datetime64): Даты (datetime64[D]).
+        period (str): Период (month или week).
+
+    Returns:
+        ndarray: Номера месяцев или недель (с понедельника) от 1970 года.
+    """
+    if period == 'month':
+        return np.asarray(days).astype('datetime64[M]').astype(np.int64)
+    # 1970-01-01 - четверг, сдвиг на 3 дня выравнивает недели по понедельникам
+    return (np.asarray(days).astype('datetime64[D]').astype(np.int64) + 3) // 7
+
+
+def period_label(index, period):
+    """
+    Возвращает подпись периода по его номеру.
+
+    Args:
+        index (int): Номер периода.
+        period (str): Период (month или week).
+
+    Returns:
+        str: Месяц вида 2025-01 или дата понедельника недели.
+    """
+    if period == 'month':
+        return f'{1970 + index // 12}-{index % 12 + 1:02d}'
+    return (date(1970, 1, 1) + timedelta(days=int(index) * 7 - 3)).isoformat()
+
+
+def decompose(matrix, season, first_index):
+    """
+    Векторно подбирает модель "уровень + сезонность" для всех рядов матрицы.
+
+    Args:
+        matrix (ndarray): Суммы по периодам, строка - ряд (категория).
+        season (int): Длина сезона в периодах.
+        first_index (int): Номер первого периода матрицы (для позиций сезона).
+
+    Returns:
+        dict: Уровень, сезонная составляющая, разброс остатков и окно
+        скользящего среднего.
+    """
+    series_count, length = matrix.shape
+    seasonal_model = length >= 2 * season
+    window = season if seasonal_model else min(SHORT_WINDOW, length)
+
+    # Скользящее среднее через накопленные суммы: trend[:, j] - среднее
+    # периодов j .. j + window - 1
+    cumulative = np.cumsum(np.pad(matrix, ((0, 0), (1, 0))), axis=1)
+    trend = (cumulative[:, window:] - cumulative[:, :-window]) / window
+    detrended = matrix[:, window - 1:] - trend
+
+    seasonal = np.zeros((series_count, season))
+    positions = (first_index + np.arange(window - 1, length)) % season
+    if seasonal_model:
+        one_hot = np.zeros((len(positions), season))
+        one_hot[np.arange(len(positions)), positions] = 1
+        seasonal = (detrended @ one_hot) / np.maximum(one_hot.sum(axis=0), 1)
+        seasonal -= seasonal.mean(axis=1, keepdims=True)
+
+    residuals = detrended - seasonal[:, positions]
+    if residuals.shape[1] > 1:
+        sigma = residuals.std(axis=1, ddof=1)
+    else:
+        sigma = np.zeros(series_count)
+
+    return {
+        'level': trend[:, -1],
+        'seasonal': seasonal,
+        'sigma': sigma,
+        'window': window,
+    }
+
+
+def fit(params, period):
+    """
+    Подбирает (или берет из кэша) модели прогноза по категориям.
+
+    История включает завершенные периоды до текущего; транзакции будущих
+    дат не учитываются.
+
+    Args:
+        params (QueryDict | dict): Параметры TransactionFilter.
+        period (str): Период (ключ SEASONS).
+
+    Returns:
+        dict | None: Модель или None, если истории нет.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    filters = {name: params.get(name) for name in analytics.FILTER_PARAMS if params.get(name)}
+    end_index = int(period_index(np.datetime64(timezone.localdate(), 'D'), period)) - 1
+    cache_key = caching.make_cache_key(
+        'forecast-model', {**filters, 'period': period, 'end': end_index}
+    )
+    model = cache.get(cache_key)
+    if model is not None:
+        return model or None
+
+    model = _fit(analytics.load_frame(filters), period, end_index)
+    # Пустой словарь кэширует отсутствие истории
+    cache.set(cache_key, model or {}, caching.get_report_cache_timeout())
+    return model
+
+
+def _fit(frame, period, end_index):
+    """
+    Подбирает модели прогноза по массивам транзакций.
+
+    Args:
+        frame (TransactionFrame): Массивы транзакций.
+        period (str): Период (ключ SEASONS).
+        end_index (int): Номер последнего завершенного периода.
+
+    Returns:
+        dict | None: Модель или None, если истории нет.
+    """
+    indexes = period_index(frame.days, period)
+    mask = indexes <= end_index
+    if not mask.any():
+        return None
+
+    indexes = indexes[mask]
+    amounts = frame.amounts[mask] / 100
+    category_ids, rows = np.unique(frame.category[mask], return_inverse=True)
+    first_index = int(indexes.min())
+
+    matrix = np.zeros((len(category_ids), end_index - first_index + 1))
+    np.add.at(matrix, (rows, indexes - first_index), amounts)
+
+    categories = {
+        row['id']: row
+        for row in Category.objects.filter(id__in=category_ids.tolist()).values(
+            'id', 'name', 'transaction_type_id', 'transaction_type__name'
+        )
+    }
+    kinds = {INCOME_TYPE: 'income', EXPENSE_TYPE: 'expense'}
+    series = []
+    for category_id, history_total in zip(category_ids.tolist(), matrix.sum(axis=1)):
+        category = categories.get(category_id, {})
+        series.append({
+            'id': category_id,
+            'name': category.get('name'),
+            'transaction_type': category.get('transaction_type_id'),
+            'kind': kinds.get(category.get('transaction_type__name')),
+            'history_total': float(history_total),
+        })
+
+    return {
+        'period': period,
+        'first_index': first_index,
+        'end_index': end_index,
+        'series': series,
+        **decompose(matrix, SEASONS[period], first_index),
+    }
+
+
+def _band(forecast, spread, floor=None):
+    """
+    Форматирует прогноз с доверительным интервалом.
+
+    Args:
+        forecast (ndarray): Прогноз по периодам.
+        spread (ndarray): Полуширина интервала по периодам.
+        floor (float, optional): Нижняя граница интервала (0 для потоков).
+
+    Returns:
+        dict: Списки forecast, lower и upper, округленные до копеек.
+    """
+    return {
+        'forecast': np.round(forecast, 2).tolist(),
+        'lower': np.round(np.clip(forecast - spread, floor, None), 2).tolist(),
+        'upper': np.round(forecast + spread, 2).tolist(),
+    }
+
+
+def project(model, horizon, confidence=95):
+    """
+    Строит прогноз по подобранной модели.
+
+    Args:
+        model (dict): Модель из fit.
+        horizon (int): Количество прогнозируемых периодов.
+        confidence (int): Уровень доверия (ключ Z_SCORES).
+
+    Returns:
+        dict: Прогноз по категориям, итоги притока и оттока, сальдо периодов
+        и остаток нарастающим итогом с доверительными интервалами.
+    """
+    period = model['period']
+    steps = np.arange(1, horizon + 1)
+    future = model['end_index'] + steps
+    positions = future % SEASONS[period]
+
+    forecast = np.clip(
+        model['level'][:, None] + model['seasonal'][:, positions], 0, None
+    )
+    spread = Z_SCORES[confidence] * model['sigma'][:, None] * np.sqrt(
+        1 + steps / model['window']
+    )
+
+    kinds = np.array([item['kind'] for item in model['series']], dtype=object)
+    totals = {}
+    for kind in ('income', 'expense'):
+        selected = kinds == kind
+        totals[kind] = (
+            forecast[selected].sum(axis=0),
+            np.sqrt((spread[selected] ** 2).sum(axis=0)),
+        )
+
+    balance = totals['income'][0] - totals['expense'][0]
+    balance_spread = np.hypot(totals['income'][1], totals['expense'][1])
+    history = {kind: 0.0 for kind in ('income', 'expense')}
+    for item in model['series']:
+        if item['kind'] in history:
+            history[item['kind']] += item['history_total']
+    opening = history['income'] - history['expense']
+
+    categories = []
+    for index, item in enumerate(model['series']):
+        categories.append({
+            'id': item['id'],
+            'name': item['name'],
+            'transaction_type': item['transaction_type'],
+            'kind': item['kind'],
+            **_band(forecast[index], spread[index], floor=0),
+        })
+
+    return {
+        'period': period,
+        'horizon': horizon,
+        'confidence': confidence,
+        'history': {
+            'start': period_label(model['first_index'], period),
+            'end': period_label(model['end_index'], period),
+            'periods': model['end_index'] - model['first_index'] + 1,
+        },
+        'periods': [period_label(index, period) for index in future.tolist()],
+        'categories': categories,
+        'income': _band(*totals['income'], floor=0),
+        'expense': _band(*totals['expense'], floor=0),
+        'balance': _band(balance, balance_spread),
+        'closing_balance': {
+            'opening': round(opening, 2),
+            **_band(opening + np.cumsum(balance), np.sqrt(np.cumsum(balance_spread ** 2))),
+        },
+    }
+
+
+def build_forecast(params, period='month', horizon=6, confidence=95):
+    """
+    Строит прогноз денежного потока по отфильтрованной истории.
+
+    Args:
+        params (QueryDict | dict): Параметры TransactionFilter.
+        period (str): Период (ключ SEASONS).
+        horizon (int): Количество прогнозируемых периодов.
+        confidence (int): Уровень доверия (ключ Z_SCORES).
+
+    Returns:
+        dict: Прогноз (без рядов, если истории нет).
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    model = fit(params, period)
+    if model is None:
+        return {
+            'period': period,
+            'horizon': horizon,
+            'confidence': confidence,
+            'history': None,
+            'periods': [],
+            'categories': [],
+        }
+    return project(model, horizon, confidence)
@@ -0,0 +1,458 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Веб-процессы только создают записи Job, а выполняет их команда run_jobs
+в отдельных потоках или процессах. Задача захватывается обработчиком
+условным UPDATE по состоянию, поэтому одну задачу не возьмут два обработчика.
+Пока задача выполняется, обработчик продлевает ее аренду; задача с истекшей
+арендой возвращается в очередь.
+Типы задач регистрируются декоратором register.
+"""
+import csv
+import io
+import json
+import logging
+import tempfile
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import batch, transfer, upsert
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Зарегистрированные типы задач: тип -> функция handler(job)
+JOB_HANDLERS = {}
+
+
+class JobError(Exception):
+    """
+    Ошибка выполнения задачи, текст которой показывается клиенту.
+    """
+
+
+def register(kind):
+    """
+    Регистрирует функцию выполнения задачи указанного типа.
+
+    Args:
+        kind (str): Тип задачи.
+
+    Returns:
+        callable: Декоратор функции handler(job).
+    """
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def get_poll_interval():
+    """
+    Возвращает интервал опроса очереди.
+
+    Returns:
+        float: Значение настройки CASHFLOW_JOB_POLL_INTERVAL (секунды).
+    """
+    return getattr(settings, 'CASHFLOW_JOB_POLL_INTERVAL', 2)
+
+
+def submit(kind, params=None, input_file=None):
+    """
+    Ставит задачу в очередь.
+
+    Args:
+        kind (str): Тип задачи (ключ JOB_HANDLERS).
+        params (dict, optional): Параметры задачи.
+        input_file (File, optional): Входной файл.
+
+    Returns:
+        Job: Созданная задача.
+
+    Raises:
+        ValueError: Если тип задачи не зарегистрирован.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(kind)
+    job = Job(kind=kind, params=params or {})
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def get_lease_timeout():
+    """
+    Возвращает срок аренды выполняемой задачи.
+
+    Returns:
+        timedelta: Значение настройки CASHFLOW_JOB_LEASE_TIMEOUT (секунды).
+    """
+    return timedelta(seconds=getattr(settings, 'CASHFLOW_JOB_LEASE_TIMEOUT', 300))
+
+
+def get_max_attempts():
+    """
+    Возвращает максимальное количество захватов одной задачи.
+
+    Returns:
+        int: Значение настройки CASHFLOW_JOB_MAX_ATTEMPTS.
+    """
+    return getattr(settings, 'CASHFLOW_JOB_MAX_ATTEMPTS', 3)
+
+
+def requeue_expired():
+    """
+    Возвращает в очередь задачи, аренда которых истекла.
+
+    Аренда истекает, если обработчик завершился, не закончив задачу
+    (аварийное завершение процесса, перезапуск сервера). Задачи,
+    исчерпавшие CASHFLOW_JOB_MAX_ATTEMPTS захватов, завершаются ошибкой.
+
+    Returns:
+        int: Количество задач, возвращенных в очередь.
+    """
+    deadline = timezone.now() - get_lease_timeout()
+    expired = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat_at__lt=deadline) |
+        Q(heartbeat_at__isnull=True, started_at__lt=deadline)
+    )
+    expired.filter(attempts__gte=get_max_attempts()).update(
+        status=Job.FAILED,
+        error="Обработчик задачи завершился аварийно, попытки исчерпаны",
+        finished_at=timezone.now()
+    )
+    return expired.update(
+        status=Job.QUEUED,
+        worker='',
+        message="Возвращена в очередь после аварийного завершения обработчика"
+    )
+
+
+def claim_next(worker):
+    """
+    Захватывает самую старую задачу из очереди.
+
+    Перед захватом в очередь возвращаются задачи с истекшей арендой.
+
+    Args:
+        worker (str): Имя обработчика.
+
+    Returns:
+        Job | None: Захваченная задача или None, если очередь пуста.
+    """
+    requeue_expired()
+    while True:
+        job = (
+            Job.objects.filter(status=Job.QUEUED)
+            .order_by('created_date', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+            worker=worker,
+            progress=0
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+class Heartbeat:
+    """
+    Продлевает аренду выполняемой задачи из отдельного потока.
+
+    Используется как контекстный менеджер на время выполнения задачи;
+    аренда продлевается с интервалом в треть срока аренды.
+
+    Attributes:
+        job (Job): Выполняемая задача.
+        interval (float): Интервал продления (секунды).
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval or get_lease_timeout().total_seconds() / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f'job-heartbeat-{job.pk}', daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                Job.objects.filter(
+                    pk=self.job.pk, status=Job.RUNNING, worker=self.job.worker
+                ).update(heartbeat_at=timezone.now())
+        finally:
+            # Соединения с БД принадлежат потоку
+            connections.close_all()
+
+
+def store_result(job, name, content):
+    """
+    Сохраняет файл результата задачи.
+
+    Args:
+        job (Job): Задача.
+        name (str): Имя файла результата.
+        content (File): Содержимое файла.
+    """
+    job.result.save(f'{job.pk}-{name}', content, save=False)
+    Job.objects.filter(pk=job.pk).update(result=job.result.name)
+
+
+def run_job(job):
+    """
+    Выполняет захваченную задачу и сохраняет итоговое состояние.
+
+    Args:
+        job (Job): Задача в состоянии RUNNING.
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise JobError(f"Неизвестный тип задачи: {job.kind}")
+        with Heartbeat(job):
+            handler(job)
+    except JobError as error:
+        _finish(job, Job.FAILED, error=str(error))
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        _finish(job, Job.FAILED, error=traceback.format_exc())
+    else:
+        _finish(job, Job.SUCCEEDED)
+
+
+def _finish(job, status, error=''):
+    """
+    Сохраняет итоговое состояние задачи.
+
+    Args:
+        job (Job): Задача.
+        status (str): Итоговое состояние.
+        error (str): Текст ошибки.
+    """
+    values = {
+        'status': status,
+        'error': error,
+        'finished_at': timezone.now(),
+    }
+    if status == Job.SUCCEEDED:
+        values['progress'] = 100
+    # Задачу, возвращенную в очередь и захваченную другим обработчиком,
+    # не перезаписываем
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(**values)
+
+
+def worker_loop(worker, stop_event, poll_interval=None, once=False):
+    """
+    Цикл обработчика: захват и выполнение задач до сигнала остановки.
+
+    Args:
+        worker (str): Имя обработчика.
+        stop_event (Event): Событие остановки (threading или multiprocessing).
+        poll_interval (float, optional): Интервал опроса пустой очереди.
+        once (bool): Завершиться, когда очередь опустеет.
+    """
+    poll_interval = poll_interval or get_poll_interval()
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            job = claim_next(worker)
+            if job is None:
+                if once:
+                    return
+                stop_event.wait(poll_interval)
+                continue
+            run_job(job)
+    finally:
+        connections.close_all()
+
+
+def _progress_reporter(job, message):
+    """
+    Возвращает функцию progress(done, total), сохраняющую прогресс задачи.
+
+    Args:
+        job (Job): Задача.
+        message (str): Описание этапа.
+
+    Returns:
+        callable: Функция обновления прогресса.
+    """
+    def progress(done, total):
+        job.set_progress(done * 100 // total if total else 0, f"{message}: {done}/{total}")
+    return progress
+
+
+def build_job_request():
+    """
+    Создает HttpRequest для вызова представлений API из задачи.
+
+    Returns:
+        HttpRequest: Анонимный GET-запрос к хосту CASHFLOW_JOB_HOST.
+    """
+    host = getattr(settings, 'CASHFLOW_JOB_HOST', 'localhost')
+    request = HttpRequest()
+    request.META = {
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+    }
+    request.user = AnonymousUser()
+    return request
+
+
+@register('report')
+def run_report(job):
+    """
+    Выполняет отчет API (например, transactions/pivot/) и сохраняет JSON.
+
+    Параметры: path - путь GET-запроса к API с параметрами.
+
+    Args:
+        job (Job): Задача.
+
+    Raises:
+        JobError: Если путь не указан или отчет завершился ошибкой.
+    """
+    path = job.params.get('path')
+    if not isinstance(path, str) or not path:
+        raise JobError("Не указан параметр path")
+
+    job.set_progress(0, "Построение отчета")
+    result = batch.dispatch(build_job_request(), path)
+    if result['status'] >= 400:
+        raise JobError(json.dumps(result['body'], ensure_ascii=False, default=str))
+    store_result(job, 'report.json', ContentFile(JSONRenderer().render(result['body'])))
+
+
+@register('export')
+def run_export(job):
+    """
+    Выгружает отфильтрованные транзакции в CSV.
+
+    Параметры: filters - параметры фильтра списка транзакций.
+
+    Args:
+        job (Job): Задача.
+
+    Raises:
+        JobError: Если параметры фильтра некорректны.
+    """
+    filters = job.params.get('filters') or {}
+    with tempfile.TemporaryFile() as output:
+        text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+        try:
+            count = transfer.export_transactions(
+                filters, text, _progress_reporter(job, "Выгружено")
+            )
+        except ValueError as error:
+            raise JobError(f"Некорректные фильтры: {error}")
+        text.flush()
+        output.seek(0)
+        store_result(job, 'transactions.csv', File(output))
+        text.detach()
+    job.set_progress(100, f"Выгружено транзакций: {count}")
+
+
+@register('import')
+def run_import(job):
+    """
+    Импортирует транзакции из загруженного CSV и сохраняет отчет в JSON.
+
+    Параметры: reject_duplicates - отклонять строки, совпадающие
+    с существующими транзакциями (по умолчанию из настроек).
+
+    Args:
+        job (Job): Задача с входным файлом.
+
+    Raises:
+        JobError: Если входной файл не загружен или не является CSV в UTF-8.
+    """
+    if not job.input_file:
+        raise JobError("Не загружен входной файл")
+
+    with job.input_file.open('rb') as source:
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+        try:
+            report = transfer.import_transactions(
+                text,
+                progress=_progress_reporter(job, "Обработано строк"),
+                reject_duplicates=job.params.get('reject_duplicates')
+            )
+        except UnicodeDecodeError:
+            raise JobError("Файл должен быть в кодировке UTF-8")
+
+    store_result(job, 'import.json', ContentFile(JSONRenderer().render(report)))
+    job.set_progress(
+        100, f"Создано: {report['created']}, ошибок: {len(report['errors'])}"
+    )
+
+
+@register('upsert')
+def run_upsert(job):
+    """
+    Добавляет или обновляет транзакции из загруженного CSV по внешнему
+    идентификатору и сохраняет отчет в JSON.
+
+    Параметры: source - код источника; столбец reference файла содержит
+    идентификатор строки в источнике.
+
+    Args:
+        job (Job): Задача с входным файлом.
+
+    Raises:
+        JobError: Если входной файл не загружен, не является CSV в UTF-8
+            или код источника некорректен.
+    """
+    if not job.input_file:
+        raise JobError("Не загружен входной файл")
+
+    with job.input_file.open('rb') as source:
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+        try:
+            report = upsert.upsert_transactions(
+                csv.DictReader(text),
+                job.params.get('source'),
+                progress=_progress_reporter(job, "Обработано строк"),
+                start=2
+            )
+        except UnicodeDecodeError:
+            raise JobError("Файл должен быть в кодировке UTF-8")
+        except ValueError as error:
+            raise JobError(str(error))
+
+    store_result(job, 'upsert.json', ContentFile(JSONRenderer().render(report)))
+    job.set_progress(
+        100,
+        f"Создано: {report['created']}, обновлено: {report['updated']}, "
+        f"без изменений: {report['unchanged']}, ошибок: {len(report['errors'])}"
+    )
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from dds_app_api.archive import archive_to_table, archive_to_ndjson
+from dds_app_api.models import ArchiveSegment, Transaction, ArchivedTransaction
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для переноса старых транзакций в архив.
+
+    Переносит транзакции, совершенные до указанной даты, из основной таблицы
+    в архивную таблицу или в сжатый NDJSON-сегмент. Итоги по перенесенным
+    операциям сохраняются в таблице итогов архива.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Архивация транзакций старше указанной даты'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            '--before',
+            required=True,
+            help='Граница архивации в формате YYYY-MM-DD'
+        )
+        parser.add_argument(
+            '--storage',
+            choices=[choice for choice, _ in ArchiveSegment.STORAGE_CHOICES],
+            default=ArchiveSegment.STORAGE_TABLE,
+            help='Хранилище архива: архивная таблица или NDJSON-файл'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество транзакций в одной порции'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать количество транзакций для переноса'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если дата указана в неверном формате.
+        """
+        try:
+            cutoff = parse_date(options['before'])
+        except ValueError:
+            cutoff = None
+        if cutoff is None:
+            raise CommandError('Неверный формат даты, ожидается YYYY-MM-DD')
+
+        storage = options['storage']
+
+        if options['dry_run']:
+            count = Transaction.objects.filter(transaction_date__lt=cutoff).count()
+            if storage == ArchiveSegment.STORAGE_NDJSON:
+                count += ArchivedTransaction.objects.filter(
+                    transaction_date__lt=cutoff
+                ).count()
+            self.stdout.write(f'Транзакций для переноса: {count}')
+            return
+
+        self.stdout.write(f'🔄 Архивация транзакций до {cutoff}...')
+
+        if storage == ArchiveSegment.STORAGE_NDJSON:
+            segment = archive_to_ndjson(cutoff, options['batch_size'])
+        else:
+            segment = archive_to_table(cutoff, options['batch_size'])
+
+        if segment is None:
+            self.stdout.write('Нет транзакций для архивации')
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Перенесено {segment.row_count} транзакций '
+                f'на сумму {segment.total_amount}р.'
+            )
+        )
+        if segment.path:
+            self.stdout.write(f'Файл сегмента: {segment.path}')
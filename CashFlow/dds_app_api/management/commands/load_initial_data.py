@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from dds_app_api import upsert
 from dds_app_api.models import (
     Status,
     TransactionType,
@@ -7,11 +8,19 @@ from dds_app_api.models import (
     Transaction
 )
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from decimal import Decimal
 import random
 from datetime import datetime, timedelta
 
 
+# Код источника демонстрационных транзакций
+DEMO_SOURCE = 'demo'
+# Начальное значение генератора демонстрационных транзакций: повторный
+# запуск дает те же суммы, подкатегории и смещения дат
+DEMO_SEED = 2024
+
+
 class Command(BaseCommand):
     """
     Кастомная команда Django для заполнения базы данных начальными данными.
@@ -428,9 +437,12 @@ class Command(BaseCommand):
         Создает тестовые транзакции для демонстрации работы системы.
 
         Генерирует случайные транзакции за последние 6 месяцев,
-        включая доходы, расходы и налоговые платежи.
+        включая доходы, расходы и налоговые платежи. Генератор инициализируется
+        DEMO_SEED, поэтому транзакции demo:sample-<номер> при повторном
+        запуске получают те же суммы и подкатегории.
         """
         self.stdout.write('💰 Создание тестовых транзакций...')
+        rng = random.Random(DEMO_SEED)
 
         # Получаем все необходимые объекты
         business_status = Status.objects.get(name='Бизнес')
@@ -440,12 +452,17 @@ class Command(BaseCommand):
         income_type = TransactionType.objects.get(name='Пополнение')
         expense_type = TransactionType.objects.get(name='Списание')
 
-        # Получаем случайные подкатегории для каждого типа
+        # Получаем подкатегории для каждого типа в постоянном порядке,
+        # чтобы выбор генератора не зависел от ID
         income_subcategories = list(
-            Subcategory.objects.filter(category__transaction_type=income_type)
+            Subcategory.objects.filter(
+                category__transaction_type=income_type
+            ).order_by('category__name', 'name')
         )
         expense_subcategories = list(
-            Subcategory.objects.filter(category__transaction_type=expense_type)
+            Subcategory.objects.filter(
+                category__transaction_type=expense_type
+            ).order_by('category__name', 'name')
         )
 
         # Создаем 40+ транзакций за последние 6 месяцев
@@ -453,8 +470,8 @@ class Command(BaseCommand):
 
         # Доходные транзакции (20 штук)
         for i in range(20):
-            date = timezone.now() - timedelta(days=random.randint(1, 180))
-            subcategory = random.choice(income_subcategories)
+            date = timezone.now() - timedelta(days=rng.randint(1, 180))
+            subcategory = rng.choice(income_subcategories)
 
             transactions_data.append({
                 'transaction_date': date.date(),
@@ -462,20 +479,20 @@ class Command(BaseCommand):
                 'transaction_type': income_type,
                 'category': subcategory.category,
                 'subcategory': subcategory,
-                'amount': Decimal(str(round(random.uniform(1000, 50000), 2))),
+                'amount': Decimal(str(round(rng.uniform(1000, 50000), 2))),
                 'comment': f'{subcategory.name} - {date.strftime("%B %Y")}'
             })
 
         # Расходные транзакции (20 штук)
         for i in range(20):
-            date = timezone.now() - timedelta(days=random.randint(1, 180))
-            subcategory = random.choice(expense_subcategories)
+            date = timezone.now() - timedelta(days=rng.randint(1, 180))
+            subcategory = rng.choice(expense_subcategories)
 
-            amount = Decimal(str(round(random.uniform(500, 20000), 2)))
+            amount = Decimal(str(round(rng.uniform(500, 20000), 2)))
 
             transactions_data.append({
                 'transaction_date': date.date(),
-                'status': business_status if random.random() > 0.3 else personal_status,
+                'status': business_status if rng.random() > 0.3 else personal_status,
                 'transaction_type': expense_type,
                 'category': subcategory.category,
                 'subcategory': subcategory,
@@ -488,11 +505,11 @@ class Command(BaseCommand):
         if tax_categories.exists():
             tax_subcategories = Subcategory.objects.filter(
                 category=tax_categories.first()
-            )
+            ).order_by('name')
 
             for i in range(5):
-                date = timezone.now() - timedelta(days=random.randint(30, 180))
-                subcategory = random.choice(list(tax_subcategories))
+                date = timezone.now() - timedelta(days=rng.randint(30, 180))
+                subcategory = rng.choice(list(tax_subcategories))
 
                 transactions_data.append({
                     'transaction_date': date.date(),
@@ -500,24 +517,14 @@ class Command(BaseCommand):
                     'transaction_type': expense_type,
                     'category': subcategory.category,
                     'subcategory': subcategory,
-                    'amount': Decimal(str(round(random.uniform(5000, 30000), 2))),
+                    'amount': Decimal(str(round(rng.uniform(5000, 30000), 2))),
                     'comment': f'Налоговый платеж - {subcategory.name}'
                 })
 
         # Создаем транзакции в базе данных
-        created_count = 0
-        for transaction_data in transactions_data:
-            transaction, created = Transaction.objects.get_or_create(
-                transaction_date=transaction_data['transaction_date'],
-                amount=transaction_data['amount'],
-                subcategory=transaction_data['subcategory'],
-                defaults=transaction_data
-            )
-
-            if created:
-                created_count += 1
+        report = self.save_transactions(transactions_data, 'sample')
 
-        self.stdout.write(f'✓ Создано {created_count} тестовых транзакций')
+        self.stdout.write(f'✓ Создано {report["created"]} тестовых транзакций')
 
         # Добавляем несколько конкретных примеров для демонстрации
         specific_transactions = [
@@ -550,16 +557,40 @@ class Command(BaseCommand):
             },
         ]
 
-        for transaction_data in specific_transactions:
-            transaction, created = Transaction.objects.get_or_create(
-                transaction_date=transaction_data['transaction_date'],
-                amount=transaction_data['amount'],
-                subcategory=transaction_data['subcategory'],
-                defaults=transaction_data
-            )
-
-            if created:
+        report = self.save_transactions(specific_transactions, 'example')
+        if report['created']:
+            for transaction_data in specific_transactions:
                 self.stdout.write(
-                    f'✓ Добавлена демо-транзакция: {transaction.amount}р. - '
-                    f'{transaction.subcategory.name}'
-                )
\ No newline at end of file
+                    f'✓ Добавлена демо-транзакция: {transaction_data["amount"]}р. - '
+                    f'{transaction_data["subcategory"].name}'
+                )
+
+    def save_transactions(self, transactions_data, prefix):
+        """
+        Сохраняет транзакции с внешними идентификаторами demo:<prefix>-<номер>.
+
+        Повторный запуск обновляет транзакции с теми же идентификаторами,
+        а не создает новые, поэтому совпадающие по дате, сумме
+        и подкатегории операции не теряются.
+
+        Args:
+            transactions_data (list): Данные транзакций со связанными объектами.
+            prefix (str): Префикс ссылок в источнике demo.
+
+        Returns:
+            dict: Количество созданных, обновленных и неизмененных транзакций.
+        """
+        rows = [
+            {
+                'transaction_date': parse_date(str(transaction_data['transaction_date'])),
+                'status_id': transaction_data['status'].id,
+                'transaction_type_id': transaction_data['transaction_type'].id,
+                'category_id': transaction_data['category'].id,
+                'subcategory_id': transaction_data['subcategory'].id,
+                'amount': transaction_data['amount'],
+                'comment': transaction_data['comment'],
+                'external_id': upsert.make_external_id(DEMO_SOURCE, f'{prefix}-{index}'),
+            }
+            for index, transaction_data in enumerate(transactions_data, start=1)
+        ]
+        return upsert.upsert_values(rows)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from dds_app_api import recurring
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для создания транзакций по шаблонам регулярных операций.
+
+    Создает транзакции на все наступившие даты расписаний, включая даты,
+    пропущенные за время простоя. Повторный запуск не создает дубликатов,
+    поэтому команду можно запускать по расписанию (например, ежедневно).
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Создание транзакций по шаблонам регулярных операций'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            '--until',
+            help='Создать операции по указанную дату (YYYY-MM-DD, по умолчанию сегодня)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество шаблонов в порции и транзакций в пакете'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать количество операций для создания'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если дата или размер порции указаны неверно.
+        """
+        until = None
+        if options['until']:
+            try:
+                until = parse_date(options['until'])
+            except ValueError:
+                until = None
+            if until is None:
+                raise CommandError('Неверный формат даты, ожидается YYYY-MM-DD')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
+
+        result = recurring.materialize(
+            until=until,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run']
+        )
+
+        for template_id, error in result['errors'].items():
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Шаблон #{template_id} пропущен: {error}'
+            ))
+        if options['dry_run']:
+            self.stdout.write(
+                f"Операций для создания: {result['created']} "
+                f"(шаблонов: {result['templates']})"
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Создано транзакций: {result['created']} "
+            f"(шаблонов: {result['templates']})"
+        ))
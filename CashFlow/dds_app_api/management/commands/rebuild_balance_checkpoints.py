@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from dds_app_api import balances
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для пересчета остатков на конец месяца.
+
+    Отметки остатков обновляются автоматически при записи транзакций через
+    ORM. Команда нужна при первом развертывании, после изменения настройки
+    CASHFLOW_BALANCE_DIMENSIONS или названий типов операций и после массовых
+    изменений в обход сигналов.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Пересчет остатков на конец месяца по всем транзакциям и архиву'
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+        """
+        count = balances.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Остатки пересчитаны, отметок: {count}')
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from dds_app_api import counters
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для пересчета счетчиков транзакций.
+
+    Счетчики обновляются автоматически при записи транзакций через ORM.
+    Команда нужна после массовых изменений в обход сигналов (например,
+    прямых SQL-запросов или восстановления из резервной копии).
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Пересчет счетчиков транзакций по основной таблице'
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+        """
+        counters.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Счетчики пересчитаны, транзакций: {counters.get_total()}'
+            )
+        )
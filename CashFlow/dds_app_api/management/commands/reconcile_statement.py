@@ -0,0 +1,114 @@
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dds_app_api import reconcile
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для сверки банковской выписки с транзакциями.
+
+    Сопоставляет строки выписки с транзакциями за период выписки с допусками
+    по дате и сумме и выводит итоги, строки выписки без транзакций и
+    транзакции, отсутствующие в выписке.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Сверка банковской выписки (CSV) с транзакциями'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            'path',
+            help='CSV-файл выписки со столбцами date, amount (со знаком), '
+                 'reference, description'
+        )
+        parser.add_argument(
+            '--date-tolerance',
+            type=int,
+            help='Допуск по дате в днях (по умолчанию из настроек)'
+        )
+        parser.add_argument(
+            '--amount-tolerance',
+            help='Допуск по сумме (по умолчанию из настроек)'
+        )
+        parser.add_argument(
+            '--status',
+            type=int,
+            help='ID статуса транзакций счета'
+        )
+        parser.add_argument(
+            '--category',
+            type=int,
+            help='ID категории транзакций счета'
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить полный результат в JSON-файл'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если файл недоступен или параметры некорректны.
+        """
+        amount_tolerance = None
+        if options['amount_tolerance'] is not None:
+            try:
+                amount_tolerance = Decimal(options['amount_tolerance'])
+            except InvalidOperation:
+                raise CommandError('Допуск по сумме должен быть числом')
+        filters = {
+            name: options[name] for name in ('status', 'category')
+            if options[name] is not None
+        }
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as source:
+                result = reconcile.reconcile_statement(
+                    source, filters, options['date_tolerance'], amount_tolerance
+                )
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть файл: {error}')
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        for error in result['errors']:
+            self.stdout.write(
+                self.style.WARNING(f"⚠ Строка {error['line']}: {error['error']}")
+            )
+        for line in result['missing']:
+            self.stdout.write(
+                f"✗ Нет в учете: строка {line['line']}, {line['date']}, "
+                f"{line['amount']} {line['reference']}".rstrip()
+            )
+        for item in result['extra']:
+            self.stdout.write(
+                f"✗ Нет в выписке: транзакция {item['transaction']}, "
+                f"{item['date']}, {item['amount']}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(result, output, ensure_ascii=False, indent=2, default=str)
+
+        summary = result['summary']
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Строк выписки: {summary['lines']}, сопоставлено: {summary['matched']}, "
+            f"нет в учете: {summary['missing']}, нет в выписке: {summary['extra']}"
+        ))
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import socket
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dds_app_api import jobs
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для выполнения фоновых задач из очереди.
+
+    Запускает пул обработчиков (потоков или процессов), каждый из которых
+    захватывает задачи из таблицы Job и выполняет их. Процессы подходят
+    для задач, нагружающих процессор (отчеты), потоки - для задач,
+    ограниченных вводом-выводом (экспорт, импорт).
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Выполнение фоновых задач (отчеты, экспорт, импорт)'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Количество обработчиков'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['threads', 'processes'],
+            default='threads',
+            help='Тип обработчиков: потоки или процессы'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='Интервал опроса пустой очереди в секундах'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задачи из очереди и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если параметры пула некорректны.
+        """
+        if options['workers'] < 1:
+            raise CommandError('Количество обработчиков должно быть больше нуля')
+
+        if options['mode'] == 'processes':
+            if 'fork' not in multiprocessing.get_all_start_methods():
+                raise CommandError('Режим процессов недоступен на этой платформе')
+            context = multiprocessing.get_context('fork')
+            stop_event = context.Event()
+            # Дочерние процессы не должны наследовать открытые соединения с БД
+            connections.close_all()
+            worker_class = context.Process
+        else:
+            stop_event = threading.Event()
+            worker_class = threading.Thread
+
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        workers = [
+            worker_class(
+                target=jobs.worker_loop,
+                args=(f'{prefix}:{index}', stop_event),
+                kwargs={
+                    'poll_interval': options['poll_interval'],
+                    'once': options['once'],
+                },
+                name=f'job-worker-{index}',
+                daemon=True
+            )
+            for index in range(options['workers'])
+        ]
+
+        self.stdout.write(
+            f"🔄 Запуск обработчиков задач: {options['workers']} ({options['mode']})"
+        )
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('⏹️  Остановка после завершения текущих задач...')
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+
+        self.stdout.write(self.style.SUCCESS('✅ Обработчики задач остановлены'))
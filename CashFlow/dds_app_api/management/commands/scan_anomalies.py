@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from dds_app_api import anomalies
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для полной проверки транзакций на аномальные суммы.
+
+    Пересчитывает статистики сумм по подкатегориям, по которым затем
+    проверяются новые транзакции, и заменяет список найденных аномалий.
+    Команду следует запускать периодически (например, раз в сутки)
+    и после массовой загрузки или изменения данных.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Полная проверка транзакций на аномальные суммы по подкатегориям'
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+        """
+        result = anomalies.scan()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Проверено транзакций: {result['checked']}, "
+            f"подкатегорий: {result['subcategories']}"
+        ))
+        if result['anomalies']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Найдено аномалий: {result['anomalies']}"
+            ))
+        else:
+            self.stdout.write('ℹ️ Аномалии не найдены')
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+
+from dds_app_api import slowlog
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для сводки журнала медленных SQL-запросов.
+
+    Группирует записи журнала (включая ротированные файлы) по форме
+    запроса, месту вызова или действию API и выводит группы с наибольшим
+    суммарным временем выполнения.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Сводка журнала медленных SQL-запросов по суммарному времени'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            '--by',
+            choices=['sql', 'call_site', 'action'],
+            default='sql',
+            help='Группировка: форма запроса, место вызова или действие API'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Количество выводимых групп (по умолчанию 10)'
+        )
+        parser.add_argument(
+            '--log',
+            help='Файл журнала (по умолчанию CASHFLOW_SLOW_QUERY_LOG)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+        """
+        groups = slowlog.summarize(
+            slowlog.read_entries(options['log']), options['by'], options['top']
+        )
+        if not groups:
+            self.stdout.write('ℹ️ Медленные запросы не найдены')
+            return
+
+        for number, group in enumerate(groups, 1):
+            example = group['example']
+            self.stdout.write(self.style.WARNING(
+                f"{number}. {group['total_ms']} мс всего, {group['count']} раз, "
+                f"в среднем {group['avg_ms']} мс, максимум {group['max_ms']} мс"
+            ))
+            self.stdout.write(f"   {group['key']}")
+            if options['by'] != 'sql':
+                self.stdout.write(f"   SQL: {slowlog.normalize_sql(example.get('sql', ''))}")
+            if options['by'] != 'call_site':
+                self.stdout.write(f"   Место вызова: {example.get('call_site') or '-'}")
+            if example.get('path'):
+                self.stdout.write(
+                    f"   Запрос: {example.get('method')} {example['path']} "
+                    f"({example.get('view') or '-'}.{example.get('action') or '-'})"
+                )
+            self.stdout.write(f"   Параметры: {example.get('params')}")
@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from dds_app_api import snapshot
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для создания и обновления колоночного снимка транзакций.
+
+    Снимок используется аналитикой вместо загрузки транзакций из БД.
+    Команду следует запускать при развертывании (чтобы снимок был готов
+    до первых запросов) и, при необходимости, в режиме --watch, чтобы
+    изменения дописывались в снимок в фоне, а не при запросах аналитики.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Создание и инкрементальное обновление колоночного снимка транзакций'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Перестроить снимок заново'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Обновлять снимок непрерывно'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Интервал обновления в режиме --watch (секунды)'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если интервал обновления некорректен.
+        """
+        if options['interval'] <= 0:
+            raise CommandError('Интервал обновления должен быть больше нуля')
+
+        if options['rebuild']:
+            meta = snapshot.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Снимок перестроен: поколение {meta['generation']}, "
+                f"строк: {meta['count']}"
+            ))
+        else:
+            self._refresh()
+
+        if not options['watch']:
+            return
+
+        self.stdout.write(f"🔄 Обновление снимка каждые {options['interval']} с")
+        try:
+            while True:
+                time.sleep(options['interval'])
+                close_old_connections()
+                self._refresh(quiet=True)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('✅ Обновление снимка остановлено'))
+
+    def _refresh(self, quiet=False):
+        """
+        Дописывает изменения в снимок и выводит результат.
+
+        Args:
+            quiet (bool): Не выводить сообщение, если изменений нет.
+        """
+        meta = snapshot.refresh()
+        if meta['appended'] is None:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Снимок перестроен: поколение {meta['generation']}, "
+                f"строк: {meta['count']}"
+            ))
+        elif meta['appended'] or not quiet:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Снимок обновлен: дописано строк: {meta['appended']}, "
+                f"актуальных: {meta['live']}, устаревших: {meta['count'] - meta['live']}"
+            ))
@@ -0,0 +1,78 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dds_app_api import upsert
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для повторяемой загрузки транзакций из CSV.
+
+    Каждая строка файла получает внешний идентификатор из кода источника
+    и столбца reference. Новые строки добавляются, загруженные ранее
+    обновляются, поэтому повторный запуск с тем же файлом безопасен.
+
+    Attributes:
+        help (str): Краткое описание команды для интерфейса командной строки.
+    """
+
+    help = 'Загрузка транзакций из CSV с обновлением по внешнему идентификатору'
+
+    def add_arguments(self, parser):
+        """
+        Добавляет аргументы командной строки.
+
+        Args:
+            parser (ArgumentParser): Парсер аргументов.
+        """
+        parser.add_argument(
+            'path',
+            help='CSV-файл со столбцами reference, transaction_date, status, '
+                 'transaction_type, category, subcategory, amount, comment'
+        )
+        parser.add_argument(
+            '--source',
+            required=True,
+            help='Код источника (например, bank)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество транзакций в одном запросе'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Основной метод обработки команды.
+
+        Args:
+            *args: Аргументы командной строки.
+            **options: Опции командной строки.
+
+        Raises:
+            CommandError: Если файл недоступен или код источника некорректен.
+        """
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as source:
+                report = upsert.upsert_transactions(
+                    csv.DictReader(source),
+                    options['source'],
+                    batch_size=options['batch_size'],
+                    start=2
+                )
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть файл: {error}')
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        for error in report['errors']:
+            self.stdout.write(
+                self.style.WARNING(f"⚠ Строка {error['line']}: {error['error']}")
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Создано: {report['created']}, обновлено: {report['updated']}, "
+            f"без изменений: {report['unchanged']}, в архиве: {report['archived']}, "
+            f"ошибок: {len(report['errors'])}"
+        ))
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage', models.CharField(choices=[('table', 'Архивная таблица'), ('ndjson', 'Сжатый NDJSON-файл')], max_length=10, verbose_name='Хранилище')),
+                ('cutoff', models.DateField(verbose_name='Граница архивации')),
+                ('date_from', models.DateField(blank=True, null=True, verbose_name='Дата операций с')),
+                ('date_to', models.DateField(blank=True, null=True, verbose_name='Дата операций по')),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='Количество транзакций')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Сумма')),
+                ('path', models.CharField(blank=True, max_length=500, verbose_name='Файл сегмента')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Сегмент архива',
+                'verbose_name_plural': 'Сегменты архива',
+                'ordering': ['-created_date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_date',
+            field=models.DateField(db_index=True, verbose_name='Дата операции'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(verbose_name='Дата создания')),
+                ('transaction_date', models.DateField(db_index=True, verbose_name='Дата операции')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Сумма')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transactions', to='dds_app_api.category', verbose_name='Категория')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transactions', to='dds_app_api.status', verbose_name='Статус')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transactions', to='dds_app_api.subcategory', verbose_name='Подкатегория')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transactions', to='dds_app_api.transactiontype', verbose_name='Тип операции')),
+            ],
+            options={
+                'verbose_name': 'Архивная транзакция',
+                'verbose_name_plural': 'Архивные транзакции',
+                'ordering': ['-transaction_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage', models.CharField(choices=[('table', 'Архивная таблица'), ('ndjson', 'Сжатый NDJSON-файл')], max_length=10, verbose_name='Хранилище')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Сумма')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dds_app_api.category', verbose_name='Категория')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dds_app_api.status', verbose_name='Статус')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dds_app_api.subcategory', verbose_name='Подкатегория')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dds_app_api.transactiontype', verbose_name='Тип операции')),
+            ],
+            options={
+                'verbose_name': 'Итоги архива',
+                'verbose_name_plural': 'Итоги архива',
+                'unique_together': {('storage', 'month', 'status', 'transaction_type', 'category', 'subcategory')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:17
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def build_counters(apps, schema_editor):
+    Transaction = apps.get_model('dds_app_api', 'Transaction')
+    TransactionCounter = apps.get_model('dds_app_api', 'TransactionCounter')
+
+    counters = [
+        TransactionCounter(dimension='all', key='', count=Transaction.objects.count())
+    ]
+    for dimension in ('status', 'transaction_type', 'category', 'subcategory'):
+        field = f'{dimension}_id'
+        for row in Transaction.objects.order_by().values(field).annotate(count=Count('id')):
+            counters.append(
+                TransactionCounter(dimension=dimension, key=str(row[field]), count=row['count'])
+            )
+    for row in (
+        Transaction.objects.order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('month').annotate(count=Count('id'))
+    ):
+        counters.append(
+            TransactionCounter(dimension='month', key=f"{row['month']:%Y-%m}", count=row['count'])
+        )
+    TransactionCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0002_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20, verbose_name='Измерение')),
+                ('key', models.CharField(blank=True, max_length=20, verbose_name='Значение')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик транзакций',
+                'verbose_name_plural': 'Счетчики транзакций',
+                'unique_together': {('dimension', 'key')},
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
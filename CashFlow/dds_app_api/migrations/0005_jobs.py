@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:28
+
+import dds_app_api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0004_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30, verbose_name='Тип задачи')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('succeeded', 'Выполнена'), ('failed', 'Ошибка')], db_index=True, default='queued', max_length=10, verbose_name='Состояние')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Сообщение')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('input_file', models.FileField(blank=True, storage=dds_app_api.models.get_job_storage, upload_to='input/', verbose_name='Входной файл')),
+                ('result', models.FileField(blank=True, storage=dds_app_api.models.get_job_storage, upload_to='results/', verbose_name='Результат')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Обработчик')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершение')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
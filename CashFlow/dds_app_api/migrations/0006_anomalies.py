@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0005_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Anomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('expected', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Типичная сумма')),
+                ('detected_at', models.DateTimeField(auto_now=True, verbose_name='Дата обнаружения')),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly', to='dds_app_api.transaction', verbose_name='Транзакция')),
+            ],
+            options={
+                'verbose_name': 'Аномальная транзакция',
+                'verbose_name_plural': 'Аномальные транзакции',
+                'ordering': ['-score'],
+            },
+        ),
+    ]
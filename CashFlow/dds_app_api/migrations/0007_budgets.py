@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0006_anomalies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True, verbose_name='Месяц')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Плановая сумма')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='dds_app_api.category', verbose_name='Категория')),
+                ('subcategory', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='dds_app_api.subcategory', verbose_name='Подкатегория')),
+            ],
+            options={
+                'verbose_name': 'Бюджет',
+                'verbose_name_plural': 'Бюджеты',
+                'ordering': ['-month'],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('category__isnull', False), ('subcategory__isnull', True)), models.Q(('category__isnull', True), ('subcategory__isnull', False)), _connector='OR'), name='budget_category_xor_subcategory'), models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('category', 'month'), name='unique_category_budget'), models.UniqueConstraint(condition=models.Q(('subcategory__isnull', False)), fields=('subcategory', 'month'), name='unique_subcategory_budget')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:49
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_checkpoints(apps, schema_editor):
+    TransactionType = apps.get_model('dds_app_api', 'TransactionType')
+    BalanceCheckpoint = apps.get_model('dds_app_api', 'BalanceCheckpoint')
+
+    names = {'Пополнение': 1, 'Списание': -1}
+    signs = {
+        type_id: names[name]
+        for type_id, name in TransactionType.objects.filter(name__in=names).values_list('id', 'name')
+    }
+    sources = [
+        apps.get_model('dds_app_api', model).objects.order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('month', 'transaction_type_id').annotate(total=Sum('amount'))
+        for model in ('Transaction', 'ArchivedTransaction')
+    ]
+    sources.append(
+        apps.get_model('dds_app_api', 'ArchiveRollup').objects.order_by()
+        .filter(storage='ndjson')
+        .values('month', 'transaction_type_id').annotate(total=Sum('total'))
+    )
+
+    nets = defaultdict(Decimal)
+    for source in sources:
+        for row in source:
+            nets[row['month']] += signs.get(row['transaction_type_id'], 0) * row['total']
+
+    balance = Decimal(0)
+    checkpoints = []
+    for month in sorted(nets):
+        balance += nets[month]
+        checkpoints.append(BalanceCheckpoint(dimension='all', key='', month=month, balance=balance))
+    BalanceCheckpoint.objects.bulk_create(checkpoints)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0008_recurring_transactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20, verbose_name='Измерение')),
+                ('key', models.CharField(blank=True, max_length=20, verbose_name='Значение')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Остаток')),
+            ],
+            options={
+                'verbose_name': 'Остаток на конец месяца',
+                'verbose_name_plural': 'Остатки на конец месяца',
+                'unique_together': {('dimension', 'key', 'month')},
+            },
+        ),
+        migrations.RunPython(build_checkpoints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0009_balance_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Внешний идентификатор'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Внешний идентификатор'),
+        ),
+    ]
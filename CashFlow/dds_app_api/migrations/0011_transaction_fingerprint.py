@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:57
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def fill_fingerprints(apps, schema_editor):
+    Transaction = apps.get_model('dds_app_api', 'Transaction')
+
+    last_id = 0
+    while True:
+        batch = list(
+            Transaction.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'transaction_date', 'amount', 'subcategory_id', 'comment')[:1000]
+        )
+        if not batch:
+            return
+        for item in batch:
+            key = '|'.join((
+                item.transaction_date.isoformat(),
+                str(item.amount.quantize(Decimal('0.01'))),
+                str(item.subcategory_id),
+                ' '.join((item.comment or '').casefold().split()),
+            ))
+            item.fingerprint = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        Transaction.objects.bulk_update(batch, ['fingerprint'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0010_transaction_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, verbose_name='Отпечаток'),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+    ]
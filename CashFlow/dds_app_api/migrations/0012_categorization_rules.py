@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0011_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorizationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название')),
+                ('kind', models.CharField(choices=[('keyword', 'Ключевое слово'), ('regex', 'Регулярное выражение')], default='keyword', max_length=10, verbose_name='Вид шаблона')),
+                ('pattern', models.CharField(max_length=500, verbose_name='Шаблон')),
+                ('priority', models.PositiveIntegerField(default=100, verbose_name='Приоритет')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активно')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to='dds_app_api.subcategory', verbose_name='Подкатегория')),
+            ],
+            options={
+                'verbose_name': 'Правило категоризации',
+                'verbose_name_plural': 'Правила категоризации',
+                'ordering': ['priority', 'id'],
+            },
+        ),
+    ]
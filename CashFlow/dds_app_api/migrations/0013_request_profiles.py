@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:30
+
+import dds_app_api.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dds_app_api', '0012_categorization_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=500, verbose_name='Путь')),
+                ('query_string', models.TextField(blank=True, verbose_name='Параметры')),
+                ('view', models.CharField(blank=True, max_length=100, verbose_name='Представление')),
+                ('action', models.CharField(blank=True, max_length=100, verbose_name='Действие')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Код ответа')),
+                ('duration_ms', models.FloatField(verbose_name='Время (мс)')),
+                ('query_count', models.PositiveIntegerField(default=0, verbose_name='SQL-запросов')),
+                ('summary', models.TextField(blank=True, verbose_name='Сводка')),
+                ('profile', models.FileField(storage=dds_app_api.models.get_profile_storage, upload_to='profiles/', verbose_name='Профиль')),
+                ('created_date', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
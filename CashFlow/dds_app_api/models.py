@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 
 
@@ -10,6 +12,7 @@ class Status(models.Model):
     Attributes:
         name (CharField): Название статуса (уникальное).
         description (TextField): Описание статуса (необязательное).
+        updated_at (DateTimeField): Дата и время последнего изменения.
     """
 
     name = models.CharField(
@@ -22,6 +25,12 @@ class Status(models.Model):
         verbose_name="Описание"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения"
+    )
+
     class Meta:
         """Метаданные модели Status."""
         verbose_name = "Статус"
@@ -46,6 +55,7 @@ class TransactionType(models.Model):
     Attributes:
         name (CharField): Название типа операции (уникальное).
         description (TextField): Описание типа операции (необязательное).
+        updated_at (DateTimeField): Дата и время последнего изменения.
     """
 
     name = models.CharField(
@@ -58,6 +68,12 @@ class TransactionType(models.Model):
         verbose_name="Описание"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения"
+    )
+
     class Meta:
         """Метаданные модели TransactionType."""
         verbose_name = "Тип операции"
@@ -83,6 +99,7 @@ class Category(models.Model):
         name (CharField): Название категории.
         transaction_type (ForeignKey): Ссылка на тип операции.
         description (TextField): Описание категории (необязательное).
+        updated_at (DateTimeField): Дата и время последнего изменения.
     """
 
     name = models.CharField(
@@ -99,6 +116,12 @@ class Category(models.Model):
         verbose_name="Описание"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения"
+    )
+
     class Meta:
         """Метаданные модели Category."""
         verbose_name = "Категория"
@@ -125,6 +148,7 @@ class Subcategory(models.Model):
         name (CharField): Название подкатегории.
         category (ForeignKey): Ссылка на родительскую категорию.
         description (TextField): Описание подкатегории (необязательное).
+        updated_at (DateTimeField): Дата и время последнего изменения.
     """
 
     name = models.CharField(
@@ -141,6 +165,12 @@ class Subcategory(models.Model):
         verbose_name="Описание"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения"
+    )
+
     class Meta:
         """Метаданные модели Subcategory."""
         verbose_name = "Подкатегория"
@@ -173,6 +203,11 @@ class Transaction(models.Model):
         subcategory (ForeignKey): Подкатегория операции.
         amount (DecimalField): Сумма операции.
         comment (TextField): Комментарий к операции (необязательный).
+        external_id (CharField): Внешний идентификатор вида
+            "источник:ссылка" для повторяемого импорта (необязательный).
+        fingerprint (CharField): Хэш нормализованных даты, суммы,
+            подкатегории и комментария для поиска дубликатов.
+        updated_at (DateTimeField): Дата и время последнего изменения.
     """
 
     created_date = models.DateTimeField(
@@ -180,6 +215,7 @@ class Transaction(models.Model):
         verbose_name="Дата создания"
     )
     transaction_date = models.DateField(
+        db_index=True,
         verbose_name="Дата операции"
     )
     status = models.ForeignKey(
@@ -211,6 +247,26 @@ class Transaction(models.Model):
         blank=True,
         verbose_name="Комментарий"
     )
+    external_id = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Внешний идентификатор"
+    )
+    fingerprint = models.CharField(
+        max_length=40,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Отпечаток"
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         """Метаданные модели Transaction."""
@@ -225,4 +281,999 @@ class Transaction(models.Model):
         Returns:
             str: Дата, сумма и категория операции.
         """
-        return f"{self.transaction_date} - {self.amount}р. - {self.category}"
\ No newline at end of file
+        return f"{self.transaction_date} - {self.amount}р. - {self.category}"
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Модель для хранения архивных (холодных) транзакций.
+
+    Содержит транзакции, перенесенные из основной таблицы командой
+    archive_transactions. Первичный ключ совпадает с ID исходной транзакции,
+    поэтому архивные записи можно отдавать через API без изменения ссылок.
+
+    Attributes:
+        id (BigIntegerField): ID исходной транзакции.
+        created_date (DateTimeField): Дата и время создания исходной записи.
+        transaction_date (DateField): Дата совершения операции.
+        status (ForeignKey): Статус операции.
+        transaction_type (ForeignKey): Тип операции.
+        category (ForeignKey): Категория операции.
+        subcategory (ForeignKey): Подкатегория операции.
+        amount (DecimalField): Сумма операции.
+        comment (TextField): Комментарий к операции.
+        external_id (CharField): Внешний идентификатор исходной записи.
+        updated_at (DateTimeField): Дата и время последнего изменения исходной записи.
+        archived_at (DateTimeField): Дата и время переноса в архив.
+    """
+
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name="ID"
+    )
+    created_date = models.DateTimeField(
+        verbose_name="Дата создания"
+    )
+    transaction_date = models.DateField(
+        db_index=True,
+        verbose_name="Дата операции"
+    )
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.PROTECT,
+        related_name="archived_transactions",
+        verbose_name="Статус"
+    )
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.PROTECT,
+        related_name="archived_transactions",
+        verbose_name="Тип операции"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name="archived_transactions",
+        verbose_name="Категория"
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.PROTECT,
+        related_name="archived_transactions",
+        verbose_name="Подкатегория"
+    )
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Сумма"
+    )
+    comment = models.TextField(
+        blank=True,
+        verbose_name="Комментарий"
+    )
+    external_id = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Внешний идентификатор"
+    )
+    updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата изменения"
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата архивации"
+    )
+
+    class Meta:
+        """Метаданные модели ArchivedTransaction."""
+        verbose_name = "Архивная транзакция"
+        verbose_name_plural = "Архивные транзакции"
+        ordering = ["-transaction_date"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта ArchivedTransaction.
+
+        Returns:
+            str: Дата, сумма и категория операции.
+        """
+        return f"{self.transaction_date} - {self.amount}р. - {self.category}"
+
+    def as_transaction(self):
+        """
+        Преобразует архивную запись в несохраненный объект Transaction.
+
+        Переносит значения общих полей и уже загруженные связанные объекты,
+        чтобы архивную запись можно было сериализовать TransactionSerializer
+        без дополнительных запросов.
+
+        Returns:
+            Transaction: Несохраненная транзакция с теми же данными.
+        """
+        own_fields = {field.attname for field in self._meta.concrete_fields}
+        transaction = Transaction(**{
+            field.attname: getattr(self, field.attname)
+            for field in Transaction._meta.concrete_fields
+            if field.attname in own_fields
+        })
+
+        for name in ('status', 'transaction_type', 'category', 'subcategory'):
+            if self._meta.get_field(name).is_cached(self):
+                setattr(transaction, name, getattr(self, name))
+
+        return transaction
+
+
+class ArchiveSegment(models.Model):
+    """
+    Модель для учета выполненных операций архивации.
+
+    Каждая запись описывает порцию транзакций, перенесенных из основной
+    таблицы в архивную таблицу или в сжатый NDJSON-файл.
+
+    Attributes:
+        storage (CharField): Тип хранилища (таблица или NDJSON-файл).
+        cutoff (DateField): Граница архивации (перенесены операции до этой даты).
+        date_from (DateField): Минимальная дата операции в сегменте.
+        date_to (DateField): Максимальная дата операции в сегменте.
+        row_count (PositiveIntegerField): Количество перенесенных транзакций.
+        total_amount (DecimalField): Сумма перенесенных транзакций.
+        path (CharField): Путь к файлу сегмента (для NDJSON).
+        created_date (DateTimeField): Дата и время архивации.
+    """
+
+    STORAGE_TABLE = 'table'
+    STORAGE_NDJSON = 'ndjson'
+    STORAGE_CHOICES = (
+        (STORAGE_TABLE, 'Архивная таблица'),
+        (STORAGE_NDJSON, 'Сжатый NDJSON-файл'),
+    )
+
+    storage = models.CharField(
+        max_length=10,
+        choices=STORAGE_CHOICES,
+        verbose_name="Хранилище"
+    )
+    cutoff = models.DateField(
+        verbose_name="Граница архивации"
+    )
+    date_from = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Дата операций с"
+    )
+    date_to = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Дата операций по"
+    )
+    row_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество транзакций"
+    )
+    total_amount = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        verbose_name="Сумма"
+    )
+    path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name="Файл сегмента"
+    )
+    created_date = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата архивации"
+    )
+
+    class Meta:
+        """Метаданные модели ArchiveSegment."""
+        verbose_name = "Сегмент архива"
+        verbose_name_plural = "Сегменты архива"
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта ArchiveSegment.
+
+        Returns:
+            str: Тип хранилища, граница и количество транзакций.
+        """
+        return f"{self.get_storage_display()} до {self.cutoff} ({self.row_count})"
+
+
+class ArchiveRollup(models.Model):
+    """
+    Модель для хранения агрегированных итогов по архивным транзакциям.
+
+    Итоги ведутся помесячно в разрезе статуса, типа, категории и подкатегории
+    отдельно для каждого хранилища. Позволяют учитывать в сводках данные,
+    вынесенные в NDJSON-файлы и отсутствующие в базе данных.
+
+    Attributes:
+        storage (CharField): Тип хранилища архивных транзакций.
+        month (DateField): Первый день месяца.
+        status (ForeignKey): Статус операций.
+        transaction_type (ForeignKey): Тип операций.
+        category (ForeignKey): Категория операций.
+        subcategory (ForeignKey): Подкатегория операций.
+        count (PositiveIntegerField): Количество операций.
+        total (DecimalField): Сумма операций.
+    """
+
+    storage = models.CharField(
+        max_length=10,
+        choices=ArchiveSegment.STORAGE_CHOICES,
+        verbose_name="Хранилище"
+    )
+    month = models.DateField(
+        verbose_name="Месяц"
+    )
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.PROTECT,
+        related_name="+",
+        verbose_name="Статус"
+    )
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.PROTECT,
+        related_name="+",
+        verbose_name="Тип операции"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name="+",
+        verbose_name="Категория"
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.PROTECT,
+        related_name="+",
+        verbose_name="Подкатегория"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество"
+    )
+    total = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        verbose_name="Сумма"
+    )
+
+    class Meta:
+        """Метаданные модели ArchiveRollup."""
+        verbose_name = "Итоги архива"
+        verbose_name_plural = "Итоги архива"
+        unique_together = (
+            "storage", "month", "status", "transaction_type",
+            "category", "subcategory"
+        )
+
+    def __str__(self):
+        """
+        Строковое представление объекта ArchiveRollup.
+
+        Returns:
+            str: Месяц, подкатегория и сумма операций.
+        """
+        return f"{self.month:%Y-%m} - {self.subcategory} - {self.total}р."
+
+
+class TransactionCounter(models.Model):
+    """
+    Модель для хранения поддерживаемых счетчиков транзакций.
+
+    Счетчики обновляются при каждой записи транзакции и позволяют получать
+    количество строк для пагинации без выполнения COUNT(*).
+
+    Attributes:
+        dimension (CharField): Измерение (all, status, transaction_type,
+            category, subcategory или month).
+        key (CharField): Значение измерения (ID или месяц YYYY-MM).
+        count (BigIntegerField): Количество транзакций.
+    """
+
+    dimension = models.CharField(
+        max_length=20,
+        verbose_name="Измерение"
+    )
+    key = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Значение"
+    )
+    count = models.BigIntegerField(
+        default=0,
+        verbose_name="Количество"
+    )
+
+    class Meta:
+        """Метаданные модели TransactionCounter."""
+        verbose_name = "Счетчик транзакций"
+        verbose_name_plural = "Счетчики транзакций"
+        unique_together = ("dimension", "key")
+
+    def __str__(self):
+        """
+        Строковое представление объекта TransactionCounter.
+
+        Returns:
+            str: Измерение, значение и количество.
+        """
+        return f"{self.dimension}:{self.key} = {self.count}"
+
+
+class Tombstone(models.Model):
+    """
+    Модель для учета удаленных объектов при синхронизации.
+
+    При удалении транзакции или справочника сохраняется запись с его ID,
+    чтобы клиенты, синхронизирующие изменения, могли удалить объект у себя.
+    Перенос транзакций в архив удалением не считается.
+
+    Attributes:
+        model (CharField): Ключ модели в API синхронизации (например, transactions).
+        object_id (BigIntegerField): ID удаленного объекта.
+        deleted_at (DateTimeField): Дата и время удаления.
+    """
+
+    model = models.CharField(
+        max_length=30,
+        verbose_name="Модель"
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="ID объекта"
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Дата удаления"
+    )
+
+    class Meta:
+        """Метаданные модели Tombstone."""
+        verbose_name = "Удаленный объект"
+        verbose_name_plural = "Удаленные объекты"
+
+    def __str__(self):
+        """
+        Строковое представление объекта Tombstone.
+
+        Returns:
+            str: Модель и ID удаленного объекта.
+        """
+        return f"{self.model}:{self.object_id}"
+
+
+def get_job_storage():
+    """
+    Возвращает хранилище входных файлов и результатов фоновых задач.
+
+    Returns:
+        FileSystemStorage: Хранилище в каталоге из настройки CASHFLOW_JOB_DIR.
+    """
+    return FileSystemStorage(
+        location=getattr(settings, 'CASHFLOW_JOB_DIR', settings.BASE_DIR / 'jobs')
+    )
+
+
+class Job(models.Model):
+    """
+    Модель фоновой задачи (отчет, экспорт или импорт транзакций).
+
+    Задачи ставятся в очередь через API и выполняются командой run_jobs
+    вне процессов веб-сервера.
+
+    Attributes:
+        kind (CharField): Тип задачи (report, export, import, upsert).
+        params (JSONField): Параметры задачи.
+        status (CharField): Состояние задачи.
+        progress (PositiveSmallIntegerField): Прогресс выполнения в процентах.
+        message (CharField): Текущий этап или итог выполнения.
+        error (TextField): Текст ошибки для неудачных задач.
+        input_file (FileField): Входной файл (для импорта).
+        result (FileField): Файл с результатом.
+        worker (CharField): Имя обработчика, выполняющего задачу.
+        attempts (PositiveSmallIntegerField): Количество захватов задачи.
+        heartbeat_at (DateTimeField): Последнее продление аренды обработчиком.
+        created_date (DateTimeField): Дата и время постановки в очередь.
+        started_at (DateTimeField): Дата и время начала выполнения.
+        finished_at (DateTimeField): Дата и время завершения.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (SUCCEEDED, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(
+        max_length=30,
+        verbose_name="Тип задачи"
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Параметры"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        db_index=True,
+        verbose_name="Состояние"
+    )
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Прогресс"
+    )
+    message = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Сообщение"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка"
+    )
+    input_file = models.FileField(
+        storage=get_job_storage,
+        upload_to='input/',
+        blank=True,
+        verbose_name="Входной файл"
+    )
+    result = models.FileField(
+        storage=get_job_storage,
+        upload_to='results/',
+        blank=True,
+        verbose_name="Результат"
+    )
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Обработчик"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток"
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Продление аренды"
+    )
+    created_date = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Начало выполнения"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Завершение"
+    )
+
+    class Meta:
+        """Метаданные модели Job."""
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта Job.
+
+        Returns:
+            str: ID, тип и состояние задачи.
+        """
+        return f"#{self.pk} {self.kind} ({self.get_status_display()})"
+
+    def set_progress(self, progress, message=''):
+        """
+        Сохраняет прогресс выполнения без перезаписи остальных полей.
+
+        Args:
+            progress (int): Прогресс в процентах (0-100).
+            message (str): Описание текущего этапа.
+        """
+        self.progress = max(0, min(100, int(progress)))
+        self.message = message[:255]
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, message=self.message
+        )
+
+
+class Anomaly(models.Model):
+    """
+    Модель для хранения транзакций, помеченных как аномальные.
+
+    Записи создаются полной проверкой (команда scan_anomalies) и проверкой
+    новых транзакций по закэшированной статистике их подкатегории.
+
+    Attributes:
+        transaction (OneToOneField): Аномальная транзакция.
+        score (FloatField): Модифицированная z-оценка суммы (по медиане и MAD).
+        expected (DecimalField): Типичная (медианная) сумма подкатегории.
+        detected_at (DateTimeField): Дата и время обнаружения.
+    """
+
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='anomaly',
+        verbose_name="Транзакция"
+    )
+    score = models.FloatField(
+        verbose_name="Оценка"
+    )
+    expected = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Типичная сумма"
+    )
+    detected_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата обнаружения"
+    )
+
+    class Meta:
+        """Метаданные модели Anomaly."""
+        verbose_name = "Аномальная транзакция"
+        verbose_name_plural = "Аномальные транзакции"
+        ordering = ["-score"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта Anomaly.
+
+        Returns:
+            str: ID транзакции и оценка.
+        """
+        return f"#{self.transaction_id} ({self.score:.1f})"
+
+
+class Budget(models.Model):
+    """
+    Модель для хранения месячных бюджетов по категориям и подкатегориям.
+
+    Каждый бюджет задается либо для категории целиком, либо для одной
+    подкатегории; на месяц допускается один бюджет для каждой из них.
+
+    Attributes:
+        category (ForeignKey): Категория (для бюджета категории).
+        subcategory (ForeignKey): Подкатегория (для бюджета подкатегории).
+        month (DateField): Первый день месяца.
+        amount (DecimalField): Плановая сумма (лимит) за месяц.
+        updated_at (DateTimeField): Дата и время последнего изменения.
+    """
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="budgets",
+        verbose_name="Категория"
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="budgets",
+        verbose_name="Подкатегория"
+    )
+    month = models.DateField(
+        db_index=True,
+        verbose_name="Месяц"
+    )
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Плановая сумма"
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
+
+    class Meta:
+        """Метаданные модели Budget."""
+        verbose_name = "Бюджет"
+        verbose_name_plural = "Бюджеты"
+        ordering = ["-month"]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(category__isnull=False, subcategory__isnull=True) |
+                    models.Q(category__isnull=True, subcategory__isnull=False)
+                ),
+                name="budget_category_xor_subcategory"
+            ),
+            models.UniqueConstraint(
+                fields=["category", "month"],
+                condition=models.Q(category__isnull=False),
+                name="unique_category_budget"
+            ),
+            models.UniqueConstraint(
+                fields=["subcategory", "month"],
+                condition=models.Q(subcategory__isnull=False),
+                name="unique_subcategory_budget"
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Строковое представление объекта Budget.
+
+        Returns:
+            str: Месяц, категория или подкатегория и плановая сумма.
+        """
+        return f"{self.month:%Y-%m} - {self.subcategory or self.category} - {self.amount}р."
+
+
+class RecurringTransaction(models.Model):
+    """
+    Модель шаблона регулярной операции (аренда, зарплата, подписки).
+
+    По шаблону команда materialize_recurring создает транзакции на даты,
+    соответствующие расписанию. Расписание задается в формате cron из трех
+    полей: день месяца, месяц и день недели (например, "1 * *" - первое
+    число каждого месяца, "L * *" - последний день месяца, "* * 1" - каждый
+    понедельник).
+
+    Attributes:
+        name (CharField): Название шаблона.
+        status (ForeignKey): Статус создаваемых операций.
+        transaction_type (ForeignKey): Тип создаваемых операций.
+        category (ForeignKey): Категория создаваемых операций.
+        subcategory (ForeignKey): Подкатегория создаваемых операций.
+        amount (DecimalField): Сумма операции.
+        comment (TextField): Комментарий к операциям (по умолчанию название).
+        schedule (CharField): Расписание в формате cron (три поля).
+        start_date (DateField): Дата начала действия шаблона.
+        end_date (DateField): Дата окончания действия шаблона (необязательная).
+        is_active (BooleanField): Создаются ли операции по шаблону.
+        materialized_until (DateField): Дата, до которой (включительно)
+            операции по шаблону уже созданы.
+        created_date (DateTimeField): Дата и время создания шаблона.
+        updated_at (DateTimeField): Дата и время последнего изменения.
+    """
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name="Название"
+    )
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.PROTECT,
+        related_name="recurring_transactions",
+        verbose_name="Статус"
+    )
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.PROTECT,
+        related_name="recurring_transactions",
+        verbose_name="Тип операции"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name="recurring_transactions",
+        verbose_name="Категория"
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.PROTECT,
+        related_name="recurring_transactions",
+        verbose_name="Подкатегория"
+    )
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Сумма"
+    )
+    comment = models.TextField(
+        blank=True,
+        verbose_name="Комментарий"
+    )
+    schedule = models.CharField(
+        max_length=100,
+        verbose_name="Расписание"
+    )
+    start_date = models.DateField(
+        verbose_name="Дата начала"
+    )
+    end_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Дата окончания"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Активен"
+    )
+    materialized_until = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Операции созданы по"
+    )
+    created_date = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания"
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
+
+    class Meta:
+        """Метаданные модели RecurringTransaction."""
+        verbose_name = "Регулярная операция"
+        verbose_name_plural = "Регулярные операции"
+        ordering = ["name"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта RecurringTransaction.
+
+        Returns:
+            str: Название, расписание и сумма.
+        """
+        return f"{self.name} ({self.schedule}) - {self.amount}р."
+
+
+class CategorizationRule(models.Model):
+    """
+    Модель правила автоматической категоризации транзакций по комментарию.
+
+    Правило связывает ключевое слово или регулярное выражение с подкатегорией;
+    категория и тип операции определяются подкатегорией. Правила применяются
+    при создании и импорте транзакций без подкатегории.
+
+    Attributes:
+        name (CharField): Название правила.
+        kind (CharField): Вид шаблона: ключевое слово или регулярное выражение.
+        pattern (CharField): Ключевое слово или фраза (без учета регистра
+            и знаков препинания, целыми словами) или регулярное выражение.
+        subcategory (ForeignKey): Подкатегория, назначаемая транзакции.
+        priority (PositiveIntegerField): Приоритет (меньше - важнее) при
+            совпадении нескольких правил.
+        is_active (BooleanField): Применяется ли правило.
+        updated_at (DateTimeField): Дата и время последнего изменения.
+    """
+
+    KEYWORD = 'keyword'
+    REGEX = 'regex'
+    KIND_CHOICES = [
+        (KEYWORD, 'Ключевое слово'),
+        (REGEX, 'Регулярное выражение'),
+    ]
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name="Название"
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        default=KEYWORD,
+        verbose_name="Вид шаблона"
+    )
+    pattern = models.CharField(
+        max_length=500,
+        verbose_name="Шаблон"
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.CASCADE,
+        related_name="categorization_rules",
+        verbose_name="Подкатегория"
+    )
+    priority = models.PositiveIntegerField(
+        default=100,
+        verbose_name="Приоритет"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Активно"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
+
+    class Meta:
+        """Метаданные модели CategorizationRule."""
+        verbose_name = "Правило категоризации"
+        verbose_name_plural = "Правила категоризации"
+        ordering = ["priority", "id"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта CategorizationRule.
+
+        Returns:
+            str: Шаблон и подкатегория.
+        """
+        return f"{self.pattern} → {self.subcategory}"
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Модель для хранения остатков на конец месяца.
+
+    Остаток - сумма пополнений за вычетом списаний по всем операциям
+    до конца месяца включительно. Отметки ведутся для всех операций
+    и, если настроено, в разрезе статуса или категории; они обновляются
+    при каждой записи транзакции, в том числе задним числом (с переносом
+    изменения на все последующие месяцы). Месяцы без операций не хранятся:
+    их остаток равен остатку предыдущей отметки.
+
+    Attributes:
+        dimension (CharField): Измерение (all, status или category).
+        key (CharField): Значение измерения (ID или пустая строка для all).
+        month (DateField): Первый день месяца.
+        balance (DecimalField): Остаток на конец месяца.
+    """
+
+    dimension = models.CharField(
+        max_length=20,
+        verbose_name="Измерение"
+    )
+    key = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Значение"
+    )
+    month = models.DateField(
+        verbose_name="Месяц"
+    )
+    balance = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        verbose_name="Остаток"
+    )
+
+    class Meta:
+        """Метаданные модели BalanceCheckpoint."""
+        verbose_name = "Остаток на конец месяца"
+        verbose_name_plural = "Остатки на конец месяца"
+        unique_together = ("dimension", "key", "month")
+
+    def __str__(self):
+        """
+        Строковое представление объекта BalanceCheckpoint.
+
+        Returns:
+            str: Измерение, месяц и остаток.
+        """
+        return f"{self.dimension}:{self.key} {self.month:%Y-%m} = {self.balance}р."
+
+
+def get_profile_storage():
+    """
+    Возвращает хранилище файлов профилей запросов.
+
+    Returns:
+        FileSystemStorage: Хранилище в каталоге из настройки CASHFLOW_PROFILE_DIR.
+    """
+    return FileSystemStorage(
+        location=getattr(settings, 'CASHFLOW_PROFILE_DIR', settings.BASE_DIR / 'profiles')
+    )
+
+
+class RequestProfile(models.Model):
+    """
+    Модель профиля выполнения HTTP-запроса.
+
+    Профиль снимается по запросу сотрудника (заголовок X-Profile или
+    параметр profile) и хранится файлом в формате pstats вместе
+    с описанием запроса.
+
+    Attributes:
+        user (ForeignKey): Сотрудник, запросивший профилирование.
+        method (CharField): HTTP-метод запроса.
+        path (CharField): Путь запроса.
+        query_string (TextField): Строка параметров запроса.
+        view (CharField): Класс представления.
+        action (CharField): Действие DRF.
+        status_code (PositiveSmallIntegerField): Код ответа.
+        duration_ms (FloatField): Время обработки запроса под профилировщиком (мс).
+        query_count (PositiveIntegerField): Количество выполненных SQL-запросов.
+        summary (TextField): Функции с наибольшим накопленным временем.
+        profile (FileField): Файл профиля pstats.
+        created_date (DateTimeField): Дата и время запроса.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='request_profiles',
+        verbose_name="Пользователь"
+    )
+    method = models.CharField(
+        max_length=10,
+        verbose_name="Метод"
+    )
+    path = models.CharField(
+        max_length=500,
+        verbose_name="Путь"
+    )
+    query_string = models.TextField(
+        blank=True,
+        verbose_name="Параметры"
+    )
+    view = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Представление"
+    )
+    action = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Действие"
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name="Код ответа"
+    )
+    duration_ms = models.FloatField(
+        verbose_name="Время (мс)"
+    )
+    query_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="SQL-запросов"
+    )
+    summary = models.TextField(
+        blank=True,
+        verbose_name="Сводка"
+    )
+    profile = models.FileField(
+        storage=get_profile_storage,
+        upload_to='profiles/',
+        verbose_name="Профиль"
+    )
+    created_date = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Дата создания"
+    )
+
+    class Meta:
+        """Метаданные модели RequestProfile."""
+        verbose_name = "Профиль запроса"
+        verbose_name_plural = "Профили запросов"
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        """
+        Строковое представление объекта RequestProfile.
+
+        Returns:
+            str: Метод, путь и время обработки запроса.
+        """
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} мс)"
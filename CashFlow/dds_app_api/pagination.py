@@ -0,0 +1,191 @@
+"""
+Пагинация без полного подсчета строк для больших таблиц.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections, DatabaseError
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from . import archive, counters
+
+
+def get_count_limit():
+    """
+    Возвращает предел точного подсчета строк.
+
+    Returns:
+        int: Значение настройки CASHFLOW_COUNT_LIMIT.
+    """
+    return getattr(settings, 'CASHFLOW_COUNT_LIMIT', 10000)
+
+
+def estimate_row_count(model, using='default'):
+    """
+    Оценивает количество строк в таблице модели без полного сканирования.
+
+    Для PostgreSQL используется статистика планировщика (pg_class), для SQLite -
+    статистика ANALYZE (sqlite_stat1), а если ее нет - разница между
+    максимальным и минимальным первичным ключом.
+
+    Args:
+        model (Model): Класс модели.
+        using (str): Алиас базы данных.
+
+    Returns:
+        int: Оценка количества строк.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }
+    sql = queries.get(connection.vendor)
+    if sql is not None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        if row and row[0] is not None:
+            estimate = int(str(row[0]).split()[0])
+            if estimate > 0:
+                return estimate
+
+    bounds = model._default_manager.using(using).aggregate(
+        low=Min('pk'), high=Max('pk')
+    )
+    if bounds['low'] is None:
+        return 0
+    return bounds['high'] - bounds['low'] + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, не выполняющий полный COUNT(*) по большой таблице.
+
+    Для выборки без условий возвращает оценку размера таблицы, для
+    отфильтрованной - точное количество, но не больше CASHFLOW_COUNT_LIMIT
+    (подсчет ведется по подзапросу с LIMIT).
+    """
+
+    @cached_property
+    def count(self):
+        """
+        Возвращает оценку или ограниченное количество объектов.
+
+        Returns:
+            int: Количество объектов для построения страниц.
+        """
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+
+        if not query.has_filters():
+            return self.estimate_count()
+
+        return self.object_list[:get_count_limit()].count()
+
+    def estimate_count(self):
+        """
+        Возвращает оценку количества строк для выборки без условий.
+
+        Returns:
+            int: Оценка размера таблицы.
+        """
+        return estimate_row_count(self.object_list.model, self.object_list.db)
+
+
+class TransactionCountPaginator(EstimatedCountPaginator):
+    """
+    Пагинатор админки транзакций, берущий общее количество из счетчиков.
+    """
+
+    def estimate_count(self):
+        """
+        Возвращает точное количество транзакций из счетчика.
+
+        Returns:
+            int: Количество транзакций в основной таблице.
+        """
+        return counters.get_total()
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор с заранее известным или ограниченным количеством объектов.
+
+    Attributes:
+        known_count (int | None): Точное количество, полученное из счетчиков.
+        count_limit (int | None): Предел подсчета, если количество неизвестно.
+        count_exact (bool): Является ли count точным значением.
+    """
+
+    def __init__(self, object_list, per_page, *args, known_count=None,
+                 count_limit=None, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.known_count = known_count
+        self.count_limit = count_limit
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        """
+        Возвращает количество объектов для построения страниц.
+
+        Returns:
+            int: Точное количество из счетчиков, ограниченный подсчет
+            (для объединения с архивом - по обеим таблицам) или полный
+            подсчет для остальных выборок.
+        """
+        if self.known_count is not None:
+            return self.known_count
+
+        if self.count_limit and isinstance(self.object_list, archive.ArchiveChain):
+            count = self.object_list.count(self.count_limit + 1)
+        elif self.count_limit and hasattr(self.object_list, 'query'):
+            count = self.object_list[:self.count_limit + 1].count()
+        else:
+            return super().count
+
+        if count > self.count_limit:
+            self.count_exact = False
+            return self.count_limit
+        return count
+
+
+class TransactionPagination(PageNumberPagination):
+    """
+    Пагинация списка транзакций с количеством из поддерживаемых счетчиков.
+
+    Если фильтры запроса покрываются счетчиками, общее количество берется
+    из них за O(1). Иначе выполняется подсчет, ограниченный
+    CASHFLOW_COUNT_LIMIT; в этом случае count_exact равен False.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Разбивает выборку на страницы, подставляя известное количество.
+
+        Args:
+            queryset (QuerySet | ArchiveChain): Отфильтрованная выборка.
+            request (Request): Объект запроса.
+            view (APIView, optional): Представление.
+
+        Returns:
+            list | None: Объекты текущей страницы.
+        """
+        known_count = None
+        if hasattr(queryset, 'query'):
+            known_count = counters.count_for_params(request.query_params)
+        self.django_paginator_class = partial(
+            CountedPaginator,
+            known_count=known_count,
+            count_limit=get_count_limit()
+        )
+        return super().paginate_queryset(queryset, request, view)
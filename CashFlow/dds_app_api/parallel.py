@@ -0,0 +1,251 @@
+"""
+Параллельное построение многопериодных отчетов.
+
+Диапазон дат отчета делится на шарды по границам периодов (месяц, квартал,
+год), каждый шард вычисляется в отдельном процессе пула со своим соединением
+с БД, а частичные ячейки объединяются в порядке шардов. Так как каждый период
+целиком попадает в один шард, объединение сводится к сложению точных Decimal
+и не зависит от порядка завершения процессов.
+
+Фильтры применяются через TransactionFilter (как в списке транзакций), архив
+и итоги архива подключаются для каждого шарда отдельно по его границам.
+
+Процессы пула запускаются методом spawn: они не наследуют соединения с БД
+и другие ресурсы многопоточного процесса веб-сервера и открывают собственные
+соединения. Если пул аварийно завершился, он пересоздается при следующем
+отчете, а текущий отчет строится в процессе веб-сервера.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Sum
+
+from . import archive, reports, transfer
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_report_workers():
+    """
+    Возвращает количество процессов для построения отчетов.
+
+    Returns:
+        int: Значение настройки CASHFLOW_REPORT_WORKERS или количество ядер.
+    """
+    workers = getattr(settings, 'CASHFLOW_REPORT_WORKERS', None)
+    return workers or os.cpu_count() or 1
+
+
+def get_min_periods():
+    """
+    Возвращает минимальное количество периодов для деления отчета на шарды.
+
+    Returns:
+        int: Значение настройки CASHFLOW_REPORT_SHARD_MIN_PERIODS.
+    """
+    return getattr(settings, 'CASHFLOW_REPORT_SHARD_MIN_PERIODS', 24)
+
+
+def split_range(date_from, date_to, period, shards):
+    """
+    Делит диапазон дат на шарды по границам периодов.
+
+    Args:
+        date_from (date): Начало диапазона.
+        date_to (date): Конец диапазона (включительно).
+        period (str): Период столбцов (ключ PIVOT_PERIODS).
+        shards (int): Желаемое количество шардов.
+
+    Returns:
+        list: Пары (начало, конец) шардов в порядке дат; каждый период
+        диапазона целиком входит ровно в один шард.
+    """
+    buckets = list(reports.iter_buckets(date_from, date_to, period))
+    if not buckets:
+        return []
+    shards = max(1, min(shards, len(buckets)))
+    size, extra = divmod(len(buckets), shards)
+
+    ranges = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < extra else 0)
+        shard_from = max(buckets[start], date_from)
+        if end < len(buckets):
+            shard_to = date.fromordinal(buckets[end].toordinal() - 1)
+        else:
+            shard_to = date_to
+        ranges.append((shard_from, shard_to))
+        start = end
+    return ranges
+
+
+def collect_cells(params, rows, period):
+    """
+    Вычисляет ячейки сводной таблицы для параметров фильтра.
+
+    Args:
+        params (dict): Параметры TransactionFilter.
+        rows (str): Измерение строк (ключ PIVOT_ROWS).
+        period (str): Период столбцов (ключ PIVOT_PERIODS).
+
+    Returns:
+        list: Наборы ячеек из основной таблицы, архива и итогов архива.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    cell_groups = [
+        reports.pivot_cells(queryset, rows, period)
+        for queryset in transfer.filter_transactions(params)
+    ]
+    if archive.reaches_archive(params):
+        cell_groups.append(reports.pivot_cells(
+            archive.filter_rollups(params), rows, period,
+            date_field='month', count=Sum('count'), total=Sum('total')
+        ))
+    return cell_groups
+
+
+def _compute_shard(params, rows, period):
+    """
+    Вычисляет ячейки одного шарда в процессе пула.
+
+    Args:
+        params (dict): Параметры фильтра с границами шарда.
+        rows (str): Измерение строк.
+        period (str): Период столбцов.
+
+    Returns:
+        list: Ячейки шарда (словари с ID, названием, периодом, количеством и суммой).
+    """
+    close_old_connections()
+    try:
+        return [
+            cell
+            for cells in collect_cells(params, rows, period)
+            for cell in cells
+        ]
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    """
+    Возвращает пул процессов для шардов отчетов, создавая его при первом вызове.
+
+    Пул создается один раз на процесс веб-сервера. Процессы запускаются
+    методом spawn и настраивают Django инициализатором django.setup до
+    получения первого шарда: модуль шардов импортирует модели и не может
+    быть загружен раньше.
+
+    Returns:
+        ProcessPoolExecutor: Пул процессов.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=get_report_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        return _executor
+
+
+def _reset_executor():
+    """
+    Сбрасывает пул процессов после аварийного завершения процесса пула.
+
+    Следующий отчет создаст новый пул.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def can_shard(date_from, date_to, period):
+    """
+    Проверяет, имеет ли смысл строить отчет параллельно.
+
+    Параллельное построение требует полного диапазона дат не короче
+    CASHFLOW_REPORT_SHARD_MIN_PERIODS периодов и больше одного процесса.
+    Внутри транзакции БД отчет строится в текущем процессе, так как процессы
+    пула не видят незафиксированные изменения; в процессах-демонах
+    (обработчики run_jobs) запуск дочерних процессов невозможен.
+
+    Args:
+        date_from (date | None): Начало диапазона.
+        date_to (date | None): Конец диапазона.
+        period (str): Период столбцов.
+
+    Returns:
+        bool: True, если отчет следует делить на шарды.
+    """
+    if date_from is None or date_to is None or date_from > date_to:
+        return False
+    if get_report_workers() < 2:
+        return False
+    if connection.in_atomic_block or multiprocessing.current_process().daemon:
+        return False
+    periods = sum(1 for _ in reports.iter_buckets(date_from, date_to, period))
+    return periods >= get_min_periods()
+
+
+def build_pivot_report(params, rows, period, date_from=None, date_to=None):
+    """
+    Строит сводную таблицу, при большом диапазоне - параллельно по шардам.
+
+    Args:
+        params (QueryDict | dict): Параметры TransactionFilter.
+        rows (str): Измерение строк (ключ PIVOT_ROWS).
+        period (str): Период столбцов (ключ PIVOT_PERIODS).
+        date_from (date, optional): Начало диапазона.
+        date_to (date, optional): Конец диапазона.
+
+    Returns:
+        dict: Сводная таблица в формате reports.build_pivot.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    params = {key: params.get(key) for key in params}
+    if not can_shard(date_from, date_to, period):
+        cell_groups = collect_cells(params, rows, period)
+        return reports.build_pivot(cell_groups, rows, period, date_from, date_to)
+
+    # Ошибки фильтров проверяются до запуска шардов
+    transfer.filter_transactions(params)
+
+    shards = split_range(date_from, date_to, period, get_report_workers())
+    shard_params = [
+        {**params, 'date_from': shard_from.isoformat(), 'date_to': shard_to.isoformat()}
+        for shard_from, shard_to in shards
+    ]
+    try:
+        # map возвращает результаты в порядке шардов
+        cell_groups = list(get_executor().map(
+            _compute_shard,
+            shard_params,
+            [rows] * len(shards),
+            [period] * len(shards)
+        ))
+    except BrokenProcessPool:
+        logger.warning('Пул процессов отчетов завершился аварийно, отчет строится без шардов')
+        _reset_executor()
+        cell_groups = collect_cells(params, rows, period)
+    return reports.build_pivot(cell_groups, rows, period, date_from, date_to)
@@ -0,0 +1,229 @@
+"""
+Профилирование отдельных HTTP-запросов по требованию сотрудников.
+
+Запрос профилируется, если в нем передан заголовок X-Profile или параметр
+profile и пользователь является сотрудником (is_staff). Профилировщик
+cProfile охватывает всю обработку запроса: представление, бэкенды
+фильтрации, сериализатор и рендерер ответа. Профиль сохраняется в модели
+RequestProfile файлом pstats (открывается pstats, snakeviz и т.п.) вместе
+с описанием запроса, а его ID возвращается в заголовке X-Profile-Id.
+Запросы без признака профилирования проходят без дополнительной работы,
+кроме проверки заголовка и строки параметров.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import slowlog
+from .models import RequestProfile
+
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_HEADER = 'HTTP_X_PROFILE'
+TRIGGER_PARAM = 'profile'
+RESPONSE_HEADER = 'X-Profile-Id'
+
+
+def get_summary_size():
+    """
+    Возвращает количество функций в текстовой сводке профиля.
+
+    Returns:
+        int: Значение настройки CASHFLOW_PROFILE_SUMMARY_SIZE.
+    """
+    return getattr(settings, 'CASHFLOW_PROFILE_SUMMARY_SIZE', 40)
+
+
+def get_keep_count():
+    """
+    Возвращает количество хранимых профилей.
+
+    Returns:
+        int | None: Значение настройки CASHFLOW_PROFILE_KEEP
+        (None - профили не удаляются).
+    """
+    return getattr(settings, 'CASHFLOW_PROFILE_KEEP', 200)
+
+
+def is_requested(request):
+    """
+    Проверяет, запрошено ли профилирование.
+
+    Args:
+        request (HttpRequest): Запрос.
+
+    Returns:
+        bool: True, если передан заголовок X-Profile или параметр profile
+        со значением, отличным от 0/false.
+    """
+    value = request.META.get(TRIGGER_HEADER)
+    if value is None and TRIGGER_PARAM in request.META.get('QUERY_STRING', ''):
+        value = request.GET.get(TRIGGER_PARAM)
+    return value is not None and value.lower() not in ('0', 'false', 'no')
+
+
+def get_staff_user(request):
+    """
+    Возвращает сотрудника, выполняющего запрос.
+
+    Пользователь сессии уже известен после AuthenticationMiddleware;
+    для остальных схем (например, Basic) запрос проверяется
+    аутентификаторами DRF из DEFAULT_AUTHENTICATION_CLASSES.
+
+    Args:
+        request (HttpRequest): Запрос.
+
+    Returns:
+        User | None: Сотрудник или None, если пользователь не сотрудник.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator_class().authenticate(drf_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0] if result[0].is_staff else None
+    return None
+
+
+class QueryCounter:
+    """
+    Обертка выполнения SQL, подсчитывающая выполненные запросы.
+
+    Attributes:
+        count (int): Количество запросов.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def build_summary(profiler, limit):
+    """
+    Формирует текстовую сводку профиля.
+
+    Args:
+        profiler (Profile): Остановленный профилировщик.
+        limit (int): Количество функций в сводке.
+
+    Returns:
+        str: Функции с наибольшим накопленным временем в формате pstats.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
+
+
+def save_profile(request, response, user, profiler, duration, query_count):
+    """
+    Сохраняет профиль запроса и удаляет профили сверх CASHFLOW_PROFILE_KEEP.
+
+    Args:
+        request (HttpRequest): Запрос.
+        response (HttpResponse): Ответ.
+        user (User): Сотрудник, запросивший профилирование.
+        profiler (Profile): Остановленный профилировщик.
+        duration (float): Время обработки запроса (секунды).
+        query_count (int): Количество выполненных SQL-запросов.
+
+    Returns:
+        RequestProfile: Сохраненный профиль.
+    """
+    profiler.create_stats()
+    context = getattr(request, '_profile_context', {})
+    record = RequestProfile(
+        user=user,
+        method=request.method,
+        path=request.path[:500],
+        query_string=request.META.get('QUERY_STRING', ''),
+        view=context.get('view', ''),
+        action=context.get('action') or '',
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=query_count,
+        summary=build_summary(profiler, get_summary_size()),
+    )
+    # Формат файла совпадает с Profile.dump_stats
+    record.profile.save(
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method.lower()}.prof",
+        ContentFile(marshal.dumps(profiler.stats)),
+        save=False
+    )
+    record.save()
+
+    keep = get_keep_count()
+    if keep is not None:
+        for old in RequestProfile.objects.order_by('-created_date', '-pk')[keep:]:
+            old.profile.delete(save=False)
+            old.delete()
+    return record
+
+
+class ProfilerMiddleware:
+    """
+    Middleware профилирования запросов сотрудников по требованию.
+
+    Должен располагаться после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_requested(request):
+            return self.get_response(request)
+        user = get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        request._profile_context = {}
+        profiler = cProfile.Profile()
+        counter = QueryCounter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (например, в соседнем потоке)
+            logger.warning('Профилирование %s пропущено: профилировщик занят', request.path)
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        try:
+            with connections['default'].execute_wrapper(counter):
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        record = save_profile(request, response, user, profiler, duration, counter.count)
+        response[RESPONSE_HEADER] = str(record.pk)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Запоминает представление и действие DRF профилируемого запроса.
+        """
+        context = getattr(request, '_profile_context', None)
+        if context is not None:
+            context.update(slowlog.describe_view(request, view_func))
+        return None
@@ -0,0 +1,168 @@
+"""
+Диагностика запросов: план выполнения и фактическое время.
+
+Код, выполняющий запросы (например, построение списка или сводки
+транзакций), запускается с оберткой выполнения SQL, которая записывает
+текст запроса, параметры и время каждого выполнения. Затем для каждого
+записанного SELECT запрашивается план (EXPLAIN QUERY PLAN для SQLite,
+EXPLAIN для остальных СУБД), из которого извлекаются использованные
+индексы и полные просмотры таблиц.
+"""
+import re
+import time
+
+from django.db import connections, DatabaseError
+
+
+# Строки плана SQLite с использованием индекса и с полным просмотром
+# таблицы (в том числе в порядке индекса, без условия поиска по нему)
+INDEX_USAGE = re.compile(r'USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)')
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+# Подзапросы и CTE, просмотр которых не является просмотром таблицы
+SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+
+# Типы параметров, которые передаются в ответ без преобразования
+PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+class QueryRecorder:
+    """
+    Обертка выполнения SQL, записывающая запросы и время их выполнения.
+
+    Attributes:
+        queries (list): Записанные запросы (sql, params, many, время в секундах).
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, many, time.perf_counter() - started))
+
+
+def _plain(value):
+    """
+    Приводит параметр запроса к значению, сериализуемому в JSON.
+
+    Args:
+        value: Параметр запроса.
+
+    Returns:
+        Значение параметра или его строковое представление.
+    """
+    return value if isinstance(value, PLAIN_TYPES) else str(value)
+
+
+def explain(sql, params, using='default'):
+    """
+    Возвращает план выполнения запроса.
+
+    Args:
+        sql (str): Текст запроса с заполнителями.
+        params (Sequence): Параметры запроса.
+        using (str): Алиас базы данных.
+
+    Returns:
+        list: Строки плана (для SQLite - описания шагов с отступом
+        по вложенности).
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            rows = cursor.fetchall()
+        depth = {0: -1}
+        plan = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            plan.append('  ' * depth[node] + detail)
+        return plan
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return [' '.join(str(value) for value in row) for row in cursor.fetchall()]
+
+
+def analyze_plan(plan):
+    """
+    Извлекает из плана использованные индексы и полные просмотры таблиц.
+
+    Args:
+        plan (list): Строки плана SQLite.
+
+    Returns:
+        tuple: Списки имен индексов и таблиц, просматриваемых целиком.
+    """
+    indexes = []
+    scans = []
+    subqueries = {'CONSTANT'}
+    for line in plan:
+        line = line.strip()
+        for match in INDEX_USAGE.finditer(line):
+            name = match.group(1) or match.group(2)
+            if name not in indexes:
+                indexes.append(name)
+        match = SUBQUERY.match(line)
+        if match:
+            subqueries.add(match.group(1))
+        match = FULL_SCAN.match(line)
+        if match and match.group(1) not in subqueries and match.group(1) not in scans:
+            scans.append(match.group(1))
+    return indexes, scans
+
+
+def inspect(run, using='default'):
+    """
+    Выполняет код и возвращает выполненные запросы с планами и временем.
+
+    Args:
+        run (callable): Функция без аргументов, выполняющая запросы.
+        using (str): Алиас базы данных.
+
+    Returns:
+        dict: СУБД, общее время выполнения (мс), запросы с параметрами,
+        временем (мс), планом, индексами и полными просмотрами, а также
+        все использованные индексы и просматриваемые целиком таблицы.
+    """
+    connection = connections[using]
+    recorder = QueryRecorder()
+    started = time.perf_counter()
+    with connection.execute_wrapper(recorder):
+        run()
+    total = time.perf_counter() - started
+
+    queries = []
+    all_indexes = []
+    all_scans = []
+    for sql, params, many, duration in recorder.queries:
+        item = {
+            'sql': sql,
+            'params': None if many else [_plain(value) for value in params or ()],
+            'time_ms': round(duration * 1000, 3),
+            'plan': [],
+            'indexes': [],
+            'full_scans': [],
+        }
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            try:
+                item['plan'] = explain(sql, params, using)
+            except DatabaseError as error:
+                item['plan'] = [f'EXPLAIN недоступен: {error}']
+            if connection.vendor == 'sqlite':
+                item['indexes'], item['full_scans'] = analyze_plan(item['plan'])
+        for names, found in ((all_indexes, item['indexes']), (all_scans, item['full_scans'])):
+            names.extend(name for name in found if name not in names)
+        queries.append(item)
+
+    return {
+        'vendor': connection.vendor,
+        'total_time_ms': round(total * 1000, 3),
+        'query_count': len(queries),
+        'queries': queries,
+        'indexes': all_indexes,
+        'full_scans': all_scans,
+    }
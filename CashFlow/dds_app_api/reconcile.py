@@ -0,0 +1,299 @@
+"""
+Сверка банковской выписки с учтенными транзакциями.
+
+Строки выписки (дата и сумма со знаком: поступления положительные,
+списания отрицательные) сопоставляются с транзакциями периода выписки
+с допусками по дате и сумме. Транзакции загружаются массивами аналитики
+(из колоночного снимка, если он создан) и сортируются по сумме со знаком
+и дате, поэтому кандидаты для строки находятся двоичным поиском окна
+по сумме и дате, а не перебором всех транзакций.
+
+Сопоставление жадное и взаимно однозначное: сначала для строк в порядке
+дат подбираются транзакции с точно совпадающей суммой (ближайшая по дате),
+затем оставшиеся строки сопоставляются с допуском по сумме. Результат -
+сопоставленные строки, строки выписки без транзакций (missing) и транзакции
+периода, отсутствующие в выписке (extra).
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.conf import settings
+from django.utils.dateparse import parse_date
+
+from . import analytics, balances
+
+
+# Параметры TransactionFilter, задающие период сверки
+PERIOD_PARAMS = ('date_from', 'date_to')
+
+
+def get_date_tolerance():
+    """
+    Возвращает допустимое расхождение дат по умолчанию.
+
+    Returns:
+        int: Значение настройки CASHFLOW_RECONCILE_DATE_TOLERANCE (дни).
+    """
+    return getattr(settings, 'CASHFLOW_RECONCILE_DATE_TOLERANCE', 3)
+
+
+def get_amount_tolerance():
+    """
+    Возвращает допустимое расхождение сумм по умолчанию.
+
+    Returns:
+        Decimal: Значение настройки CASHFLOW_RECONCILE_AMOUNT_TOLERANCE.
+    """
+    return Decimal(str(getattr(settings, 'CASHFLOW_RECONCILE_AMOUNT_TOLERANCE', '0')))
+
+
+def _parse_amount(value):
+    """
+    Разбирает сумму строки выписки.
+
+    Допускаются пробелы между разрядами и запятая как десятичный разделитель.
+
+    Args:
+        value (str): Сумма.
+
+    Returns:
+        Decimal: Сумма со знаком.
+
+    Raises:
+        ValueError: Если сумма некорректна.
+    """
+    text = ''.join((value or '').split()).replace(',', '.')
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError("amount: ожидается число")
+    if not amount.is_finite() or amount.as_tuple().exponent < -2:
+        raise ValueError("amount: не более двух знаков после запятой")
+    return amount
+
+
+def parse_statement(source):
+    """
+    Читает строки выписки из CSV.
+
+    Обязательны столбцы date (YYYY-MM-DD) и amount (со знаком), необязательны
+    reference и description.
+
+    Args:
+        source (file): Текстовый файл CSV.
+
+    Returns:
+        tuple: Строки выписки (номер строки файла, дата, сумма, ссылка,
+        описание) и список ошибок по строкам.
+    """
+    lines = []
+    errors = []
+    for index, row in enumerate(csv.DictReader(source), start=2):
+        try:
+            try:
+                line_date = parse_date(row.get('date') or '')
+            except ValueError:
+                line_date = None
+            if line_date is None:
+                raise ValueError("date: ожидается дата YYYY-MM-DD")
+            lines.append({
+                'line': index,
+                'date': line_date,
+                'amount': _parse_amount(row.get('amount')),
+                'reference': row.get('reference') or '',
+                'description': row.get('description') or '',
+            })
+        except ValueError as error:
+            errors.append({'line': index, 'error': str(error)})
+    return lines, errors
+
+
+def _signed_amounts(frame):
+    """
+    Возвращает суммы транзакций со знаком типа операции.
+
+    Args:
+        frame (TransactionFrame): Массивы транзакций.
+
+    Returns:
+        ndarray: Суммы в копейках, отрицательные для списаний.
+    """
+    types, inverse = np.unique(frame.transaction_type, return_inverse=True)
+    signs = balances.get_type_signs()
+    factors = np.array([signs.get(int(key), 1) for key in types], dtype=np.int64)
+    return frame.amounts * factors[inverse]
+
+
+def _match_pass(pending, line_days, line_amounts, days, amounts, used,
+                date_tolerance, amount_tolerance):
+    """
+    Сопоставляет строки выписки с неиспользованными транзакциями.
+
+    Транзакции отсортированы по сумме и дате. Для строки окно кандидатов
+    по сумме находится двоичным поиском; при точном совпадении сумм окно
+    дополнительно сужается двоичным поиском по дате.
+
+    Args:
+        pending (list): Индексы несопоставленных строк в порядке обработки.
+        line_days (ndarray): Даты строк (дни от 1970-01-01).
+        line_amounts (ndarray): Суммы строк в копейках.
+        days (ndarray): Даты транзакций в порядке сортировки.
+        amounts (ndarray): Суммы транзакций в порядке сортировки.
+        used (ndarray): Признаки использованных транзакций (изменяется).
+        date_tolerance (int): Допуск по дате (дни).
+        amount_tolerance (int): Допуск по сумме (копейки).
+
+    Returns:
+        dict: Индекс строки -> позиция транзакции в порядке сортировки.
+    """
+    matches = {}
+    for index in pending:
+        day = line_days[index]
+        amount = line_amounts[index]
+        low = np.searchsorted(amounts, amount - amount_tolerance, side='left')
+        high = np.searchsorted(amounts, amount + amount_tolerance, side='right')
+        if low == high:
+            continue
+        if not amount_tolerance:
+            # Суммы в окне равны, даты упорядочены
+            window = days[low:high]
+            high = low + np.searchsorted(window, day + date_tolerance, side='right')
+            low = low + np.searchsorted(window, day - date_tolerance, side='left')
+            if low == high:
+                continue
+
+        day_diff = np.abs(days[low:high] - day)
+        amount_diff = np.abs(amounts[low:high] - amount)
+        candidates = np.flatnonzero(~used[low:high] & (day_diff <= date_tolerance))
+        if not len(candidates):
+            continue
+        best = candidates[np.lexsort((day_diff[candidates], amount_diff[candidates]))[0]]
+        used[low + best] = True
+        matches[index] = low + best
+    return matches
+
+
+def reconcile(lines, filters=None, date_tolerance=None, amount_tolerance=None):
+    """
+    Сверяет строки выписки с транзакциями.
+
+    Args:
+        lines (list): Строки выписки из parse_statement.
+        filters (dict, optional): Параметры TransactionFilter для отбора
+            транзакций счета (например, status); период задается выпиской.
+        date_tolerance (int, optional): Допуск по дате в днях.
+        amount_tolerance (Decimal, optional): Допуск по сумме.
+
+    Returns:
+        dict: Период, допуски, итоги и списки matched, missing и extra.
+
+    Raises:
+        ValueError: Если допуски или параметры фильтра некорректны.
+    """
+    if date_tolerance is None:
+        date_tolerance = get_date_tolerance()
+    if amount_tolerance is None:
+        amount_tolerance = get_amount_tolerance()
+    if date_tolerance < 0 or not amount_tolerance.is_finite() or amount_tolerance < 0:
+        raise ValueError("Допуски должны быть неотрицательными числами")
+
+    result = {
+        'period': None,
+        'tolerance': {'days': date_tolerance, 'amount': amount_tolerance},
+        'summary': {'lines': len(lines), 'matched': 0, 'missing': 0, 'extra': 0},
+        'matched': [],
+        'missing': [],
+        'extra': [],
+    }
+    if not lines:
+        return result
+
+    lines = sorted(lines, key=lambda line: (line['date'], line['line']))
+    date_from, date_to = lines[0]['date'], lines[-1]['date']
+    result['period'] = {'date_from': date_from, 'date_to': date_to}
+
+    line_days = np.array([line['date'] for line in lines], dtype='datetime64[D]').astype(np.int64)
+    line_amounts = np.array(
+        [int(line['amount'].scaleb(2)) for line in lines], dtype=np.int64
+    )
+
+    params = {
+        key: value for key, value in (filters or {}).items()
+        if key not in PERIOD_PARAMS
+    }
+    window = np.timedelta64(date_tolerance, 'D')
+    params['date_from'] = str(np.datetime64(date_from, 'D') - window)
+    params['date_to'] = str(np.datetime64(date_to, 'D') + window)
+    frame = analytics.load_frame(params)
+
+    signed = _signed_amounts(frame)
+    all_days = frame.days.astype(np.int64)
+    order = np.lexsort((all_days, signed))
+    days = all_days[order]
+    amounts = signed[order]
+    used = np.zeros(len(order), dtype=bool)
+
+    pending = list(range(len(lines)))
+    matches = _match_pass(
+        pending, line_days, line_amounts, days, amounts, used, date_tolerance, 0
+    )
+    tolerance = int(amount_tolerance.scaleb(2))
+    if tolerance:
+        pending = [index for index in pending if index not in matches]
+        matches.update(_match_pass(
+            pending, line_days, line_amounts, days, amounts, used,
+            date_tolerance, tolerance
+        ))
+
+    for index, line in enumerate(lines):
+        position = matches.get(index)
+        if position is None:
+            result['missing'].append(line)
+            continue
+        result['matched'].append({
+            **line,
+            'transaction': int(frame.ids[order[position]]),
+            'transaction_date': str(np.datetime64(int(days[position]), 'D')),
+            'transaction_amount': analytics.to_money(amounts[position]),
+        })
+
+    # Транзакции на краях окна допуска за пределами периода выписки
+    # не считаются лишними
+    in_period = (days >= line_days[0]) & (days <= line_days[-1])
+    for position in np.flatnonzero(~used & in_period).tolist():
+        result['extra'].append({
+            'transaction': int(frame.ids[order[position]]),
+            'date': str(np.datetime64(int(days[position]), 'D')),
+            'amount': analytics.to_money(amounts[position]),
+        })
+    result['extra'].sort(key=lambda item: (item['date'], item['transaction']))
+
+    result['summary'].update({
+        'matched': len(result['matched']),
+        'missing': len(result['missing']),
+        'extra': len(result['extra']),
+    })
+    return result
+
+
+def reconcile_statement(source, filters=None, date_tolerance=None, amount_tolerance=None):
+    """
+    Читает выписку из CSV и сверяет ее с транзакциями.
+
+    Args:
+        source (file): Текстовый файл CSV.
+        filters (dict, optional): Параметры TransactionFilter.
+        date_tolerance (int, optional): Допуск по дате в днях.
+        amount_tolerance (Decimal, optional): Допуск по сумме.
+
+    Returns:
+        dict: Результат reconcile и ошибки разбора строк выписки.
+
+    Raises:
+        ValueError: Если допуски или параметры фильтра некорректны.
+    """
+    lines, errors = parse_statement(source)
+    result = reconcile(lines, filters, date_tolerance, amount_tolerance)
+    result['errors'] = errors
+    return result
@@ -0,0 +1,345 @@
+"""
+Создание транзакций по шаблонам регулярных операций.
+
+Расписание шаблона задается в формате cron из трех полей: день месяца
+(1-31 или L - последний день), месяц (1-12) и день недели (0-7, 0 и 7 -
+воскресенье). Поля поддерживают списки (1,15), диапазоны (1-5), шаги (*/2)
+и звездочку. Как и в cron, если ограничены и день месяца, и день недели,
+дата подходит при совпадении любого из них.
+
+Даты вычисляются векторно: признаки дат (день, месяц, день недели, последний
+день месяца) строятся один раз для всего периода, маска дат считается один
+раз для каждого различного расписания. Транзакции сохраняются пакетами
+вместе со сдвигом отметки materialized_until шаблона в одной транзакции БД,
+поэтому повторный запуск не создает дубликатов, а запуск после простоя
+досоздает пропущенные даты.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import transfer
+from .models import RecurringTransaction, Transaction
+
+
+# Поля расписания: название, минимальное и максимальное значение
+SCHEDULE_FIELDS = (
+    ('день месяца', 1, 31),
+    ('месяц', 1, 12),
+    ('день недели', 0, 7),
+)
+
+LAST_DAY = 'L'
+
+
+def _parse_field(text, name, low, high):
+    """
+    Разбирает поле расписания в набор допустимых значений.
+
+    Args:
+        text (str): Значение поля.
+        name (str): Название поля для сообщений об ошибках.
+        low (int): Минимальное значение.
+        high (int): Максимальное значение.
+
+    Returns:
+        set: Допустимые значения поля.
+
+    Raises:
+        ValueError: Если поле некорректно.
+    """
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise ValueError(f"Некорректный шаг в поле \"{name}\": {text}")
+            step = int(step_text)
+
+        if part == '*':
+            start, stop = low, high
+        elif '-' in part:
+            start_text, stop_text = part.split('-', 1)
+            if not (start_text.isdigit() and stop_text.isdigit()):
+                raise ValueError(f"Некорректный диапазон в поле \"{name}\": {text}")
+            start, stop = int(start_text), int(stop_text)
+        elif part.isdigit():
+            start = int(part)
+            stop = high if step > 1 else start
+        else:
+            raise ValueError(f"Некорректное значение в поле \"{name}\": {text}")
+
+        if not low <= start <= stop <= high:
+            raise ValueError(
+                f"Значения поля \"{name}\" должны быть от {low} до {high}: {text}"
+            )
+        values.update(range(start, stop + 1, step))
+    return values
+
+
+class Schedule:
+    """
+    Разобранное расписание шаблона регулярной операции.
+
+    Attributes:
+        days (ndarray): Маска допустимых дней месяца (индекс - день).
+        last_day (bool): Подходит ли последний день месяца.
+        months (ndarray): Маска допустимых месяцев (индекс - месяц).
+        weekdays (ndarray): Маска допустимых дней недели (0 - воскресенье).
+        any_day (bool): Не ограничен ли день месяца.
+        any_weekday (bool): Не ограничен ли день недели.
+    """
+
+    def __init__(self, text):
+        """
+        Разбирает расписание.
+
+        Args:
+            text (str): Расписание из трех полей через пробел.
+
+        Raises:
+            ValueError: Если расписание некорректно.
+        """
+        fields = text.split()
+        if len(fields) != len(SCHEDULE_FIELDS):
+            raise ValueError(
+                "Расписание должно состоять из трех полей: "
+                "день месяца, месяц, день недели"
+            )
+        day_field, month_field, weekday_field = fields
+
+        day_parts = day_field.split(',')
+        self.last_day = LAST_DAY in day_parts
+        day_parts = [part for part in day_parts if part != LAST_DAY]
+        days = set()
+        if day_parts:
+            days = _parse_field(','.join(day_parts), *SCHEDULE_FIELDS[0])
+        months = _parse_field(month_field, *SCHEDULE_FIELDS[1])
+        weekdays = _parse_field(weekday_field, *SCHEDULE_FIELDS[2])
+
+        self.days = np.zeros(32, dtype=bool)
+        self.days[list(days)] = True
+        self.months = np.zeros(13, dtype=bool)
+        self.months[list(months)] = True
+        self.weekdays = np.zeros(7, dtype=bool)
+        self.weekdays[[value % 7 for value in weekdays]] = True
+        self.any_day = day_field == '*'
+        self.any_weekday = weekday_field == '*'
+
+    def matches(self, calendar):
+        """
+        Вычисляет маску подходящих дат.
+
+        Args:
+            calendar (dict): Признаки дат из build_calendar.
+
+        Returns:
+            ndarray: Маска дат, соответствующих расписанию.
+        """
+        by_day = self.days[calendar['day']]
+        if self.last_day:
+            by_day = by_day | calendar['last_day']
+        by_weekday = self.weekdays[calendar['weekday']]
+
+        if self.any_day or self.any_weekday:
+            matched = by_day & by_weekday
+        else:
+            matched = by_day | by_weekday
+        return matched & self.months[calendar['month']]
+
+
+def build_calendar(start, end):
+    """
+    Строит признаки всех дат периода.
+
+    Args:
+        start (date): Первая дата.
+        end (date): Последняя дата (включительно).
+
+    Returns:
+        dict: Даты (datetime64[D]) и массивы дня месяца, месяца, дня недели
+        (0 - воскресенье) и признака последнего дня месяца.
+    """
+    days = np.arange(
+        np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1, dtype='datetime64[D]'
+    )
+    months = days.astype('datetime64[M]')
+    return {
+        'dates': days,
+        'day': (days - months).astype(np.int64) + 1,
+        'month': months.astype(np.int64) % 12 + 1,
+        # 1970-01-01 - четверг (4)
+        'weekday': (days.astype(np.int64) + 4) % 7,
+        'last_day': (days + 1).astype('datetime64[M]') != months,
+    }
+
+
+def occurrences(schedule, start, end):
+    """
+    Возвращает даты, соответствующие расписанию, в периоде.
+
+    Args:
+        schedule (str | Schedule): Расписание.
+        start (date): Первая дата.
+        end (date): Последняя дата (включительно).
+
+    Returns:
+        list: Даты операций.
+    """
+    if start > end:
+        return []
+    if not isinstance(schedule, Schedule):
+        schedule = Schedule(schedule)
+    calendar = build_calendar(start, end)
+    return calendar['dates'][schedule.matches(calendar)].tolist()
+
+
+def due_templates(until):
+    """
+    Отбирает шаблоны, по которым могут быть несозданные даты до указанной.
+
+    Args:
+        until (date): Дата, до которой (включительно) создаются операции.
+
+    Returns:
+        QuerySet: Активные шаблоны.
+    """
+    return RecurringTransaction.objects.filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=until),
+        Q(end_date__isnull=True) | Q(materialized_until__isnull=True) |
+        Q(end_date__gt=F('materialized_until')),
+        is_active=True,
+        start_date__lte=until,
+    )
+
+
+def _window(template, until):
+    """
+    Возвращает период несозданных дат шаблона.
+
+    Args:
+        template (RecurringTransaction): Шаблон.
+        until (date): Дата, до которой создаются операции.
+
+    Returns:
+        tuple: Первая и последняя дата периода (первая может быть позже
+        последней, если создавать нечего).
+    """
+    start = template.start_date
+    if template.materialized_until is not None:
+        start = max(start, template.materialized_until + timedelta(days=1))
+    end = until if template.end_date is None else min(until, template.end_date)
+    return start, end
+
+
+def _build_transactions(templates, until):
+    """
+    Строит несохраненные транзакции по шаблонам до указанной даты.
+
+    Args:
+        templates (list): Шаблоны.
+        until (date): Дата, до которой создаются операции.
+
+    Returns:
+        tuple: Транзакции и шаблоны с некорректным расписанием (ID -> ошибка).
+    """
+    windows = {template.pk: _window(template, until) for template in templates}
+    starts = [start for start, end in windows.values() if start <= end]
+    if not starts:
+        return [], {}
+
+    calendar = build_calendar(min(starts), until)
+    first = calendar['dates'][0]
+    # Смещения подходящих дат вычисляются один раз для каждого расписания
+    offsets_by_schedule = {}
+    errors = {}
+    transactions = []
+    for template in templates:
+        start, end = windows[template.pk]
+        if start > end:
+            continue
+        offsets = offsets_by_schedule.get(template.schedule)
+        if offsets is None:
+            try:
+                offsets = np.flatnonzero(Schedule(template.schedule).matches(calendar))
+            except ValueError as error:
+                offsets = error
+            offsets_by_schedule[template.schedule] = offsets
+        if isinstance(offsets, ValueError):
+            errors[template.pk] = str(offsets)
+            continue
+
+        low = np.searchsorted(offsets, (np.datetime64(start, 'D') - first).astype(np.int64))
+        high = np.searchsorted(
+            offsets, (np.datetime64(end, 'D') - first).astype(np.int64), side='right'
+        )
+        for transaction_date in calendar['dates'][offsets[low:high]].tolist():
+            transactions.append(Transaction(
+                transaction_date=transaction_date,
+                status_id=template.status_id,
+                transaction_type_id=template.transaction_type_id,
+                category_id=template.category_id,
+                subcategory_id=template.subcategory_id,
+                amount=template.amount,
+                comment=template.comment or template.name,
+            ))
+    return transactions, errors
+
+
+def materialize(until=None, batch_size=1000, dry_run=False):
+    """
+    Создает транзакции по всем шаблонам на наступившие даты.
+
+    Шаблоны обрабатываются порциями: в одной транзакции БД шаблоны порции
+    блокируются, их транзакции сохраняются пакетами, а отметка
+    materialized_until сдвигается до until. Даты до отметки повторно
+    не создаются; даты, пропущенные из-за простоя, создаются при следующем
+    запуске.
+
+    Args:
+        until (date, optional): Дата, до которой (включительно) создаются
+            операции (по умолчанию сегодня).
+        batch_size (int): Количество шаблонов в порции и транзакций в пакете.
+        dry_run (bool): Только посчитать операции, не сохраняя их.
+
+    Returns:
+        dict: Количество обработанных шаблонов, созданных транзакций
+        и шаблоны с некорректным расписанием (ID -> ошибка).
+    """
+    until = until or timezone.localdate()
+    template_ids = list(
+        due_templates(until).order_by('id').values_list('id', flat=True)
+    )
+
+    result = {'templates': 0, 'created': 0, 'errors': {}}
+    for start in range(0, len(template_ids), batch_size):
+        chunk = template_ids[start:start + batch_size]
+        with db_transaction.atomic():
+            # Повторная выборка с блокировкой: параллельный запуск дождется
+            # сдвига отметок и не создаст те же даты повторно
+            templates = list(
+                due_templates(until).select_for_update().filter(id__in=chunk)
+            )
+            transactions, errors = _build_transactions(templates, until)
+            materialized = [
+                template for template in templates if template.pk not in errors
+            ]
+            result['templates'] += len(materialized)
+            result['created'] += len(transactions)
+            result['errors'].update(errors)
+            if dry_run:
+                continue
+
+            for offset in range(0, len(transactions), batch_size):
+                transfer.save_transactions(transactions[offset:offset + batch_size])
+            for template in materialized:
+                template.materialized_until = until
+            RecurringTransaction.objects.bulk_update(
+                materialized, ['materialized_until'], batch_size=batch_size
+            )
+
+    return result
@@ -0,0 +1,142 @@
+"""
+Построение и кэширование справочных данных.
+
+Справочники (статусы, типы, категории, подкатегории) меняются редко, поэтому
+готовые структуры для API кэшируются с версией справочных данных в ключе.
+Дерево "тип -> категория -> подкатегория" строится фиксированным числом
+запросов независимо от количества элементов.
+"""
+from django.core.cache import cache
+
+from . import caching
+from .models import Status, TransactionType, Category, Subcategory
+from .serializers import (
+    StatusSerializer,
+    TransactionTypeSerializer,
+    CategorySerializer,
+    SubcategorySerializer
+)
+
+
+REFERENCE_FIELDS = ('id', 'name', 'description')
+
+
+def get_reference_version():
+    """
+    Возвращает текущую версию справочных данных.
+
+    Returns:
+        int: Версия, увеличивающаяся при любом изменении справочников.
+    """
+    return caching.get_data_version(caching.REFERENCES)
+
+
+def _cached(prefix, params, builder):
+    """
+    Возвращает закэшированный результат построителя или строит его заново.
+
+    Args:
+        prefix (str): Префикс ключа кэша.
+        params (dict): Параметры построения.
+        builder (callable): Функция построения результата.
+
+    Returns:
+        object: Результат построителя.
+    """
+    cache_key = caching.make_cache_key(prefix, params, scopes=(caching.REFERENCES,))
+    data = cache.get(cache_key)
+    if data is None:
+        data = builder()
+        cache.set(cache_key, data, caching.get_report_cache_timeout())
+    return data
+
+
+def build_reference_data():
+    """
+    Возвращает плоские списки всех справочников в формате API.
+
+    Returns:
+        dict: Списки statuses, transaction_types, categories и subcategories.
+    """
+    def build():
+        return {
+            'statuses': StatusSerializer(
+                Status.objects.all(), many=True
+            ).data,
+            'transaction_types': TransactionTypeSerializer(
+                TransactionType.objects.all(), many=True
+            ).data,
+            'categories': CategorySerializer(
+                Category.objects.select_related('transaction_type'), many=True
+            ).data,
+            'subcategories': SubcategorySerializer(
+                Subcategory.objects.select_related('category__transaction_type'),
+                many=True
+            ).data,
+        }
+
+    return _cached('reference-data', {}, build)
+
+
+def build_reference_tree(transaction_type=None):
+    """
+    Возвращает дерево справочников "тип -> категория -> подкатегория".
+
+    Дерево строится четырьмя запросами (статусы, типы, категории,
+    подкатегории) и собирается в памяти.
+
+    Args:
+        transaction_type (int | None): ID типа операции, если дерево нужно
+            ограничить одной ветвью.
+
+    Returns:
+        dict: Версия справочников, список статусов и дерево типов операций.
+    """
+    def build():
+        types = TransactionType.objects.order_by('name')
+        categories = Category.objects.order_by('name')
+        subcategories = Subcategory.objects.order_by('name')
+        if transaction_type is not None:
+            types = types.filter(id=transaction_type)
+            categories = categories.filter(transaction_type_id=transaction_type)
+            subcategories = subcategories.filter(
+                category__transaction_type_id=transaction_type
+            )
+
+        children = {}
+        for subcategory in subcategories.values(*REFERENCE_FIELDS, 'category_id'):
+            children.setdefault(subcategory.pop('category_id'), []).append(subcategory)
+
+        categories_by_type = {}
+        for category in categories.values(*REFERENCE_FIELDS, 'transaction_type_id'):
+            category['subcategories'] = children.get(category['id'], [])
+            categories_by_type.setdefault(
+                category.pop('transaction_type_id'), []
+            ).append(category)
+
+        tree = []
+        for type_values in types.values(*REFERENCE_FIELDS):
+            type_values['categories'] = categories_by_type.get(type_values['id'], [])
+            tree.append(type_values)
+
+        return {
+            'version': str(get_reference_version()),
+            'statuses': list(Status.objects.order_by('name').values(*REFERENCE_FIELDS)),
+            'transaction_types': tree,
+        }
+
+    return _cached('reference-tree', {'transaction_type': transaction_type}, build)
+
+
+def get_tree_etag(transaction_type=None):
+    """
+    Возвращает ETag дерева справочников для текущей версии данных.
+
+    Args:
+        transaction_type (int | None): ID типа операции при выборке одной ветви.
+
+    Returns:
+        str: Значение заголовка ETag.
+    """
+    branch = transaction_type if transaction_type is not None else 'all'
+    return f'"references-{get_reference_version()}-{branch}"'
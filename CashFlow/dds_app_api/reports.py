@@ -0,0 +1,189 @@
+"""
+Построение аналитических отчетов по транзакциям.
+
+Содержит сводную таблицу (pivot) "измерение × период", которая вычисляется
+одним сгруппированным SQL-запросом на каждый источник данных.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
+
+
+# Измерения строк сводной таблицы: поле ID и поле названия
+PIVOT_ROWS = {
+    'category': ('category_id', 'category__name'),
+    'subcategory': ('subcategory_id', 'subcategory__name'),
+    'status': ('status_id', 'status__name'),
+}
+
+# Периоды столбцов сводной таблицы
+PIVOT_PERIODS = {
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+
+
+def get_fiscal_year_range(fiscal_year):
+    """
+    Возвращает границы финансового года.
+
+    Финансовый год обозначается годом своего начала и начинается с месяца
+    из настройки CASHFLOW_FISCAL_YEAR_START_MONTH.
+
+    Args:
+        fiscal_year (int): Номер финансового года.
+
+    Returns:
+        tuple: Первый день года и последний день года (включительно).
+    """
+    start_month = getattr(settings, 'CASHFLOW_FISCAL_YEAR_START_MONTH', 1)
+    start = date(fiscal_year, start_month, 1)
+    end = date(fiscal_year + 1, start_month, 1)
+    return start, date.fromordinal(end.toordinal() - 1)
+
+
+def pivot_cells(queryset, rows, period, date_field='transaction_date',
+                count=None, total=None):
+    """
+    Формирует сгруппированный запрос ячеек сводной таблицы.
+
+    Args:
+        queryset (QuerySet): Отфильтрованная выборка.
+        rows (str): Измерение строк (ключ PIVOT_ROWS).
+        period (str): Период столбцов (ключ PIVOT_PERIODS).
+        date_field (str): Поле даты для группировки по периоду.
+        count (Aggregate): Выражение количества (по умолчанию Count('id')).
+        total (Aggregate): Выражение суммы (по умолчанию Sum('amount')).
+
+    Returns:
+        QuerySet: Словари с ID и названием строки, периодом, количеством и суммой.
+    """
+    id_field, name_field = PIVOT_ROWS[rows]
+    return (
+        queryset.order_by()
+        .annotate(bucket=PIVOT_PERIODS[period](date_field))
+        .values(id_field, name_field, 'bucket')
+        .annotate(
+            count=count if count is not None else Count('id'),
+            total=total if total is not None else Sum('amount')
+        )
+    )
+
+
+def iter_buckets(start, end, period):
+    """
+    Перечисляет начала периодов между двумя датами включительно.
+
+    Args:
+        start (date): Начальная дата.
+        end (date): Конечная дата.
+        period (str): Период (month, quarter или year).
+
+    Yields:
+        date: Первый день очередного периода.
+    """
+    step = {'month': 1, 'quarter': 3, 'year': 12}[period]
+    month = start.month
+    if period == 'quarter':
+        month = (month - 1) // 3 * 3 + 1
+    elif period == 'year':
+        month = 1
+
+    current = date(start.year, month, 1)
+    while current <= end:
+        yield current
+        month_index = current.month - 1 + step
+        current = date(current.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def format_bucket(bucket, period):
+    """
+    Форматирует начало периода в подпись столбца.
+
+    Args:
+        bucket (date): Первый день периода.
+        period (str): Период (month, quarter или year).
+
+    Returns:
+        str: Подпись вида 2025-01, 2025-Q1 или 2025.
+    """
+    if period == 'year':
+        return f'{bucket.year}'
+    if period == 'quarter':
+        return f'{bucket.year}-Q{(bucket.month - 1) // 3 + 1}'
+    return f'{bucket:%Y-%m}'
+
+
+def build_pivot(cell_groups, rows, period, date_from=None, date_to=None):
+    """
+    Собирает сводную таблицу из сгруппированных ячеек.
+
+    Ячейки из нескольких источников (основная таблица, архив, итоги архива)
+    суммируются. Если задан полный диапазон дат, столбцы включают все периоды
+    диапазона, в том числе пустые.
+
+    Args:
+        cell_groups (list): Итерируемые наборы ячеек из pivot_cells.
+        rows (str): Измерение строк (ключ PIVOT_ROWS).
+        period (str): Период столбцов (ключ PIVOT_PERIODS).
+        date_from (date, optional): Начало диапазона.
+        date_to (date, optional): Конец диапазона.
+
+    Returns:
+        dict: Столбцы, строки с суммами и количествами, итоги по столбцам и общий итог.
+    """
+    id_field, name_field = PIVOT_ROWS[rows]
+    matrix = {}
+    buckets = set()
+    for cells in cell_groups:
+        for cell in cells:
+            row = matrix.setdefault(
+                cell[id_field], {'name': cell[name_field], 'cells': {}}
+            )
+            values = row['cells'].setdefault(cell['bucket'], [0, 0])
+            values[0] += cell['count'] or 0
+            values[1] += cell['total'] or 0
+            buckets.add(cell['bucket'])
+
+    if date_from is not None and date_to is not None:
+        columns = list(iter_buckets(date_from, date_to, period))
+    else:
+        columns = sorted(buckets)
+
+    column_counts = [0] * len(columns)
+    column_totals = [0] * len(columns)
+    result_rows = []
+    for row_id, row in sorted(
+        matrix.items(), key=lambda item: (item[1]['name'], item[0])
+    ):
+        counts = []
+        totals = []
+        for index, bucket in enumerate(columns):
+            count, total = row['cells'].get(bucket, (0, 0))
+            counts.append(count)
+            totals.append(total)
+            column_counts[index] += count
+            column_totals[index] += total
+
+        result_rows.append({
+            'id': row_id,
+            'name': row['name'],
+            'counts': counts,
+            'totals': totals,
+            'count': sum(counts),
+            'total': sum(totals),
+        })
+
+    return {
+        'rows_by': rows,
+        'period': period,
+        'columns': [format_bucket(bucket, period) for bucket in columns],
+        'rows': result_rows,
+        'column_counts': column_counts,
+        'column_totals': column_totals,
+        'grand_count': sum(column_counts),
+        'grand_total': sum(column_totals),
+    }
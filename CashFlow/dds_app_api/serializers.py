@@ -1,5 +1,19 @@
 from rest_framework import serializers
-from .models import Status, TransactionType, Category, Subcategory, Transaction
+from rest_framework.reverse import reverse
+from . import categorize, fingerprints, recurring, upsert
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    Job,
+    Anomaly,
+    Budget,
+    RecurringTransaction,
+    CategorizationRule,
+    RequestProfile
+)
 
 
 class StatusSerializer(serializers.ModelSerializer):
@@ -144,17 +158,51 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
     Используется при создании и изменении транзакций.
     Не включает вычисляемые поля для упрощения валидации.
     Выполняет проверку согласованности данных между связанными моделями.
+    Подкатегорию, категорию и тип операции можно не указывать, если их
+    определяют правила категоризации по комментарию.
     """
 
     class Meta:
         model = Transaction
         fields = '__all__'
         read_only_fields = ('created_date',)
+        extra_kwargs = {
+            'transaction_type': {'required': False},
+            'category': {'required': False},
+            'subcategory': {'required': False},
+        }
+
+    def validate_external_id(self, value):
+        """
+        Проверяет внешний идентификатор.
+
+        Args:
+            value (str | None): Идентификатор вида "источник:ссылка".
+
+        Returns:
+            str | None: Идентификатор или None, если он не указан.
+
+        Raises:
+            serializers.ValidationError: Если идентификатор некорректен.
+        """
+        if not value:
+            return None
+        source, _, reference = value.partition(upsert.SEPARATOR)
+        try:
+            return upsert.make_external_id(source, reference)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
 
     def validate(self, data):
         """
         Проверяет согласованность данных между связанными моделями.
 
+        Если подкатегория не указана при создании, она определяется
+        правилами категоризации по комментарию вместе с незаполненными
+        категорией и типом операции. Если включена настройка
+        CASHFLOW_REJECT_DUPLICATES, отклоняет транзакцию с тем же
+        отпечатком, что у существующей.
+
         Args:
             data (dict): Данные для валидации.
 
@@ -162,18 +210,64 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
             dict: Проверенные данные.
 
         Raises:
-            serializers.ValidationError: Если обнаружена несогласованность данных.
+            serializers.ValidationError: Если обнаружена несогласованность
+                данных, подкатегорию не удалось определить или транзакция
+                является дубликатом.
         """
-        if data['category'].transaction_type != data['transaction_type']:
+        if 'subcategory' not in data and not self.partial:
+            classified = categorize.get_matcher().classify(data.get('comment'))
+            if classified is None:
+                raise serializers.ValidationError({
+                    'subcategory': "Обязательное поле: ни одно правило "
+                                   "категоризации не подходит к комментарию"
+                })
+            subcategory = Subcategory.objects.select_related(
+                'category__transaction_type'
+            ).get(pk=classified[0])
+            data['subcategory'] = subcategory
+            data.setdefault('category', subcategory.category)
+            data.setdefault('transaction_type', subcategory.category.transaction_type)
+
+        for field in ('transaction_type', 'category'):
+            if field not in data and not self.partial:
+                raise serializers.ValidationError({field: "Обязательное поле."})
+
+        # При частичном изменении недостающие значения берутся из транзакции
+        values = {
+            name: data.get(name, getattr(self.instance, name, None))
+            for name in (
+                'transaction_type', 'category', 'subcategory',
+                'transaction_date', 'amount', 'comment'
+            )
+        }
+
+        if values['category'].transaction_type != values['transaction_type']:
             raise serializers.ValidationError(
                 "Категория не соответствует типу операции"
             )
 
-        if data['subcategory'].category != data['category']:
+        if values['subcategory'].category != values['category']:
             raise serializers.ValidationError(
                 "Подкатегория не соответствует категории"
             )
 
+        if fingerprints.reject_duplicates():
+            duplicates = Transaction.objects.filter(
+                fingerprint=fingerprints.compute({
+                    'transaction_date': values['transaction_date'],
+                    'amount': values['amount'],
+                    'subcategory_id': values['subcategory'].pk,
+                    'comment': values['comment'],
+                })
+            )
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            duplicate_id = duplicates.values_list('id', flat=True).first()
+            if duplicate_id is not None:
+                raise serializers.ValidationError(
+                    f"Такая транзакция уже существует: {duplicate_id}"
+                )
+
         return data
 
 
@@ -213,4 +307,383 @@ class TransactionTypeDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TransactionType
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели Job.
+
+    Используется для постановки фоновых задач в очередь и опроса их
+    состояния. Входной файл передается только при создании задачи.
+
+    Attributes:
+        input_file (FileField): Входной файл задачи (только для записи).
+        result_url (str): Ссылка на скачивание результата (только для чтения).
+    """
+
+    input_file = serializers.FileField(
+        write_only=True,
+        required=False
+    )
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = (
+            'id',
+            'kind',
+            'params',
+            'input_file',
+            'status',
+            'progress',
+            'message',
+            'error',
+            'result_url',
+            'created_date',
+            'started_at',
+            'finished_at',
+        )
+        read_only_fields = (
+            'id',
+            'status',
+            'progress',
+            'message',
+            'error',
+            'created_date',
+            'started_at',
+            'finished_at',
+        )
+
+    def get_result_url(self, obj):
+        """
+        Возвращает ссылку на скачивание результата задачи.
+
+        Args:
+            obj (Job): Задача.
+
+        Returns:
+            str | None: URL действия download или None, если результата нет.
+        """
+        if not obj.result:
+            return None
+        url = reverse('job-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate_kind(self, value):
+        """
+        Проверяет, что тип задачи зарегистрирован.
+
+        Args:
+            value (str): Тип задачи.
+
+        Returns:
+            str: Проверенный тип задачи.
+
+        Raises:
+            serializers.ValidationError: Если тип задачи неизвестен.
+        """
+        from .jobs import JOB_HANDLERS
+
+        if value not in JOB_HANDLERS:
+            raise serializers.ValidationError(
+                f"Допустимые значения: {', '.join(sorted(JOB_HANDLERS))}"
+            )
+        return value
+
+    def validate_params(self, value):
+        """
+        Проверяет, что параметры задачи переданы объектом.
+
+        Args:
+            value (object): Параметры задачи.
+
+        Returns:
+            dict: Проверенные параметры.
+
+        Raises:
+            serializers.ValidationError: Если параметры не являются объектом.
+        """
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Ожидается объект")
+        return value
+
+
+class AnomalySerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели Anomaly.
+
+    Attributes:
+        transaction (TransactionSerializer): Аномальная транзакция.
+    """
+
+    transaction = TransactionSerializer(read_only=True)
+
+    class Meta:
+        model = Anomaly
+        fields = ('transaction', 'score', 'expected', 'detected_at')
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели Budget.
+
+    Бюджет задается для категории или для подкатегории; месяц приводится
+    к первому дню.
+
+    Attributes:
+        category_name (str): Название категории (только для чтения).
+        subcategory_name (str): Название подкатегории (только для чтения).
+    """
+
+    category_name = serializers.CharField(
+        source='category.name',
+        read_only=True,
+        default=None
+    )
+    subcategory_name = serializers.CharField(
+        source='subcategory.name',
+        read_only=True,
+        default=None
+    )
+
+    class Meta:
+        model = Budget
+        fields = '__all__'
+        read_only_fields = (
+            'id',
+            'category_name',
+            'subcategory_name',
+            'updated_at'
+        )
+
+    def validate_month(self, value):
+        """
+        Приводит месяц бюджета к первому дню.
+
+        Args:
+            value (date): Дата внутри месяца.
+
+        Returns:
+            date: Первый день месяца.
+        """
+        return value.replace(day=1)
+
+    def validate(self, data):
+        """
+        Проверяет, что бюджет задан ровно для одной категории или подкатегории
+        и что на этот месяц для нее еще нет бюджета.
+
+        Args:
+            data (dict): Данные для валидации.
+
+        Returns:
+            dict: Проверенные данные.
+
+        Raises:
+            serializers.ValidationError: Если данные некорректны.
+        """
+        values = {
+            name: data.get(name, getattr(self.instance, name, None))
+            for name in ('category', 'subcategory', 'month')
+        }
+        if (values['category'] is None) == (values['subcategory'] is None):
+            raise serializers.ValidationError(
+                "Укажите либо категорию, либо подкатегорию"
+            )
+
+        target = 'category' if values['category'] is not None else 'subcategory'
+        duplicates = Budget.objects.filter(
+            **{target: values[target], 'month': values['month']}
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(
+                "Бюджет на этот месяц уже задан"
+            )
+
+        return data
+
+
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели RecurringTransaction.
+
+    Проверяет расписание и согласованность категории, подкатегории и типа
+    операции так же, как при создании транзакции.
+
+    Attributes:
+        category_name (str): Название категории (только для чтения).
+        subcategory_name (str): Название подкатегории (только для чтения).
+    """
+
+    category_name = serializers.CharField(
+        source='category.name',
+        read_only=True
+    )
+    subcategory_name = serializers.CharField(
+        source='subcategory.name',
+        read_only=True
+    )
+
+    class Meta:
+        model = RecurringTransaction
+        fields = '__all__'
+        read_only_fields = (
+            'id',
+            'category_name',
+            'subcategory_name',
+            'materialized_until',
+            'created_date',
+            'updated_at'
+        )
+
+    def validate_schedule(self, value):
+        """
+        Проверяет расписание.
+
+        Args:
+            value (str): Расписание в формате cron (три поля).
+
+        Returns:
+            str: Расписание с одинарными пробелами между полями.
+
+        Raises:
+            serializers.ValidationError: Если расписание некорректно.
+        """
+        try:
+            recurring.Schedule(value)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
+        return ' '.join(value.split())
+
+    def validate(self, data):
+        """
+        Проверяет согласованность связанных моделей и дат шаблона.
+
+        Args:
+            data (dict): Данные для валидации.
+
+        Returns:
+            dict: Проверенные данные.
+
+        Raises:
+            serializers.ValidationError: Если обнаружена несогласованность данных.
+        """
+        values = {
+            name: data.get(name, getattr(self.instance, name, None))
+            for name in (
+                'transaction_type', 'category', 'subcategory',
+                'start_date', 'end_date'
+            )
+        }
+        if values['category'].transaction_type != values['transaction_type']:
+            raise serializers.ValidationError(
+                "Категория не соответствует типу операции"
+            )
+
+        if values['subcategory'].category != values['category']:
+            raise serializers.ValidationError(
+                "Подкатегория не соответствует категории"
+            )
+
+        if values['end_date'] is not None and values['end_date'] < values['start_date']:
+            raise serializers.ValidationError(
+                "Дата окончания раньше даты начала"
+            )
+
+        return data
+
+
+class CategorizationRuleSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели CategorizationRule.
+
+    Проверяет, что шаблон может быть включен в общее выражение правил.
+
+    Attributes:
+        subcategory_name (str): Название подкатегории (только для чтения).
+    """
+
+    subcategory_name = serializers.CharField(
+        source='subcategory.name',
+        read_only=True
+    )
+
+    class Meta:
+        model = CategorizationRule
+        fields = '__all__'
+        read_only_fields = ('id', 'subcategory_name', 'updated_at')
+
+    def validate(self, data):
+        """
+        Проверяет шаблон правила.
+
+        Args:
+            data (dict): Данные для валидации.
+
+        Returns:
+            dict: Проверенные данные.
+
+        Raises:
+            serializers.ValidationError: Если шаблон некорректен.
+        """
+        kind = data.get('kind', getattr(self.instance, 'kind', CategorizationRule.KEYWORD))
+        pattern = data.get('pattern', getattr(self.instance, 'pattern', ''))
+        try:
+            categorize.validate_pattern(kind, pattern)
+        except ValueError as error:
+            raise serializers.ValidationError({'pattern': str(error)})
+        return data
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели RequestProfile (только чтение).
+
+    Attributes:
+        username (str): Имя сотрудника, запросившего профилирование.
+        download_url (str): Ссылка на скачивание файла профиля.
+    """
+
+    username = serializers.CharField(
+        source='user.username',
+        read_only=True,
+        default=None
+    )
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RequestProfile
+        fields = (
+            'id',
+            'username',
+            'method',
+            'path',
+            'query_string',
+            'view',
+            'action',
+            'status_code',
+            'duration_ms',
+            'query_count',
+            'summary',
+            'download_url',
+            'created_date',
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        """
+        Возвращает ссылку на скачивание файла профиля.
+
+        Args:
+            obj (RequestProfile): Профиль запроса.
+
+        Returns:
+            str: URL действия download.
+        """
+        url = reverse('requestprofile-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,284 @@
+"""
+Обработчики сигналов моделей DDS API.
+
+Поддерживают в актуальном состоянии производные данные (версии кэша,
+счетчики строк, записи об удалениях, отметки аномалий, исполнение
+бюджетов, остатки на конец месяца, отпечатки транзакций, версия правил
+категоризации), которые зависят от транзакций, справочников, бюджетов
+и правил.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import anomalies, archive, balances, budgets, caching, counters, fingerprints, sync
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    Anomaly,
+    Budget,
+    CategorizationRule
+)
+
+
+REFERENCE_MODELS = (Status, TransactionType, Category, Subcategory)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def transaction_changed(sender, **kwargs):
+    """
+    Сбрасывает версию данных транзакций при создании, изменении или удалении.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        **kwargs: Аргументы сигнала.
+    """
+    caching.bump_data_version(caching.TRANSACTIONS)
+
+
+@receiver(pre_save, sender=Transaction)
+def assign_fingerprint(sender, instance, **kwargs):
+    """
+    Вычисляет отпечаток транзакции перед сохранением.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраняемая транзакция.
+        **kwargs: Аргументы сигнала.
+    """
+    instance.fingerprint = fingerprints.compute(instance)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_counter_keys(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает ключи счетчиков и сумму изменяемой транзакции до сохранения.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраняемая транзакция.
+        raw (bool): True при загрузке фикстур.
+        **kwargs: Аргументы сигнала.
+    """
+    instance._counter_keys = set()
+    instance._previous_values = None
+    if instance.pk is None or raw:
+        return
+    values = sender.objects.filter(pk=instance.pk).values(
+        *counters.KEY_FIELDS, 'amount'
+    ).first()
+    if values is not None:
+        instance._counter_keys = counters.counter_keys(values)
+        instance._previous_values = values
+
+
+@receiver(post_save, sender=Transaction)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Обновляет счетчики после создания или изменения транзакции.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраненная транзакция.
+        created (bool): True, если транзакция создана.
+        raw (bool): True при загрузке фикстур.
+        **kwargs: Аргументы сигнала.
+    """
+    if raw:
+        return
+    old_keys = getattr(instance, '_counter_keys', set())
+    new_keys = counters.counter_keys(instance)
+    counters.apply(new_keys - old_keys, 1)
+    counters.apply(old_keys - new_keys, -1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """
+    Обновляет счетчики после удаления транзакции.
+
+    При переносе в архив счетчики уменьшаются один раз на порцию.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Удаленная транзакция.
+        **kwargs: Аргументы сигнала.
+    """
+    if archive.is_archiving():
+        return
+    counters.apply(counters.counter_keys(instance), -1)
+
+
+@receiver(post_save, sender=Transaction)
+def check_anomaly(sender, instance, created, raw=False, **kwargs):
+    """
+    Проверяет сумму сохраненной транзакции по статистике подкатегории.
+
+    Проверка выполняется по закэшированной статистике без запросов к БД;
+    запись выполняется, только если транзакция аномальна или была
+    отмечена как аномальная до изменения.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраненная транзакция.
+        created (bool): True, если транзакция создана.
+        raw (bool): True при загрузке фикстур.
+        **kwargs: Аргументы сигнала.
+    """
+    if raw:
+        return
+    result = anomalies.check(instance)
+    if result is not None:
+        Anomaly.objects.update_or_create(
+            transaction=instance,
+            defaults={'score': result[0], 'expected': result[1]}
+        )
+    elif not created:
+        Anomaly.objects.filter(transaction=instance).delete()
+
+
+@receiver(post_save, sender=Transaction)
+def update_budgets_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Обновляет закэшированное исполнение бюджетов после записи транзакции.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраненная транзакция.
+        created (bool): True, если транзакция создана.
+        raw (bool): True при загрузке фикстур.
+        **kwargs: Аргументы сигнала.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_values', None)
+    if previous is not None:
+        if (
+            counters.month_key(previous['transaction_date']) ==
+            counters.month_key(instance.transaction_date) and
+            previous['subcategory_id'] == instance.subcategory_id and
+            previous['amount'] == instance.amount
+        ):
+            return
+        budgets.apply_rows([previous], -1)
+    budgets.apply_rows([instance], 1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_budgets_on_delete(sender, instance, **kwargs):
+    """
+    Обновляет закэшированное исполнение бюджетов после удаления транзакции.
+
+    Перенос в архив фактические суммы месяца не меняет и не учитывается.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Удаленная транзакция.
+        **kwargs: Аргументы сигнала.
+    """
+    if archive.is_archiving():
+        return
+    budgets.apply_rows([instance], -1)
+
+
+@receiver(post_save, sender=Transaction)
+def update_balances_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Переносит изменение остатка от записанной транзакции на отметки остатков.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Сохраненная транзакция.
+        created (bool): True, если транзакция создана.
+        raw (bool): True при загрузке фикстур.
+        **kwargs: Аргументы сигнала.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_values', None)
+    if previous is not None:
+        fields = ('transaction_type_id', 'amount') + tuple(balances.DIMENSIONS.values())
+        if (
+            counters.month_key(previous['transaction_date']) ==
+            counters.month_key(instance.transaction_date) and
+            all(previous[field] == getattr(instance, field) for field in fields)
+        ):
+            return
+        balances.apply_rows([previous], -1)
+    balances.apply_rows([instance], 1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_balances_on_delete(sender, instance, **kwargs):
+    """
+    Вычитает удаленную транзакцию из отметок остатков.
+
+    Перенос в архив остатки не меняет и не учитывается.
+
+    Args:
+        sender (Model): Класс модели Transaction.
+        instance (Transaction): Удаленная транзакция.
+        **kwargs: Аргументы сигнала.
+    """
+    if archive.is_archiving():
+        return
+    balances.apply_rows([instance], -1)
+
+
+@receiver([post_save, post_delete], sender=Budget)
+def budget_changed(sender, **kwargs):
+    """
+    Сбрасывает версию бюджетов при создании, изменении или удалении.
+
+    Args:
+        sender (Model): Класс модели Budget.
+        **kwargs: Аргументы сигнала.
+    """
+    caching.bump_data_version(caching.BUDGETS)
+
+
+@receiver([post_save, post_delete], sender=CategorizationRule)
+def rule_changed(sender, **kwargs):
+    """
+    Сбрасывает версию правил категоризации при создании, изменении
+    или удалении правила.
+
+    Args:
+        sender (Model): Класс модели CategorizationRule.
+        **kwargs: Аргументы сигнала.
+    """
+    caching.bump_data_version(caching.RULES)
+
+
+def reference_changed(sender, **kwargs):
+    """
+    Сбрасывает версию справочных данных при изменении любого справочника.
+
+    Args:
+        sender (Model): Класс модели справочника.
+        **kwargs: Аргументы сигнала.
+    """
+    caching.bump_data_version(caching.REFERENCES)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_changed, sender=model)
+    post_delete.connect(reference_changed, sender=model)
+
+
+def record_deletion(sender, instance, **kwargs):
+    """
+    Сохраняет запись об удалении объекта для клиентов синхронизации.
+
+    Args:
+        sender (Model): Класс удаленной модели.
+        instance (Model): Удаленный объект.
+        **kwargs: Аргументы сигнала.
+    """
+    sync.record_tombstone(instance)
+
+
+for model in REFERENCE_MODELS + (Transaction,):
+    post_delete.connect(record_deletion, sender=model)
@@ -0,0 +1,289 @@
+"""
+Журнал медленных SQL-запросов.
+
+Обертка выполнения SQL подключается к каждому соединению с базой данных
+и измеряет время выполнения запросов. Запрос дольше порога
+CASHFLOW_SLOW_QUERY_THRESHOLD_MS записывается в журнал (логгер
+dds_app_api.slowlog, по умолчанию - ротируемый файл) одной строкой JSON:
+текст и параметры запроса, время, место вызова в коде приложения,
+а также путь запроса и действие DRF, если запрос выполнен при обработке
+HTTP-запроса. Место вызова определяется только для медленных запросов,
+поэтому для остальных обертка добавляет лишь измерение времени.
+"""
+import json
+import logging
+import re
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .queryplan import PLAIN_TYPES
+
+
+logger = logging.getLogger(__name__)
+
+# Каталог приложения: место вызова - первый кадр стека из этого каталога
+APP_DIR = str(Path(__file__).resolve().parent)
+# Кадры, которые не считаются местом вызова (сам журнал и миграции)
+SKIPPED_FILES = (__file__, str(Path(APP_DIR) / 'migrations'))
+
+# Списки заполнителей IN (%s, %s, ...) разной длины сводятся к одному виду
+PLACEHOLDER_LIST = re.compile(r'IN \(\s*%s(?:\s*,\s*%s)*\s*\)', re.IGNORECASE)
+
+# Описание HTTP-запроса, при обработке которого выполняются SQL-запросы
+_request_context = ContextVar('dds_slowlog_request', default=None)
+
+
+def get_threshold():
+    """
+    Возвращает порог времени выполнения медленного запроса.
+
+    Returns:
+        float | None: Порог в секундах или None, если журнал отключен.
+    """
+    threshold = getattr(settings, 'CASHFLOW_SLOW_QUERY_THRESHOLD_MS', None)
+    if threshold is None:
+        return None
+    return threshold / 1000
+
+
+def get_log_path():
+    """
+    Возвращает путь к файлу журнала медленных запросов.
+
+    Returns:
+        Path: Путь из CASHFLOW_SLOW_QUERY_LOG.
+    """
+    return Path(getattr(settings, 'CASHFLOW_SLOW_QUERY_LOG', settings.BASE_DIR / 'slow_queries.log'))
+
+
+def normalize_sql(sql):
+    """
+    Приводит текст запроса к виду, общему для запросов одной формы.
+
+    Args:
+        sql (str): Текст запроса с заполнителями.
+
+    Returns:
+        str: Текст запроса со списками заполнителей IN, сведенными к IN (...).
+    """
+    return PLACEHOLDER_LIST.sub('IN (...)', ' '.join(sql.split()))
+
+
+def find_call_site():
+    """
+    Определяет место в коде приложения, из которого выполнен запрос.
+
+    Returns:
+        str | None: Строка "путь:строка в функции" относительно каталога
+        проекта или None, если запрос выполнен не из кода приложения.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(SKIPPED_FILES):
+            path = Path(filename).relative_to(Path(APP_DIR).parent)
+            return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def _params(params, many):
+    """
+    Приводит параметры запроса к значениям, сериализуемым в JSON.
+
+    Args:
+        params (Sequence | None): Параметры запроса.
+        many (bool): Признак executemany.
+
+    Returns:
+        list | dict: Параметры запроса или количество наборов для executemany.
+    """
+    if many:
+        return {'executemany': len(params) if hasattr(params, '__len__') else None}
+    if isinstance(params, dict):
+        params = params.values()
+    return [value if isinstance(value, PLAIN_TYPES) else str(value) for value in params or ()]
+
+
+class SlowQueryRecorder:
+    """
+    Обертка выполнения SQL, записывающая медленные запросы в журнал.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            threshold = get_threshold()
+            if threshold is not None and duration >= threshold:
+                self.record(sql, params, many, duration, context['connection'].alias)
+
+    def record(self, sql, params, many, duration, alias):
+        """
+        Записывает медленный запрос в журнал.
+
+        Args:
+            sql (str): Текст запроса.
+            params (Sequence | None): Параметры запроса.
+            many (bool): Признак executemany.
+            duration (float): Время выполнения (секунды).
+            alias (str): Алиас базы данных.
+        """
+        entry = {
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'database': alias,
+            'sql': sql,
+            'params': _params(params, many),
+            'call_site': find_call_site(),
+            **(_request_context.get() or {}),
+        }
+        logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+recorder = SlowQueryRecorder()
+
+
+def install(connection, **kwargs):
+    """
+    Подключает обертку медленных запросов к соединению с базой данных.
+
+    Используется как обработчик сигнала connection_created; повторное
+    подключение к тому же соединению не дублирует обертку.
+
+    Args:
+        connection (BaseDatabaseWrapper): Соединение с базой данных.
+        **kwargs: Аргументы сигнала.
+    """
+    if recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(recorder)
+
+
+def describe_view(request, view_func):
+    """
+    Определяет представление и действие DRF, обрабатывающие запрос.
+
+    Для ViewSet действие определяется по методу запроса из сопоставления,
+    переданного маршрутизатором в as_view.
+
+    Args:
+        request (HttpRequest): Запрос.
+        view_func (callable): Функция представления из process_view.
+
+    Returns:
+        dict: Имя класса (или функции) представления и действие
+        (None, если представление не ViewSet).
+    """
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    return {
+        'view': view_class.__name__ if view_class else view_func.__name__,
+        'action': actions.get(request.method.lower()),
+    }
+
+
+class SlowQueryMiddleware:
+    """
+    Middleware, сохраняющий путь запроса и действие DRF для журнала.
+
+    Описание запроса хранится в контекстной переменной на время его
+    обработки и добавляется к каждой записи о медленном запросе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if get_threshold() is None:
+            return self.get_response(request)
+        token = _request_context.set({
+            'method': request.method,
+            'path': request.path,
+        })
+        try:
+            return self.get_response(request)
+        finally:
+            _request_context.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Добавляет к описанию запроса представление и действие DRF.
+        """
+        context = _request_context.get()
+        if context is not None:
+            context.update(describe_view(request, view_func))
+        return None
+
+
+def read_entries(path=None):
+    """
+    Читает записи журнала, включая ротированные файлы.
+
+    Args:
+        path (Path | None): Путь к файлу журнала (по умолчанию из настроек).
+
+    Yields:
+        dict: Записи журнала; строки, не являющиеся JSON, пропускаются.
+    """
+    path = Path(path or get_log_path())
+    files = sorted(
+        path.parent.glob(f'{path.name}.*'),
+        key=lambda item: int(item.suffix[1:]) if item.suffix[1:].isdigit() else 0,
+        reverse=True
+    )
+    for log_file in [*files, path]:
+        if not log_file.exists():
+            continue
+        with open(log_file, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries, by='sql', top=10):
+    """
+    Группирует записи журнала и возвращает самые затратные группы.
+
+    Args:
+        entries (Iterable[dict]): Записи журнала.
+        by (str): Ключ группировки: sql, call_site или action.
+        top (int): Количество возвращаемых групп.
+
+    Returns:
+        list: Группы (ключ, количество, суммарное, среднее и максимальное
+        время в мс, пример записи) по убыванию суммарного времени.
+    """
+    groups = {}
+    for entry in entries:
+        if by == 'sql':
+            key = normalize_sql(entry.get('sql', ''))
+        elif by == 'action':
+            key = ' '.join(
+                str(entry.get(name) or '-') for name in ('method', 'view', 'action')
+            )
+        else:
+            key = entry.get(by) or '-'
+        group = groups.setdefault(key, {
+            'key': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'example': entry,
+        })
+        duration = entry.get('duration_ms', 0)
+        group['count'] += 1
+        group['total_ms'] += duration
+        if duration > group['max_ms']:
+            group['max_ms'] = duration
+            group['example'] = entry
+
+    result = sorted(groups.values(), key=lambda group: -group['total_ms'])[:top]
+    for group in result:
+        group['total_ms'] = round(group['total_ms'], 3)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 3)
+    return result
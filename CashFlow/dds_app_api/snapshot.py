@@ -0,0 +1,423 @@
+"""
+Колоночный снимок транзакций в файлах, отображаемых в память.
+
+Снимок хранит столбцы основной таблицы транзакций в двоичных файлах
+(по файлу на столбец) и файл meta.json с количеством строк, позицией
+последнего изменения и поколением. Все процессы отображают одни и те же
+файлы в память (np.memmap) и разделяют их через страничный кэш ОС без
+копирования, поэтому после перезапуска аналитика доступна сразу, без
+загрузки данных из БД.
+
+Снимок обновляется инкрементально: измененные и новые строки дописываются
+в конец файлов, а прежние версии строк и удаленные транзакции помечаются
+в столбце live. Если после обновления число живых строк расходится со
+счетчиком транзакций (например, после архивации) или мертвых строк слишком
+много, снимок перестраивается в новом поколении файлов. Запись выполняется
+под файловой блокировкой; читатели видят только строки, учтенные в meta.json.
+"""
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+
+from . import counters, sync
+from .models import Transaction, Tombstone
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Столбцы снимка: имя -> (поле модели, тип данных)
+COLUMNS = {
+    'id': ('id', np.int64),
+    'days': ('transaction_date', 'datetime64[D]'),
+    'amounts': ('amount', np.int64),
+    'transaction_type': ('transaction_type_id', np.int64),
+    'status': ('status_id', np.int64),
+    'category': ('category_id', np.int64),
+    'subcategory': ('subcategory_id', np.int64),
+}
+
+# Размер порции чтения изменений из БД
+CHUNK_SIZE = 5000
+
+_mapped = None
+_mapped_lock = threading.Lock()
+
+
+def get_snapshot_dir():
+    """
+    Возвращает каталог файлов снимка.
+
+    Returns:
+        Path: Путь из настройки CASHFLOW_SNAPSHOT_DIR.
+    """
+    return Path(getattr(
+        settings, 'CASHFLOW_SNAPSHOT_DIR', settings.BASE_DIR / 'snapshot'
+    ))
+
+
+def get_max_dead_ratio():
+    """
+    Возвращает допустимую долю мертвых строк до перестроения снимка.
+
+    Returns:
+        float: Значение настройки CASHFLOW_SNAPSHOT_MAX_DEAD_RATIO.
+    """
+    return getattr(settings, 'CASHFLOW_SNAPSHOT_MAX_DEAD_RATIO', 0.25)
+
+
+class Snapshot:
+    """
+    Снимок, отображенный в память текущего процесса.
+
+    Attributes:
+        generation (int): Поколение файлов.
+        count (int): Количество строк в файлах (включая мертвые).
+        live_count (int): Количество живых строк.
+        cursor (list | None): Позиция [updated_at, id] последнего учтенного изменения.
+        tombstone (int): ID последнего учтенного Tombstone.
+        counter (int): Значение счетчика транзакций при последнем обновлении.
+        columns (dict): Имя столбца -> массив (np.memmap).
+        live (ndarray): Признаки живых строк (uint8).
+    """
+
+    def __init__(self, meta, columns, live):
+        self.generation = meta['generation']
+        self.count = meta['count']
+        self.live_count = meta['live']
+        self.cursor = meta['cursor']
+        self.tombstone = meta['tombstone']
+        self.counter = meta['counter']
+        self.columns = columns
+        self.live = live
+
+
+def _read_meta(directory):
+    """
+    Читает метаданные снимка.
+
+    Args:
+        directory (Path): Каталог снимка.
+
+    Returns:
+        dict | None: Метаданные или None, если снимок не создан.
+    """
+    try:
+        with open(directory / 'meta.json', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(directory, meta):
+    """
+    Атомарно записывает метаданные снимка.
+
+    Args:
+        directory (Path): Каталог снимка.
+        meta (dict): Метаданные.
+    """
+    temporary = directory / 'meta.json.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(meta, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, directory / 'meta.json')
+
+
+def _generation_dir(directory, generation):
+    return directory / f'gen-{generation}'
+
+
+def _map(path, dtype, count, mode='r'):
+    """
+    Отображает файл столбца в память.
+
+    Args:
+        path (Path): Файл столбца.
+        dtype (dtype): Тип данных.
+        count (int): Количество элементов.
+        mode (str): Режим np.memmap.
+
+    Returns:
+        ndarray: Отображенный массив (пустой массив при count == 0).
+    """
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=(count,))
+
+
+@contextmanager
+def _write_lock(directory):
+    """
+    Блокирует снимок для записи между процессами.
+
+    Args:
+        directory (Path): Каталог снимка.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / 'lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _changed_rows(cursor):
+    """
+    Перечисляет порции строк, измененных после позиции курсора.
+
+    Args:
+        cursor (list | None): Позиция [updated_at, id].
+
+    Yields:
+        tuple: Порция значений столбцов (списки) и позиция ее последней строки.
+    """
+    fields = [field for field, _ in COLUMNS.values()]
+    while True:
+        queryset = Transaction.objects.order_by('updated_at', 'id')
+        if cursor:
+            updated_at = parse_datetime(cursor[0])
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=cursor[1])
+            )
+        rows = list(queryset.values_list(*fields, 'updated_at')[:CHUNK_SIZE])
+        if not rows:
+            return
+        cursor = [rows[-1][-1].isoformat(), rows[-1][0]]
+        yield list(zip(*rows))[:len(COLUMNS)], cursor
+        if len(rows) < CHUNK_SIZE:
+            return
+
+
+def _to_arrays(values):
+    """
+    Преобразует значения столбцов из БД в массивы снимка.
+
+    Args:
+        values (list): Последовательности значений в порядке COLUMNS.
+
+    Returns:
+        dict: Имя столбца -> массив.
+    """
+    arrays = {}
+    for (name, (field, dtype)), column in zip(COLUMNS.items(), values):
+        if name == 'amounts':
+            column = [int(amount.scaleb(2)) for amount in column]
+        arrays[name] = np.array(column, dtype=dtype)
+    return arrays
+
+
+def _append(directory, arrays):
+    """
+    Дописывает массивы в конец файлов столбцов.
+
+    Args:
+        directory (Path): Каталог поколения.
+        arrays (dict): Имя столбца -> массив.
+    """
+    for name, array in arrays.items():
+        with open(directory / f'{name}.bin', 'ab') as file:
+            file.write(array.tobytes())
+    with open(directory / 'live.bin', 'ab') as file:
+        file.write(np.ones(len(arrays['id']), dtype=np.uint8).tobytes())
+
+
+def rebuild():
+    """
+    Строит снимок заново в новом поколении файлов.
+
+    Returns:
+        dict: Метаданные нового снимка.
+    """
+    directory = get_snapshot_dir()
+    with _write_lock(directory):
+        return _rebuild(directory)
+
+
+def _rebuild(directory):
+    """
+    Строит снимок заново (вызывается под блокировкой записи).
+
+    Args:
+        directory (Path): Каталог снимка.
+
+    Returns:
+        dict: Метаданные нового снимка.
+    """
+    previous = _read_meta(directory)
+    generation = previous['generation'] + 1 if previous else 1
+    target = _generation_dir(directory, generation)
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir(parents=True)
+
+    # Позиция Tombstone и счетчик фиксируются до чтения строк, чтобы
+    # изменения, выполненные во время перестроения, были учтены следующим
+    # обновлением
+    tombstone = Tombstone.objects.aggregate(last=Max('id'))['last'] or 0
+    counter = counters.get_total()
+    count = 0
+    cursor = None
+    for values, cursor in _changed_rows(None):
+        arrays = _to_arrays(values)
+        _append(target, arrays)
+        count += len(arrays['id'])
+    for name in (*COLUMNS, 'live'):
+        (target / f'{name}.bin').touch()
+
+    meta = {
+        'generation': generation,
+        'count': count,
+        'live': count,
+        'cursor': cursor,
+        'tombstone': tombstone,
+        'counter': counter,
+    }
+    _write_meta(directory, meta)
+
+    # Процессы, отобразившие прежнее поколение, продолжают читать его
+    # до переоткрытия: удаленные файлы остаются доступными по отображению
+    for old in directory.glob('gen-*'):
+        if old != target:
+            shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+def refresh():
+    """
+    Дописывает в снимок изменения после его последнего обновления.
+
+    Если снимок не создан, поврежден, расходится со счетчиком транзакций
+    или содержит слишком много мертвых строк, он перестраивается.
+
+    Returns:
+        dict: Метаданные обновленного снимка и количество дописанных строк (appended).
+    """
+    directory = get_snapshot_dir()
+    with _write_lock(directory):
+        meta = _read_meta(directory)
+        if meta is None:
+            return {**_rebuild(directory), 'appended': None}
+
+        meta['counter'] = counters.get_total()
+        target = _generation_dir(directory, meta['generation'])
+        ids = _map(target / 'id.bin', np.int64, meta['count'])
+        changed = []
+        appended = 0
+        for values, cursor in _changed_rows(meta['cursor']):
+            arrays = _to_arrays(values)
+            _append(target, arrays)
+            changed.append(arrays['id'])
+            appended += len(arrays['id'])
+            meta['cursor'] = cursor
+
+        tombstones = list(
+            Tombstone.objects.filter(
+                model=sync.MODEL_KEYS[Transaction], id__gt=meta['tombstone']
+            ).values_list('id', 'object_id')
+        )
+        if tombstones:
+            meta['tombstone'] = max(pk for pk, _ in tombstones)
+        removed = [object_id for _, object_id in tombstones]
+
+        # Прежние версии измененных строк и удаленные строки помечаются мертвыми
+        stale = np.concatenate(changed + [np.array(removed, dtype=np.int64)])
+        if len(stale) and meta['count']:
+            live = _map(target / 'live.bin', np.uint8, meta['count'], mode='r+')
+            positions = np.flatnonzero(np.isin(ids, stale) & (live == 1))
+            live[positions] = 0
+            live.flush()
+            meta['live'] -= len(positions)
+        meta['count'] += appended
+        meta['live'] += appended
+
+        dead = meta['count'] - meta['live']
+        if meta['live'] != meta['counter'] or dead > meta['count'] * get_max_dead_ratio():
+            return {**_rebuild(directory), 'appended': None}
+
+        _write_meta(directory, meta)
+        return {**meta, 'appended': appended}
+
+
+def is_stale(snapshot):
+    """
+    Проверяет, отстает ли снимок от основной таблицы.
+
+    Удаления и архивация обнаруживаются по изменению счетчика транзакций,
+    изменения и добавления - по максимальному updated_at.
+
+    Args:
+        snapshot (Snapshot): Снимок.
+
+    Returns:
+        bool: True, если после снимка были изменения или удаления транзакций.
+    """
+    if snapshot.counter != counters.get_total():
+        return True
+    latest = Transaction.objects.aggregate(latest=Max('updated_at'))['latest']
+    if latest is None:
+        return False
+    return snapshot.cursor is None or latest > parse_datetime(snapshot.cursor[0])
+
+
+def get_snapshot(fresh=True):
+    """
+    Возвращает снимок, отображенный в память текущего процесса.
+
+    Файлы переотображаются, только если изменились поколение или количество
+    строк в meta.json.
+
+    Args:
+        fresh (bool): Дописать изменения, если снимок отстает от таблицы.
+
+    Returns:
+        Snapshot | None: Снимок или None, если он еще не создан
+        командой snapshot_transactions.
+    """
+    global _mapped
+    directory = get_snapshot_dir()
+    meta = _read_meta(directory)
+    if meta is None:
+        return None
+
+    with _mapped_lock:
+        snapshot = _mapped
+        if snapshot is None or (snapshot.generation, snapshot.count) != (
+            meta['generation'], meta['count']
+        ):
+            target = _generation_dir(directory, meta['generation'])
+            try:
+                columns = {
+                    name: _map(target / f'{name}.bin', dtype, meta['count'])
+                    for name, (_, dtype) in COLUMNS.items()
+                }
+                live = _map(target / 'live.bin', np.uint8, meta['count'])
+            except FileNotFoundError:
+                # Поколение заменено между чтением meta.json и отображением
+                if _read_meta(directory) == meta:
+                    return None
+                return get_snapshot(fresh)
+            snapshot = _mapped = Snapshot(meta, columns, live)
+        else:
+            # Столбец live меняется на месте, количество живых строк - в meta.json
+            snapshot.live_count = meta['live']
+            snapshot.cursor = meta['cursor']
+            snapshot.counter = meta['counter']
+
+    if fresh and is_stale(snapshot):
+        refresh()
+        return get_snapshot(fresh=False)
+    return snapshot
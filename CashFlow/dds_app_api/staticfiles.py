@@ -0,0 +1,194 @@
+"""
+Хранилище и раздача статических файлов с хешами в именах.
+
+Хранилище добавляет к именам файлов хеш содержимого (манифест Django), а для
+файлов из настройки CASHFLOW_STATIC_OPTIMIZE дополнительно минифицирует
+хешированную копию и сохраняет рядом сжатые варианты .gz и .br. Представление
+serve отдает файлы из STATIC_ROOT с учетом Accept-Encoding и с заголовком
+Cache-Control: immutable для хешированных имен.
+
+Минификация (rjsmin) и сжатие brotli необязательны: если пакеты не
+установлены, соответствующий шаг пропускается.
+"""
+import gzip
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import views as staticfiles_views
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage
+)
+from django.core.files.base import ContentFile
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve as static_serve
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Время кэширования хешированных файлов (один год)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Сжатые варианты в порядке предпочтения: кодировка -> расширение файла
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def get_optimized_names():
+    """
+    Возвращает имена статических файлов для минификации и сжатия.
+
+    Returns:
+        list: Значение настройки CASHFLOW_STATIC_OPTIMIZE.
+    """
+    return getattr(settings, 'CASHFLOW_STATIC_OPTIMIZE', [])
+
+
+def minify(name, content):
+    """
+    Минифицирует содержимое файла, если для его типа доступен минификатор.
+
+    Args:
+        name (str): Имя файла.
+        content (bytes): Исходное содержимое.
+
+    Returns:
+        bytes: Минифицированное или исходное содержимое.
+    """
+    if name.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin(content)
+    return content
+
+
+class CashFlowStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статических файлов с хешами, минификацией и сжатыми вариантами.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """
+        Хеширует файлы и создает оптимизированные варианты.
+
+        Args:
+            paths (dict): Собранные файлы.
+            dry_run (bool): Режим без записи файлов.
+            **options: Опции collectstatic.
+
+        Yields:
+            tuple: Исходное имя, обработанное имя и признак обработки.
+        """
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in get_optimized_names():
+            hashed_name = self.hashed_files.get(self.hash_key(self.clean_name(name)))
+            if hashed_name is None:
+                continue
+            yield from self._optimize(name, hashed_name)
+
+    def _optimize(self, name, hashed_name):
+        """
+        Минифицирует хешированную копию файла и сохраняет сжатые варианты.
+
+        Args:
+            name (str): Исходное имя файла.
+            hashed_name (str): Имя файла с хешем.
+
+        Yields:
+            tuple: Исходное имя, имя варианта и признак обработки.
+        """
+        with self.open(hashed_name) as file:
+            content = file.read()
+
+        if getattr(settings, 'CASHFLOW_STATIC_MINIFY', True):
+            minified = minify(name, content)
+            if minified != content:
+                content = minified
+                self.delete(hashed_name)
+                self._save(hashed_name, ContentFile(content))
+                yield name, hashed_name, True
+
+        if not getattr(settings, 'CASHFLOW_STATIC_COMPRESS', True):
+            return
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            variant_name = hashed_name + suffix
+            if self.exists(variant_name):
+                self.delete(variant_name)
+            self._save(variant_name, ContentFile(compressed))
+            yield name, variant_name, True
+
+
+def is_hashed_name(path):
+    """
+    Проверяет, является ли путь именем файла с хешем из манифеста.
+
+    Args:
+        path (str): Путь относительно STATIC_URL.
+
+    Returns:
+        bool: True, если содержимое по этому пути никогда не меняется.
+    """
+    return path in getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+
+def serve(request, path):
+    """
+    Отдает статический файл из STATIC_ROOT.
+
+    Если клиент поддерживает сжатие и рядом с файлом есть сжатый вариант,
+    отдается он. Хешированные имена кэшируются браузером на год без
+    повторных проверок, остальные файлы проверяются при каждом обращении.
+    В режиме DEBUG файлы ищутся через finders без хешей и сжатия.
+
+    Args:
+        request (HttpRequest): Объект HTTP-запроса.
+        path (str): Путь относительно STATIC_URL.
+
+    Returns:
+        HttpResponse: Ответ с содержимым файла.
+
+    Raises:
+        SuspiciousFileOperation: Если путь выходит за пределы STATIC_ROOT.
+    """
+    if settings.DEBUG:
+        return staticfiles_views.serve(request, path)
+
+    path = posixpath.normpath(path).lstrip('/')
+    document_root = Path(settings.STATIC_ROOT)
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    # Пути вне STATIC_ROOT отклоняются до проверки сжатых вариантов
+    full_path = safe_join(document_root, path)
+
+    has_variants = False
+    served_path = path
+    for encoding, suffix in ENCODINGS:
+        if Path(full_path + suffix).is_file():
+            has_variants = True
+            if encoding in accept_encoding:
+                served_path = path + suffix
+                break
+
+    response = static_serve(request, served_path, document_root=document_root)
+    if has_variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed_name(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,314 @@
+"""
+Инкрементальная синхронизация транзакций и справочников.
+
+Клиент получает изменения с момента предыдущей синхронизации по
+непрозрачному курсору. Измененные объекты выбираются по индексированному
+полю updated_at (ключевая пагинация по паре updated_at, id), удаленные -
+по записям Tombstone. Объем ответа пропорционален числу изменений,
+а не размеру данных. Курсор продвигается только по изменениям старше
+CASHFLOW_SYNC_SAFETY_WINDOW, а более новые передаются повторно, поэтому
+изменение, зафиксированное позже изменения с большей отметкой, не теряется.
+
+Названия связанных справочников в объектах (status_name, category_name
+и т.п.) отражают состояние на момент последнего изменения объекта:
+переименование справочника не меняет updated_at связанных транзакций
+и справочников. Клиент получает переименованный справочник в том же потоке
+изменений и должен отображать названия по ID справочника, а не по полям
+*_name.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    Tombstone
+)
+from .serializers import (
+    StatusSerializer,
+    TransactionTypeSerializer,
+    CategorySerializer,
+    SubcategorySerializer,
+    TransactionSerializer
+)
+
+
+CURSOR_SALT = 'dds_app_api.sync'
+CURSOR_VERSION = 1
+
+# Модели синхронизации: ключ -> (модель, сериализатор, связанные поля).
+# Справочники идут раньше транзакций, чтобы клиент применял изменения
+# в порядке зависимостей.
+SYNC_MODELS = {
+    'statuses': (Status, StatusSerializer, ()),
+    'transaction_types': (TransactionType, TransactionTypeSerializer, ()),
+    'categories': (Category, CategorySerializer, ('transaction_type',)),
+    'subcategories': (
+        Subcategory, SubcategorySerializer, ('category__transaction_type',)
+    ),
+    'transactions': (
+        Transaction,
+        TransactionSerializer,
+        ('status', 'transaction_type', 'category', 'subcategory')
+    ),
+}
+
+MODEL_KEYS = {model: key for key, (model, _, _) in SYNC_MODELS.items()}
+
+_tombstones_suppressed = ContextVar('dds_tombstones_suppressed', default=False)
+
+
+def get_page_size(value=None):
+    """
+    Возвращает количество объектов каждой модели в одном ответе.
+
+    Args:
+        value (str | None): Значение параметра limit.
+
+    Returns:
+        int: Размер страницы, ограниченный CASHFLOW_SYNC_MAX_PAGE_SIZE.
+
+    Raises:
+        ValueError: Если значение не является положительным числом.
+    """
+    default = getattr(settings, 'CASHFLOW_SYNC_PAGE_SIZE', 500)
+    maximum = getattr(settings, 'CASHFLOW_SYNC_MAX_PAGE_SIZE', 5000)
+    if not value:
+        return default
+    size = int(value)
+    if size < 1:
+        raise ValueError(value)
+    return min(size, maximum)
+
+
+@contextmanager
+def suppress_tombstones():
+    """
+    Отключает запись Tombstone для удалений внутри блока.
+
+    Используется при переносе транзакций в архив: для клиента синхронизации
+    такие транзакции не удалены.
+    """
+    token = _tombstones_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tombstones_suppressed.reset(token)
+
+
+def tombstones_suppressed():
+    """
+    Проверяет, отключена ли запись Tombstone в текущем контексте.
+
+    Returns:
+        bool: True внутри блока suppress_tombstones.
+    """
+    return _tombstones_suppressed.get()
+
+
+def record_tombstone(instance):
+    """
+    Сохраняет запись об удалении объекта синхронизируемой модели.
+
+    Args:
+        instance (Model): Удаленный объект.
+    """
+    key = MODEL_KEYS.get(type(instance))
+    if key is None or tombstones_suppressed():
+        return
+    Tombstone.objects.create(model=key, object_id=instance.pk)
+
+
+def encode_cursor(state):
+    """
+    Упаковывает состояние синхронизации в подписанный курсор.
+
+    Args:
+        state (dict): Позиции моделей и ID последнего Tombstone.
+
+    Returns:
+        str: Непрозрачный курсор.
+    """
+    return signing.dumps(
+        {'v': CURSOR_VERSION, **state}, salt=CURSOR_SALT, compress=True
+    )
+
+
+def decode_cursor(cursor):
+    """
+    Распаковывает курсор синхронизации.
+
+    Args:
+        cursor (str | None): Курсор из предыдущего ответа.
+
+    Returns:
+        dict | None: Состояние синхронизации или None для полной синхронизации.
+
+    Raises:
+        ValueError: Если курсор поврежден или создан другой версией API.
+    """
+    if not cursor:
+        return None
+    try:
+        state = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValueError(cursor)
+    if not isinstance(state, dict) or state.get('v') != CURSOR_VERSION:
+        raise ValueError(cursor)
+    return state
+
+
+def get_safety_window():
+    """
+    Возвращает запас времени на фиксацию транзакций БД.
+
+    Объект получает updated_at при записи, а становится виден другим
+    соединениям только после фиксации транзакции, поэтому объект с более
+    ранней отметкой может появиться позже объекта, уже отданного клиенту.
+    Курсор продвигается только по объектам старше этого запаса.
+
+    Returns:
+        timedelta: Значение настройки CASHFLOW_SYNC_SAFETY_WINDOW (секунды).
+    """
+    return timedelta(seconds=getattr(settings, 'CASHFLOW_SYNC_SAFETY_WINDOW', 5))
+
+
+def _changed_objects(key, position, limit, watermark):
+    """
+    Выбирает объекты модели, измененные после позиции курсора.
+
+    Позиция продвигается только по объектам с updated_at не позже watermark.
+    Более новые объекты добавляются в ответ, если страница не заполнена,
+    и передаются повторно в следующем ответе (клиент применяет их по ID),
+    чтобы не потерять объект, зафиксированный позже с меньшей отметкой.
+
+    Args:
+        key (str): Ключ модели в SYNC_MODELS.
+        position (list | None): Пара [updated_at, id] последнего объекта.
+        limit (int): Максимальное количество объектов.
+        watermark (datetime): Граница объектов, по которым продвигается позиция.
+
+    Returns:
+        tuple: Список объектов, новая позиция и признак наличия продолжения.
+    """
+    model, _, related = SYNC_MODELS[key]
+    queryset = model.objects.select_related(*related).order_by('updated_at', 'id')
+    if position:
+        updated_at = parse_datetime(position[0])
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=position[1])
+        )
+
+    objects = list(queryset.filter(updated_at__lte=watermark)[:limit + 1])
+    has_more = len(objects) > limit
+    objects = objects[:limit]
+    if objects:
+        position = [objects[-1].updated_at.isoformat(), objects[-1].id]
+    if not has_more and len(objects) < limit:
+        objects += queryset.filter(updated_at__gt=watermark)[:limit - len(objects)]
+    return objects, position, has_more
+
+
+def _deleted_objects(position, limit, watermark):
+    """
+    Выбирает ID объектов, удаленных после позиции курсора.
+
+    Как и для измененных объектов, позиция и признак продолжения
+    определяются только записями Tombstone не новее watermark; более новые
+    записи добавляются в ответ, если страница не заполнена, и передаются
+    повторно. Поэтому свежие удаления не возвращают клиенту тот же курсор
+    с has_more, равным True.
+
+    Args:
+        position (int): ID последней учтенной записи Tombstone.
+        limit (int): Максимальное количество записей.
+        watermark (datetime): Граница записей, по которым продвигается позиция.
+
+    Returns:
+        tuple: ID удаленных объектов по моделям, новая позиция и признак
+        наличия продолжения.
+    """
+    queryset = Tombstone.objects.filter(id__gt=position).order_by('id')
+    fields = ('id', 'model', 'object_id')
+    tombstones = list(
+        queryset.filter(deleted_at__lte=watermark).values_list(*fields)[:limit + 1]
+    )
+    has_more = len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    if tombstones:
+        position = tombstones[-1][0]
+    if not has_more and len(tombstones) < limit:
+        tombstones += queryset.filter(
+            id__gt=position, deleted_at__gt=watermark
+        ).values_list(*fields)[:limit - len(tombstones)]
+
+    deleted = {key: [] for key in SYNC_MODELS}
+    for _, key, object_id in tombstones:
+        if key in deleted:
+            deleted[key].append(object_id)
+    return deleted, position, has_more
+
+
+def collect_changes(cursor=None, limit=None):
+    """
+    Собирает изменения всех синхронизируемых моделей после курсора.
+
+    При полной синхронизации (без курсора) удаления не передаются, а позиция
+    Tombstone фиксируется до чтения объектов, чтобы удаление, выполненное
+    во время выборки, попало в следующий ответ.
+
+    Args:
+        cursor (str | None): Курсор из предыдущего ответа.
+        limit (int | None): Количество объектов каждой модели в ответе.
+
+    Returns:
+        dict: Новый курсор, признак продолжения, измененные объекты
+        и ID удаленных объектов по моделям.
+
+    Raises:
+        ValueError: Если курсор некорректен.
+    """
+    state = decode_cursor(cursor)
+    limit = limit or get_page_size()
+    positions = state['models'] if state else {}
+
+    watermark = timezone.now() - get_safety_window()
+    stable_tombstones = Tombstone.objects.filter(deleted_at__lte=watermark)
+
+    if state is None:
+        deleted = {key: [] for key in SYNC_MODELS}
+        last_tombstone = stable_tombstones.aggregate(last=Max('id'))['last'] or 0
+        has_more = False
+    else:
+        deleted, last_tombstone, has_more = _deleted_objects(
+            state['tombstone'], limit, watermark
+        )
+
+    changes = {}
+    new_positions = {}
+    for key, (_, serializer_class, _) in SYNC_MODELS.items():
+        objects, new_positions[key], model_has_more = _changed_objects(
+            key, positions.get(key), limit, watermark
+        )
+        has_more = has_more or model_has_more
+        changes[key] = serializer_class(objects, many=True).data
+
+    return {
+        'cursor': encode_cursor({
+            'models': new_positions,
+            'tombstone': last_tombstone,
+        }),
+        'has_more': has_more,
+        'changes': changes,
+        'deleted': deleted,
+    }
@@ -1,3 +1,2161 @@
-from django.test import TestCase
+import io
+import json
+import math
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .admin_filters import CachedMonthFilter
+from . import (
+    analytics,
+    anomalies,
+    archive,
+    balances,
+    budgets,
+    categorize,
+    counters,
+    fingerprints,
+    forecast,
+    jobs,
+    pagination,
+    parallel,
+    profiling,
+    queryplan,
+    reconcile,
+    recurring,
+    reports,
+    slowlog,
+    snapshot,
+    staticfiles,
+    sync,
+    transfer,
+    views_frontend
+)
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    ArchivedTransaction,
+    ArchiveSegment,
+    Tombstone,
+    Job,
+    Anomaly,
+    Budget,
+    BalanceCheckpoint,
+    CategorizationRule,
+    RecurringTransaction,
+    RequestProfile,
+    TransactionCounter
+)
+
+
+class ReferenceDataMixin:
+    """
+    Справочники и создание транзакций для тестов.
+
+    Attributes:
+        status (Status): Статус операций.
+        income (TransactionType): Тип "Пополнение".
+        expense (TransactionType): Тип "Списание".
+        sales (Subcategory): Подкатегория пополнений.
+        rent (Subcategory): Подкатегория списаний.
+    """
+
+    @classmethod
+    def create_references(cls):
+        cls.status = Status.objects.create(name='Бизнес')
+        cls.income = TransactionType.objects.create(name='Пополнение')
+        cls.expense = TransactionType.objects.create(name='Списание')
+        cls.sales = Subcategory.objects.create(
+            name='Онлайн продажи',
+            category=Category.objects.create(name='Продажи', transaction_type=cls.income)
+        )
+        cls.rent = Subcategory.objects.create(
+            name='Аренда',
+            category=Category.objects.create(name='Офис', transaction_type=cls.expense)
+        )
+
+    def make_transaction(self, amount, transaction_date=date(2025, 1, 15),
+                         subcategory=None, **kwargs):
+        """
+        Создает транзакцию в подкатегории (по умолчанию - пополнение).
+
+        Args:
+            amount (str | Decimal): Сумма.
+            transaction_date (date): Дата операции.
+            subcategory (Subcategory | None): Подкатегория.
+            **kwargs: Остальные поля транзакции (статус по умолчанию - status).
+
+        Returns:
+            Transaction: Созданная транзакция.
+        """
+        subcategory = subcategory or self.sales
+        kwargs.setdefault('status', self.status)
+        return Transaction.objects.create(
+            transaction_date=transaction_date,
+            transaction_type=subcategory.category.transaction_type,
+            category=subcategory.category,
+            subcategory=subcategory,
+            amount=Decimal(amount),
+            **kwargs
+        )
+
+
+class CashFlowTestCase(ReferenceDataMixin, TestCase):
+    """
+    Базовый класс тестов со справочниками и клиентом API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_references()
+
+    def setUp(self):
+        # Версии данных и отчеты хранятся в общем кэше процесса
+        cache.clear()
+        self.client = APIClient()
+
+
+class CounterTests(CashFlowTestCase):
+    """Тесты счетчиков строк и общего количества в пагинации."""
+
+    def snapshot(self):
+        """Возвращает ненулевые значения счетчиков."""
+        return {
+            (counter.dimension, counter.key): counter.count
+            for counter in TransactionCounter.objects.exclude(count=0)
+        }
+
+    def assertCountersRebuilt(self):
+        """Проверяет, что инкрементальные счетчики совпадают с пересчетом."""
+        incremental = self.snapshot()
+        counters.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def get_pagination(self, **params):
+        response = self.client.get('/api/transactions/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['pagination']
+
+    def test_counters_follow_create_and_delete(self):
+        first = self.make_transaction('100.00')
+        self.make_transaction('200.00', transaction_date=date(2025, 2, 3))
+        self.make_transaction('50.00', subcategory=self.rent)
+        first.delete()
+
+        self.assertEqual(counters.get_total(), 2)
+        self.assertEqual(counters.count_for_params({'subcategory': str(self.sales.pk)}), 1)
+        self.assertEqual(counters.count_for_params({'transaction_type': str(self.expense.pk)}), 1)
+        self.assertEqual(
+            counters.count_for_params({'date_from': '2025-01-01', 'date_to': '2025-01-31'}), 1
+        )
+        self.assertIsNone(counters.count_for_params({'date_from': '2025-01-10'}))
+        self.assertCountersRebuilt()
+
+    def test_bulk_import_updates_counters(self):
+        self.make_transaction('10.00')
+        source = io.StringIO(
+            'transaction_date,status,transaction_type,category,subcategory,amount\n'
+            + ''.join(
+                f'2025-03-{day:02d},{self.status.pk},{self.expense.pk},'
+                f'{self.rent.category_id},{self.rent.pk},{day}.00\n'
+                for day in range(1, 6)
+            )
+            + '2025-03-06,,,,,1.00\n'
+        )
+
+        report = transfer.import_transactions(source, batch_size=2, reject_duplicates=False)
+
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(len(report['errors']), 1)
+        self.assertEqual(counters.get_total(), 6)
+        self.assertEqual(counters.count_for_params({'date_from': '2025-03-01'}), 5)
+        self.assertCountersRebuilt()
+
+    def test_pagination_total(self):
+        for day in range(1, 13):
+            self.make_transaction('10.00', transaction_date=date(2025, 1, day))
+        self.make_transaction('20.00', subcategory=self.rent).delete()
+
+        pagination = self.get_pagination(page=2)
+        self.assertEqual(pagination['total_count'], 12)
+        self.assertEqual(pagination['total_pages'], 2)
+        self.assertEqual(pagination['start_index'], 11)
+        self.assertTrue(pagination['count_exact'])
+
+        pagination = self.get_pagination(subcategory=self.rent.pk)
+        self.assertEqual(pagination['total_count'], 0)
+
+        # Фильтр, не покрытый счетчиками, считается запросом к БД
+        pagination = self.get_pagination(date_from='2025-01-03')
+        self.assertEqual(pagination['total_count'], 10)
+        self.assertTrue(pagination['count_exact'])
+
+    @override_settings(CASHFLOW_COUNT_LIMIT=2)
+    def test_pagination_count_limit(self):
+        for day in range(1, 6):
+            self.make_transaction('10.00', transaction_date=date(2025, 1, day))
+
+        pagination = self.get_pagination(date_from='2025-01-02')
+        self.assertEqual(pagination['total_count'], 2)
+        self.assertFalse(pagination['count_exact'])
+        self.assertEqual(self.get_pagination()['total_count'], 5)
+
+    def test_archive_chain_count_is_capped(self):
+        for month in range(1, 5):
+            self.make_transaction('10.00', transaction_date=date(2024, month, 10))
+        self.make_transaction('10.00', transaction_date=date(2025, 2, 1))
+        self.make_transaction('10.00', transaction_date=date(2025, 3, 1))
+        archive.archive_to_table(date(2025, 1, 1))
+
+        pagination = self.get_pagination(date_from='2024-01-01')
+        self.assertEqual(pagination['total_count'], 6)
+        self.assertTrue(pagination['count_exact'])
+
+        with override_settings(CASHFLOW_COUNT_LIMIT=3):
+            pagination = self.get_pagination(date_from='2024-01-01')
+        self.assertEqual(pagination['total_count'], 3)
+        self.assertFalse(pagination['count_exact'])
+
+        chain = archive.ArchiveChain(
+            Transaction.objects.all(), ArchivedTransaction.objects.all()
+        )
+        self.assertEqual(chain.count(), 6)
+        self.assertEqual([chain.count(limit) for limit in (1, 2, 3, 7)], [1, 2, 3, 6])
+
+
+class UpsertTests(CashFlowTestCase):
+    """Тесты повторяемой загрузки транзакций по внешнему идентификатору."""
+
+    def row(self, reference, amount, **kwargs):
+        return {
+            'reference': reference,
+            'transaction_date': '2025-01-15',
+            'status': self.status.pk,
+            'transaction_type': self.income.pk,
+            'category': self.sales.category_id,
+            'subcategory': self.sales.pk,
+            'amount': amount,
+            **kwargs,
+        }
+
+    def post_upsert(self, rows, source='bank'):
+        response = self.client.post(
+            '/api/transactions/upsert/',
+            {'source': source, 'transactions': rows},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_repeated_upload_is_idempotent(self):
+        rows = [self.row('1', '100.00'), self.row('2', '50.00', comment='Заказ')]
+
+        report = self.post_upsert(rows)
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (2, 0, 0))
+        report = self.post_upsert(rows)
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (0, 0, 2))
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(counters.get_total(), 2)
+        self.assertEqual(
+            Transaction.objects.get(external_id='bank:2').fingerprint,
+            fingerprints.compute(Transaction.objects.get(external_id='bank:2'))
+        )
+
+    def test_changed_row_is_updated(self):
+        self.post_upsert([self.row('1', '100.00')])
+        transaction = Transaction.objects.get()
+
+        report = self.post_upsert([
+            self.row('1', '80.00', transaction_date='2025-02-01',
+                     transaction_type=self.expense.pk, category=self.rent.category_id,
+                     subcategory=self.rent.pk),
+            self.row('1', '120.00'),
+        ])
+
+        # Из повторяющихся строк порции используется последняя
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.amount, Decimal('120.00'))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_update_shifts_derived_state(self):
+        self.post_upsert([self.row('1', '100.00')])
+        self.post_upsert([self.row(
+            '1', '40.00', transaction_date='2025-02-10',
+            transaction_type=self.expense.pk, category=self.rent.category_id,
+            subcategory=self.rent.pk
+        )])
+
+        self.assertEqual(counters.count_for_params({'subcategory': str(self.sales.pk)}), 0)
+        self.assertEqual(counters.count_for_params({'subcategory': str(self.rent.pk)}), 1)
+        self.assertEqual(
+            counters.count_for_params({'date_from': '2025-01-01', 'date_to': '2025-01-31'}), 0
+        )
+        self.assertEqual(balances.balance_at(date(2025, 3, 1))['balance'], Decimal('-40.00'))
+
+    def test_sources_are_separate_and_errors_reported(self):
+        self.post_upsert([self.row('1', '100.00')], source='bank')
+        report = self.post_upsert(
+            [self.row('1', '100.00'), self.row('', '5.00'), self.row('3', 'x')],
+            source='erp'
+        )
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['line'] for error in report['errors']], [2, 3])
+        self.assertEqual(
+            set(Transaction.objects.values_list('external_id', flat=True)),
+            {'bank:1', 'erp:1'}
+        )
+
+        response = self.client.post(
+            '/api/transactions/upsert/',
+            {'source': 'a:b', 'transactions': []},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_archived_rows_are_skipped(self):
+        self.post_upsert([self.row('1', '100.00')])
+        archive.archive_to_table(date(2025, 2, 1))
+
+        report = self.post_upsert([self.row('1', '200.00')])
+
+        self.assertEqual(report['archived'], 1)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(
+            ArchivedTransaction.objects.get(external_id='bank:1').amount, Decimal('100.00')
+        )
+
+
+class FingerprintTests(CashFlowTestCase):
+    """Тесты отпечатков транзакций и поиска дубликатов."""
+
+    def payload(self, amount='100.00', comment='Заказ 42'):
+        return {
+            'transaction_date': '2025-01-15',
+            'status': self.status.pk,
+            'transaction_type': self.income.pk,
+            'category': self.sales.category_id,
+            'subcategory': self.sales.pk,
+            'amount': amount,
+            'comment': comment,
+        }
+
+    def import_csv(self, lines, **kwargs):
+        header = 'transaction_date,status,transaction_type,category,subcategory,amount,comment\n'
+        rows = ''.join(
+            f'2025-01-15,{self.status.pk},{self.income.pk},{self.sales.category_id},'
+            f'{self.sales.pk},{amount},{comment}\n'
+            for amount, comment in lines
+        )
+        return transfer.import_transactions(io.StringIO(header + rows), **kwargs)
+
+    def test_normalization(self):
+        base = {
+            'transaction_date': date(2025, 1, 15),
+            'amount': Decimal('100'),
+            'subcategory_id': self.sales.pk,
+            'comment': 'Заказ  42 ',
+        }
+        same = {**base, 'transaction_date': '2025-01-15', 'amount': '100.00', 'comment': 'заказ 42'}
+
+        self.assertEqual(fingerprints.compute(base), fingerprints.compute(same))
+        self.assertNotEqual(
+            fingerprints.compute(base),
+            fingerprints.compute({**base, 'subcategory_id': self.rent.pk})
+        )
+        self.assertNotEqual(
+            fingerprints.compute(base), fingerprints.compute({**base, 'amount': '100.01'})
+        )
+
+    def test_fingerprint_follows_updates(self):
+        transaction = self.make_transaction('100.00', comment='Заказ 42')
+        self.assertEqual(transaction.fingerprint, fingerprints.compute(transaction))
+
+        transaction.amount = Decimal('120.00')
+        transaction.save()
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.fingerprint, fingerprints.compute(transaction))
+
+    def test_duplicates_endpoint(self):
+        first = self.make_transaction('100.00', comment='Заказ 42')
+        second = self.make_transaction('100', comment='ЗАКАЗ  42')
+        self.make_transaction('100.00', comment='Заказ 43')
+
+        response = self.client.get('/api/transactions/duplicates/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['count'], 2)
+        self.assertEqual(
+            [item['id'] for item in response.data[0]['transactions']], [first.pk, second.pk]
+        )
+        self.assertEqual(
+            self.client.get('/api/transactions/duplicates/', {'limit': 0}).status_code, 400
+        )
+
+    @override_settings(CASHFLOW_REJECT_DUPLICATES=True)
+    def test_api_rejects_duplicates(self):
+        existing = self.make_transaction('100.00', comment='Заказ 42')
+
+        response = self.client.post('/api/transactions/', self.payload(comment='заказ 42'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(existing.pk), str(response.data))
+
+        # Сохранение самой транзакции дубликатом не считается
+        response = self.client.put(
+            f'/api/transactions/{existing.pk}/', self.payload(), format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/api/transactions/', self.payload(amount='99.00'), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(CASHFLOW_REJECT_DUPLICATES=True)
+    def test_partial_update_checks_duplicates(self):
+        existing = self.make_transaction('100.00', comment='Заказ 42')
+        other = self.make_transaction('100.00', comment='Заказ 43')
+
+        response = self.client.patch(
+            f'/api/transactions/{other.pk}/', {'amount': '101.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # Недостающие поля берутся из изменяемой транзакции
+        response = self.client.patch(
+            f'/api/transactions/{other.pk}/',
+            {'amount': '100.00', 'comment': 'заказ 42'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(existing.pk), str(response.data))
+
+        response = self.client.patch(
+            f'/api/transactions/{other.pk}/', {'category': self.rent.category_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_rejects_existing_rows_only(self):
+        existing = self.make_transaction('100.00', comment='Заказ 42')
+
+        report = self.import_csv(
+            [('100.00', 'заказ 42'), ('5.00', 'Новый'), ('5.00', 'Новый')],
+            reject_duplicates=True
+        )
+
+        # Одинаковые строки внутри файла дубликатами не считаются
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(
+            report['errors'], [{'line': 2, 'error': f"Дубликат транзакции {existing.pk}"}]
+        )
+
+        report = self.import_csv([('100.00', 'Заказ 42')], reject_duplicates=False)
+        self.assertEqual(report['created'], 1)
+
+
+class ReconcileTests(CashFlowTestCase):
+    """Тесты сверки банковской выписки с транзакциями."""
+
+    def statement(self, *rows):
+        return io.StringIO(
+            'date,amount,reference\n' + ''.join(f'{row}\n' for row in rows)
+        )
+
+    def matched(self, result):
+        return {item['line']: item['transaction'] for item in result['matched']}
+
+    def test_exact_match_prefers_nearest_date(self):
+        early = self.make_transaction('100.00', transaction_date=date(2025, 1, 10))
+        late = self.make_transaction('100.00', transaction_date=date(2025, 1, 13))
+        rent = self.make_transaction('50.00', transaction_date=date(2025, 1, 12), subcategory=self.rent)
+
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-12,100.00,a', '2025-01-11,100.00,b', '2025-01-12,-50,c'),
+            date_tolerance=3, amount_tolerance=Decimal('0')
+        )
+
+        # Строки обрабатываются в порядке дат: 11.01 забирает ближайшую 10.01
+        self.assertEqual(self.matched(result), {2: late.pk, 3: early.pk, 4: rent.pk})
+        self.assertEqual(result['summary'], {'lines': 3, 'matched': 3, 'missing': 0, 'extra': 0})
+
+    def test_date_tolerance(self):
+        transaction = self.make_transaction('100.00', transaction_date=date(2025, 1, 10))
+
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-13,100.00,a'), date_tolerance=2, amount_tolerance=Decimal('0')
+        )
+        self.assertEqual(result['summary']['missing'], 1)
+        # Транзакция за пределами периода выписки не считается лишней
+        self.assertEqual(result['extra'], [])
+
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-13,100.00,a'), date_tolerance=3, amount_tolerance=Decimal('0')
+        )
+        self.assertEqual(self.matched(result), {2: transaction.pk})
+
+    def test_amount_tolerance_after_exact_pass(self):
+        exact = self.make_transaction('99.50', transaction_date=date(2025, 1, 12))
+        near = self.make_transaction('100.00', transaction_date=date(2025, 1, 10))
+
+        # Без допуска по сумме совпадает только точная сумма
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-10,99.60,a', '2025-01-12,99.50,b'),
+            date_tolerance=3, amount_tolerance=Decimal('0')
+        )
+        self.assertEqual(self.matched(result), {3: exact.pk})
+        self.assertEqual([item['transaction'] for item in result['extra']], [near.pk])
+
+        # Точное совпадение сопоставляется раньше, несмотря на более раннюю строку
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-10,99.60,a', '2025-01-12,99.50,b'),
+            date_tolerance=3, amount_tolerance=Decimal('0.50')
+        )
+        self.assertEqual(self.matched(result), {2: near.pk, 3: exact.pk})
+        self.assertEqual(result['matched'][0]['transaction_amount'], Decimal('100.00'))
+
+    def test_filters_and_parse_errors(self):
+        other = Status.objects.create(name='Личное')
+        self.make_transaction('100.00', transaction_date=date(2025, 1, 10), status=other)
+        transaction = self.make_transaction('1000.50', transaction_date=date(2025, 1, 10))
+
+        result = reconcile.reconcile_statement(
+            self.statement('2025-01-10,"1 000,50",a', '2025-01-10,100.00,b', '2025-13-01,1,c', '2025-01-10,1.005,d'),
+            filters={'status': str(self.status.pk)}, date_tolerance=0, amount_tolerance=Decimal('0')
+        )
+
+        self.assertEqual(self.matched(result), {2: transaction.pk})
+        self.assertEqual([line['line'] for line in result['missing']], [3])
+        self.assertEqual([error['line'] for error in result['errors']], [4, 5])
+
+    def test_endpoint(self):
+        transaction = self.make_transaction('100.00', transaction_date=date(2025, 1, 10))
+
+        def post(**params):
+            upload = ContentFile(b'date,amount\n2025-01-11,100.00\n', name='statement.csv')
+            query = '&'.join(f'{key}={value}' for key, value in params.items())
+            return self.client.post(
+                f'/api/transactions/reconcile/?{query}', {'file': upload}, format='multipart'
+            )
+
+        response = post(date_tolerance=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['matched'][0]['transaction'], transaction.pk)
+        self.assertEqual(post(date_tolerance=0).data['summary']['missing'], 1)
+        self.assertEqual(post(date_tolerance='x').status_code, 400)
+        self.assertEqual(post(amount_tolerance='-1').status_code, 400)
+        self.assertEqual(
+            self.client.post('/api/transactions/reconcile/', {}, format='multipart').status_code, 400
+        )
+
+
+class RecurringTests(CashFlowTestCase):
+    """Тесты расписаний и создания регулярных операций."""
+
+    def dates(self, schedule, start, end):
+        return [
+            value.isoformat() for value in recurring.occurrences(schedule, start, end)
+        ]
+
+    def make_template(self, schedule, **kwargs):
+        return RecurringTransaction.objects.create(
+            name='Аренда офиса',
+            status=self.status,
+            transaction_type=self.expense,
+            category=self.rent.category,
+            subcategory=self.rent,
+            amount=Decimal('500.00'),
+            schedule=schedule,
+            start_date=kwargs.pop('start_date', date(2025, 1, 1)),
+            **kwargs
+        )
+
+    def test_last_day_of_month(self):
+        self.assertEqual(
+            self.dates('L * *', date(2024, 1, 1), date(2024, 4, 30)),
+            ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30']
+        )
+        self.assertEqual(
+            self.dates('15,L 2 *', date(2025, 1, 1), date(2025, 12, 31)),
+            ['2025-02-15', '2025-02-28']
+        )
+
+    def test_day_and_weekday_match_either(self):
+        # 1 января 2025 - среда, понедельники - 6, 13, 20 и 27 января
+        self.assertEqual(
+            self.dates('1 1 1', date(2025, 1, 1), date(2025, 1, 31)),
+            ['2025-01-01', '2025-01-06', '2025-01-13', '2025-01-20', '2025-01-27']
+        )
+        self.assertEqual(
+            self.dates('L * 0', date(2025, 5, 20), date(2025, 6, 3)),
+            ['2025-05-25', '2025-05-31', '2025-06-01']
+        )
+        # Если одно из полей - звездочка, учитывается только другое
+        self.assertEqual(
+            self.dates('* * 1', date(2025, 1, 1), date(2025, 1, 10)), ['2025-01-06']
+        )
+        self.assertEqual(
+            self.dates('1 * *', date(2025, 1, 1), date(2025, 2, 10)), ['2025-01-01', '2025-02-01']
+        )
+
+    def test_lists_ranges_and_steps(self):
+        self.assertEqual(
+            self.dates('*/10 * *', date(2025, 1, 1), date(2025, 1, 31)),
+            ['2025-01-01', '2025-01-11', '2025-01-21', '2025-01-31']
+        )
+        self.assertEqual(
+            self.dates('5/10 1-2 *', date(2025, 1, 1), date(2025, 3, 31)),
+            ['2025-01-05', '2025-01-15', '2025-01-25', '2025-02-05', '2025-02-15', '2025-02-25']
+        )
+        # 0 и 7 - воскресенье
+        self.assertEqual(
+            self.dates('* * 7', date(2025, 1, 1), date(2025, 1, 12)),
+            self.dates('* * 0', date(2025, 1, 1), date(2025, 1, 12)),
+        )
+        self.assertEqual(self.dates('L * *', date(2025, 2, 1), date(2025, 1, 1)), [])
+
+    def test_invalid_schedules(self):
+        for schedule in ('32 * *', '1 *', 'x * *', '5-1 * *', '*/0 * *', 'L-1 * *', '1 13 *', '1 * 8'):
+            with self.subTest(schedule=schedule):
+                with self.assertRaises(ValueError):
+                    recurring.Schedule(schedule)
+
+    def test_materialize_is_repeatable(self):
+        template = self.make_template('L * *', end_date=date(2025, 3, 15))
+        self.make_template('1 * *', is_active=False)
+
+        result = recurring.materialize(until=date(2025, 2, 10))
+        self.assertEqual((result['templates'], result['created']), (1, 1))
+        self.assertEqual(recurring.materialize(until=date(2025, 2, 10))['created'], 0)
+
+        # Запуск после простоя создает пропущенные даты до end_date
+        result = recurring.materialize(until=date(2025, 6, 1))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('transaction_date', flat=True)),
+            [date(2025, 1, 31), date(2025, 2, 28)]
+        )
+        template.refresh_from_db()
+        self.assertEqual(template.materialized_until, date(2025, 6, 1))
+        self.assertEqual(counters.get_total(), 2)
+
+    def test_materialize_reports_invalid_schedule(self):
+        valid = self.make_template('1 * *')
+        invalid = self.make_template('1 * *')
+        RecurringTransaction.objects.filter(pk=invalid.pk).update(schedule='40 * *')
+
+        result = recurring.materialize(until=date(2025, 1, 31))
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(list(result['errors']), [invalid.pk])
+        valid.refresh_from_db()
+        invalid.refresh_from_db()
+        self.assertEqual(valid.materialized_until, date(2025, 1, 31))
+        self.assertIsNone(invalid.materialized_until)
+
+
+class PivotTests(CashFlowTestCase):
+    """Тесты сводной таблицы /api/transactions/pivot/."""
+
+    def setUp(self):
+        super().setUp()
+        self.make_transaction('100.00', date(2024, 3, 10))
+        self.make_transaction('50.00', date(2024, 4, 5))
+        self.make_transaction('30.00', date(2024, 4, 20), subcategory=self.rent)
+        self.make_transaction('20.00', date(2024, 7, 1), subcategory=self.rent)
+
+    def get_pivot(self, **params):
+        response = self.client.get('/api/transactions/pivot/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_row_and_column_totals(self):
+        data = self.get_pivot(date_from='2024-03-01', date_to='2024-05-31')
+
+        self.assertEqual(data['columns'], ['2024-03', '2024-04', '2024-05'])
+        self.assertEqual(
+            [(row['name'], row['counts'], row['totals'], row['total']) for row in data['rows']],
+            [
+                ('Офис', [0, 1, 0], [0, Decimal('30.00'), 0], Decimal('30.00')),
+                ('Продажи', [1, 1, 0], [Decimal('100.00'), Decimal('50.00'), 0], Decimal('150.00')),
+            ]
+        )
+        self.assertEqual(data['column_counts'], [1, 2, 0])
+        self.assertEqual(data['column_totals'], [Decimal('100.00'), Decimal('80.00'), 0])
+        self.assertEqual((data['grand_count'], data['grand_total']), (3, Decimal('180.00')))
+
+    def test_columns_without_date_range(self):
+        data = self.get_pivot(rows='subcategory', period='quarter')
+
+        # Без полного диапазона дат столбцы - только периоды с данными
+        self.assertEqual(data['columns'], ['2024-Q1', '2024-Q2', '2024-Q3'])
+        self.assertEqual([row['name'] for row in data['rows']], ['Аренда', 'Онлайн продажи'])
+        self.assertEqual(data['grand_total'], Decimal('200.00'))
+
+    @override_settings(CASHFLOW_FISCAL_YEAR_START_MONTH=4)
+    def test_fiscal_year(self):
+        data = self.get_pivot(fiscal_year=2024, period='quarter')
+
+        self.assertEqual(data['columns'], ['2024-Q2', '2024-Q3', '2024-Q4', '2025-Q1'])
+        self.assertEqual(data['column_totals'], [Decimal('80.00'), Decimal('20.00'), 0, 0])
+
+        # Пересечение финансового года с фильтром по дате
+        data = self.get_pivot(fiscal_year=2024, period='year', date_to='2024-06-30')
+        self.assertEqual(data['columns'], ['2024'])
+        self.assertEqual(data['grand_total'], Decimal('80.00'))
+
+    def test_filters(self):
+        other = Status.objects.create(name='Личное')
+        self.make_transaction('5.00', date(2024, 4, 1), status=other)
+
+        data = self.get_pivot(rows='status', period='year')
+        self.assertEqual(
+            [(row['name'], row['total']) for row in data['rows']],
+            [('Бизнес', Decimal('200.00')), ('Личное', Decimal('5.00'))]
+        )
+        data = self.get_pivot(transaction_type=self.expense.pk, period='year')
+        self.assertEqual([row['name'] for row in data['rows']], ['Офис'])
+        data = self.get_pivot(status=other.pk, period='year')
+        self.assertEqual(data['grand_total'], Decimal('5.00'))
+
+    def test_cache_follows_writes(self):
+        self.assertEqual(self.get_pivot(period='year')['grand_count'], 4)
+        self.make_transaction('1.00', date(2024, 8, 1))
+        self.assertEqual(self.get_pivot(period='year')['grand_count'], 5)
+
+    def test_invalid_parameters(self):
+        for params in ({'rows': 'amount'}, {'period': 'week'}, {'fiscal_year': 'next'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/transactions/pivot/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.data)
+
+
+# Манифест статических файлов создается только collectstatic
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class AdminListTests(CashFlowTestCase):
+    """Тесты фильтра месяцев и пагинаторов списка транзакций в админке."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.model_admin = admin.site._registry[Transaction]
+
+    def get_months(self):
+        request = mock.Mock(GET={})
+        month_filter = CachedMonthFilter(request, {}, Transaction, self.model_admin)
+        return [value for value, _ in month_filter.lookup_choices]
+
+    def test_month_list_follows_writes(self):
+        self.make_transaction('10.00', date(2025, 1, 15))
+        self.make_transaction('10.00', date(2024, 11, 2))
+        self.assertEqual(self.get_months(), ['2025-01', '2024-11'])
+
+        with self.assertNumQueries(0):
+            self.get_months()
+
+        transaction = self.make_transaction('10.00', date(2025, 3, 1))
+        self.assertEqual(self.get_months(), ['2025-03', '2025-01', '2024-11'])
+        transaction.delete()
+        self.assertEqual(self.get_months(), ['2025-01', '2024-11'])
+
+    def test_changelist_month_filter(self):
+        self.make_transaction('10.00', date(2025, 1, 15))
+        self.make_transaction('20.00', date(2025, 2, 15))
+
+        url = '/admin/dds_app_api/transaction/'
+        response = self.client.get(url, {'month': '2025-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item.amount for item in response.context['cl'].result_list], [Decimal('20.00')]
+        )
+        self.assertEqual(response.context['cl'].paginator.count, 1)
+
+        response = self.client.get(url, {'month': 'broken'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_estimated_count(self):
+        transactions = [self.make_transaction('10.00') for _ in range(5)]
+        transactions[1].delete()
+
+        queryset = Transaction.objects.order_by('id')
+        # Без статистики SQLite оценка - разница первичных ключей
+        self.assertEqual(pagination.estimate_row_count(Transaction), 5)
+        self.assertEqual(pagination.EstimatedCountPaginator(queryset, 2).count, 5)
+        self.assertEqual(pagination.TransactionCountPaginator(queryset, 2).count, 4)
+
+        filtered = queryset.filter(amount=Decimal('10.00'))
+        self.assertEqual(pagination.EstimatedCountPaginator(filtered, 2).count, 4)
+        with override_settings(CASHFLOW_COUNT_LIMIT=3):
+            self.assertEqual(pagination.EstimatedCountPaginator(filtered, 2).count, 3)
+
+
+class CategorizeTests(CashFlowTestCase):
+    """Тесты правил автоматической категоризации."""
+
+    def make_rule(self, pattern, subcategory, priority=100, kind=CategorizationRule.KEYWORD):
+        return CategorizationRule.objects.create(
+            name=pattern, kind=kind, pattern=pattern,
+            subcategory=subcategory, priority=priority
+        )
+
+    def classify(self, comment):
+        result = categorize.get_matcher().classify(comment)
+        return result[0] if result else None
+
+    def test_keywords_and_expressions(self):
+        self.make_rule('аренда офиса', self.rent)
+        self.make_rule(r'заказ\s*№?\d+', self.sales, kind=CategorizationRule.REGEX)
+
+        self.assertEqual(self.classify('Оплата: АРЕНДА офиса, март'), self.rent.pk)
+        self.assertEqual(self.classify('Заказ №123'), self.sales.pk)
+        self.assertIsNone(self.classify('аренда склада'))
+        self.assertEqual(
+            categorize.get_matcher().classify('аренда офиса'),
+            (self.rent.pk, self.rent.category_id, self.expense.pk)
+        )
+
+    def test_priority(self):
+        self.make_rule('оплата', self.sales, priority=20)
+        self.make_rule('аренда', self.rent, priority=10)
+        self.make_rule('возврат', self.sales, priority=5, kind=CategorizationRule.REGEX)
+
+        # Меньший приоритет важнее, независимо от позиции в комментарии
+        self.assertEqual(self.classify('оплата аренда'), self.rent.pk)
+        self.assertEqual(self.classify('аренда возврат'), self.sales.pk)
+
+    def test_priority_tie_prefers_older_rule(self):
+        self.make_rule('аренда', self.rent, priority=10)
+        self.make_rule('аренда', self.sales, priority=10, kind=CategorizationRule.REGEX)
+        self.make_rule('склад', self.sales, priority=10, kind=CategorizationRule.REGEX)
+        self.make_rule('склад', self.rent, priority=10)
+
+        self.assertEqual(self.classify('аренда'), self.rent.pk)
+        self.assertEqual(self.classify('склад'), self.sales.pk)
+        self.assertEqual(self.classify('склад и аренда'), self.rent.pk)
+
+    def test_invalid_patterns(self):
+        for kind, pattern in (
+            (CategorizationRule.REGEX, '('),
+            (CategorizationRule.REGEX, r'(a)\1'),
+            (CategorizationRule.REGEX, '(?P<name>a)'),
+            (CategorizationRule.REGEX, 'a*'),
+            (CategorizationRule.KEYWORD, '!!!'),
+            (CategorizationRule.KEYWORD, '  '),
+        ):
+            with self.subTest(pattern=pattern):
+                with self.assertRaises(ValueError):
+                    categorize.validate_pattern(kind, pattern)
+
+        response = self.client.post('/api/categorization-rules/', {
+            'name': 'Сломанное', 'kind': CategorizationRule.REGEX,
+            'pattern': '(', 'subcategory': self.rent.pk, 'priority': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        # Правило, сохраненное в обход проверки, не ломает остальные
+        self.make_rule('(', self.rent, priority=1, kind=CategorizationRule.REGEX)
+        self.make_rule('аренда', self.rent, priority=2)
+        self.assertEqual(self.classify('аренда ('), self.rent.pk)
+
+    def test_reclassification_after_rule_edit(self):
+        rule = self.make_rule('аренда', self.sales)
+        self.assertEqual(self.classify('аренда'), self.sales.pk)
+        matcher = categorize.get_matcher()
+        self.assertIs(categorize.get_matcher(), matcher)
+
+        rule.subcategory = self.rent
+        rule.save()
+        self.assertIsNot(categorize.get_matcher(), matcher)
+        self.assertEqual(self.classify('аренда'), self.rent.pk)
+
+        rule.is_active = False
+        rule.save()
+        self.assertIsNone(self.classify('аренда'))
+
+        rule.is_active = True
+        rule.save()
+        response = self.client.post('/api/transactions/', {
+            'transaction_date': '2025-01-15', 'status': self.status.pk,
+            'amount': '10.00', 'comment': 'Аренда за январь',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.get().subcategory, self.rent)
+
+        rule.delete()
+        response = self.client.post('/api/transactions/', {
+            'transaction_date': '2025-01-15', 'status': self.status.pk,
+            'amount': '10.00', 'comment': 'Аренда за январь',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subcategory', response.data)
+
+
+class QueryPlanTests(CashFlowTestCase):
+    """Тесты диагностики планов выполнения запросов."""
+
+    def setUp(self):
+        super().setUp()
+        self.make_transaction(100, subcategory=self.sales)
+        self.make_transaction(40, subcategory=self.rent)
+        self.staff = User.objects.create_user('staff', password='password', is_staff=True)
+
+    def test_requires_staff(self):
+        response = self.client.get('/api/transactions/explain/')
+        self.assertIn(response.status_code, (401, 403))
+
+        self.client.force_authenticate(User.objects.create_user('user', password='password'))
+        response = self.client.get('/api/transactions/explain/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_list_plan(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/transactions/explain/', {
+            'transaction_type': self.income.pk,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['target'], 'list')
+        self.assertEqual(response.data['params'], {'transaction_type': str(self.income.pk)})
+        self.assertEqual(response.data['query_count'], len(response.data['queries']))
+        selects = [query for query in response.data['queries'] if query['plan']]
+        self.assertTrue(selects)
+        self.assertTrue(any(self.income.pk in query['params'] for query in selects))
+        for query in selects:
+            self.assertGreaterEqual(query['time_ms'], 0)
+
+    def test_summary_plan(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/transactions/explain/', {'target': 'summary'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['target'], 'summary')
+        self.assertTrue(any('SUM' in query['sql'].upper() for query in response.data['queries']))
+
+        response = self.client.get('/api/transactions/explain/', {'target': 'pivot'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_analyze_plan(self):
+        plan = [
+            'SEARCH dds_app_api_transaction USING INDEX tx_date_idx (transaction_date>?)',
+            '  SEARCH dds_app_api_status USING INTEGER PRIMARY KEY (rowid=?)',
+            'CO-ROUTINE rows',
+            '  SCAN dds_app_api_category',
+            'SCAN rows',
+            'SCAN dds_app_api_transaction USING COVERING INDEX tx_date_idx',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]
+        indexes, scans = queryplan.analyze_plan(plan)
+        self.assertEqual(indexes, ['tx_date_idx', 'INTEGER PRIMARY KEY'])
+        self.assertEqual(scans, ['dds_app_api_category', 'dds_app_api_transaction'])
+
+
+class SlowLogTests(CashFlowTestCase):
+    """Тесты журнала медленных SQL-запросов."""
+
+    def read_log(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            slowlog.normalize_sql('SELECT *\n  FROM t WHERE id IN (%s, %s,%s) AND x IN (%s)'),
+            'SELECT * FROM t WHERE id IN (...) AND x IN (...)'
+        )
+
+    @override_settings(CASHFLOW_SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        with self.assertNoLogs('dds_app_api.slowlog'):
+            self.client.get('/api/transactions/')
+
+    @override_settings(CASHFLOW_SLOW_QUERY_THRESHOLD_MS=0)
+    def test_records_request_context(self):
+        self.make_transaction(100, subcategory=self.sales)
+        with self.assertLogs('dds_app_api.slowlog', 'WARNING') as logs:
+            response = self.client.get('/api/transactions/', {'amount_min': '50'})
+        self.assertEqual(response.status_code, 200)
+
+        entries = self.read_log(logs)
+        self.assertTrue(entries)
+        for entry in entries:
+            self.assertEqual(entry['method'], 'GET')
+            self.assertEqual(entry['path'], '/api/transactions/')
+            self.assertEqual(entry['view'], 'TransactionViewSet')
+            self.assertEqual(entry['action'], 'list')
+            self.assertEqual(entry['database'], 'default')
+            self.assertGreaterEqual(entry['duration_ms'], 0)
+        self.assertTrue(any('50' in map(str, entry['params']) for entry in entries))
+        self.assertTrue(any(
+            (entry['call_site'] or '').startswith('dds_app_api/') for entry in entries
+        ))
+
+    @override_settings(CASHFLOW_SLOW_QUERY_THRESHOLD_MS=0)
+    def test_records_outside_request(self):
+        with self.assertLogs('dds_app_api.slowlog', 'WARNING') as logs:
+            list(Transaction.objects.filter(id__in=[1, 2, 3]))
+        entry = self.read_log(logs)[-1]
+        self.assertEqual(entry['params'], [1, 2, 3])
+        self.assertNotIn('path', entry)
+
+    def test_summarize(self):
+        entries = [
+            {'sql': 'SELECT 1 WHERE id IN (%s)', 'duration_ms': 5, 'call_site': 'a.py:1',
+             'method': 'GET', 'view': 'TransactionViewSet', 'action': 'list'},
+            {'sql': 'SELECT 1 WHERE id IN (%s, %s)', 'duration_ms': 30, 'call_site': 'a.py:1',
+             'method': 'GET', 'view': 'TransactionViewSet', 'action': 'list'},
+            {'sql': 'SELECT 2', 'duration_ms': 20, 'call_site': 'b.py:2'},
+        ]
+        groups = slowlog.summarize(entries)
+        self.assertEqual([group['key'] for group in groups], [
+            'SELECT 1 WHERE id IN (...)', 'SELECT 2',
+        ])
+        self.assertEqual(groups[0]['count'], 2)
+        self.assertEqual(groups[0]['total_ms'], 35)
+        self.assertEqual(groups[0]['avg_ms'], 17.5)
+        self.assertEqual(groups[0]['max_ms'], 30)
+        self.assertIs(groups[0]['example'], entries[1])
+
+        groups = slowlog.summarize(entries, by='action', top=1)
+        self.assertEqual([group['key'] for group in groups], ['GET TransactionViewSet list'])
+        groups = slowlog.summarize(entries, by='call_site')
+        self.assertEqual([group['key'] for group in groups], ['a.py:1', 'b.py:2'])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            path = f'{log_dir}/slow.log'
+            with open(f'{path}.1', 'w', encoding='utf-8') as handle:
+                handle.write(json.dumps({'sql': 'SELECT 2', 'duration_ms': 50}) + '\n')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write('не JSON\n')
+                handle.write(json.dumps({
+                    'sql': 'SELECT 1', 'duration_ms': 10, 'call_site': 'a.py:1',
+                    'method': 'GET', 'path': '/api/transactions/',
+                    'view': 'TransactionViewSet', 'action': 'list', 'params': [],
+                }) + '\n')
+
+            self.assertEqual(len(list(slowlog.read_entries(path))), 2)
+            out = io.StringIO()
+            call_command('slow_queries', log=path, stdout=out)
+            output = out.getvalue()
+            self.assertLess(output.index('SELECT 2'), output.index('SELECT 1'))
+            self.assertIn('GET /api/transactions/ (TransactionViewSet.list)', output)
+
+            out = io.StringIO()
+            call_command('slow_queries', log=f'{log_dir}/missing.log', stdout=out)
+            self.assertIn('не найдены', out.getvalue())
+
+
+class ProfilingTests(CashFlowTestCase):
+    """Тесты профилирования запросов по требованию сотрудников."""
+
+    def setUp(self):
+        super().setUp()
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        field = RequestProfile._meta.get_field('profile')
+        patcher = mock.patch.object(field, 'storage', FileSystemStorage(location=profile_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.staff = User.objects.create_user('staff', password='password', is_staff=True)
+
+    def test_staff_request_is_profiled(self):
+        self.make_transaction(100, subcategory=self.sales)
+        self.client.force_login(self.staff)
+        response = self.client.get('/api/transactions/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+
+        record = RequestProfile.objects.get(pk=response[profiling.RESPONSE_HEADER])
+        self.assertEqual(record.user, self.staff)
+        self.assertEqual(record.path, '/api/transactions/')
+        self.assertEqual(record.view, 'TransactionViewSet')
+        self.assertEqual(record.action, 'list')
+        self.assertEqual(record.status_code, 200)
+        self.assertGreater(record.query_count, 0)
+        self.assertTrue(record.profile.storage.exists(record.profile.name))
+
+        response = self.client.get('/api/transactions/', {'profile': '1'})
+        self.assertIn(profiling.RESPONSE_HEADER, response)
+        self.assertEqual(RequestProfile.objects.latest('pk').query_string, 'profile=1')
+
+    def test_other_requests_are_not_profiled(self):
+        response = self.client.get('/api/transactions/', HTTP_X_PROFILE='1')
+        self.assertNotIn(profiling.RESPONSE_HEADER, response)
+
+        self.client.force_login(User.objects.create_user('user', password='password'))
+        response = self.client.get('/api/transactions/', HTTP_X_PROFILE='1')
+        self.assertNotIn(profiling.RESPONSE_HEADER, response)
+
+        self.client.force_login(self.staff)
+        response = self.client.get('/api/transactions/')
+        self.assertNotIn(profiling.RESPONSE_HEADER, response)
+        response = self.client.get('/api/transactions/', HTTP_X_PROFILE='0')
+        self.assertNotIn(profiling.RESPONSE_HEADER, response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(CASHFLOW_PROFILE_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        self.client.force_login(self.staff)
+        ids = [
+            int(self.client.get('/api/transactions/', HTTP_X_PROFILE='1')[profiling.RESPONSE_HEADER])
+            for _ in range(3)
+        ]
+        self.assertEqual(sorted(RequestProfile.objects.values_list('pk', flat=True)), ids[1:])
+        storage = RequestProfile._meta.get_field('profile').storage
+        _, files = storage.listdir('profiles')
+        self.assertEqual(len(files), 2)
+
+
+class LoadInitialDataTests(TestCase):
+    """Тесты загрузки начальных данных."""
+
+    def load(self):
+        call_command('load_initial_data', stdout=io.StringIO())
+        return list(
+            Transaction.objects.filter(external_id__startswith='demo:').order_by('external_id').values_list(
+                'external_id', 'transaction_date', 'status__name',
+                'subcategory__name', 'amount', 'comment'
+            )
+        )
+
+    def test_demo_transactions_are_stable(self):
+        first = self.load()
+        self.assertEqual(len(first), 48)
+        self.assertEqual(self.load(), first)
+
+
+class AnalyticsTests(CashFlowTestCase):
+    """Тесты колоночной аналитики транзакций."""
+
+    def setUp(self):
+        super().setUp()
+        analytics._frames.clear()
+        self.make_transaction('100.00', date(2025, 1, 5))
+        self.make_transaction('250.50', date(2025, 1, 5))
+        self.make_transaction('80.00', date(2025, 2, 2))
+        self.make_transaction('40.00', date(2025, 1, 7), subcategory=self.rent)
+        self.make_transaction('60.25', date(2025, 2, 10), subcategory=self.rent)
+
+    def assertMatchesOrm(self, report, queryset, by):
+        expected = {
+            row[by]: row
+            for row in queryset.values(by).annotate(count=Count('id'), total=Sum('amount'))
+        }
+        self.assertEqual(report['count'], queryset.count())
+        self.assertEqual(report['total'], queryset.aggregate(total=Sum('amount'))['total'])
+        self.assertEqual(len(report['groups']), len(expected))
+        for group in report['groups']:
+            row = expected[group['id']]
+            amounts = queryset.filter(**{by: group['id']}).values_list('amount', flat=True)
+            self.assertEqual(group['count'], row['count'])
+            self.assertEqual(group['total'], row['total'])
+            self.assertEqual(group['average'], round(float(row['total']) / row['count'], 2))
+            self.assertEqual(
+                group['percentiles']['50'], round(float(statistics.median(amounts)), 2)
+            )
+
+    def test_groups_match_orm(self):
+        for by in ('category', 'subcategory', 'transaction_type', 'status'):
+            with self.subTest(by=by):
+                self.assertMatchesOrm(
+                    analytics.build_analytics({}, by), Transaction.objects.all(), by
+                )
+
+        report = analytics.build_analytics({}, 'category')
+        names = {group['id']: group['name'] for group in report['groups']}
+        self.assertEqual(names, {self.sales.category_id: 'Продажи', self.rent.category_id: 'Офис'})
+
+    def test_filters_match_orm(self):
+        report = analytics.build_analytics(
+            {'transaction_type': str(self.income.pk), 'amount_min': '90'}, 'category'
+        )
+        self.assertMatchesOrm(
+            report,
+            Transaction.objects.filter(transaction_type=self.income, amount__gte=90),
+            'category'
+        )
+
+        with self.assertRaises(ValueError):
+            analytics.build_analytics({'date_from': 'вчера'})
+
+    def test_months(self):
+        report = analytics.build_analytics({}, 'month')
+        expected = {
+            row['month'].strftime('%Y-%m'): row['total']
+            for row in Transaction.objects.annotate(month=TruncMonth('transaction_date'))
+            .values('month').annotate(total=Sum('amount'))
+        }
+        self.assertEqual(
+            {group['id']: group['total'] for group in report['groups']}, expected
+        )
+
+    def test_daily_series(self):
+        report = analytics.build_analytics({}, window=7)
+        series = report['series']
+        self.assertEqual(series['start'], '2025-01-05')
+        self.assertEqual(len(series['totals']), 37)
+        self.assertEqual(series['totals'][0], Decimal('350.50'))
+        self.assertEqual(series['totals'][1], Decimal('0.00'))
+        self.assertEqual(sum(series['totals']), report['total'])
+        self.assertEqual(series['moving_average'][:6], [None] * 6)
+        self.assertEqual(series['moving_average'][6], round((350.50 + 40) / 7, 2))
+
+    def test_cached_frame_is_refreshed(self):
+        self.assertEqual(analytics.build_analytics({})['count'], 5)
+        self.make_transaction('10.00')
+        self.assertEqual(analytics.build_analytics({})['count'], 6)
+
+    def test_endpoint(self):
+        response = self.client.get('/api/transactions/analytics/', {
+            'group_by': 'subcategory', 'percentiles': '25,75', 'window': 3,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(set(response.data['groups'][0]['percentiles']), {'25', '75'})
+
+        for params in ({'group_by': 'day'}, {'percentiles': '101'}, {'window': 0}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/transactions/analytics/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CASHFLOW_SNAPSHOT_MAX_DEAD_RATIO=1)
+class SnapshotTests(CashFlowTestCase):
+    """Тесты колоночного снимка транзакций."""
+
+    def setUp(self):
+        super().setUp()
+        snapshot_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(snapshot_dir.cleanup)
+        settings_override = override_settings(CASHFLOW_SNAPSHOT_DIR=snapshot_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        snapshot._mapped = None
+        self.addCleanup(setattr, snapshot, '_mapped', None)
+        analytics._frames.clear()
+
+        self.first = self.make_transaction('100.00', date(2024, 6, 1))
+        self.second = self.make_transaction('40.00', date(2025, 1, 7), subcategory=self.rent)
+        self.third = self.make_transaction('250.50', date(2025, 2, 5))
+
+    def live_rows(self, current):
+        live = current.live[:current.count] == 1
+        return dict(zip(
+            current.columns['id'][live].tolist(), current.columns['amounts'][live].tolist()
+        ))
+
+    def test_rebuild(self):
+        self.assertIsNone(snapshot.get_snapshot())
+
+        meta = snapshot.rebuild()
+
+        self.assertEqual((meta['generation'], meta['count'], meta['live']), (1, 3, 3))
+        current = snapshot.get_snapshot()
+        self.assertEqual(self.live_rows(current), {
+            self.first.pk: 10000, self.second.pk: 4000, self.third.pk: 25050,
+        })
+        self.assertFalse(snapshot.is_stale(current))
+
+    def test_refresh_after_update(self):
+        snapshot.rebuild()
+        self.second.amount = Decimal('45.50')
+        self.second.save()
+
+        current = snapshot.get_snapshot()
+
+        self.assertEqual((current.generation, current.count, current.live_count), (1, 4, 3))
+        self.assertEqual(self.live_rows(current)[self.second.pk], 4550)
+        self.assertFalse(snapshot.is_stale(current))
+        self.assertEqual(snapshot.refresh()['appended'], 0)
+
+    def test_refresh_after_delete(self):
+        snapshot.rebuild()
+        self.third.delete()
+        self.make_transaction('10.00', date(2025, 3, 1))
+
+        current = snapshot.get_snapshot()
+
+        self.assertEqual((current.generation, current.count, current.live_count), (1, 4, 3))
+        rows = self.live_rows(current)
+        self.assertNotIn(self.third.pk, rows)
+        self.assertEqual(sorted(rows.values()), [1000, 4000, 10000])
+
+    @override_settings(CASHFLOW_SNAPSHOT_MAX_DEAD_RATIO=0.2)
+    def test_rebuild_after_many_dead_rows(self):
+        snapshot.rebuild()
+        self.first.amount = Decimal('1.00')
+        self.first.save()
+
+        meta = snapshot.refresh()
+
+        self.assertIsNone(meta['appended'])
+        self.assertEqual((meta['generation'], meta['count'], meta['live']), (2, 3, 3))
+
+    def test_rebuild_after_archiving(self):
+        snapshot.rebuild()
+        archive.archive_to_table(date(2025, 1, 1))
+
+        current = snapshot.get_snapshot()
+
+        self.assertEqual((current.generation, current.count, current.live_count), (2, 2, 2))
+        self.assertEqual(set(self.live_rows(current)), {self.second.pk, self.third.pk})
+
+    def test_analytics_match_database(self):
+        self.second.amount = Decimal('45.50')
+        self.second.save()
+        params = {'date_from': '2025-01-01', 'amount_max': '300'}
+        with override_settings(CASHFLOW_ANALYTICS_SNAPSHOT=False):
+            expected = analytics.build_analytics(params, 'subcategory')
+
+        snapshot.rebuild()
+        self.third.delete()
+        self.make_transaction('250.50', date(2025, 2, 5))
+        self.make_transaction('999.00', date(2025, 2, 6))
+
+        with mock.patch.object(
+            analytics.transfer, 'filter_transactions', side_effect=AssertionError
+        ):
+            report = analytics.build_analytics(params, 'subcategory')
+        self.assertEqual(report, expected)
+
+
+@mock.patch('dds_app_api.forecast.timezone.localdate', return_value=date(2025, 7, 10))
+class ForecastTests(CashFlowTestCase):
+    """Тесты прогноза денежного потока."""
+
+    def setUp(self):
+        super().setUp()
+        analytics._frames.clear()
+
+    def make_history(self, incomes, expense='40.00'):
+        for month, amount in enumerate(incomes, start=1):
+            self.make_transaction(amount, date(2025, month, 10))
+            self.make_transaction(expense, date(2025, month, 20), subcategory=self.rent)
+
+    def test_flat_history(self, localdate):
+        self.make_history(['100.00'] * 6)
+        # Текущий период в историю не входит
+        self.make_transaction('5000.00', date(2025, 7, 1))
+
+        result = forecast.build_forecast({}, horizon=3)
+
+        self.assertEqual(result['history'], {'start': '2025-01', 'end': '2025-06', 'periods': 6})
+        self.assertEqual(result['periods'], ['2025-07', '2025-08', '2025-09'])
+        self.assertEqual(result['income'], {
+            'forecast': [100.0] * 3, 'lower': [100.0] * 3, 'upper': [100.0] * 3,
+        })
+        self.assertEqual(result['expense']['forecast'], [40.0] * 3)
+        self.assertEqual(result['balance']['forecast'], [60.0] * 3)
+        self.assertEqual(result['closing_balance']['opening'], 360.0)
+        self.assertEqual(result['closing_balance']['forecast'], [420.0, 480.0, 540.0])
+        self.assertEqual(
+            {item['id']: item['kind'] for item in result['categories']},
+            {self.sales.category_id: 'income', self.rent.category_id: 'expense'}
+        )
+
+    def test_interval_widens_with_horizon(self, localdate):
+        self.make_history(['100.00', '200.00'] * 3)
+
+        result = forecast.build_forecast({}, horizon=3, confidence=80)
+
+        income = result['income']
+        # Уровень - среднее трех последних месяцев
+        self.assertEqual(income['forecast'], [round(500 / 3, 2)] * 3)
+        widths = [upper - lower for lower, upper in zip(income['lower'], income['upper'])]
+        self.assertTrue(all(width > 0 for width in widths))
+        self.assertEqual(widths, sorted(widths))
+        self.assertLess(widths[0], widths[-1])
+        self.assertTrue(all(
+            lower < value < upper for lower, value, upper in zip(
+                income['lower'], income['forecast'], income['upper']
+            )
+        ))
+
+        wider = forecast.build_forecast({}, horizon=3, confidence=95)['income']
+        self.assertLess(wider['lower'][0], income['lower'][0])
+
+    def test_seasonal_decomposition(self, localdate):
+        # Два года истории с ростом сумм в декабре
+        matrix = np.full((1, 24), 100.0)
+        matrix[0, [11, 23]] = 220
+        first_index = int(forecast.period_index(np.datetime64('2023-01-01'), 'month'))
+
+        model = forecast.decompose(matrix, 12, first_index)
+
+        self.assertEqual(model['window'], 12)
+        self.assertAlmostEqual(model['level'][0], 110.0)
+        self.assertEqual(int(np.argmax(model['seasonal'][0])), 11)
+        self.assertAlmostEqual(model['seasonal'][0].sum(), 0)
+
+    def test_model_is_refit_after_changes(self, localdate):
+        self.make_history(['100.00'] * 6)
+        self.assertEqual(forecast.build_forecast({}, horizon=1)['income']['forecast'], [100.0])
+
+        self.make_transaction('300.00', date(2025, 6, 15))
+
+        self.assertEqual(forecast.build_forecast({}, horizon=1)['income']['forecast'], [200.0])
+
+    def test_empty_history_and_validation(self, localdate):
+        self.make_transaction('100.00', date(2025, 7, 1))
+        result = forecast.build_forecast({}, horizon=2)
+        self.assertIsNone(result['history'])
+        self.assertEqual(result['categories'], [])
+
+        for params in ({'period': 'day'}, {'horizon': 0}, {'confidence': 99}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/transactions/forecast/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+class AnomalyTests(CashFlowTestCase):
+    """Тесты поиска аномальных сумм."""
+
+    def setUp(self):
+        super().setUp()
+        analytics._frames.clear()
+        for amount in ('1000.00', '1100.00', '900.00', '1050.00', '950.00'):
+            self.make_transaction(amount, subcategory=self.rent)
+        self.outlier = self.make_transaction('100000.00', subcategory=self.rent)
+        # Подкатегория с малым количеством транзакций не проверяется
+        for amount in ('100.00', '50000.00', '120.00'):
+            self.make_transaction(amount)
+
+    def expected_score(self, amount):
+        amounts = Transaction.objects.filter(subcategory=self.rent).values_list('amount', flat=True)
+        values = [math.log(int(value * 100)) for value in amounts]
+        median = statistics.median(values)
+        mad = statistics.median(abs(value - median) for value in values)
+        return round(anomalies.Z_FACTOR * (math.log(int(amount * 100)) - median) / mad, 2)
+
+    def test_scan(self):
+        response = self.client.post('/api/transactions/anomalies/')
+
+        self.assertEqual(response.data, {'checked': 9, 'subcategories': 2, 'anomalies': 1})
+        anomaly = Anomaly.objects.get()
+        self.assertEqual(anomaly.transaction, self.outlier)
+        self.assertAlmostEqual(anomaly.score, self.expected_score(Decimal('100000')), places=2)
+        # Медиана логарифмов - среднее геометрическое 1000 и 1050
+        self.assertEqual(anomaly.expected, Decimal('1024.70'))
+
+    def test_new_transactions_are_checked(self):
+        anomalies.scan()
+
+        low = self.make_transaction('10.00', subcategory=self.rent)
+        self.make_transaction('1020.00', subcategory=self.rent)
+        self.make_transaction('900000.00')
+
+        self.assertEqual(
+            set(Anomaly.objects.values_list('transaction_id', flat=True)),
+            {self.outlier.pk, low.pk}
+        )
+        self.assertLess(Anomaly.objects.get(transaction=low).score, -anomalies.get_threshold())
+
+        response = self.client.get('/api/transactions/anomalies/', {'limit': 1})
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['transaction']['id'], low.pk)
+
+    def test_edit_clears_anomaly(self):
+        anomalies.scan()
+
+        response = self.client.patch(
+            f'/api/transactions/{self.outlier.pk}/', {'amount': '1000.00'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Anomaly.objects.exists())
+
+        self.outlier.amount = Decimal('200000.00')
+        self.outlier.save()
+        self.assertTrue(Anomaly.objects.filter(transaction=self.outlier).exists())
+
+    @override_settings(CASHFLOW_ANOMALY_THRESHOLD=100)
+    def test_threshold(self):
+        self.assertEqual(anomalies.scan()['anomalies'], 0)
+
+
+class StaticFilesTests(TestCase):
+    """Тесты раздачи статических файлов."""
+
+    HASHED_NAME = 'css/app.3f2a9c.css'
+
+    def setUp(self):
+        base_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(base_dir.cleanup)
+        self.root = f'{base_dir.name}/static'
+        files = {
+            self.HASHED_NAME: b'body{}',
+            f'{self.HASHED_NAME}.gz': b'gzip',
+            f'{self.HASHED_NAME}.br': b'brotli',
+            'robots.txt': b'User-agent: *',
+            '../secret.txt.gz': b'secret',
+        }
+        for name, content in files.items():
+            path = Path(self.root, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+
+        settings_override = override_settings(DEBUG=False, STATIC_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(
+            staticfiles.staticfiles_storage, 'hashed_files', {'css/app.css': self.HASHED_NAME}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path, encoding=None):
+        headers = {'HTTP_ACCEPT_ENCODING': encoding} if encoding is not None else {}
+        response = staticfiles.serve(RequestFactory().get(f'/static/{path}', **headers), path)
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_content_negotiation(self):
+        for encoding, content, content_encoding in (
+            ('gzip, deflate, br', b'brotli', 'br'),
+            ('gzip, deflate', b'gzip', 'gzip'),
+            ('', b'body{}', None),
+            (None, b'body{}', None),
+        ):
+            with self.subTest(encoding=encoding):
+                response = self.get(self.HASHED_NAME, encoding)
+                self.assertEqual(self.content(response), content)
+                self.assertEqual(response.get('Content-Encoding'), content_encoding)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_cache_headers(self):
+        response = self.get(self.HASHED_NAME, 'gzip')
+        self.assertEqual(
+            set(response['Cache-Control'].split(', ')),
+            {'public', f'max-age={staticfiles.IMMUTABLE_MAX_AGE}', 'immutable'}
+        )
+
+        response = self.get('robots.txt', 'gzip, br')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertFalse(response.has_header('Vary'))
+        self.assertEqual(self.content(response), b'User-agent: *')
+
+    def test_path_outside_root(self):
+        with mock.patch.object(staticfiles, 'static_serve') as static_serve:
+            with self.assertRaises(SuspiciousFileOperation):
+                self.get('../secret.txt', 'gzip')
+        static_serve.assert_not_called()
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class BootstrapTests(CashFlowTestCase):
+    """Тесты данных, встраиваемых в страницы фронтенда."""
+
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 13):
+            self.make_transaction('100.00', date(2025, 1, day))
+        self.make_transaction('40.00', subcategory=self.rent)
+
+    def get_bootstrap(self, path='/'):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        start = content.index('>', content.index(f'id="{views_frontend.BOOTSTRAP_ELEMENT_ID}"')) + 1
+        return json.loads(content[start:content.index('</script>', start)])
+
+    def test_index_matches_api(self):
+        data = self.get_bootstrap()
+
+        self.assertEqual(data['transactions']['status'], 200)
+        self.assertEqual(data['transactions']['body'], self.client.get('/api/transactions/').json())
+        self.assertEqual(data['summary']['body'], self.client.get('/api/transactions/summary/').json())
+        self.assertEqual(data['references']['body'], self.client.get('/api/reference-tree/').json())
+
+    def test_index_is_cached_until_changes(self):
+        first = self.get_bootstrap()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_bootstrap(), first)
+        self.assertFalse([
+            query for query in queries.captured_queries if 'dds_app_api_transaction' in query['sql']
+        ])
+
+        self.make_transaction('10.00')
+        data = self.get_bootstrap()
+        self.assertEqual(data['transactions']['body']['count'], 14)
+        self.assertEqual(data['transactions']['body'], self.client.get('/api/transactions/').json())
+
+    def test_transaction_form(self):
+        transaction = Transaction.objects.earliest('id')
+        data = self.get_bootstrap(f'/transaction/{transaction.pk}/')
+        self.assertEqual(
+            data['transaction']['body'],
+            self.client.get(f'/api/transactions/{transaction.pk}/').json()
+        )
+
+        data = self.get_bootstrap('/transaction/999999/')
+        self.assertEqual(data['transaction']['status'], 404)
+
+
+class BatchTests(CashFlowTestCase):
+    """Тесты пакетного endpoint /api/batch/."""
+
+    def post_batch(self, requests):
+        return self.client.post('/api/batch/', {'requests': requests}, format='json')
+
+    def test_subrequests_with_placeholders(self):
+        transaction = self.make_transaction('100.00')
+        response = self.post_batch([
+            {'id': 'tx', 'path': f'transactions/{transaction.pk}/'},
+            {'id': 'category', 'path': 'categories/{tx.category}/'},
+            'statuses/',
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        tx, category, statuses = response.data['responses']
+        self.assertEqual(tx['status'], 200)
+        self.assertEqual(category['path'], f'categories/{transaction.category_id}/')
+        self.assertEqual(category['body']['name'], 'Продажи')
+        self.assertEqual(statuses['status'], 200)
+
+    def test_failed_dependency(self):
+        response = self.post_batch([
+            {'id': 'missing', 'path': 'transactions/999999/'},
+            'categories/{missing.category}/',
+        ])
+
+        missing, dependent = response.data['responses']
+        self.assertEqual(missing['status'], 404)
+        self.assertEqual(dependent['status'], 424)
+
+    def test_forbidden_and_nested_requests(self):
+        response = self.post_batch(['request-profiles/', '/admin/', 'batch/'])
+
+        profiles, admin, nested = response.data['responses']
+        self.assertIn(profiles['status'], (401, 403))
+        self.assertEqual(admin['status'], 400)
+        self.assertEqual(nested['status'], 400)
+
+    def test_streaming_response_is_rejected(self):
+        job = Job.objects.create(kind='export', status=Job.SUCCEEDED)
+        job.result.save('batch-test.csv', ContentFile(b'id\n1\n'))
+        self.addCleanup(job.result.delete, save=False)
+
+        response = self.post_batch([f'jobs/{job.pk}/download/', 'statuses/'])
+
+        self.assertEqual(response.status_code, 200)
+        download, statuses = response.data['responses']
+        self.assertEqual(download['status'], 400)
+        self.assertIn('Потоковые', download['body']['detail'])
+        self.assertEqual(statuses['status'], 200)
+
+    def test_invalid_batch(self):
+        self.assertEqual(self.post_batch([]).status_code, 400)
+        self.assertEqual(self.post_batch([{'id': 'a', 'path': 'statuses/'}] * 2).status_code, 400)
+
+
+class ArchiveTests(CashFlowTestCase):
+    """Тесты переноса холодной истории в архив."""
+
+    def setUp(self):
+        super().setUp()
+        for month in range(1, 13):
+            self.make_transaction('100.00', date(2024, month, 10))
+            self.make_transaction('40.00', date(2024, month, 20), subcategory=self.rent)
+        self.make_transaction('500.00', date(2025, 2, 1))
+        self.make_transaction('50.00', date(2025, 2, 3), subcategory=self.rent)
+
+    def get_summary(self, **params):
+        response = self.client.get('/api/transactions/summary/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['summary']
+
+    def test_archive_to_table_keeps_totals(self):
+        summary_before = self.get_summary(date_from='2024-01-01')
+        balance_before = balances.balance_at(date(2025, 2, 2))
+        Anomaly.objects.create(
+            transaction=Transaction.objects.earliest('transaction_date'),
+            score=5, expected=100
+        )
+
+        segment = archive.archive_to_table(date(2025, 1, 1), batch_size=10)
+
+        self.assertEqual(segment.row_count, 24)
+        self.assertEqual(segment.total_amount, Decimal('1680.00'))
+        self.assertEqual(segment.date_from, date(2024, 1, 10))
+        self.assertEqual(segment.date_to, date(2024, 12, 20))
+        self.assertEqual(ArchiveSegment.objects.count(), 1)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(ArchivedTransaction.objects.count(), 24)
+        self.assertFalse(Anomaly.objects.exists())
+        self.assertFalse(Tombstone.objects.exists())
+
+        self.assertEqual(counters.get_total(), 2)
+        self.assertEqual(self.get_summary(date_from='2024-01-01'), summary_before)
+        self.assertEqual(self.get_summary()['total_count'], 2)
+        self.assertEqual(balances.balance_at(date(2025, 2, 2)), balance_before)
+        self.assertEqual(
+            balances.balance_at(date(2024, 6, 15))['balance'],
+            Decimal('5') * 60 + Decimal('100')
+        )
+
+    def test_query_count_does_not_depend_on_rows(self):
+        for day in range(1, 29):
+            for _ in range(5):
+                self.make_transaction('10.00', date(2023, 5, day))
+
+        with CaptureQueriesContext(connection) as queries:
+            segment = archive.archive_to_table(date(2024, 1, 1))
+
+        self.assertEqual(segment.row_count, 140)
+        # Обработчики удаления не вызываются для каждой строки
+        self.assertLess(len(queries), 40)
+
+    def test_horizon_follows_each_batch(self):
+        archived = []
+        original = archive._remove_transactions
+
+        def remove_and_check(rows):
+            original(rows)
+            archived.append(archive.get_archive_horizon())
+
+        with mock.patch.object(archive, '_remove_transactions', remove_and_check):
+            archive.archive_to_table(date(2025, 1, 1), batch_size=10)
+
+        # Граница доступна сразу после первой порции
+        self.assertEqual(len(archived), 3)
+        self.assertEqual(archive.get_archive_horizon(), date(2025, 1, 1))
+
+    def test_archive_to_ndjson_compacts_table(self):
+        archive.archive_to_table(date(2024, 7, 1))
+        summary_before = self.get_summary(date_from='2024-01-01')
+        balance_before = balances.balance_at(date(2025, 2, 2))
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with override_settings(CASHFLOW_ARCHIVE_DIR=archive_dir):
+                segment = archive.archive_to_ndjson(date(2025, 1, 1))
+
+        self.assertEqual(segment.storage, ArchiveSegment.STORAGE_NDJSON)
+        self.assertEqual(segment.row_count, 24)
+        self.assertFalse(ArchivedTransaction.objects.exists())
+        self.assertEqual(counters.get_total(), 2)
+        self.assertEqual(self.get_summary(date_from='2024-01-01'), summary_before)
+        self.assertEqual(balances.balance_at(date(2025, 2, 2)), balance_before)
+
+    def test_ndjson_rollups_mark_inexact_summaries(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with override_settings(CASHFLOW_ARCHIVE_DIR=archive_dir):
+                archive.archive_to_ndjson(date(2025, 1, 1))
+
+        def get(path, **params):
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, 200)
+            return response.data
+
+        data = get('/api/transactions/summary/', date_from='2024-03-01', date_to='2024-04-30')
+        self.assertTrue(data['exact'])
+        self.assertEqual(data['summary']['total_count'], 4)
+        self.assertTrue(get('/api/transactions/summary/')['exact'])
+
+        # Граница внутри месяца: итоги учитывают весь месяц
+        data = get('/api/transactions/summary/', date_from='2024-03-15', date_to='2024-04-30')
+        self.assertFalse(data['exact'])
+        self.assertEqual(data['summary']['total_count'], 4)
+        self.assertFalse(get('/api/transactions/summary/', date_from='2024-01-01', date_to='2024-03-15')['exact'])
+
+        # Поиск и фильтр по сумме к итогам не применяются
+        self.assertFalse(get('/api/transactions/summary/', date_from='2024-01-01', search='x')['exact'])
+        self.assertFalse(get('/api/transactions/summary/', date_from='2024-01-01', amount_min='50')['exact'])
+        self.assertTrue(get('/api/transactions/summary/', date_from='2025-01-01', amount_min='50')['exact'])
+
+        self.assertFalse(get('/api/transactions/pivot/', date_from='2024-03-15', date_to='2025-02-28')['exact'])
+        self.assertTrue(get('/api/transactions/pivot/', date_from='2024-03-01', date_to='2025-02-28')['exact'])
+
+        # Список не содержит строк NDJSON-сегментов
+        data = get('/api/transactions/', date_from='2024-01-01')
+        self.assertEqual(data['pagination']['total_count'], 2)
+
+    def test_nothing_to_archive(self):
+        self.assertIsNone(archive.archive_to_table(date(2020, 1, 1)))
+        self.assertIsNone(archive.get_archive_horizon())
+
+
+class BudgetTests(CashFlowTestCase):
+    """Тесты исполнения бюджетов по закэшированным суммам."""
+
+    def get_actual(self, month):
+        report = budgets.build_variance(month)
+        category = next(item for item in report['categories'] if item['id'] == self.rent.category_id)
+        return category['actual']
+
+    def test_cached_actual_follows_writes(self):
+        month = date(2025, 3, 1)
+        Budget.objects.create(subcategory=self.rent, month=month, amount=Decimal('1000'))
+        first = self.make_transaction('300.00', date(2025, 3, 5), subcategory=self.rent)
+        self.assertEqual(self.get_actual(month), Decimal('300.00'))
+
+        second = self.make_transaction('200.00', date(2025, 3, 6), subcategory=self.rent)
+        self.assertEqual(self.get_actual(month), Decimal('500.00'))
+
+        # Отключение записей Tombstone не означает перенос в архив
+        with sync.suppress_tombstones():
+            first.delete()
+        self.assertEqual(self.get_actual(month), Decimal('200.00'))
+
+        with archive.archiving():
+            second.delete()
+        self.assertEqual(self.get_actual(month), Decimal('200.00'))
+
+
+class BalanceTests(CashFlowTestCase):
+    """Тесты остатков на конец месяца и остатка на дату."""
+
+    def setUp(self):
+        super().setUp()
+        self.make_transaction('1000.00', date(2025, 1, 10))
+        self.make_transaction('300.00', date(2025, 1, 25), subcategory=self.rent)
+        self.make_transaction('500.00', date(2025, 3, 5))
+        self.make_transaction('200.00', date(2025, 3, 20), subcategory=self.rent)
+
+    def expected_balance(self, day):
+        balance = Decimal(0)
+        for transaction in Transaction.objects.filter(transaction_date__lte=day):
+            sign = 1 if transaction.transaction_type_id == self.income.pk else -1
+            balance += sign * transaction.amount
+        return balance
+
+    def assertBalances(self, days):
+        for day in days:
+            with self.subTest(day=day):
+                self.assertEqual(balances.balance_at(day)['balance'], self.expected_balance(day))
+
+    def test_balance_at_across_checkpoints(self):
+        self.assertEqual(
+            dict(BalanceCheckpoint.objects.filter(dimension=balances.ALL)
+                 .values_list('month', 'balance')),
+            {date(2025, 1, 1): Decimal('700.00'), date(2025, 3, 1): Decimal('1000.00')}
+        )
+        result = balances.balance_at(date(2025, 1, 31))
+        self.assertEqual(result['checkpoint'], '2025-01')
+        self.assertEqual(result['balance'], Decimal('700.00'))
+        # Месяц без операций берет остаток предыдущей отметки
+        self.assertEqual(balances.balance_at(date(2025, 2, 14))['checkpoint'], '2025-01')
+        self.assertEqual(balances.balance_at(date(2024, 12, 31))['balance'], Decimal('0.00'))
+        self.assertBalances([
+            date(2025, 1, 9), date(2025, 1, 10), date(2025, 1, 24), date(2025, 2, 14),
+            date(2025, 3, 5), date(2025, 3, 19), date(2025, 3, 31), date(2025, 6, 1),
+        ])
+
+    def test_backdated_update_and_delete_shift_later_months(self):
+        backdated = self.make_transaction('150.00', date(2024, 11, 30), subcategory=self.rent)
+        self.assertBalances([date(2024, 11, 30), date(2025, 1, 31), date(2025, 3, 31)])
+
+        backdated.transaction_date = date(2025, 2, 10)
+        backdated.save()
+        self.assertBalances([date(2024, 11, 30), date(2025, 2, 28), date(2025, 3, 31)])
+
+        with sync.suppress_tombstones():
+            backdated.delete()
+        self.assertBalances([date(2025, 2, 28), date(2025, 3, 31)])
+
+    def test_rebuild_matches_incremental_checkpoints(self):
+        incremental = list(BalanceCheckpoint.objects.values_list('dimension', 'key', 'month', 'balance'))
+        balances.rebuild()
+        self.assertCountEqual(
+            BalanceCheckpoint.objects.values_list('dimension', 'key', 'month', 'balance'),
+            incremental
+        )
+
+
+@override_settings(CASHFLOW_SYNC_SAFETY_WINDOW=60)
+class SyncTests(CashFlowTestCase):
+    """Тесты инкрементальной синхронизации /api/sync/."""
+
+    def sync(self, cursor=None, limit=None):
+        params = {}
+        if cursor:
+            params['cursor'] = cursor
+        if limit:
+            params['limit'] = limit
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def age(self, transactions, seconds):
+        Transaction.objects.filter(pk__in=[item.pk for item in transactions]).update(
+            updated_at=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def transaction_ids(self, data):
+        return [item['id'] for item in data['changes']['transactions']]
+
+    def test_cursor_paging(self):
+        created = [self.make_transaction(f'{index}0.00') for index in range(1, 6)]
+        self.age(created, 600)
+
+        seen = []
+        data = self.sync(limit=2)
+        pages = 1
+        seen += self.transaction_ids(data)
+        while data['has_more']:
+            data = self.sync(data['cursor'], limit=2)
+            seen += self.transaction_ids(data)
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(item.pk for item in created))
+
+        changed = created[2]
+        changed.comment = 'изменено'
+        changed.save()
+        data = self.sync(data['cursor'])
+        self.assertEqual(self.transaction_ids(data), [changed.pk])
+
+    def test_late_commit_is_not_lost(self):
+        first = self.make_transaction('100.00')
+        self.age([first], 600)
+        recent = self.make_transaction('200.00')
+
+        data = self.sync()
+        self.assertEqual(self.transaction_ids(data), [first.pk, recent.pk])
+
+        # Транзакция БД, начатая раньше, фиксируется после ответа клиенту
+        late = self.make_transaction('300.00')
+        self.age([late], 30)
+
+        data = self.sync(data['cursor'])
+        self.assertEqual(self.transaction_ids(data), [late.pk, recent.pk])
+
+        self.age([late, recent], 120)
+        data = self.sync(data['cursor'])
+        self.assertCountEqual(self.transaction_ids(data), [late.pk, recent.pk])
+        data = self.sync(data['cursor'])
+        self.assertEqual(self.transaction_ids(data), [])
+
+    def test_tombstones(self):
+        kept = self.make_transaction('100.00')
+        removed = self.make_transaction('200.00')
+        self.age([kept, removed], 600)
+        cursor = self.sync()['cursor']
+
+        removed_id = removed.pk
+        removed.delete()
+        with archive.archiving():
+            self.make_transaction('1.00', date(2000, 1, 1)).delete()
+
+        data = self.sync(cursor)
+        self.assertEqual(data['deleted']['transactions'], [removed_id])
+
+        # Недавнее удаление передается повторно, пока не выйдет за запас
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['transactions'], [removed_id])
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(seconds=120))
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['transactions'], [removed_id])
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['transactions'], [])
+
+    def test_fresh_tombstones_do_not_stall_cursor(self):
+        transactions = [self.make_transaction('10.00') for _ in range(5)]
+        self.age(transactions, 600)
+        cursor = self.sync()['cursor']
+        removed_ids = [transaction.pk for transaction in transactions]
+        for transaction in transactions:
+            transaction.delete()
+
+        # Свежих удалений больше страницы: продолжения нет, курсор не меняется
+        data = self.sync(cursor, limit=2)
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['cursor'], cursor)
+
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(seconds=120))
+        deleted = []
+        while True:
+            data = self.sync(cursor, limit=2)
+            deleted += data['deleted']['transactions']
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        self.assertCountEqual(deleted, removed_ids)
+        self.assertEqual(self.sync(cursor)['deleted']['transactions'], [])
+
+    def test_renamed_reference_is_synced(self):
+        transaction = self.make_transaction('10.00')
+        self.age([transaction], 600)
+        Status.objects.update(updated_at=timezone.now() - timedelta(seconds=600))
+        cursor = self.sync()['cursor']
+
+        self.status.name = 'Основной'
+        self.status.save()
+
+        # Транзакции не меняются, новое название приходит со справочником
+        data = self.sync(cursor)
+        self.assertEqual(self.transaction_ids(data), [])
+        self.assertEqual(
+            [(item['id'], item['name']) for item in data['changes']['statuses']],
+            [(self.status.pk, 'Основной')]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/sync/', {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 400)
+
+
+class JobQueueTests(CashFlowTestCase):
+    """Тесты захвата задач и аренды обработчиков."""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        jobs.JOB_HANDLERS['test'] = self.calls.append
+        self.addCleanup(jobs.JOB_HANDLERS.pop, 'test')
+
+    def expire(self, job):
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - jobs.get_lease_timeout() - timedelta(seconds=1)
+        )
+
+    def test_claim_and_run(self):
+        submitted = jobs.submit('test', {'value': 1})
+        job = jobs.claim_next('worker-1')
+
+        self.assertEqual(job.pk, submitted.pk)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+        jobs.run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(self.calls, [job])
+
+    def test_expired_lease_is_reclaimed(self):
+        jobs.submit('test')
+        stale = jobs.claim_next('worker-1')
+        self.expire(stale)
+
+        job = jobs.claim_next('worker-2')
+        self.assertEqual(job.pk, stale.pk)
+        self.assertEqual(job.worker, 'worker-2')
+        self.assertEqual(job.attempts, 2)
+
+        # Завершение задачи прежним обработчиком не перезаписывает состояние
+        jobs._finish(stale, Job.FAILED, error='stale')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_active_lease_is_kept(self):
+        jobs.submit('test')
+        jobs.claim_next('worker-1')
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+    @override_settings(CASHFLOW_JOB_MAX_ATTEMPTS=2)
+    def test_attempts_exhausted(self):
+        jobs.submit('test')
+        for worker in ('worker-1', 'worker-2'):
+            self.expire(jobs.claim_next(worker))
+
+        self.assertIsNone(jobs.claim_next('worker-3'))
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+
+@override_settings(CASHFLOW_REPORT_WORKERS=3, CASHFLOW_REPORT_SHARD_MIN_PERIODS=4)
+class ParallelPivotTests(ReferenceDataMixin, TransactionTestCase):
+    """
+    Тесты построения сводной таблицы по шардам.
+
+    Шарды считаются пулом потоков вместо пула процессов: тестовая база
+    в памяти недоступна другим процессам. Вне транзакции БД потоки видят
+    зафиксированные строки.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.create_references()
+        for month in range(1, 13):
+            self.make_transaction(f'{month}.00', transaction_date=date(2024, month, 5))
+            self.make_transaction('7.50', transaction_date=date(2024, month, 20), subcategory=self.rent)
+        self.addCleanup(parallel._reset_executor)
+
+    def serial(self, params, rows, period):
+        return reports.build_pivot(
+            parallel.collect_cells(params, rows, period), rows, period,
+            date(2024, 1, 1), date(2024, 12, 31)
+        )
+
+    def test_sharded_matches_serial(self):
+        executor = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(executor.shutdown)
+        params = {'date_from': '2024-01-01', 'date_to': '2024-12-31'}
+
+        with mock.patch.object(parallel, 'get_executor', return_value=executor), \
+                mock.patch.object(executor, 'map', wraps=executor.map) as mapped:
+            for rows, period in (('category', 'month'), ('subcategory', 'quarter'), ('status', 'month')):
+                with self.subTest(rows=rows, period=period):
+                    sharded = parallel.build_pivot_report(
+                        params, rows, period, date(2024, 1, 1), date(2024, 12, 31)
+                    )
+                    self.assertEqual(sharded, self.serial(params, rows, period))
+                    self.assertEqual(sharded['grand_count'], 24)
+        self.assertEqual(mapped.call_count, 3)
+        self.assertEqual(len(list(mapped.call_args_list[0].args[1])), 3)
+
+    def test_split_range_keeps_periods_whole(self):
+        self.assertEqual(
+            parallel.split_range(date(2024, 1, 15), date(2024, 12, 31), 'quarter', 3),
+            [
+                (date(2024, 1, 15), date(2024, 6, 30)),
+                (date(2024, 7, 1), date(2024, 9, 30)),
+                (date(2024, 10, 1), date(2024, 12, 31)),
+            ]
+        )
+
+    def test_broken_pool_recovers(self):
+        broken = mock.Mock()
+        broken.map.side_effect = BrokenProcessPool('worker died')
+        parallel._executor = broken
+        params = {'date_from': '2024-01-01', 'date_to': '2024-12-31'}
+
+        with self.assertLogs('dds_app_api.parallel', 'WARNING'):
+            data = parallel.build_pivot_report(
+                params, 'category', 'month', date(2024, 1, 1), date(2024, 12, 31)
+            )
+
+        self.assertEqual(data, self.serial(params, 'category', 'month'))
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertIsNone(parallel._executor)
+
+        # Следующий отчет создает новый пул
+        with mock.patch.object(parallel, 'ProcessPoolExecutor') as pool_class:
+            self.assertIs(parallel.get_executor(), pool_class.return_value)
+        self.assertEqual(
+            pool_class.call_args.kwargs['mp_context'].get_start_method(), 'spawn'
+        )
+        parallel._executor = None
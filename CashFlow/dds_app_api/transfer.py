@@ -0,0 +1,369 @@
+"""
+Экспорт и импорт транзакций в формате CSV.
+
+Экспорт применяет фильтры TransactionFilter и при необходимости подключает
+архивную таблицу. Импорт проверяет строки по загруженным в память
+справочникам (без запросов на каждую строку) и сохраняет транзакции порциями
+через bulk_create, обновляя счетчики и версию данных так же, как сигналы
+при одиночном сохранении.
+"""
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_date
+
+from . import anomalies, archive, balances, budgets, caching, categorize, counters, fingerprints
+from .filters import TransactionFilter
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    ArchivedTransaction
+)
+
+
+EXPORT_FIELDS = (
+    'id',
+    'transaction_date',
+    'status',
+    'status_name',
+    'transaction_type',
+    'transaction_type_name',
+    'category',
+    'category_name',
+    'subcategory',
+    'subcategory_name',
+    'amount',
+    'comment',
+    'created_date',
+    'external_id',
+)
+
+IMPORT_REQUIRED_FIELDS = (
+    'transaction_date',
+    'status',
+    'transaction_type',
+    'category',
+    'subcategory',
+    'amount',
+)
+
+RELATED_FIELDS = ('status', 'transaction_type', 'category', 'subcategory')
+
+# Поля, которые заполняются правилами категоризации, если не указана
+# подкатегория (в порядке результата Matcher.classify)
+CLASSIFIED_FIELDS = ('subcategory', 'category', 'transaction_type')
+
+# Шаг отчета о прогрессе (строк)
+PROGRESS_STEP = 1000
+
+
+class ImportRowError(ValueError):
+    """
+    Ошибка в строке импортируемого файла.
+    """
+
+
+def filter_transactions(params):
+    """
+    Возвращает выборки транзакций, соответствующие фильтрам списка.
+
+    Args:
+        params (dict): Параметры TransactionFilter.
+
+    Returns:
+        list: Выборка из основной таблицы и, если диапазон дат выходит
+        за границу архивации, выборка из архивной таблицы.
+
+    Raises:
+        ValueError: Если параметры фильтра некорректны.
+    """
+    sources = [Transaction.objects.all()]
+    if archive.reaches_archive(params):
+        sources.append(ArchivedTransaction.objects.all())
+
+    querysets = []
+    for queryset in sources:
+        filterset = TransactionFilter(params, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValueError(dict(filterset.errors))
+        querysets.append(
+            filterset.qs.select_related(*RELATED_FIELDS).order_by('transaction_date', 'id')
+        )
+    return querysets
+
+
+def export_transactions(params, output, progress=None):
+    """
+    Записывает отфильтрованные транзакции в CSV.
+
+    Args:
+        params (dict): Параметры TransactionFilter.
+        output (file): Текстовый файл для записи.
+        progress (callable, optional): Функция progress(done, total).
+
+    Returns:
+        int: Количество выгруженных транзакций.
+    """
+    querysets = filter_transactions(params)
+    total = sum(queryset.count() for queryset in querysets)
+
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_FIELDS)
+    done = 0
+    for queryset in querysets:
+        for item in queryset.iterator(chunk_size=2000):
+            writer.writerow([
+                item.id,
+                item.transaction_date.isoformat(),
+                item.status_id,
+                item.status.name,
+                item.transaction_type_id,
+                item.transaction_type.name,
+                item.category_id,
+                item.category.name,
+                item.subcategory_id,
+                item.subcategory.name,
+                item.amount,
+                item.comment,
+                item.created_date.isoformat(),
+                item.external_id or '',
+            ])
+            done += 1
+            if progress is not None and done % PROGRESS_STEP == 0:
+                progress(done, total)
+    return done
+
+
+class ReferenceIndex:
+    """
+    Справочники, загруженные в память для проверки импортируемых строк.
+
+    Attributes:
+        statuses (set): ID статусов.
+        transaction_types (set): ID типов операций.
+        categories (dict): ID категории -> ID типа операции.
+        subcategories (dict): ID подкатегории -> ID категории.
+        matcher (Matcher): Скомпилированные правила категоризации.
+    """
+
+    def __init__(self):
+        self.statuses = set(Status.objects.values_list('id', flat=True))
+        self.transaction_types = set(
+            TransactionType.objects.values_list('id', flat=True)
+        )
+        self.categories = dict(
+            Category.objects.values_list('id', 'transaction_type_id')
+        )
+        self.subcategories = dict(
+            Subcategory.objects.values_list('id', 'category_id')
+        )
+        self.matcher = categorize.get_matcher()
+
+
+def _parse_id(row, field, known):
+    """
+    Разбирает ID справочника из строки и проверяет его существование.
+
+    Args:
+        row (dict): Строка CSV.
+        field (str): Имя столбца.
+        known (Container): Существующие ID.
+
+    Returns:
+        int: ID объекта справочника.
+
+    Raises:
+        ImportRowError: Если значение не является ID существующего объекта.
+    """
+    try:
+        value = int(row[field])
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field}: ожидается ID")
+    if value not in known:
+        raise ImportRowError(f"{field}: объект {value} не найден")
+    return value
+
+
+def parse_row(row, references):
+    """
+    Проверяет строку импорта и возвращает значения полей транзакции.
+
+    Выполняет те же проверки, что и TransactionCreateSerializer: наличие
+    обязательных полей, существование справочников и согласованность
+    категории с типом операции и подкатегории с категорией. Если
+    подкатегория не указана, она и незаполненные категория и тип операции
+    определяются правилами категоризации по комментарию.
+
+    Args:
+        row (dict): Строка CSV.
+        references (ReferenceIndex): Загруженные справочники.
+
+    Returns:
+        dict: Значения полей для создания Transaction.
+
+    Raises:
+        ImportRowError: Если строка некорректна.
+    """
+    if not row.get('subcategory'):
+        classified = references.matcher.classify(row.get('comment'))
+        if classified is not None:
+            row = {**row, **{
+                field: str(value)
+                for field, value in zip(CLASSIFIED_FIELDS, classified)
+                if not row.get(field)
+            }}
+
+    missing = [field for field in IMPORT_REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ImportRowError(f"Не заполнены поля: {', '.join(missing)}")
+
+    try:
+        transaction_date = parse_date(row['transaction_date'])
+    except ValueError:
+        transaction_date = None
+    if not isinstance(transaction_date, date):
+        raise ImportRowError("transaction_date: ожидается дата YYYY-MM-DD")
+
+    try:
+        amount = Decimal(row['amount'])
+    except InvalidOperation:
+        raise ImportRowError("amount: ожидается число")
+    if not amount.is_finite() or amount.as_tuple().exponent < -2:
+        raise ImportRowError("amount: не более двух знаков после запятой")
+
+    values = {
+        'transaction_date': transaction_date,
+        'status_id': _parse_id(row, 'status', references.statuses),
+        'transaction_type_id': _parse_id(
+            row, 'transaction_type', references.transaction_types
+        ),
+        'category_id': _parse_id(row, 'category', references.categories),
+        'subcategory_id': _parse_id(row, 'subcategory', references.subcategories),
+        'amount': amount,
+        'comment': row.get('comment') or '',
+    }
+
+    if references.categories[values['category_id']] != values['transaction_type_id']:
+        raise ImportRowError("Категория не соответствует типу операции")
+    if references.subcategories[values['subcategory_id']] != values['category_id']:
+        raise ImportRowError("Подкатегория не соответствует категории")
+    return values
+
+
+def save_transactions(transactions):
+    """
+    Сохраняет новые транзакции одним пакетом.
+
+    Массовое сохранение не вызывает сигналы, поэтому счетчики строк,
+    версия данных транзакций, отметки аномалий, исполнение бюджетов
+    и остатки на конец месяца обновляются явно.
+
+    Args:
+        transactions (list): Несохраненные объекты Transaction.
+
+    Returns:
+        list: Сохраненные транзакции.
+    """
+    if not transactions:
+        return []
+    fingerprints.assign(transactions)
+    with db_transaction.atomic():
+        created = Transaction.objects.bulk_create(transactions)
+        counters.apply_rows(created, 1)
+        anomalies.check_many(created)
+        balances.apply_rows(created, 1)
+    budgets.apply_rows(created, 1)
+    caching.bump_data_version(caching.TRANSACTIONS)
+    return created
+
+
+def _reject_duplicates(pending, lines, max_id, errors):
+    """
+    Отбрасывает строки, совпадающие по отпечатку с существовавшими
+    до импорта транзакциями.
+
+    Args:
+        pending (list): Несохраненные транзакции порции.
+        lines (list): Номера строк файла для транзакций порции.
+        max_id (int): Наибольший ID транзакции до начала импорта.
+        errors (list): Список ошибок, в который добавляются дубликаты.
+
+    Returns:
+        list: Транзакции, не являющиеся дубликатами.
+    """
+    fingerprints.assign(pending)
+    existing = fingerprints.find_existing(
+        (item.fingerprint for item in pending), max_id
+    )
+    kept = []
+    for item, line in zip(pending, lines):
+        if item.fingerprint in existing:
+            errors.append({
+                'line': line,
+                'error': f"Дубликат транзакции {existing[item.fingerprint]}",
+            })
+        else:
+            kept.append(item)
+    return kept
+
+
+def import_transactions(source, batch_size=1000, progress=None, reject_duplicates=None):
+    """
+    Импортирует транзакции из CSV.
+
+    Первая строка файла содержит имена столбцов; обязательны столбцы
+    IMPORT_REQUIRED_FIELDS, столбец comment необязателен, остальные
+    (например, названия из файла экспорта) игнорируются. Подкатегорию,
+    категорию и тип операции можно не заполнять, если их определяют правила
+    категоризации по комментарию. Некорректные строки пропускаются
+    и возвращаются в списке ошибок.
+
+    В режиме отклонения дубликатов строка пропускается, если транзакция
+    с тем же отпечатком существовала до начала импорта; одинаковые строки
+    внутри файла дубликатами не считаются.
+
+    Args:
+        source (file): Текстовый файл CSV.
+        batch_size (int): Размер порции сохранения.
+        progress (callable, optional): Функция progress(done, total).
+        reject_duplicates (bool, optional): Отклонять дубликаты (по умолчанию
+            значение настройки CASHFLOW_REJECT_DUPLICATES).
+
+    Returns:
+        dict: Количество созданных транзакций и список ошибок по строкам.
+    """
+    rows = list(csv.DictReader(source))
+    references = ReferenceIndex()
+    if reject_duplicates is None:
+        reject_duplicates = fingerprints.reject_duplicates()
+    max_id = Transaction.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+    created = 0
+    errors = []
+    pending = []
+    lines = []
+    for index, row in enumerate(rows, start=1):
+        try:
+            pending.append(Transaction(**parse_row(row, references)))
+            # Номер строки в файле с учетом заголовка
+            lines.append(index + 1)
+        except ImportRowError as error:
+            errors.append({'line': index + 1, 'error': str(error)})
+
+        if len(pending) >= batch_size or index == len(rows):
+            if reject_duplicates:
+                pending = _reject_duplicates(pending, lines, max_id, errors)
+            created += len(save_transactions(pending))
+            pending = []
+            lines = []
+        if progress is not None and index % PROGRESS_STEP == 0:
+            progress(index, len(rows))
+
+    errors.sort(key=lambda error: error['line'])
+    return {'created': created, 'errors': errors}
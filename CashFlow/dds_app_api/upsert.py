@@ -0,0 +1,206 @@
+"""
+Повторяемый импорт транзакций по внешнему идентификатору.
+
+Каждая строка источника (банковской выписки, учетной системы) получает
+внешний идентификатор вида "источник:ссылка", уникальный в таблице
+транзакций. Порция строк записывается одним INSERT ... ON CONFLICT
+(external_id) DO UPDATE: новые строки добавляются, существующие обновляются,
+поэтому повторная загрузка того же файла не создает дубликатов.
+
+Перед записью порции одним запросом читаются текущие значения уже
+загруженных строк: строки без изменений не записываются, а для измененных
+счетчики, остатки и исполнение бюджетов сдвигаются на разницу старых
+и новых значений. Строки, перенесенные в архив, не изменяются.
+"""
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from . import anomalies, balances, budgets, caching, counters, fingerprints, transfer
+from .models import Anomaly, ArchivedTransaction, Transaction
+
+
+# Поля, которые обновляются у существующей транзакции
+UPSERT_FIELDS = (
+    'transaction_date',
+    'status_id',
+    'transaction_type_id',
+    'category_id',
+    'subcategory_id',
+    'amount',
+    'comment',
+)
+
+SEPARATOR = ':'
+
+
+def get_max_rows():
+    """
+    Возвращает максимальное количество строк в одном запросе к API.
+
+    Returns:
+        int: Значение настройки CASHFLOW_UPSERT_MAX_ROWS.
+    """
+    return getattr(settings, 'CASHFLOW_UPSERT_MAX_ROWS', 5000)
+
+
+def clean_source(source):
+    """
+    Проверяет код источника.
+
+    Args:
+        source (str): Код источника.
+
+    Returns:
+        str: Код источника без пробелов по краям.
+
+    Raises:
+        ValueError: Если код пуст или содержит разделитель.
+    """
+    source = (source or '').strip()
+    if not source or SEPARATOR in source:
+        raise ValueError(f"Код источника не должен быть пустым или содержать \"{SEPARATOR}\"")
+    return source
+
+
+def make_external_id(source, reference):
+    """
+    Составляет внешний идентификатор из источника и ссылки.
+
+    Args:
+        source (str): Код источника (без двоеточия).
+        reference (str): Идентификатор строки в источнике.
+
+    Returns:
+        str: Идентификатор вида "источник:ссылка".
+
+    Raises:
+        ValueError: Если источник или ссылка некорректны.
+    """
+    source = clean_source(source)
+    reference = (reference or '').strip()
+    if not reference:
+        raise ValueError("Не указана ссылка на строку источника")
+    external_id = f'{source}{SEPARATOR}{reference}'
+    max_length = Transaction._meta.get_field('external_id').max_length
+    if len(external_id) > max_length:
+        raise ValueError(f"Внешний идентификатор длиннее {max_length} символов")
+    return external_id
+
+
+def upsert_values(rows):
+    """
+    Добавляет или обновляет порцию транзакций одним запросом.
+
+    Args:
+        rows (list): Значения полей UPSERT_FIELDS с ключом external_id.
+            При повторе идентификатора в порции используется последняя строка.
+
+    Returns:
+        dict: Количество созданных, обновленных, неизмененных и пропущенных
+        архивных транзакций.
+    """
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'archived': 0}
+    latest = {row['external_id']: row for row in rows}
+    if not latest:
+        return result
+
+    archived = set(ArchivedTransaction.objects.filter(
+        external_id__in=list(latest)
+    ).values_list('external_id', flat=True))
+    result['archived'] = len(archived)
+
+    with db_transaction.atomic():
+        previous = {
+            row['external_id']: row
+            for row in Transaction.objects.select_for_update().filter(
+                external_id__in=[key for key in latest if key not in archived]
+            ).values('id', 'external_id', *UPSERT_FIELDS)
+        }
+
+        pending = []
+        replaced = []
+        for external_id, row in latest.items():
+            if external_id in archived:
+                continue
+            old = previous.get(external_id)
+            if old is not None:
+                if all(old[field] == row[field] for field in UPSERT_FIELDS):
+                    result['unchanged'] += 1
+                    continue
+                replaced.append(old)
+            pending.append(Transaction(**row, fingerprint=fingerprints.compute(row)))
+        result['updated'] = len(replaced)
+        result['created'] = len(pending) - len(replaced)
+        if not pending:
+            return result
+
+        saved = Transaction.objects.bulk_create(
+            pending,
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=[field.removesuffix('_id') for field in UPSERT_FIELDS]
+            + ['fingerprint', 'updated_at'],
+        )
+        counters.apply_rows(replaced, -1)
+        counters.apply_rows(saved, 1)
+        Anomaly.objects.filter(transaction_id__in=[row['id'] for row in replaced]).delete()
+        anomalies.check_many(saved)
+        balances.apply_rows(replaced, -1)
+        balances.apply_rows(saved, 1)
+
+    budgets.apply_rows(replaced, -1)
+    budgets.apply_rows(saved, 1)
+    caching.bump_data_version(caching.TRANSACTIONS)
+    return result
+
+
+def upsert_transactions(rows, source, batch_size=1000, progress=None, start=1):
+    """
+    Проверяет строки источника и записывает их порциями.
+
+    Строка содержит столбец reference (идентификатор в источнике)
+    и столбцы импорта CSV (transfer.IMPORT_REQUIRED_FIELDS и comment).
+    Некорректные строки пропускаются и возвращаются в списке ошибок.
+
+    Args:
+        rows (Iterable): Словари значений строк (CSV или JSON).
+        source (str): Код источника.
+        batch_size (int): Размер порции записи.
+        progress (callable, optional): Функция progress(done, total).
+        start (int): Номер первой строки в сообщениях об ошибках (2 для CSV
+            с заголовком).
+
+    Returns:
+        dict: Количество созданных, обновленных, неизмененных и пропущенных
+        архивных транзакций и список ошибок по строкам.
+
+    Raises:
+        ValueError: Если код источника некорректен.
+    """
+    source = clean_source(source)
+    rows = list(rows)
+    references = transfer.ReferenceIndex()
+
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'archived': 0, 'errors': []}
+    pending = []
+    for index, row in enumerate(rows, start=1):
+        row = {
+            key: '' if value is None else str(value) for key, value in row.items()
+        }
+        try:
+            values = transfer.parse_row(row, references)
+            values['external_id'] = make_external_id(source, row.get('reference'))
+            pending.append(values)
+        except ValueError as error:
+            result['errors'].append({'line': index + start - 1, 'error': str(error)})
+
+        if len(pending) >= batch_size:
+            for key, value in upsert_values(pending).items():
+                result[key] += value
+            pending = []
+        if progress is not None and index % transfer.PROGRESS_STEP == 0:
+            progress(index, len(rows))
+
+    for key, value in upsert_values(pending).items():
+        result[key] += value
+    return result
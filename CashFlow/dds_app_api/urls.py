@@ -9,9 +9,17 @@ router.register(r'transaction-types', views.TransactionTypeViewSet)
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'subcategories', views.SubcategoryViewSet)
 router.register(r'transactions', views.TransactionViewSet)
+router.register(r'jobs', views.JobViewSet)
+router.register(r'budgets', views.BudgetViewSet)
+router.register(r'recurring-transactions', views.RecurringTransactionViewSet)
+router.register(r'categorization-rules', views.CategorizationRuleViewSet)
+router.register(r'request-profiles', views.RequestProfileViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('reference-data/', views.ReferenceDataView.as_view(), name='reference-data'),
+    path('reference-tree/', views.ReferenceTreeView.as_view(), name='reference-tree'),
+    path('sync/', views.SyncView.as_view(), name='sync'),
+    path('batch/', views.BatchView.as_view(), name='batch'),
     path('api-auth/', include('rest_framework.urls')),
 ]
\ No newline at end of file
@@ -1,14 +1,58 @@
-from rest_framework import viewsets, generics, status
+import io
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from rest_framework import viewsets, generics, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
 from django.db.models import Sum, Count
-from rest_framework.pagination import PageNumberPagination
+from django.db.models.functions import Abs
+from django.core.cache import cache
+from django.http import FileResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 
-from .models import Status, TransactionType, Category, Subcategory, Transaction
+from . import (
+    analytics,
+    anomalies,
+    archive,
+    balances,
+    batch,
+    budgets,
+    caching,
+    categorize,
+    fingerprints,
+    forecast,
+    jobs,
+    parallel,
+    queryplan,
+    reconcile,
+    references,
+    reports,
+    sync,
+    upsert
+)
+from .models import (
+    Status,
+    TransactionType,
+    Category,
+    Subcategory,
+    Transaction,
+    ArchivedTransaction,
+    Job,
+    Anomaly,
+    Budget,
+    RecurringTransaction,
+    CategorizationRule,
+    RequestProfile
+)
 from .serializers import (
     StatusSerializer,
     TransactionTypeSerializer,
@@ -17,14 +61,22 @@ from .serializers import (
     TransactionSerializer,
     TransactionCreateSerializer,
     CategoryDetailSerializer,
-    TransactionTypeDetailSerializer
+    TransactionTypeDetailSerializer,
+    JobSerializer,
+    AnomalySerializer,
+    BudgetSerializer,
+    RecurringTransactionSerializer,
+    CategorizationRuleSerializer,
+    RequestProfileSerializer
 )
+from .pagination import TransactionPagination
 from .filters import (
     TransactionFilter,
     StatusFilter,
     TransactionTypeFilter,
     CategoryFilter,
-    SubcategoryFilter
+    SubcategoryFilter,
+    BudgetFilter
 )
 
 
@@ -202,7 +254,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     filterset_class = TransactionFilter
     search_fields = ['comment', 'category__name', 'subcategory__name']
     ordering_fields = ['transaction_date', 'amount', 'created_date']
-    pagination_class = PageNumberPagination
+    pagination_class = TransactionPagination
     page_size = 10
 
     def get_serializer_class(self):
@@ -217,25 +269,71 @@ class TransactionViewSet(viewsets.ModelViewSet):
             return TransactionCreateSerializer
         return TransactionSerializer
 
+    def filter_queryset(self, queryset):
+        """
+        Применяет фильтры и при необходимости подключает архивные транзакции.
+
+        Для списка транзакций, если фильтры по дате выходят за границу
+        архивации, возвращается объединение основной и архивной выборок.
+        Строки, вынесенные в NDJSON-сегменты, в список не входят.
+
+        Args:
+            queryset (QuerySet): Исходный набор транзакций.
+
+        Returns:
+            QuerySet | ArchiveChain: Отфильтрованная выборка.
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and archive.reaches_archive(self.request.query_params):
+            archived = self.filter_archived_queryset(
+                ArchivedTransaction.objects.select_related(
+                    'status', 'transaction_type', 'category', 'subcategory'
+                )
+            )
+            return archive.ArchiveChain(queryset, archived)
+        return queryset
+
+    def filter_archived_queryset(self, queryset):
+        """
+        Применяет к архивной выборке те же фильтры, что и к основной.
+
+        Args:
+            queryset (QuerySet): Набор объектов ArchivedTransaction.
+
+        Returns:
+            QuerySet: Отфильтрованная архивная выборка.
+        """
+        queryset = self.filterset_class(
+            self.request.query_params,
+            queryset=queryset,
+            request=self.request
+        ).qs
+        queryset = SearchFilter().filter_queryset(self.request, queryset, self)
+        return OrderingFilter().filter_queryset(self.request, queryset, self)
+
     def list(self, request, *args, **kwargs):
         """
         Переопределенный метод list для добавления пагинационной информации.
 
+        Список читает основную и архивную таблицы; строки NDJSON-сегментов
+        архива не возвращаются.
+
         Returns:
             Response: Ответ с данными и дополнительной пагинационной информацией.
         """
         response = super().list(request, *args, **kwargs)
 
         # Проверяем что пагинатор существует
-        if hasattr(response, 'paginator') and response.paginator is not None:
-            page = response.paginator.page
-            paginator = response.paginator.page.paginator
+        page = getattr(self.paginator, 'page', None)
+        if page is not None:
+            paginator = page.paginator
 
             response.data.update({
                 'pagination': {
                     'current_page': page.number,
                     'total_pages': paginator.num_pages,
                     'total_count': paginator.count,
+                    'count_exact': paginator.count_exact,
                     'has_next': page.has_next(),
                     'has_previous': page.has_previous(),
                     'next_page': page.next_page_number() if page.has_next() else None,
@@ -257,7 +355,12 @@ class TransactionViewSet(viewsets.ModelViewSet):
         serializer.save()
 
     @swagger_auto_schema(
-        operation_description="Получить статистику по транзакциям",
+        operation_description=(
+            "Получить статистику по транзакциям. exact равно False, если "
+            "период затрагивает NDJSON-сегменты архива, а поиск, фильтр "
+            "по сумме или граница периода внутри месяца не применяются "
+            "к их помесячным итогам."
+        ),
         manual_parameters=[
             openapi.Parameter(
                 'date_from',
@@ -287,58 +390,675 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """
         Получить статистическую сводку по транзакциям.
 
+        Результат кэшируется до изменения транзакций или справочников.
+        Если период затрагивает NDJSON-сегменты архива, а фильтры нельзя
+        точно применить к их помесячным итогам, поле exact равно False.
+
         Returns:
             Response: Ответ со статистикой, сгруппированной по типам и категориям.
         """
+        cache_key = caching.make_cache_key('summary', request.query_params)
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_summary(request)
+            cache.set(cache_key, data, caching.get_report_cache_timeout())
+        return Response(data)
+
+    def build_summary(self, request):
+        """
+        Вычисляет статистическую сводку по транзакциям без кэша.
+
+        Args:
+            request (Request): Запрос с параметрами фильтрации.
+
+        Returns:
+            dict: Итоги, группировки по типам и по категориям и признак
+            точности exact.
+        """
         queryset = self.filter_queryset(self.get_queryset())
+        exact = True
 
-        # Выполняем агрегацию
-        agg_result = queryset.aggregate(
-            total_count=Count('id'),
-            total_amount=Sum('amount')
-        )
+        # Группируем по типу и категории одним запросом на каждый источник
+        grouped = [
+            queryset.values('transaction_type__name', 'category__name')
+            .annotate(count=Count('id'), total=Sum('amount'))
+            .order_by()
+        ]
 
-        total_count = agg_result['total_count'] or 0
-        average_amount = (
-            agg_result['total_amount'] / total_count if total_count > 0 else 0
-        )
+        # Если фильтры по дате выходят за границу архивации, учитываем архив
+        if archive.reaches_archive(request.query_params):
+            archived = self.filter_archived_queryset(
+                ArchivedTransaction.objects.all()
+            )
+            grouped.append(
+                archived.values('transaction_type__name', 'category__name')
+                .annotate(count=Count('id'), total=Sum('amount'))
+                .order_by()
+            )
+            grouped.append(
+                archive.filter_rollups(request.query_params)
+                .values('transaction_type__name', 'category__name')
+                .annotate(count=Sum('count'), total=Sum('total'))
+            )
+            exact = archive.rollups_exact(request.query_params)
 
-        # Вычисляем доход и расход
-        income = queryset.filter(
-            transaction_type__name='Пополнение'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        by_type = {}
+        by_category = {}
+        for rows in grouped:
+            for row in rows:
+                for key, field, groups in (
+                    (row['transaction_type__name'], 'transaction_type__name', by_type),
+                    (row['category__name'], 'category__name', by_category),
+                ):
+                    group = groups.setdefault(
+                        key, {field: key, 'count': 0, 'total': 0}
+                    )
+                    group['count'] += row['count']
+                    group['total'] += row['total'] or 0
+
+        total_count = sum(group['count'] for group in by_type.values())
+        total_amount = sum(group['total'] for group in by_type.values())
+        average_amount = total_amount / total_count if total_count > 0 else 0
 
-        expense = queryset.filter(
-            transaction_type__name='Списание'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        # Вычисляем доход и расход
+        income = by_type.get('Пополнение', {}).get('total', 0)
+        expense = by_type.get('Списание', {}).get('total', 0)
 
         balance = income - expense
 
         summary = {
             'total_count': total_count,
-            'total_amount': agg_result['total_amount'] or 0,
+            'total_amount': total_amount,
             'average_amount': average_amount,
             'income': income,
             'expense': expense,
             'balance': balance
         }
 
-        # Группировка по типам
-        by_type = queryset.values('transaction_type__name').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ).order_by('transaction_type__name')
+        data = {
+            'summary': summary,
+            'exact': exact,
+            'by_type': sorted(
+                by_type.values(), key=lambda group: group['transaction_type__name']
+            ),
+            'by_category': sorted(
+                by_category.values(), key=lambda group: -group['total']
+            )[:10]
+        }
+        return data
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Сводная таблица транзакций: измерение × период с итогами "
+            "по строкам и столбцам. Учитывает все фильтры списка транзакций; "
+            "exact равно False, если итоги NDJSON-сегментов архива учтены "
+            "приближенно."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'rows',
+                openapi.IN_QUERY,
+                description="Измерение строк: category, subcategory или status",
+                type=openapi.TYPE_STRING,
+                enum=sorted(reports.PIVOT_ROWS)
+            ),
+            openapi.Parameter(
+                'period',
+                openapi.IN_QUERY,
+                description="Период столбцов: month, quarter или year",
+                type=openapi.TYPE_STRING,
+                enum=sorted(reports.PIVOT_PERIODS)
+            ),
+            openapi.Parameter(
+                'fiscal_year',
+                openapi.IN_QUERY,
+                description="Финансовый год (обозначается годом начала)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: openapi.Response('Сводная таблица транзакций')}
+    )
+    @action(detail=False, methods=['get'])
+    def pivot(self, request):
+        """
+        Получить сводную таблицу транзакций по измерению и периоду.
+
+        Ячейки вычисляются одним сгруппированным запросом на источник данных;
+        длинные диапазоны дат делятся на шарды, которые считаются параллельно
+        в пуле процессов. Результат кэшируется до изменения транзакций
+        или справочников.
+
+        Returns:
+            Response: Ответ со столбцами, строками и итогами сводной таблицы.
+
+        Raises:
+            ValidationError: Если параметры rows, period или fiscal_year некорректны.
+        """
+        rows = request.query_params.get('rows', 'category')
+        period = request.query_params.get('period', 'month')
+        if rows not in reports.PIVOT_ROWS:
+            raise ValidationError({'rows': f"Допустимые значения: {', '.join(reports.PIVOT_ROWS)}"})
+        if period not in reports.PIVOT_PERIODS:
+            raise ValidationError({'period': f"Допустимые значения: {', '.join(reports.PIVOT_PERIODS)}"})
+
+        cache_key = caching.make_cache_key('pivot', request.query_params)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        params = request.query_params.copy()
+        date_from = archive.parse_date_param(params.get('date_from'))
+        date_to = archive.parse_date_param(params.get('date_to'))
+
+        fiscal_year = params.get('fiscal_year')
+        if fiscal_year:
+            try:
+                fy_start, fy_end = reports.get_fiscal_year_range(int(fiscal_year))
+            except (TypeError, ValueError):
+                raise ValidationError({'fiscal_year': 'Ожидается номер года'})
+            date_from = max(date_from, fy_start) if date_from else fy_start
+            date_to = min(date_to, fy_end) if date_to else fy_end
+            params['date_from'] = date_from.isoformat()
+            params['date_to'] = date_to.isoformat()
+
+        # Большие диапазоны дат делятся на шарды и считаются параллельно
+        try:
+            data = parallel.build_pivot_report(params, rows, period, date_from, date_to)
+        except ValueError as error:
+            raise ValidationError(error.args[0])
+        data['exact'] = not archive.reaches_archive(params) or archive.rollups_exact(params)
+        cache.set(cache_key, data, caching.get_report_cache_timeout())
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Аналитика транзакций: количество, сумма, среднее и процентили "
+            "сумм по группам, дневные суммы со скользящим средним. "
+            "Учитывает фильтры списка транзакций; повторные запросы за тот же "
+            "период с другими параметрами анализа считаются в памяти."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'group_by',
+                openapi.IN_QUERY,
+                description="Группировка: transaction_type, status, category, subcategory, month или year",
+                type=openapi.TYPE_STRING,
+                enum=sorted({**analytics.GROUP_FIELDS, **analytics.GROUP_PERIODS})
+            ),
+            openapi.Parameter(
+                'percentiles',
+                openapi.IN_QUERY,
+                description="Процентили сумм через запятую (по умолчанию 50,90)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'window',
+                openapi.IN_QUERY,
+                description="Окно скользящего среднего в днях (по умолчанию 7)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: openapi.Response('Аналитика транзакций')}
+    )
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Получить аналитику по отфильтрованным транзакциям.
+
+        Транзакции загружаются в массивы NumPy один раз для набора фильтров
+        и версии данных; группировка, процентили и окно скользящего среднего
+        вычисляются над массивами без запросов к БД.
+
+        Returns:
+            Response: Ответ с итогами, группами и рядом дневных сумм.
+
+        Raises:
+            ValidationError: Если параметры анализа или фильтры некорректны.
+        """
+        group_by = request.query_params.get('group_by', 'category')
+        if group_by not in analytics.GROUP_FIELDS and group_by not in analytics.GROUP_PERIODS:
+            choices = ', '.join([*analytics.GROUP_FIELDS, *analytics.GROUP_PERIODS])
+            raise ValidationError({'group_by': f"Допустимые значения: {choices}"})
+
+        try:
+            percentiles = tuple(
+                float(value)
+                for value in request.query_params.get('percentiles', '50,90').split(',')
+                if value.strip()
+            )
+        except ValueError:
+            raise ValidationError({'percentiles': 'Ожидаются числа через запятую'})
+        if any(not 0 <= value <= 100 for value in percentiles):
+            raise ValidationError({'percentiles': 'Процентили должны быть от 0 до 100'})
+
+        try:
+            window = int(request.query_params.get('window', 7))
+        except ValueError:
+            raise ValidationError({'window': 'Ожидается целое число'})
+        if window < 1:
+            raise ValidationError({'window': 'Окно должно быть больше нуля'})
+
+        try:
+            data = analytics.build_analytics(
+                request.query_params, group_by, percentiles, window
+            )
+        except ValueError as error:
+            raise ValidationError(error.args[0])
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Прогноз притока, оттока и сальдо по категориям на следующие "
+            "периоды (скользящее среднее и сезонная декомпозиция) "
+            "с доверительными интервалами. Учитывает фильтры списка транзакций."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'period',
+                openapi.IN_QUERY,
+                description="Период прогноза: month или week",
+                type=openapi.TYPE_STRING,
+                enum=sorted(forecast.SEASONS)
+            ),
+            openapi.Parameter(
+                'horizon',
+                openapi.IN_QUERY,
+                description="Количество прогнозируемых периодов (по умолчанию 6)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'confidence',
+                openapi.IN_QUERY,
+                description="Уровень доверия, %: 80, 90 или 95",
+                type=openapi.TYPE_INTEGER,
+                enum=sorted(forecast.Z_SCORES)
+            ),
+        ],
+        responses={200: openapi.Response('Прогноз денежного потока')}
+    )
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """
+        Получить прогноз денежного потока.
+
+        Модели подбираются по завершенным периодам истории и кэшируются
+        до изменения транзакций; горизонт и уровень доверия применяются
+        к закэшированной модели.
+
+        Returns:
+            Response: Ответ с прогнозом по категориям и итогами.
+
+        Raises:
+            ValidationError: Если параметры прогноза или фильтры некорректны.
+        """
+        period = request.query_params.get('period', 'month')
+        if period not in forecast.SEASONS:
+            raise ValidationError({'period': f"Допустимые значения: {', '.join(forecast.SEASONS)}"})
+
+        max_horizon = forecast.get_max_horizon()
+        try:
+            horizon = int(request.query_params.get('horizon', 6))
+        except ValueError:
+            raise ValidationError({'horizon': 'Ожидается целое число'})
+        if not 1 <= horizon <= max_horizon:
+            raise ValidationError({'horizon': f"Допустимы значения от 1 до {max_horizon}"})
+
+        try:
+            confidence = int(request.query_params.get('confidence', 95))
+        except ValueError:
+            confidence = None
+        if confidence not in forecast.Z_SCORES:
+            raise ValidationError({'confidence': f"Допустимые значения: {', '.join(map(str, forecast.Z_SCORES))}"})
+
+        try:
+            data = forecast.build_forecast(
+                request.query_params, period, horizon, confidence
+            )
+        except ValueError as error:
+            raise ValidationError(error.args[0])
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Остаток (пополнения минус списания) на конец указанной даты: "
+            "отметка остатка на конец предыдущего месяца плюс операции "
+            "с начала месяца. Разрез по статусу или категории доступен, "
+            "если включен в настройке CASHFLOW_BALANCE_DIMENSIONS."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'date',
+                openapi.IN_QUERY,
+                description="Дата (по умолчанию сегодня)",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE
+            ),
+        ] + [
+            openapi.Parameter(
+                name,
+                openapi.IN_QUERY,
+                description=f"ID ({name}) для остатка в разрезе",
+                type=openapi.TYPE_INTEGER
+            )
+            for name in balances.DIMENSIONS
+        ],
+        responses={200: openapi.Response('Остаток на дату')}
+    )
+    @action(detail=False, methods=['get'])
+    def balance(self, request):
+        """
+        Получить остаток на конец даты.
+
+        Returns:
+            Response: Дата, остаток, месяц использованной отметки и признак
+            точности.
+
+        Raises:
+            ValidationError: Если дата или разрез указаны некорректно.
+        """
+        params = request.query_params
+        day = timezone.localdate()
+        if params.get('date'):
+            day = archive.parse_date_param(params['date'])
+            if day is None:
+                raise ValidationError({'date': 'Ожидается дата в формате YYYY-MM-DD'})
+
+        used = [name for name in balances.DIMENSIONS if params.get(name)]
+        if len(used) > 1:
+            raise ValidationError(f"Укажите не более одного разреза: {', '.join(used)}")
+        dimension, key = balances.ALL, ''
+        if used:
+            dimension = used[0]
+            if dimension not in balances.get_dimensions():
+                raise ValidationError({dimension: 'Остатки в этом разрезе не ведутся'})
+            try:
+                key = str(int(params[dimension]))
+            except ValueError:
+                raise ValidationError({dimension: 'Ожидается целое число'})
+
+        return Response(balances.balance_at(day, dimension, key))
+
+    @swagger_auto_schema(
+        method='get',
+        operation_description=(
+            "Список аномальных транзакций (сумма сильно отличается от типичной "
+            "для подкатегории). Учитывает фильтры списка транзакций."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Максимальное количество записей (по умолчанию 100)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: AnomalySerializer(many=True)}
+    )
+    @swagger_auto_schema(
+        method='post',
+        operation_description=(
+            "Полная проверка транзакций: пересчет медианы и MAD сумм "
+            "по подкатегориям и замена списка аномалий"
+        ),
+        request_body=no_body,
+        responses={200: openapi.Response('Результат проверки')}
+    )
+    @action(detail=False, methods=['get', 'post'])
+    def anomalies(self, request):
+        """
+        Получить аномальные транзакции или выполнить полную проверку.
+
+        Returns:
+            Response: Список аномалий (GET) или количество проверенных
+            транзакций и найденных аномалий (POST).
+
+        Raises:
+            ValidationError: Если параметр limit некорректен.
+        """
+        if request.method == 'POST':
+            return Response(anomalies.scan())
+
+        try:
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число'})
+        if not 1 <= limit <= 1000:
+            raise ValidationError({'limit': 'Допустимы значения от 1 до 1000'})
+
+        transactions = self.filter_queryset(self.get_queryset())
+        queryset = Anomaly.objects.select_related(
+            'transaction__status',
+            'transaction__transaction_type',
+            'transaction__category',
+            'transaction__subcategory'
+        ).filter(
+            transaction__in=transactions.order_by().values('id')
+        ).order_by(Abs('score').desc(), 'transaction_id')[:limit]
+        return Response(AnomalySerializer(queryset, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Повторяемая загрузка транзакций по внешнему идентификатору "
+            "\"источник:ссылка\": новые строки добавляются, загруженные ранее "
+            "обновляются, поэтому повторная отправка не создает дубликатов. "
+            "Большие файлы загружаются задачей upsert."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['source', 'transactions'],
+            properties={
+                'source': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="Код источника (например, bank)"
+                ),
+                'transactions': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    description=(
+                        "Строки: reference, transaction_date, status, "
+                        "transaction_type, category, subcategory, amount, comment"
+                    ),
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                ),
+            }
+        ),
+        responses={200: openapi.Response('Количество созданных, обновленных и неизмененных транзакций и ошибки')}
+    )
+    @action(detail=False, methods=['post'])
+    def upsert(self, request):
+        """
+        Добавить или обновить транзакции по внешнему идентификатору.
+
+        Returns:
+            Response: Количество созданных, обновленных, неизмененных
+            и пропущенных архивных транзакций и ошибки по строкам.
 
-        # Группировка по категориям
-        by_category = queryset.values('category__name').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ).order_by('-total')[:10]
+        Raises:
+            ValidationError: Если тело запроса некорректно.
+        """
+        rows = request.data.get('transactions')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValidationError({'transactions': 'Ожидается список объектов'})
+        if len(rows) > upsert.get_max_rows():
+            raise ValidationError({
+                'transactions': f"Не более {upsert.get_max_rows()} строк, "
+                                f"для больших файлов используйте задачу upsert"
+            })
+        try:
+            report = upsert.upsert_transactions(rows, request.data.get('source'))
+        except ValueError as error:
+            raise ValidationError({'source': str(error)})
+        return Response(report)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Группы транзакций, совпадающих по дате, сумме, подкатегории "
+            "и комментарию (без учета регистра и лишних пробелов), "
+            "по убыванию размера группы. Учитываются фильтры списка."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Максимальное количество групп (по умолчанию 100)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: openapi.Response('Группы дубликатов')}
+    )
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """
+        Получить группы транзакций-дубликатов.
+
+        Returns:
+            Response: Группы с отпечатком, количеством и транзакциями.
+
+        Raises:
+            ValidationError: Если параметр limit некорректен.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число'})
+        if not 1 <= limit <= 1000:
+            raise ValidationError({'limit': 'Допустимы значения от 1 до 1000'})
 
+        queryset = self.filter_queryset(self.get_queryset())
+        groups = fingerprints.duplicate_groups(queryset, limit)
+        members = defaultdict(list)
+        for item in queryset.filter(
+            fingerprint__in=[group['fingerprint'] for group in groups]
+        ).order_by('transaction_date', 'id'):
+            members[item.fingerprint].append(item)
+
+        return Response([
+            {
+                'fingerprint': group['fingerprint'],
+                'count': group['count'],
+                'transactions': TransactionSerializer(
+                    members[group['fingerprint']], many=True
+                ).data,
+            }
+            for group in groups
+        ])
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Сверка банковской выписки (CSV со столбцами date, amount со знаком, "
+            "reference, description) с транзакциями за период выписки. "
+            "Транзакции счета отбираются фильтрами списка (например, status)."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="Файл выписки CSV в UTF-8",
+                type=openapi.TYPE_FILE,
+                required=True
+            ),
+            openapi.Parameter(
+                'date_tolerance',
+                openapi.IN_QUERY,
+                description="Допуск по дате в днях (по умолчанию из настроек)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'amount_tolerance',
+                openapi.IN_QUERY,
+                description="Допуск по сумме (по умолчанию из настроек)",
+                type=openapi.TYPE_NUMBER
+            ),
+        ],
+        responses={200: openapi.Response('Сопоставленные, отсутствующие и лишние записи')}
+    )
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def reconcile(self, request):
+        """
+        Сверить выписку с транзакциями.
+
+        Returns:
+            Response: Итоги и списки matched, missing и extra.
+
+        Raises:
+            ValidationError: Если файл или параметры некорректны.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Не загружен файл выписки'})
+
+        params = request.query_params
+        tolerances = {}
+        try:
+            if params.get('date_tolerance'):
+                tolerances['date_tolerance'] = int(params['date_tolerance'])
+            if params.get('amount_tolerance'):
+                tolerances['amount_tolerance'] = Decimal(params['amount_tolerance'])
+        except (ValueError, InvalidOperation):
+            raise ValidationError('Допуски должны быть числами')
+
+        filters = {
+            name: params.get(name) for name in analytics.FILTER_PARAMS if params.get(name)
+        }
+        text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = reconcile.reconcile_statement(text, filters, **tolerances)
+        except UnicodeDecodeError:
+            raise ValidationError({'file': 'Файл должен быть в кодировке UTF-8'})
+        except ValueError as error:
+            raise ValidationError(error.args[0])
+        return Response(result)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Диагностика (только для персонала): выполняет список или сводку "
+            "транзакций с переданными параметрами и возвращает выполненные "
+            "SQL-запросы с параметрами, планом выполнения, использованными "
+            "индексами и фактическим временем. Принимает те же параметры "
+            "фильтрации, поиска, сортировки и пагинации, что и список."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'target',
+                openapi.IN_QUERY,
+                description="Проверяемый endpoint: list (по умолчанию) или summary",
+                type=openapi.TYPE_STRING,
+                enum=['list', 'summary']
+            ),
+        ],
+        responses={200: openapi.Response('Запросы, планы и время выполнения')}
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def explain(self, request):
+        """
+        Получить планы выполнения запросов списка или сводки.
+
+        Сводка строится без кэша, чтобы запросы выполнялись фактически.
+
+        Returns:
+            Response: Проверяемый endpoint, параметры запроса и результат
+            queryplan.inspect.
+
+        Raises:
+            ValidationError: Если endpoint или параметры фильтров некорректны.
+        """
+        target = request.query_params.get('target', 'list')
+        runners = {
+            'list': lambda: self.list(request),
+            'summary': lambda: self.build_summary(request),
+        }
+        if target not in runners:
+            raise ValidationError({'target': f"Ожидается одно из: {', '.join(runners)}"})
+
+        # Фильтры и сериализатор зависят от действия
+        self.action = target
+        result = queryplan.inspect(runners[target])
         return Response({
-            'summary': summary,
-            'by_type': list(by_type),
-            'by_category': list(by_category)
+            'target': target,
+            'params': {
+                key: value for key, value in request.query_params.items()
+                if key != 'target'
+            },
+            **result,
         })
 
 
@@ -383,22 +1103,443 @@ class ReferenceDataView(generics.GenericAPIView):
         """
         Получить все справочные данные для фронтенда.
 
+        Данные кэшируются до изменения любого справочника.
+
         Returns:
             Response: Ответ со всеми справочными данными в формате JSON.
         """
-        statuses = Status.objects.all()
-        transaction_types = TransactionType.objects.all()
-        categories = Category.objects.all()
-        subcategories = Subcategory.objects.all()
+        return Response(references.build_reference_data())
+
+
+class ReferenceTreeView(generics.GenericAPIView):
+    """
+    API View для получения дерева справочников.
+
+    Возвращает статусы и иерархию "тип операции -> категория -> подкатегория".
+    Ответ кэшируется и снабжается ETag по версии справочных данных, поэтому
+    повторный запрос с If-None-Match завершается ответом 304 без обращения к БД.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Получить дерево справочников",
+        manual_parameters=[
+            openapi.Parameter(
+                'transaction_type',
+                openapi.IN_QUERY,
+                description="ID типа операции для выборки одной ветви дерева",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: openapi.Response('Дерево справочников'),
+            304: openapi.Response('Справочники не изменились'),
+        }
+    )
+    def get(self, request):
+        """
+        Получить дерево справочников.
+
+        Returns:
+            Response: Ответ с версией, статусами и деревом типов операций
+            или 304, если справочники не изменились.
+
+        Raises:
+            ValidationError: Если transaction_type не является числом.
+        """
+        transaction_type = request.query_params.get('transaction_type') or None
+        if transaction_type is not None:
+            try:
+                transaction_type = int(transaction_type)
+            except ValueError:
+                raise ValidationError({'transaction_type': "Ожидается ID типа операции"})
+
+        etag = references.get_tree_etag(transaction_type)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(references.build_reference_tree(transaction_type))
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class SyncView(generics.GenericAPIView):
+    """
+    API View для инкрементальной синхронизации данных.
+
+    Возвращает транзакции и справочники, измененные после курсора, и ID
+    удаленных объектов. Первый запрос без курсора отдает все данные;
+    клиент повторяет запросы с полученным курсором, пока has_more равен True.
+    Поля *_name не обновляются при переименовании справочника: клиент
+    берет названия из синхронизированных справочников по ID.
+    """
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Получить изменения данных после курсора синхронизации. "
+            "Поля *_name отражают названия справочников на момент изменения "
+            "объекта; актуальные названия берутся из справочников по ID."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Курсор из предыдущего ответа (без курсора - полная синхронизация)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Количество объектов каждой модели в ответе",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                'Изменения данных',
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'cursor': openapi.Schema(type=openapi.TYPE_STRING),
+                        'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        'changes': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'deleted': openapi.Schema(type=openapi.TYPE_OBJECT),
+                    }
+                )
+            )
+        }
+    )
+    def get(self, request):
+        """
+        Получить изменения данных после курсора.
+
+        Returns:
+            Response: Ответ с новым курсором, измененными и удаленными объектами.
+
+        Raises:
+            ValidationError: Если курсор или limit некорректны.
+        """
+        try:
+            limit = sync.get_page_size(request.query_params.get('limit'))
+        except ValueError:
+            raise ValidationError({'limit': "Ожидается положительное целое число"})
 
-        status_serializer = StatusSerializer(statuses, many=True)
-        type_serializer = TransactionTypeSerializer(transaction_types, many=True)
-        category_serializer = CategorySerializer(categories, many=True)
-        subcategory_serializer = SubcategorySerializer(subcategories, many=True)
+        try:
+            data = sync.collect_changes(request.query_params.get('cursor'), limit)
+        except ValueError:
+            raise ValidationError({'cursor': "Некорректный курсор синхронизации"})
+
+        return Response(data)
+
+
+class BatchView(generics.GenericAPIView):
+    """
+    API View для выполнения пакета GET-запросов за один HTTP-запрос.
+
+    Принимает список подзапросов к API и возвращает их результаты в том же
+    порядке. Путь подзапроса может ссылаться на результат предыдущего
+    подзапроса через подстановку вида {id.поле}.
+    """
 
+    @swagger_auto_schema(
+        operation_description="Выполнить пакет GET-запросов к API",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['requests'],
+            properties={
+                'requests': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    description=(
+                        "Подзапросы: строка пути или объект {id, path}. "
+                        "Относительные пути считаются от /api/, в пути можно "
+                        "использовать подстановки {id.поле}"
+                    ),
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                ),
+            }
+        ),
+        responses={
+            200: openapi.Response(
+                'Результаты подзапросов',
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'responses': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                        ),
+                    }
+                )
+            )
+        }
+    )
+    def post(self, request):
+        """
+        Выполнить подзапросы пакета.
+
+        Returns:
+            Response: Ответ со списком результатов (id, path, status, body).
+
+        Raises:
+            ValidationError: Если описание пакета некорректно.
+        """
+        try:
+            items = batch.parse_items(request.data.get('requests'))
+        except (AttributeError, batch.BatchError) as error:
+            message = str(error) if isinstance(error, batch.BatchError) else \
+                "Ожидается объект с полем requests"
+            raise ValidationError({'requests': message})
+
+        responses = batch.execute(request, items, type(self))
+        return Response({'responses': responses})
+
+
+class JobViewSet(mixins.CreateModelMixin,
+                 mixins.ListModelMixin,
+                 mixins.RetrieveModelMixin,
+                 viewsets.GenericViewSet):
+    """
+    ViewSet для фоновых задач.
+
+    Позволяет поставить задачу в очередь (отчет, экспорт, импорт), опрашивать
+    ее состояние и прогресс и скачать результат. Задачи выполняются командой
+    run_jobs вне процессов веб-сервера.
+
+    Attributes:
+        queryset (QuerySet): Набор всех задач.
+        serializer_class (Serializer): Сериализатор для модели Job.
+        filter_backends (list): Список бэкендов фильтрации.
+        filterset_fields (list): Поля, доступные для фильтрации.
+    """
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['kind', 'status']
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def perform_create(self, serializer):
+        """
+        Ставит задачу в очередь.
+
+        Args:
+            serializer (JobSerializer): Проверенные данные задачи.
+        """
+        serializer.instance = jobs.submit(
+            serializer.validated_data['kind'],
+            serializer.validated_data.get('params'),
+            serializer.validated_data.get('input_file')
+        )
+
+    @swagger_auto_schema(
+        operation_description="Скачать результат выполненной задачи",
+        responses={
+            200: openapi.Response('Файл результата'),
+            409: openapi.Response('Задача еще не выполнена'),
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Скачать файл результата задачи.
+
+        Returns:
+            FileResponse | Response: Файл результата или ответ 409,
+            если задача еще не выполнена.
+        """
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED or not job.result:
+            return Response(
+                {'detail': f"Результат недоступен, состояние задачи: {job.get_status_display()}"},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            job.result.open('rb'),
+            as_attachment=True,
+            filename=job.result.name.rsplit('/', 1)[-1]
+        )
+
+
+class BudgetViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet для управления месячными бюджетами.
+
+    Предоставляет полный CRUD для модели Budget и отчет об исполнении
+    бюджетов за месяц.
+
+    Attributes:
+        queryset (QuerySet): Набор всех бюджетов со связанными объектами.
+        serializer_class (Serializer): Сериализатор для модели Budget.
+        filter_backends (list): Список бэкендов фильтрации.
+        filterset_class (Filter): Класс фильтра для бюджетов.
+        ordering_fields (list): Поля, по которым доступна сортировка.
+    """
+
+    queryset = Budget.objects.select_related('category', 'subcategory')
+    serializer_class = BudgetSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = BudgetFilter
+    ordering_fields = ['month', 'amount']
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Исполнение бюджетов за месяц: плановая и фактическая суммы, "
+            "остаток и процент исполнения по всем категориям и подкатегориям"
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'month',
+                openapi.IN_QUERY,
+                description="Месяц в формате YYYY-MM (по умолчанию текущий)",
+                type=openapi.TYPE_STRING
+            ),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def variance(self, request):
+        """
+        Получить исполнение бюджетов за месяц.
+
+        Returns:
+            Response: Категории с подкатегориями и отклонениями от бюджета.
+
+        Raises:
+            ValidationError: Если месяц указан некорректно.
+        """
+        try:
+            month = budgets.parse_month(request.query_params.get('month'))
+        except ValueError:
+            raise ValidationError({'month': 'Ожидается месяц в формате YYYY-MM'})
+        return Response(budgets.build_variance(month))
+
+
+class RecurringTransactionViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet для управления шаблонами регулярных операций.
+
+    Транзакции по шаблонам создаются командой materialize_recurring.
+
+    Attributes:
+        queryset (QuerySet): Набор всех шаблонов со связанными объектами.
+        serializer_class (Serializer): Сериализатор для модели RecurringTransaction.
+        filter_backends (list): Список бэкендов фильтрации.
+        filterset_fields (list): Поля, доступные для фильтрации.
+        search_fields (list): Поля, по которым доступен поиск.
+        ordering_fields (list): Поля, по которым доступна сортировка.
+    """
+
+    queryset = RecurringTransaction.objects.select_related('category', 'subcategory')
+    serializer_class = RecurringTransactionSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['is_active', 'status', 'transaction_type', 'category', 'subcategory']
+    search_fields = ['name', 'comment']
+    ordering_fields = ['name', 'amount', 'start_date']
+
+
+class CategorizationRuleViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet для управления правилами автоматической категоризации.
+
+    Правила применяются при импорте и создании транзакций без подкатегории.
+
+    Attributes:
+        queryset (QuerySet): Набор всех правил с подкатегориями.
+        serializer_class (Serializer): Сериализатор для модели CategorizationRule.
+        filter_backends (list): Список бэкендов фильтрации.
+        filterset_fields (list): Поля, доступные для фильтрации.
+        search_fields (list): Поля, по которым доступен поиск.
+        ordering_fields (list): Поля, по которым доступна сортировка.
+    """
+
+    queryset = CategorizationRule.objects.select_related('subcategory')
+    serializer_class = CategorizationRuleSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['kind', 'is_active', 'subcategory']
+    search_fields = ['name', 'pattern']
+    ordering_fields = ['priority', 'name']
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Определение подкатегории, категории и типа операции по комментарию "
+            "с помощью активных правил."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'comment',
+                openapi.IN_QUERY,
+                description="Комментарий транзакции",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+        ],
+        responses={200: openapi.Response('Результат категоризации')}
+    )
+    @action(detail=False, methods=['get'])
+    def classify(self, request):
+        """
+        Проверить правила на комментарии.
+
+        Returns:
+            Response: ID подкатегории, категории и типа операции
+            (None, если ни одно правило не совпало).
+
+        Raises:
+            ValidationError: Если комментарий не указан.
+        """
+        comment = request.query_params.get('comment')
+        if not comment:
+            raise ValidationError({'comment': 'Обязательный параметр'})
+        classified = categorize.get_matcher().classify(comment)
+        subcategory, category, transaction_type = classified or (None, None, None)
         return Response({
-            'statuses': status_serializer.data,
-            'transaction_types': type_serializer.data,
-            'categories': category_serializer.data,
-            'subcategories': subcategory_serializer.data,
-        })
\ No newline at end of file
+            'comment': comment,
+            'subcategory': subcategory,
+            'category': category,
+            'transaction_type': transaction_type,
+        })
+
+
+class RequestProfileViewSet(mixins.ListModelMixin,
+                            mixins.RetrieveModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    ViewSet для просмотра профилей запросов (только для персонала).
+
+    Профили создаются ProfilerMiddleware для запросов сотрудников
+    с заголовком X-Profile или параметром profile.
+
+    Attributes:
+        queryset (QuerySet): Набор всех профилей с пользователями.
+        serializer_class (Serializer): Сериализатор для модели RequestProfile.
+        permission_classes (list): Доступ только для персонала.
+        filter_backends (list): Список бэкендов фильтрации.
+        filterset_fields (list): Поля, доступные для фильтрации.
+        search_fields (list): Поля для текстового поиска.
+        ordering_fields (list): Поля, по которым доступна сортировка.
+    """
+
+    queryset = RequestProfile.objects.select_related('user')
+    serializer_class = RequestProfileSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['method', 'view', 'action', 'status_code']
+    search_fields = ['path']
+    ordering_fields = ['created_date', 'duration_ms', 'query_count']
+
+    @swagger_auto_schema(
+        operation_description="Скачать файл профиля в формате pstats",
+        responses={200: openapi.Response('Файл профиля')}
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Скачать файл профиля запроса.
+
+        Returns:
+            FileResponse: Файл профиля (.prof).
+        """
+        profile = self.get_object()
+        return FileResponse(
+            profile.profile.open('rb'),
+            as_attachment=True,
+            filename=profile.profile.name.rsplit('/', 1)[-1]
+        )
@@ -1,5 +1,66 @@
+from django.core.cache import cache
 from django.shortcuts import render
+from django.utils.html import json_script
 from django.views import View
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import batch, caching, references
+
+
+BOOTSTRAP_ELEMENT_ID = 'bootstrap-data'
+
+
+def dispatch_cached(request, path):
+    """
+    Выполняет подзапрос к API для страницы и кэширует успешный ответ.
+
+    Ответ кэшируется до изменения транзакций или справочников. Адрес сайта
+    входит в ключ, так как ссылки пагинации в ответах абсолютные.
+
+    Args:
+        request (HttpRequest): Объект HTTP-запроса страницы.
+        path (str): Путь API (с параметрами).
+
+    Returns:
+        dict: Статус и тело ответа, как у batch.dispatch.
+    """
+    cache_key = caching.make_cache_key('bootstrap', {
+        'path': path,
+        'origin': request.build_absolute_uri('/'),
+    })
+    result = cache.get(cache_key)
+    if result is None:
+        result = batch.dispatch(request, path)
+        if result['status'] == 200:
+            cache.set(cache_key, result, caching.get_report_cache_timeout())
+    return result
+
+
+def build_bootstrap(request, paths):
+    """
+    Собирает данные для встраивания в страницу вместо начальных запросов к API.
+
+    Справочники берутся из кэшируемого дерева справочников, остальные данные -
+    вызовом тех же представлений API внутри текущего запроса (с кэшированием
+    до изменения данных), поэтому формат совпадает с ответами API. Каждое
+    значение имеет вид {status, body}, как результат подзапроса /api/batch/.
+
+    Args:
+        request (HttpRequest): Объект HTTP-запроса страницы.
+        paths (dict): Ключи данных и пути API.
+
+    Returns:
+        SafeString: Тег script с данными в формате JSON.
+    """
+    data = {
+        'references': {
+            'status': 200,
+            'body': references.build_reference_tree(),
+        },
+    }
+    for key, path in paths.items():
+        data[key] = dispatch_cached(request, path)
+    return json_script(data, BOOTSTRAP_ELEMENT_ID, encoder=JSONEncoder)
 
 
 class IndexView(View):
@@ -17,9 +78,16 @@ class IndexView(View):
             request (HttpRequest): Объект HTTP-запроса.
 
         Returns:
-            HttpResponse: Ответ с отрендеренным шаблоном index.html.
+            HttpResponse: Ответ с отрендеренным шаблоном index.html, содержащим
+            справочники, первую страницу транзакций и сводку.
         """
-        return render(request, 'index.html')
+        context = {
+            'bootstrap': build_bootstrap(request, {
+                'transactions': 'transactions/',
+                'summary': 'transactions/summary/',
+            }),
+        }
+        return render(request, 'index.html', context)
 
 
 class TransactionFormView(View):
@@ -40,9 +108,16 @@ class TransactionFormView(View):
 
         Returns:
             HttpResponse: Ответ с отрендеренным шаблоном transaction_form.html,
-            содержащим context с transaction_id.
+            содержащим context с transaction_id, справочниками и данными
+            редактируемой транзакции.
         """
-        context = {'transaction_id': transaction_id}
+        paths = {}
+        if transaction_id and transaction_id.isdigit():
+            paths['transaction'] = f'transactions/{transaction_id}/'
+        context = {
+            'transaction_id': transaction_id,
+            'bootstrap': build_bootstrap(request, paths),
+        }
         return render(request, 'transaction_form.html', context)
 
 
@@ -62,6 +137,8 @@ class ReferencesView(View):
             request (HttpRequest): Объект HTTP-запроса.
 
         Returns:
-            HttpResponse: Ответ с отрендеренным шаблоном references.html.
+            HttpResponse: Ответ с отрендеренным шаблоном references.html,
+            содержащим дерево справочников.
         """
-        return render(request, 'references.html')
\ No newline at end of file
+        context = {'bootstrap': build_bootstrap(request, {})}
+        return render(request, 'references.html', context)
@@ -29,6 +29,75 @@ async function apiRequest(endpoint, method = 'GET', data = null) {
     }
 }
 
+// Выполнение нескольких GET-запросов за один запрос к /api/batch/.
+// requests - объект {id: путь}; путь может ссылаться на результат
+// предыдущего запроса через подстановку вида {id.поле}.
+// Возвращает объект {id: {status, body}}.
+async function apiBatch(requests) {
+    const items = Object.entries(requests).map(([id, path]) => ({ id, path }));
+    const data = await apiRequest('batch/', 'POST', { requests: items });
+    const results = {};
+    data.responses.forEach((item) => {
+        results[item.id] = { status: item.status, body: item.body };
+    });
+    return results;
+}
+
+// Данные, встроенные сервером в страницу (тег #bootstrap-data).
+// Каждое значение имеет вид {status, body}, как результат apiBatch.
+let bootstrapData;
+
+// Возвращает встроенные данные по ключу и удаляет их, чтобы повторные
+// загрузки (смена страницы, фильтры) шли в API за актуальными данными.
+function takeBootstrapData(key) {
+    if (bootstrapData === undefined) {
+        const element = document.getElementById('bootstrap-data');
+        bootstrapData = element ? JSON.parse(element.textContent) : {};
+    }
+    const result = bootstrapData[key];
+    delete bootstrapData[key];
+    return result && result.status === 200 ? result : null;
+}
+
+// Загрузка дерева справочников "тип -> категория -> подкатегория".
+// Запрос выполняется один раз на страницу (или берется из встроенных данных);
+// повторные загрузки браузер проверяет по ETag. После изменения справочника
+// передайте reload = true.
+let referenceTreeRequest = null;
+
+function loadReferenceTree(reload = false) {
+    if (!referenceTreeRequest || reload) {
+        const embedded = takeBootstrapData('references');
+        referenceTreeRequest = embedded && !reload
+            ? Promise.resolve(embedded.body)
+            : apiRequest('reference-tree/').catch((error) => {
+                referenceTreeRequest = null;
+                throw error;
+            });
+    }
+    return referenceTreeRequest;
+}
+
+// Преобразование дерева справочников в плоские списки
+// (формат ответа reference-data/)
+function flattenReferenceTree(tree) {
+    const data = {
+        statuses: tree.statuses,
+        transaction_types: tree.transaction_types,
+        categories: [],
+        subcategories: [],
+    };
+    tree.transaction_types.forEach((type) => {
+        type.categories.forEach((category) => {
+            data.categories.push({ ...category, transaction_type: type.id });
+            category.subcategories.forEach((subcategory) => {
+                data.subcategories.push({ ...subcategory, category: category.id });
+            });
+        });
+    });
+    return data;
+}
+
 // Получение CSRF-токена из cookies
 function getCookie(name) {
     let cookieValue = null;
@@ -90,6 +159,10 @@ function formatDate(dateStr) {
 
 // Глобальные функции
 window.apiRequest = apiRequest;
+window.apiBatch = apiBatch;
+window.takeBootstrapData = takeBootstrapData;
+window.loadReferenceTree = loadReferenceTree;
+window.flattenReferenceTree = flattenReferenceTree;
 window.showAlert = showAlert;
 window.toggleLoading = toggleLoading;
 window.formatAmount = formatAmount;
@@ -1,21 +1,41 @@
+// Дерево справочников "тип -> категория -> подкатегория".
+// Каскадные списки заполняются из него без запросов к API.
+let referenceTree = null;
+
 async function initializeTransactionForm(transactionId = null) {
   console.log("initializeTransactionForm called with id:", transactionId);
   toggleLoading(true);
   try {
-    await loadFormOptions();
+    const isEdit = transactionId && !isNaN(parseInt(transactionId));
+
+    // Дерево справочников и редактируемая транзакция встроены в страницу
+    // сервером; если их нет - загружаем одним пакетным запросом
+    let results = {
+      references: takeBootstrapData("references"),
+      transaction: isEdit ? takeBootstrapData("transaction") : null,
+    };
+    if (!results.references || (isEdit && !results.transaction)) {
+      const requests = { references: "reference-tree/" };
+      if (isEdit) {
+        requests.transaction = `transactions/${parseInt(transactionId)}/`;
+      }
+      results = await apiBatch(requests);
+    }
+
+    loadFormOptions(results.references);
 
     const typeSelect = document.getElementById("transaction_type");
     const categorySelect = document.getElementById("category");
 
     // Навешиваем обработчики один раз
     if (typeSelect && !typeSelect.dataset.listener) {
-      typeSelect.addEventListener("change", updateCategories);
+      typeSelect.addEventListener("change", () => updateCategories());
       typeSelect.dataset.listener = "true";
       console.log("transaction_type listener added");
     }
 
     if (categorySelect && !categorySelect.dataset.listener) {
-      categorySelect.addEventListener("change", updateSubcategories);
+      categorySelect.addEventListener("change", () => updateSubcategories());
       categorySelect.dataset.listener = "true";
       console.log("category listener added");
     }
@@ -39,9 +59,9 @@ async function initializeTransactionForm(transactionId = null) {
       }
     }
 
-    // Загружаем данные только для редактирования (если transactionId - число)
-    if (transactionId && !isNaN(parseInt(transactionId))) {
-      await loadTransactionData(transactionId);
+    // Заполняем форму только для редактирования (если transactionId - число)
+    if (isEdit) {
+      loadTransactionData(results.transaction);
     }
   } catch (error) {
     console.error("Error in initializeTransactionForm:", error);
@@ -51,18 +71,18 @@ async function initializeTransactionForm(transactionId = null) {
   }
 }
 
-async function loadFormOptions() {
-  try {
-    console.log("Loading form options...");
-    const data = await apiRequest("reference-data/");
-    console.log("Reference data:", data);
-
-    fillSelect("status", data.statuses, "Выберите статус...");
-    fillSelect("transaction_type", data.transaction_types, "Выберите тип...");
-  } catch (error) {
-    console.error("Error in loadFormOptions:", error);
+function loadFormOptions(result) {
+  if (!result || result.status !== 200) {
+    console.error("Error in loadFormOptions:", result);
     showAlert("danger", "Не удалось загрузить данные для формы");
+    return;
   }
+
+  referenceTree = result.body;
+  console.log("Reference tree:", referenceTree);
+
+  fillSelect("status", referenceTree.statuses, "Выберите статус...");
+  fillSelect("transaction_type", referenceTree.transaction_types, "Выберите тип...");
 }
 
 // Универсальная функция для заполнения select
@@ -85,33 +105,45 @@ function fillSelect(elementId, items, placeholder) {
   }
 }
 
-async function loadTransactionData(id) {
-  try {
-    console.log("Loading transaction data for id:", id);
-    const transaction = await apiRequest(`transactions/${id}/`);
-    console.log("Transaction data:", transaction);
+function loadTransactionData(result) {
+  if (result.status !== 200) {
+    console.error("Error in loadTransactionData:", result);
+    showAlert("danger", "Не удалось загрузить данные транзакции");
+    return;
+  }
 
-    const setValue = (id, value) => {
-      const el = document.getElementById(id);
-      if (el) el.value = value ?? "";
-    };
+  const transaction = result.body;
+  console.log("Transaction data:", transaction);
 
-    setValue("transaction-id", transaction.id);
-    setValue("transaction_date", transaction.transaction_date);
-    setValue("status", transaction.status);
-    setValue("transaction_type", transaction.transaction_type);
-    setValue("amount", transaction.amount);
-    setValue("comment", transaction.comment);
+  const setValue = (id, value) => {
+    const el = document.getElementById(id);
+    if (el) el.value = value ?? "";
+  };
 
-    await updateCategories(transaction.category, transaction.subcategory);
-  } catch (error) {
-    console.error("Error in loadTransactionData:", error);
-    showAlert("danger", "Не удалось загрузить данные транзакции");
-  }
+  setValue("transaction-id", transaction.id);
+  setValue("transaction_date", transaction.transaction_date);
+  setValue("status", transaction.status);
+  setValue("transaction_type", transaction.transaction_type);
+  setValue("amount", transaction.amount);
+  setValue("comment", transaction.comment);
+
+  updateCategories(transaction.category, transaction.subcategory);
+}
+
+// Поиск ветвей дерева справочников по ID
+function findTransactionType(typeId) {
+  const types = referenceTree ? referenceTree.transaction_types : [];
+  return types.find((type) => type.id === parseInt(typeId)) || null;
+}
+
+function findCategory(typeId, categoryId) {
+  const type = findTransactionType(typeId);
+  const categories = type ? type.categories : [];
+  return categories.find((category) => category.id === parseInt(categoryId)) || null;
 }
 
 // Поддержка установки выбранных значений при инициализации
-async function updateCategories(
+function updateCategories(
   selectedCategoryId = null,
   selectedSubcategoryId = null
 ) {
@@ -130,28 +162,22 @@ async function updateCategories(
 
   if (!typeId) return;
 
-  try {
-    const data = await apiRequest(`transaction-types/${typeId}/categories/`);
-    fillSelect("category", data || [], "Выберите категорию...");
-    categorySelect.disabled = false;
-
+  const type = findTransactionType(typeId);
+  fillSelect("category", type ? type.categories : [], "Выберите категорию...");
+  categorySelect.disabled = false;
 
-    if (selectedCategoryId) categorySelect.value = selectedCategoryId;
-
-    if (selectedCategoryId) {
-      await updateSubcategories(selectedSubcategoryId);
-    }
-  } catch (error) {
-    console.error("Error in updateCategories:", error);
-    showAlert("danger", "Не удалось загрузить категории");
+  if (selectedCategoryId) {
+    categorySelect.value = selectedCategoryId;
+    updateSubcategories(selectedSubcategoryId);
   }
 }
 
-async function updateSubcategories(selectedSubcategoryId = null) {
+function updateSubcategories(selectedSubcategoryId = null) {
+  const typeSelect = document.getElementById("transaction_type");
   const categorySelect = document.getElementById("category");
   const subcategorySelect = document.getElementById("subcategory");
 
-  if (!categorySelect || !subcategorySelect) return;
+  if (!typeSelect || !categorySelect || !subcategorySelect) return;
 
   const categoryId = categorySelect.value;
   subcategorySelect.disabled = !categoryId;
@@ -160,16 +186,15 @@ async function updateSubcategories(selectedSubcategoryId = null) {
 
   if (!categoryId) return;
 
-  try {
-    const data = await apiRequest(`categories/${categoryId}/subcategories/`);
-    fillSelect("subcategory", data || [], "Выберите подкатегорию...");
-    subcategorySelect.disabled = false;
+  const category = findCategory(typeSelect.value, categoryId);
+  fillSelect(
+    "subcategory",
+    category ? category.subcategories : [],
+    "Выберите подкатегорию..."
+  );
+  subcategorySelect.disabled = false;
 
-    if (selectedSubcategoryId) subcategorySelect.value = selectedSubcategoryId;
-  } catch (error) {
-    console.error("Error in updateSubcategories:", error);
-    showAlert("danger", "Не удалось загрузить подкатегории");
-  }
+  if (selectedSubcategoryId) subcategorySelect.value = selectedSubcategoryId;
 }
 
 function setupFormValidation() {
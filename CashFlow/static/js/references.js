@@ -32,8 +32,11 @@ async function loadReferences(endpoint, query = '') {
             apiQuery = query.substring(1);
         }
 
-        const referenceData = await apiRequest('reference-data/');
-        const data = await apiRequest(`${endpoint}${apiQuery}`);
+        const [tree, data] = await Promise.all([
+            loadReferenceTree(),
+            apiRequest(`${endpoint}${apiQuery}`)
+        ]);
+        const referenceData = flattenReferenceTree(tree);
 
         tableBody.innerHTML = '';
         if (!data.results || data.results.length === 0) {
@@ -101,7 +104,7 @@ async function loadReferences(endpoint, query = '') {
 
 async function loadFilterOptions() {
     try {
-        const data = await apiRequest('reference-data/');
+        const data = flattenReferenceTree(await loadReferenceTree());
         
         const categoryFilter = document.querySelector('#categories select');
         if (categoryFilter) {
@@ -159,8 +162,8 @@ async function showEditModal(endpoint, id) {
         if (endpoint.includes('categories')) {
             const typeSelect = document.getElementById('modalTransactionType');
             typeSelect.innerHTML = '<option value="">Выберите тип...</option>';
-            const types = await apiRequest('transaction-types/');
-            types.results.forEach(type => {
+            const tree = await loadReferenceTree();
+            tree.transaction_types.forEach(type => {
                 typeSelect.innerHTML += `<option value="${type.id}" ${type.id === data.transaction_type ? 'selected' : ''}>${type.name}</option>`;
             });
         }
@@ -168,8 +171,8 @@ async function showEditModal(endpoint, id) {
         if (endpoint.includes('subcategories')) {
             const categorySelect = document.getElementById('modalCategory');
             categorySelect.innerHTML = '<option value="">Выберите категорию...</option>';
-            const categories = await apiRequest('categories/');
-            categories.results.forEach(category => {
+            const categories = flattenReferenceTree(await loadReferenceTree()).categories;
+            categories.forEach(category => {
                 categorySelect.innerHTML += `<option value="${category.id}" ${category.id === data.category ? 'selected' : ''}>${category.name}</option>`;
             });
         }
@@ -218,6 +221,7 @@ async function saveReference() {
         {
             await apiRequest(`${apiEndpoint}/`, 'POST', data);
         }
+        loadReferenceTree(true);
         loadReferences(endpoint);
         bootstrap.Modal.getInstance(document.getElementById('referenceModal')).hide();
     } catch (error) {
@@ -239,6 +243,7 @@ async function confirmDelete() {
     try {
         await apiRequest(`${apiEndpoint}/${id}/`, 'DELETE');
         showAlert('success', 'Запись успешно удалена');
+        loadReferenceTree(true);
         loadReferences(endpoint);
         bootstrap.Modal.getInstance(modal).hide();
     } catch (error) {
@@ -6,7 +6,11 @@ async function loadTransactions(page = 1) {
     try {
         const filters = getFilters();
         const queryString = new URLSearchParams({ ...filters, page, page_size: 10 }).toString();
-        const data = await apiRequest(`transactions/?${queryString}`);
+        // Первая страница без фильтров встроена в страницу сервером
+        const embedded = takeBootstrapData('transactions');
+        const data = embedded && page === 1 && Object.keys(filters).length === 0
+            ? embedded.body
+            : await apiRequest(`transactions/?${queryString}`);
         
         console.log('Полный ответ API:', data);
         console.log('Результаты:', data.results);
@@ -172,7 +176,10 @@ async function updateStatistics() {
     try {
         const filters = getFilters();
         const queryString = new URLSearchParams(filters).toString();
-        const data = await apiRequest(`transactions/summary/?${queryString}`);
+        const embedded = takeBootstrapData('summary');
+        const data = embedded && Object.keys(filters).length === 0
+            ? embedded.body
+            : await apiRequest(`transactions/summary/?${queryString}`);
 
         document.getElementById('total-count').textContent = data.summary?.total_count || 0;
         document.getElementById('total-income').textContent = formatAmount(data.summary?.income || 0);
@@ -186,7 +193,7 @@ async function updateStatistics() {
 
 async function loadFilterOptions() {
     try {
-        const data = await apiRequest('reference-data/');
+        const data = flattenReferenceTree(await loadReferenceTree());
         
         const statusSelect = document.getElementById('filter-status');
         const typeSelect = document.getElementById('filter-type');